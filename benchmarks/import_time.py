@@ -0,0 +1,80 @@
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must not be imported just to reach the first prompt; each costs from
+# hundreds of milliseconds (huggingface_hub) to several seconds (torch, vllm).
+HEAVY_MODULES = ("torch", "psutil", "huggingface_hub", "dotenv", "lighteval",
+                 "transformers", "vllm", "pandas", "pyarrow")
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def measure_once(module: str) -> Tuple[int, Dict[str, Tuple[int, int]]]:
+    # Returns the total import time in microseconds and {module: (self_us, cumulative_us)}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    modules = {}
+    total_us = 0
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        modules[name] = (int(self_us), int(cumulative_us))
+        if len(indent) == 1:  # top-level import
+            total_us += int(cumulative_us)
+    return total_us, modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Measure how long importing the CLI takes (python -X importtime).")
+    parser.add_argument("--module", default="run_benchmark", help="Module to import.")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreters to time.")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="Fail if the median import time exceeds this many milliseconds.")
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules to list.")
+    args = parser.parse_args()
+
+    totals: List[int] = []
+    modules: Dict[str, Tuple[int, int]] = {}
+    for _ in range(args.runs):
+        total_us, modules = measure_once(args.module)
+        totals.append(total_us)
+
+    median_ms = statistics.median(totals) / 1000
+    print(f"import {args.module}: median {median_ms:.1f} ms over {args.runs} run(s) "
+          f"(min {min(totals) / 1000:.1f} ms, max {max(totals) / 1000:.1f} ms)")
+
+    print("\nSlowest modules by self time (last run):")
+    for name, (self_us, cumulative_us) in sorted(modules.items(), key=lambda m: m[1][0],
+                                                 reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms self  {cumulative_us / 1000:8.1f} ms cumulative  {name}")
+
+    failed = False
+    heavy = sorted(name for name in modules if name.split(".")[0] in HEAVY_MODULES
+                   and "." not in name)
+    if heavy:
+        print(f"\nFAIL: heavy modules imported at startup: {heavy}")
+        failed = True
+    if args.budget_ms is not None and median_ms > args.budget_ms:
+        print(f"\nFAIL: median import time {median_ms:.1f} ms exceeds budget of {args.budget_ms:.1f} ms")
+        failed = True
+    if not failed:
+        print("\nOK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from typing import Callable, Dict, Any, List, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUBS_DIR = os.path.join(REPO_ROOT, "benchmarks", "stubs")
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, "benchmarks", "baselines", "overhead.json")
+DEFAULT_TOLERANCE = 0.25
+# Differences below this are timer noise, whatever the relative change
+DEFAULT_MIN_DELTA_MS = 2.0
+BENCH_MODEL_ID = "bench/model"
+BENCH_TASK = {"task_identifier": "helm|mmlu:anatomy", "num_few_shot": 5, "allow_truncation": 1}
+HUB_CACHE_ENTRIES = 500
+
+
+@contextlib.contextmanager
+def quiet():
+    # The timed code prints progress and warnings; none of it should reach the report
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), \
+            contextlib.redirect_stderr(devnull), warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        yield
+
+
+def time_path(fn: Callable[[], Any], repeat: int, warmup: int = 1) -> Dict[str, Any]:
+    for _ in range(warmup):
+        with quiet():
+            fn()
+    timings = []
+    for _ in range(repeat):
+        with quiet():
+            start = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": round(statistics.median(timings), 3), "min_ms": round(min(timings), 3),
+            "max_ms": round(max(timings), 3), "runs": repeat}
+
+
+def isolate(workdir: str) -> Dict[str, str]:
+    # Everything runs in a scratch directory (results/ is relative to the working
+    # directory), offline, with the stub lighteval first on PATH
+    env = os.environ.copy()
+    env.update({
+        "PATH": STUBS_DIR + os.pathsep + env.get("PATH", ""),
+        "HF_HUB_OFFLINE": "1",
+        "HF_HUB_CACHE": os.path.join(workdir, "hf_cache"),
+        # Never sent anywhere (offline); avoids the missing-token warning path
+        "HF_TOKEN": env.get("HF_TOKEN") or "hf_benchmark",
+    })
+    os.environ.update(env)
+    os.chdir(workdir)
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    return env
+
+
+def write_hub_cache(path: str) -> None:
+    entries = {}
+    for i in range(HUB_CACHE_ENTRIES):
+        model_id = f"{BENCH_MODEL_ID}-{i}"
+        entries[model_id] = {"model_id": model_id, "status": "found", "sha": f"{i:040x}",
+                             "siblings": ["config.json", "model.safetensors"], "num_params": 1_000_000,
+                             "private": False, "gated": False, "source": "hub", "fetched_at": time.time()}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(entries, f)
+
+
+def build_benchmarks(workdir: str, env: Dict[str, str]) -> List[Tuple[str, Callable[[], Any], int]]:
+    # (name, callable, repeats). Imports happen here so the CLI start-up benchmark is the
+    # only one that pays for them.
+    from src.frameworks import LightevalRunner
+    from src.utils.hf_utils import HubClient
+    from src.utils.system_utils import get_system_info
+    from src.utils.task_utils.task_loader import load_tasks_from_yaml, DEFAULT_TASKS_YAML
+
+    tasks_yaml = os.path.join(REPO_ROOT, DEFAULT_TASKS_YAML)
+    hub_cache = os.path.join(workdir, "hub", "model_info.json")
+    write_hub_cache(hub_cache)
+    with quiet():
+        runner = LightevalRunner(model_id=BENCH_MODEL_ID)
+    stub_output = os.path.join(workdir, "stub_output")
+
+    def cli_startup():
+        subprocess.run([sys.executable, os.path.join(REPO_ROOT, "run_benchmark.py"), "--help"],
+                       cwd=workdir, env=env, stdout=subprocess.DEVNULL, check=True)
+
+    def hub_check():
+        info = HubClient(cache_path=hub_cache, offline=True).model_info(f"{BENCH_MODEL_ID}-{HUB_CACHE_ENTRIES // 2}")
+        assert info["status"] == "found", info
+
+    def stub_subprocess():
+        subprocess.run(["lighteval", "accelerate", f"pretrained={BENCH_MODEL_ID}",
+                        LightevalRunner.task_string(BENCH_TASK), "--save-details", "--output-dir", stub_output],
+                       env=env, stdout=subprocess.DEVNULL, check=True)
+
+    def run_end_to_end():
+        assert runner.run(BENCH_TASK, "accelerate", use_cache=False, telemetry_interval=0)
+
+    return [
+        ("cli_startup", cli_startup, 5),
+        ("task_yaml_load", lambda: load_tasks_from_yaml(tasks_yaml), 10),
+        ("hub_check_offline", hub_check, 20),
+        ("system_probe", lambda: get_system_info(max_age_s=0), 5),
+        ("system_info_cached", get_system_info, 20),
+        ("build_command", lambda: runner.build_command(BENCH_TASK, "accelerate"), 50),
+        ("stub_subprocess", stub_subprocess, 5),
+        ("run_end_to_end", run_end_to_end, 5),
+    ]
+
+
+def machine_info() -> Dict[str, Any]:
+    return {"node": platform.node(), "machine": platform.machine(), "system": platform.system(),
+            "python": platform.python_version(), "cpu_count": os.cpu_count()}
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], tolerance: float,
+            min_delta_ms: float) -> List[str]:
+    # Returns the names of the paths whose median regressed beyond the tolerance
+    regressions = []
+    print(f"\n{'path':<22} {'baseline':>10} {'now':>10} {'change':>8}")
+    for name, result in results.items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:<22} {'-':>10} {result['median_ms']:>8.2f}ms {'new':>8}")
+            continue
+        delta = result["median_ms"] - base["median_ms"]
+        change = delta / base["median_ms"] if base["median_ms"] else 0.0
+        regressed = change > tolerance and delta > min_delta_ms
+        flag = "  REGRESSED" if regressed else ""
+        print(f"{name:<22} {base['median_ms']:>8.2f}ms {result['median_ms']:>8.2f}ms {change:>+7.0%}{flag}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Time gemmabench's own overhead (start-up, task catalog, Hub check, system probe, "
+                    "command building, subprocess launch) against a stub lighteval, offline and CPU-only.")
+    parser.add_argument("--only", nargs="+", default=None, help="Only these paths.")
+    parser.add_argument("--repeat", type=int, default=None, help="Override every path's number of timed runs.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare with.")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Write this run's timings to --baseline instead of comparing.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed relative slowdown of a path's median (default: 0.25).")
+    parser.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help="Slowdowns smaller than this are ignored (default: 2 ms).")
+    parser.add_argument("--output", default=None, help="Also write the timings to this JSON file.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="gemmabench_overhead_") as workdir:
+        previous_cwd = os.getcwd()
+        env = isolate(workdir)
+        try:
+            benchmarks = build_benchmarks(workdir, env)
+            if args.only:
+                unknown = set(args.only) - {name for name, _, _ in benchmarks}
+                if unknown:
+                    print(f"Unknown path(s): {sorted(unknown)}")
+                    return 2
+                benchmarks = [b for b in benchmarks if b[0] in args.only]
+
+            results: Dict[str, Dict[str, Any]] = {}
+            for name, fn, repeat in benchmarks:
+                results[name] = time_path(fn, args.repeat or repeat)
+                r = results[name]
+                print(f"{name:<22} median {r['median_ms']:>9.2f} ms  (min {r['min_ms']:.2f}, "
+                      f"max {r['max_ms']:.2f}, {r['runs']} runs)")
+        finally:
+            os.chdir(previous_cwd)
+
+    if "run_end_to_end" in results and "stub_subprocess" in results:
+        # What a run costs beyond launching lighteval itself
+        overhead = results["run_end_to_end"]["median_ms"] - results["stub_subprocess"]["median_ms"]
+        results["run_overhead"] = {"median_ms": round(overhead, 3), "derived": True}
+        print(f"{'run_overhead':<22} median {overhead:>9.2f} ms  (run_end_to_end - stub_subprocess)")
+
+    report = {"created_at": time.time(), "machine": machine_info(), "results": results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    if baseline.get("machine", {}).get("node") != machine_info()["node"]:
+        print(f"\nWarning: the baseline was recorded on '{baseline.get('machine', {}).get('node')}'; "
+              f"timings from different machines are not comparable.")
+    regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+    if regressions:
+        print(f"\nFAIL: {len(regressions)} path(s) slower than baseline by more than "
+              f"{args.tolerance:.0%}: {regressions}")
+        return 1
+    print("\nOK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
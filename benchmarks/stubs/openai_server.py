@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# Tiny stand-in for an OpenAI-compatible server: answers /v1/chat/completions and
+# /v1/completions with a canned completion, so the endpoint backend (proxy, pooling,
+# retries, latency stats) and the load test can be exercised without a model:
+#
+#   python benchmarks/stubs/openai_server.py --port 8001 --latency-ms 20 --fail-every 5
+#   python run_benchmark.py quick stub/model --backend endpoint --base-url http://127.0.0.1:8001/v1 ...
+#
+# Streaming requests ("stream": true) get --output-tokens server-sent events, the first
+# after --latency-ms and the rest --token-ms apart. At most --max-batch requests are
+# served at once and the rest queue, so latency grows with load like a real server's.
+import argparse
+import asyncio
+import itertools
+import json
+import time
+
+from aiohttp import web
+
+
+def make_app(answer: str, latency_s: float, fail_every: int, token_s: float = 0.0,
+             output_tokens: int = 0, max_batch: int = 0) -> web.Application:
+    counter = itertools.count(1)
+    slots = asyncio.Semaphore(max_batch) if max_batch else None
+    tokens = (answer.split() * max(1, output_tokens))[:output_tokens] if output_tokens else answer.split()
+
+    def usage(prompt: str) -> dict:
+        prompt_tokens = len(prompt.split())
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+                "total_tokens": prompt_tokens + len(tokens)}
+
+    def failure():
+        # Every fail_every-th request is a 503, to exercise the client's retries
+        if fail_every and next(counter) % fail_every == 0:
+            return web.json_response({"error": {"message": "overloaded (stub)"}}, status=503,
+                                     headers={"Retry-After": "0"})
+        return None
+
+    def prompt_of(body: dict) -> str:
+        if "messages" in body:
+            return " ".join(str(m.get("content", "")) for m in body["messages"])
+        prompt = body.get("prompt", "")
+        return " ".join(prompt) if isinstance(prompt, list) else str(prompt)
+
+    def chunk(body: dict, chat: bool, text: str, finish_reason=None) -> dict:
+        choice = {"index": 0, "finish_reason": finish_reason, "logprobs": None}
+        if chat:
+            choice["delta"] = {"content": text}
+        else:
+            choice["text"] = text
+        return {"id": "stub", "object": "chat.completion.chunk" if chat else "text_completion",
+                "created": int(time.time()), "model": body.get("model"), "choices": [choice]}
+
+    async def stream(request, body: dict, chat: bool):
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+        await asyncio.sleep(latency_s)
+        for i, token in enumerate(tokens):
+            if i:
+                await asyncio.sleep(token_s)
+            text = token if i == 0 else f" {token}"
+            finish = "stop" if i == len(tokens) - 1 else None
+            await response.write(f"data: {json.dumps(chunk(body, chat, text, finish))}\n\n".encode())
+        if (body.get("stream_options") or {}).get("include_usage"):
+            final = dict(chunk(body, chat, ""), choices=[], usage=usage(prompt_of(body)))
+            await response.write(f"data: {json.dumps(final)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def complete(request, body: dict, chat: bool):
+        if body.get("stream"):
+            return await stream(request, body, chat)
+        await asyncio.sleep(latency_s + token_s * max(0, len(tokens) - 1))
+        text = " ".join(tokens)
+        if chat:
+            choices = [{"index": i, "finish_reason": "stop", "logprobs": None,
+                        "message": {"role": "assistant", "content": text}} for i in range(body.get("n", 1))]
+        else:
+            choices = [{"index": 0, "text": text, "finish_reason": "stop", "logprobs": None}]
+        return web.json_response({"id": f"stub-{time.time_ns()}",
+                                  "object": "chat.completion" if chat else "text_completion",
+                                  "created": int(time.time()), "model": body.get("model"),
+                                  "choices": choices, "usage": usage(prompt_of(body))})
+
+    def handler(chat: bool):
+        async def handle(request):
+            body = await request.json()
+            failed = failure()
+            if failed is not None:
+                return failed
+            if slots is None:
+                return await complete(request, body, chat)
+            async with slots:
+                return await complete(request, body, chat)
+        return handle
+
+    async def models(request):
+        return web.json_response({"object": "list", "data": [{"id": "stub/model", "object": "model"}]})
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", handler(chat=True))
+    app.router.add_post("/v1/completions", handler(chat=False))
+    app.router.add_get("/v1/models", models)
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stand-in OpenAI-compatible server with canned completions.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--answer", default="A", help="Completion returned for every request (default: A).")
+    parser.add_argument("--latency-ms", type=float, default=10.0, help="Delay before the (first token of the) response.")
+    parser.add_argument("--token-ms", type=float, default=0.0, help="Delay between streamed tokens.")
+    parser.add_argument("--output-tokens", type=int, default=0,
+                        help="Tokens per completion, repeating the answer's words (default: the answer as is).")
+    parser.add_argument("--max-batch", type=int, default=0, help="Requests served at once; 0 for no limit.")
+    parser.add_argument("--fail-every", type=int, default=0, help="Answer every Nth request with a 503.")
+    args = parser.parse_args()
+    print(f"Serving canned completions on http://{args.host}:{args.port}/v1", flush=True)
+    web.run_app(make_app(args.answer, args.latency_ms / 1000, args.fail_every, token_s=args.token_ms / 1000,
+                         output_tokens=args.output_tokens, max_batch=args.max_batch),
+                host=args.host, port=args.port, print=None, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,23 @@
+import argparse
+import json
 import sys
 import os
-from src.config import HF_TOKEN, SUPPORTED_FRAMEWORK, LIGHTEVAL_BACKENDS, RESULTS_DIR, VALID_DTYPES
+import time
+from src.config import (SUPPORTED_FRAMEWORK, LIGHTEVAL_BACKENDS, RESULTS_DIR, VALID_DTYPES, VALID_QUANTIZATIONS,
+                        QUANTIZATION_BACKENDS, get_hf_token)
 from src.utils.hf_utils import check_model_exists
+from src.utils.endpoint_utils import (DEFAULT_ENDPOINT_CONCURRENCY, DEFAULT_ENDPOINT_MAX_RETRIES,
+                                      DEFAULT_ENDPOINT_TIMEOUT_S, DEFAULT_STEP_DURATION_S, DEFAULT_MAX_TOKENS,
+                                      DEFAULT_MAX_IN_FLIGHT, API_KINDS)
 from src.utils.system_utils import get_system_info, display_system_info, recommend_backend
-from src.utils.task_utils import get_task_details_interactive
+from src.utils.task_utils import get_task_details_interactive, get_task_catalog
 from src.frameworks import LightevalRunner  # Import specific runner for Demo
+from src.sweep import run_sweep, SweepSpecError
+from src.executors import EXECUTORS, DEFAULT_MAX_NODE_RETRIES
+from src.results import (ResultCache, ResultsWarehouse, leaderboard, diff_runs, find_regressions,
+                         analyze_details, compare_details, resolve_run_dir, RunLayout, read_manifest,
+                         select_runs, compare_run_sets, find_details_files)
+from src.results.compare import DEFAULT_BOOTSTRAP_SAMPLES, DEFAULT_REGRESSION_THRESHOLD, DEFAULT_ALPHA
 # from src.frameworks import LmEvalHarnessRunner # Future
 
 
@@ -22,7 +35,8 @@ def main():
         sys.exit(1)
 
     # --- Hugging Face Token Check ---
-    if not HF_TOKEN:
+    hf_token = get_hf_token()
+    if not hf_token:
         print("\nError: Hugging Face token (HF_TOKEN) not found in your environment.")
         print("Please create a .env file in the root directory with your token:")
         print("HF_TOKEN=your_actual_token")
@@ -40,8 +54,10 @@ def main():
             continue
         if check_model_exists(model_id):
             break
-        else:
-            print("Please try entering the model ID again.")
+        # A model served by an OpenAI-compatible endpoint need not be on the Hub
+        if input("Use this model name anyway (e.g. for the endpoint backend)? (y/N): ").lower() == 'y':
+            break
+        print("Please try entering the model ID again.")
 
     display_sys_info = input(
         "Check system resources (CPU/RAM/GPU)? (y/N): ").lower()
@@ -50,7 +66,7 @@ def main():
         print("Gathering system info...")
         system_info = get_system_info()
         display_system_info(system_info)
-        recommended_backend = recommend_backend(system_info)
+        recommended_backend = recommend_backend(system_info, model_id=model_id)
         print(
             f"Recommended backend based on system info: '{recommended_backend}'")
 
@@ -103,16 +119,72 @@ def main():
                 print(f"Invalid dtype. Please choose from: {VALID_DTYPES}")
         print(f"Selected dtype: {dtype}")
 
+    quantization = "none"
+    if selected_backend in ("accelerate", "vllm"):
+        # bitsandbytes quantizes while loading (accelerate); AWQ/GPTQ checkpoints are detected
+        available_quantizations = [q for q in VALID_QUANTIZATIONS
+                                   if q in ("none", "auto") or selected_backend in QUANTIZATION_BACKENDS[q]]
+        print(f"\nQuantization modes for {selected_backend}: {available_quantizations}")
+        print("'auto' picks the least compressed mode predicted to fit your GPU memory.")
+        while True:
+            quantization_input = input("Choose quantization [default: none]: ").strip().lower()
+            if not quantization_input:
+                break
+            if quantization_input in available_quantizations:
+                quantization = quantization_input
+                break
+            print(f"Invalid quantization. Please choose from: {available_quantizations}")
+        print(f"Selected quantization: {quantization}")
+
+    endpoint_kwargs = {}
+    if selected_backend == "endpoint":
+        while True:
+            base_url = input("Base URL of the OpenAI-compatible server (e.g. http://localhost:8000/v1): ").strip()
+            if base_url.startswith(("http://", "https://")):
+                break
+            print("Please enter an http:// or https:// URL.")
+        endpoint_kwargs = {"base_url": base_url, "api_key": os.getenv("OPENAI_API_KEY")}
+        concurrency_input = input(f"Concurrent requests [default: {DEFAULT_ENDPOINT_CONCURRENCY}]: ").strip()
+        if concurrency_input.isdigit() and int(concurrency_input) > 0:
+            endpoint_kwargs["concurrency"] = int(concurrency_input)
+        print(f"Selected endpoint: {base_url}")
+
+    batch_size = 1
+    if selected_backend not in ("vllm", "endpoint"):
+        while True:
+            batch_input = input(
+                "Batch size [default: 1, 'auto' to autotune]: ").strip().lower()
+            if not batch_input:
+                break
+            if batch_input == "auto":
+                batch_size = "auto"
+                break
+            try:
+                batch_size = int(batch_input)
+                if batch_size < 1:
+                    print("Batch size must be at least 1.")
+                    continue
+                break
+            except ValueError:
+                print("Invalid input. Please enter a positive integer or 'auto'.")
+        print(f"Selected batch size: {batch_size}")
+
     task_details = get_task_details_interactive()
     if not task_details:
         print("Failed to get valid task details. Exiting.")
         sys.exit(1)
 
-    runner = runner_class(model_id=model_id, hf_token=HF_TOKEN)
+    runner = runner_class(model_id=model_id, hf_token=hf_token)
 
     kwargs = {}
     if selected_backend == "vllm":
         kwargs["dtype"] = dtype
+    elif selected_backend == "endpoint":
+        kwargs.update(endpoint_kwargs)
+    else:
+        kwargs["override-batch-size"] = batch_size
+    if quantization != "none":
+        kwargs["quantization"] = quantization
 
     success = runner.run(task_details=task_details,
                          backend=selected_backend, **kwargs)
@@ -126,7 +198,630 @@ def main():
         sys.exit(1)
 
 
+def sweep_main(args) -> None:
+    print("Welcome to Gemmabench! (sweep mode)")
+    executor_options = {}
+    max_parallel = args.max_parallel
+    if args.executor == "ray":
+        executor_options = {"address": args.ray_address, "num_gpus_per_job": args.gpus_per_job,
+                            "max_node_retries": args.max_node_retries}
+    elif max_parallel is None:
+        max_parallel = 1
+    try:
+        success = run_sweep(args.spec, check_models=not args.skip_model_check,
+                            dry_run=args.dry_run, max_parallel=max_parallel,
+                            min_free_gb=args.min_free_gb, max_oom_retries=args.max_oom_retries,
+                            force_rerun=args.force_rerun, resume=args.resume,
+                            in_process=args.in_process, group_size=args.group_size,
+                            telemetry_interval=args.telemetry_interval,
+                            prefetch_lookahead=args.prefetch_lookahead, prefetch_workers=args.prefetch_workers,
+                            safetensors_only=args.safetensors_only, hf_cache_budget_gb=args.hf_cache_budget_gb,
+                            executor=args.executor, executor_options=executor_options)
+    except SweepSpecError as e:
+        print(f"Error: {e}")
+        sys.exit(2)
+    except KeyboardInterrupt:
+        sys.exit(130)
+    if not success:
+        print("\nOne or more sweep jobs failed.")
+        sys.exit(1)
+
+
+def cache_main(args) -> None:
+    cache = ResultCache()
+    if args.action == "stats":
+        entries = cache.entries()
+        total_gb = cache.total_size_bytes(entries) / (1024**3)
+        print(f"Result cache: {len(entries)} run(s), {total_gb:.2f} GB in {cache.cache_dir}")
+        return
+
+    if args.max_age_days is None and args.max_size_gb is None:
+        print("Error: 'cache evict' needs --max-age-days and/or --max-size-gb.")
+        sys.exit(2)
+    size_before = cache.total_size_bytes(cache.entries())
+    evicted = cache.evict(max_age_days=args.max_age_days, max_size_gb=args.max_size_gb,
+                          delete_runs=not args.keep_runs)
+    freed_gb = (size_before - cache.total_size_bytes(cache.entries())) / (1024**3)
+    print(f"Evicted {len(evicted)} cached run(s), {freed_gb:.2f} GB.")
+
+
+def runs_main(args) -> None:
+    layout = RunLayout()
+    if args.action == "reindex":
+        count = layout.index.rebuild()
+        print(f"Indexed {count} run(s) in {layout.index.path}.")
+        return
+
+    if args.action == "show":
+        entry = layout.index.lookup(args.run)
+        if entry is None:
+            print(f"Error: Run '{args.run}' not found in {layout.index.path}.")
+            sys.exit(2)
+        print(json.dumps(read_manifest(layout.index.run_dir(entry)), indent=2))
+        return
+
+    entries = [e for e in layout.index.entries() if args.model is None or e["model_id"] == args.model]
+    if not entries:
+        print("No runs indexed. Runs are indexed as they finish; 'runs reindex' rebuilds the index.")
+        return
+    for entry in entries[-args.limit:]:
+        finished = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["finished_at"] or entry["created_at"]))
+        tasks = entry["tasks"] or []
+        label = tasks[0] if len(tasks) == 1 else f"{len(tasks)} tasks"
+        sampled = f" (max {entry['max_samples']} samples)" if entry.get("max_samples") else ""
+        print(f"{entry['run_id']}  {finished}  {entry['model_id']}  {entry['backend']}  {label}{sampled}")
+
+
+def _format_score(value) -> str:
+    return f"{value:.4f}" if isinstance(value, (int, float)) else "-"
+
+
+def warehouse_main(args) -> None:
+    warehouse = ResultsWarehouse()
+    if args.action == "ingest":
+        start = time.monotonic()
+        stats = warehouse.ingest(rebuild=args.rebuild)
+        print(f"Ingested {stats['new_runs']} new run(s) ({stats['rows']} rows) in "
+              f"{time.monotonic() - start:.2f}s; {stats['total_runs']} run(s) in the warehouse. "
+              f"{stats['skipped']} director(ies) without results were skipped.")
+        return
+
+    if args.action == "leaderboard":
+        rows = leaderboard(warehouse, metric=args.metric, suite=args.suite, task_pattern=args.task,
+                           num_few_shot=args.few_shot, limit=args.limit)
+        if not rows:
+            print("No matching results. Run 'warehouse ingest' first or relax the filters.")
+            sys.exit(1)
+        print(f"{'#':>3}  {args.metric:>8}  {'tasks':>5}  model (revision)")
+        for rank, row in enumerate(rows, start=1):
+            revision = f" ({row['revision'][:10]})" if row["revision"] else ""
+            quantization = f" [{row['quantization']}]" if row["quantization"] not in (None, "none") else ""
+            print(f"{rank:>3}  {_format_score(row['score']):>8}  {row['num_tasks']:>5}  "
+                  f"{row['model_id']}{revision}{quantization}")
+        return
+
+    if args.action == "diff":
+        run_a, run_b = warehouse.resolve_run(args.run_a), warehouse.resolve_run(args.run_b)
+        for ref, run_id in ((args.run_a, run_a), (args.run_b, run_b)):
+            if run_id is None:
+                print(f"Error: Run '{ref}' not found in the warehouse.")
+                sys.exit(2)
+        for row in diff_runs(warehouse, run_a, run_b, metric=args.metric):
+            delta = f"{row['delta']:+.4f}" if row["delta"] is not None else "-"
+            print(f"{row['task']:<45} {row['metric']:<20} {_format_score(row['a']):>8} -> "
+                  f"{_format_score(row['b']):>8}  {delta}")
+        return
+
+    regressions = find_regressions(warehouse, model_id=args.model, metric=args.metric,
+                                   threshold=args.threshold,
+                                   stderr_multiple=None if args.ignore_stderr else args.stderr_multiple)
+    if not regressions:
+        print("No regressions found.")
+        return
+    print(f"{len(regressions)} regression(s):")
+    for row in regressions:
+        quantization = f"/{row['quantization']}" if row["quantization"] not in (None, "none") else ""
+        print(f"  {row['model_id']} [{row['backend']}{quantization}] {row['task']} {row['metric']}: "
+              f"{row['previous']:.4f} -> {row['latest']:.4f} (-{row['drop']:.4f}; runs "
+              f"{row['previous_run']} -> {row['latest_run']})")
+    sys.exit(1)
+
+
+def _format_interval(row) -> str:
+    if row["ci_low"] is None:
+        return "-"
+    return f"[{row['ci_low']:.4f}, {row['ci_high']:.4f}]"
+
+
+def details_main(args) -> None:
+    runs_root = os.path.join(RESULTS_DIR, "lighteval")
+    run_dirs = []
+    for ref in [args.run_dir] + ([args.compare] if args.compare else []):
+        run_dir = resolve_run_dir(ref, runs_root)
+        if run_dir is None:
+            print(f"Error: Run directory '{ref}' not found.")
+            sys.exit(2)
+        if not find_details_files(run_dir):
+            print(f"Error: {run_dir} has no per-sample details. Runs save them unless a sweep spec sets "
+                  f"'save_details: false' or the backend is nanotron.")
+            sys.exit(1)
+        run_dirs.append(run_dir)
+
+    if not args.compare:
+        report = analyze_details(run_dirs[0], metric=args.metric, batch_size=args.batch_size)
+        if not report["tasks"]:
+            print(f"No per-sample details with a usable metric found in {run_dirs[0]}.")
+            for skipped in report["skipped"]:
+                print(f"  {skipped['task']}: {skipped['reason']}.")
+            sys.exit(1)
+        print(f"Per-sample {report['metric']} with 95% confidence intervals:")
+        print(f"  {'task':<45} {'n':>7}  {'score':>8}  interval")
+        for row in report["tasks"] + [dict(g, task=g["group"]) for g in report["groups"]] \
+                + [dict(report["overall"], task="overall")]:
+            print(f"  {row['task']:<45} {row['n']:>7}  {_format_score(row['score']):>8}  {_format_interval(row)}")
+        if report["length_buckets"]:
+            print("\nBy prompt length (tokens):")
+            for row in report["length_buckets"]:
+                print(f"  {row['bucket']:<12} {row['n']:>7}  {_format_score(row['score']):>8}  {_format_interval(row)}")
+        for skipped in report["skipped"]:
+            print(f"Skipped {skipped['task']}: {skipped['reason']}.")
+        return
+
+    shown = []
+    output = open(args.output, 'w') if args.output else None
+
+    def on_disagreement(sample):
+        if len(shown) < args.show:
+            shown.append(sample)
+        if output is not None:
+            output.write(json.dumps(sample) + "\n")
+
+    try:
+        report = compare_details(run_dirs[0], run_dirs[1], metric=args.metric,
+                                 batch_size=args.batch_size, on_disagreement=on_disagreement)
+    finally:
+        if output is not None:
+            output.close()
+    if not report["tasks"]:
+        print("The two runs have no tasks with per-sample details in common.")
+        sys.exit(1)
+    print(f"{'task':<45} {'paired':>7} {'both ok':>8} {'only A':>7} {'only B':>7} {'both wrong':>10}")
+    for row in report["tasks"]:
+        print(f"{row['task']:<45} {row['paired']:>7} {row['both_correct']:>8} {row['only_a']:>7} "
+              f"{row['only_b']:>7} {row['both_wrong']:>10}")
+    for side, tasks in (("A", report["only_in_a"]), ("B", report["only_in_b"])):
+        if tasks:
+            print(f"Only in run {side}: {', '.join(tasks)}")
+    for sample in shown:
+        winner = "A" if sample["a_correct"] else "B"
+        example = (sample["example"] or sample["sample"]).replace("\n", " ")
+        print(f"  [{sample['task']}] only {winner} correct: {example[:100]}")
+    if args.output:
+        print(f"Disagreements written to {args.output}")
+
+
+def compare_main(args) -> None:
+    runs_root = os.path.join(RESULTS_DIR, "lighteval")
+    sides = []
+    for ref, quantization in ((args.baseline, args.baseline_quantization),
+                              (args.candidate, args.candidate_quantization)):
+        side = select_runs(ref, runs_root, quantization=quantization)
+        if side is None:
+            print(f"Error: No runs found for '{ref}' (a model ID with complete full runs, "
+                  f"or comma-separated run IDs/directories).")
+            sys.exit(2)
+        sides.append(side)
+    baseline, candidate = sides
+    print(f"Baseline:  {baseline['label']} ({len(baseline['run_dirs'])} run(s))")
+    print(f"Candidate: {candidate['label']} ({len(candidate['run_dirs'])} run(s))")
+
+    started = time.monotonic()
+    report = compare_run_sets(baseline["run_dirs"], candidate["run_dirs"], metric=args.metric,
+                              threshold=args.threshold, alpha=args.alpha,
+                              num_bootstrap=args.bootstrap_samples, seed=args.seed,
+                              batch_size=args.batch_size)
+    if report["status"] == "no_tasks_in_common":
+        print("The two sides have no tasks in common.")
+        for skipped in report["skipped"]:
+            print(f"  {skipped['task']}: {skipped['reason']}.")
+        sys.exit(2)
+
+    if report["tasks"]:
+        print(f"\nPer-sample {report['metric']}, candidate - baseline, paired bootstrap "
+              f"({report['bootstrap_samples']} resamples, Holm-adjusted p):")
+        print(f"  {'task':<45} {'paired':>7} {'baseline':>9} {'candidate':>9} {'delta':>8}  "
+              f"{'95% interval':<19} {'p':>7}")
+        markers = {"regressed": "  REGRESSED", "improved": "  improved", "unchanged": ""}
+        for row in report["tasks"]:
+            print(f"  {row['task']:<45} {row['paired']:>7} {row['baseline']:>9.4f} {row['candidate']:>9.4f} "
+                  f"{row['delta']:>+8.4f}  {_format_interval(row):<19} {row['p_adjusted']:>7.4f}"
+                  f"{markers[row['status']]}")
+        overall = report["overall"]
+        print(f"  {'overall (' + str(overall['num_tasks']) + ' tasks)':<45} {overall['paired']:>7} "
+              f"{overall['baseline']:>9.4f} {overall['candidate']:>9.4f} {overall['delta']:>+8.4f}  "
+              f"{_format_interval(overall):<19} {overall['p_value']:>7.4f}")
+    if report["unpaired"]:
+        print(f"\nNo per-sample data for {len(report['unpaired'])} task(s); reported scores only, "
+              f"not tested for significance:")
+        print(f"  {'task':<45} {'metric':>7} {'baseline':>9} {'candidate':>9} {'delta':>8}  reason")
+        for row in report["unpaired"]:
+            print(f"  {row['task']:<45} {row['metric']:>7} {row['baseline']:>9.4f} {row['candidate']:>9.4f} "
+                  f"{row['delta']:>+8.4f}  {row['reason']}")
+    for side, tasks in (("baseline", report["only_in_baseline"]), ("candidate", report["only_in_candidate"])):
+        if tasks:
+            print(f"Only in the {side}: {', '.join(tasks)}")
+    for skipped in report["skipped"]:
+        print(f"Skipped {skipped['task']}: {skipped['reason']}.")
+    print(f"Compared in {time.monotonic() - started:.1f}s.")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(dict(report, baseline=baseline, candidate=candidate), f, indent=2)
+        print(f"Report written to {args.output}")
+
+    if report["regressions"]:
+        print(f"\n{len(report['regressions'])} task(s) regressed by at least {args.threshold} "
+              f"(significant at {args.alpha}).")
+        sys.exit(1)
+    if report["status"] == "no_per_sample_data":
+        print("\nNo per-sample data on both sides of any task, so no regression could be tested. "
+              "Re-run the tasks with details saved for a paired comparison.")
+        return
+    print("\nNo regressions.")
+
+
+def _expand_quick_tasks(patterns) -> list:
+    # "helm|mmlu:*" expands to every catalog task with that prefix
+    catalog = get_task_catalog()
+    tasks = []
+    for pattern in patterns:
+        matches = catalog.search_prefix(pattern[:-1]) if pattern.endswith("*") else \
+            ([pattern] if pattern in catalog else [])
+        if not matches:
+            print(f"Error: No supported task matches '{pattern}'.")
+            suggestions = catalog.suggest(pattern.rstrip("*"))
+            if suggestions:
+                print(f"Did you mean: {', '.join(suggestions)}?")
+            sys.exit(2)
+        tasks.extend(task for task in matches if task not in tasks)
+    return tasks
+
+
+def _add_endpoint_arguments(parser) -> None:
+    parser.add_argument("--base-url", default=None,
+                        help="endpoint backend: the OpenAI-compatible server, e.g. http://localhost:8000/v1.")
+    parser.add_argument("--api-key-env", default="OPENAI_API_KEY",
+                        help="endpoint backend: environment variable holding the API key (default: OPENAI_API_KEY).")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_ENDPOINT_CONCURRENCY,
+                        help=f"endpoint backend: requests in flight (default: {DEFAULT_ENDPOINT_CONCURRENCY}).")
+    parser.add_argument("--max-retries", type=int, default=DEFAULT_ENDPOINT_MAX_RETRIES,
+                        help=f"endpoint backend: retries of a failed request, with exponential backoff "
+                             f"(default: {DEFAULT_ENDPOINT_MAX_RETRIES}).")
+    parser.add_argument("--request-timeout", type=float, default=DEFAULT_ENDPOINT_TIMEOUT_S,
+                        help=f"endpoint backend: seconds per request attempt (default: {DEFAULT_ENDPOINT_TIMEOUT_S:g}).")
+
+
+def _endpoint_kwargs(args) -> dict:
+    if not args.base_url:
+        print("Error: The endpoint backend needs --base-url.")
+        sys.exit(2)
+    return {"base_url": args.base_url, "api_key": os.getenv(args.api_key_env), "concurrency": args.concurrency,
+            "max_retries": args.max_retries, "request_timeout": args.request_timeout}
+
+
+def quick_main(args) -> None:
+    from src.frameworks.quick_eval import warehouse_baseline
+    tasks = _expand_quick_tasks(args.tasks)
+    task_details_list = [{"task_identifier": task, "num_few_shot": args.few_shot,
+                          "allow_truncation": 0 if args.no_truncation else 1} for task in tasks]
+
+    baseline = None
+    if args.baseline:
+        if not args.metric:
+            print("Error: --baseline needs --metric to look up the baseline score.")
+            sys.exit(2)
+        baseline = warehouse_baseline(args.baseline, tasks, args.few_shot, args.metric,
+                                      revision=args.baseline_revision)
+        if baseline is None:
+            print(f"Error: No full results for '{args.baseline}' on these tasks in the warehouse.")
+            sys.exit(2)
+        print(f"Baseline {args.baseline}: {args.metric} = {baseline['score']:.4f} over "
+              f"{baseline['num_tasks']} task(s)")
+        if baseline["missing_tasks"]:
+            print(f"Warning: The baseline has no results for {len(baseline['missing_tasks'])} of the tasks.")
+
+    if args.backend == "vllm":
+        kwargs = {"dtype": args.dtype}
+    elif args.backend == "endpoint":
+        kwargs = _endpoint_kwargs(args)
+    else:
+        kwargs = {"override-batch-size": args.batch_size}
+    kwargs.update(quantization=args.quantization, skip_memory_check=args.skip_memory_check)
+    runner = LightevalRunner(model_id=args.model_id, hf_token=get_hf_token())
+    record = runner.run_quick(task_details_list, args.backend, metric=args.metric, baseline=baseline,
+                              initial_samples=args.initial_samples, growth=args.growth,
+                              max_rounds=args.max_rounds, target_half_width=args.ci_half_width,
+                              tolerance=args.tolerance, **kwargs)
+    if record is None or record["score"] is None:
+        print("\nQuick evaluation failed.")
+        sys.exit(1)
+    print(f"\nSampled estimate: {record['metric']} = {record['score']:.4f} "
+          f"(95% CI [{record['ci_low']:.4f}, {record['ci_high']:.4f}]) after {len(record['rounds'])} round(s), "
+          f"{record['samples_evaluated']} sample evaluations.")
+    print(f"Verdict: {record['verdict']} ({record['stop_reason']}).")
+    print(f"Recorded in {record['record_path']}")
+    if record["verdict"] == "worse":
+        sys.exit(1)
+
+
+def loadtest_main(args) -> None:
+    from src.frameworks import LoadTestRunner
+    if not args.task and not args.prompts_file:
+        print("Error: Give --task to draw prompts from, or --prompts-file.")
+        sys.exit(2)
+    if args.task and args.task not in get_task_catalog():
+        print(f"Error: Task '{args.task}' is not supported.")
+        suggestions = get_task_catalog().suggest(args.task)
+        if suggestions:
+            print(f"Did you mean: {', '.join(suggestions)}?")
+        sys.exit(2)
+    mode, levels = ("rate", args.rate) if args.rate else ("concurrency", args.concurrency or [1, 2, 4, 8, 16])
+    runner = LoadTestRunner(model_id=args.model_id)
+    report = runner.run_load_test(
+        args.base_url, mode, levels, task_identifier=args.task, prompts_file=args.prompts_file,
+        num_prompts=args.num_prompts, seed=args.seed, api=args.api, api_key=os.getenv(args.api_key_env),
+        max_tokens=args.max_tokens, step_duration_s=args.step_duration, request_timeout=args.request_timeout,
+        max_in_flight=args.max_in_flight, p99_slo_ms=args.p99_slo_ms)
+    if report is None:
+        print("\nLoad test failed.")
+        sys.exit(1)
+    if report["slo"] is not None and not report["slo"]["met"]:
+        sys.exit(1)
+
+
+def list_tasks_main(args) -> None:
+    catalog = get_task_catalog()
+    if args.suite:
+        if args.suite not in catalog.suites:
+            print(f"Error: '{args.suite}' is not a valid task suite.")
+            close_suites = catalog.suggest_suite(args.suite)
+            if close_suites:
+                print(f"Did you mean: {', '.join(close_suites)}?")
+            sys.exit(1)
+        tasks = catalog.search_prefix(f"{args.suite}|{args.query or ''}")
+    elif args.query:
+        tasks = catalog.search_prefix(args.query)
+    else:
+        print(f"{len(catalog)} tasks in {len(catalog.suites)} suites:")
+        for suite in catalog.suite_names():
+            print(f"  {suite} ({len(catalog.suite_tasks(suite))} tasks)")
+        return
+
+    if not tasks:
+        query = f"{args.suite}|{args.query or ''}" if args.suite else args.query
+        print(f"No tasks match '{query}'.")
+        suggestions = catalog.suggest(query)
+        if suggestions:
+            print(f"Did you mean: {', '.join(suggestions)}?")
+        sys.exit(1)
+    shown = tasks if args.limit is None else tasks[:args.limit]
+    for task in shown:
+        print(task)
+    if len(shown) < len(tasks):
+        print(f"... and {len(tasks) - len(shown)} more (use --limit to show more).")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark Hugging Face models with lighteval. Run without arguments for the interactive flow.")
+    parser.add_argument("--offline", action="store_true",
+                        help="Do not contact the Hugging Face Hub; resolve models from the local cache "
+                             "(same as HF_HUB_OFFLINE=1).")
+    subparsers = parser.add_subparsers(dest="command")
+
+    sweep_parser = subparsers.add_parser(
+        "sweep", help="Run a model x task x backend x few-shot matrix from a YAML/JSON spec without prompts.")
+    sweep_parser.add_argument("spec", help="Path to the sweep spec (.yaml/.yml/.json).")
+    sweep_parser.add_argument("--dry-run", action="store_true",
+                              help="Validate and print the job matrix without running it.")
+    sweep_parser.add_argument("--skip-model-check", action="store_true",
+                              help="Do not verify model IDs on the Hugging Face Hub before running.")
+    sweep_parser.add_argument("--max-parallel", type=int, default=None,
+                              help="Run up to N lighteval processes at once, each pinned to a GPU (default: 1; "
+                                   "with --executor ray, as many as the cluster's GPUs hold).")
+    sweep_parser.add_argument("--min-free-gb", type=float, default=0.0,
+                              help="Free GPU memory a device needs before a job is placed on it (parallel mode).")
+    sweep_parser.add_argument("--max-oom-retries", type=int, default=1,
+                              help="Times to retry a job that ran out of GPU memory (parallel mode).")
+    sweep_parser.add_argument("--force-rerun", action="store_true",
+                              help="Ignore cached results and evaluate every job again.")
+    sweep_parser.add_argument("--resume", action="store_true",
+                              help="Continue an interrupted sweep from its journal, skipping completed jobs.")
+    sweep_parser.add_argument("--group-size", type=int, default=1,
+                              help="Pack up to N tasks of the same model/backend/dtype/batch size into one lighteval command.")
+    sweep_parser.add_argument("--telemetry-interval", type=float, default=1.0,
+                              help="Seconds between GPU/CPU/RSS telemetry samples of each run; 0 disables (default: 1).")
+    sweep_parser.add_argument("--prefetch-lookahead", type=int, default=2,
+                              help="Download the weights of the next N models while the current job runs; 0 disables (default: 2).")
+    sweep_parser.add_argument("--prefetch-workers", type=int, default=2,
+                              help="Maximum number of models downloaded at once (default: 2).")
+    sweep_parser.add_argument("--safetensors-only", action="store_true",
+                              help="Prefetch only safetensors weights plus config and tokenizer files.")
+    sweep_parser.add_argument("--hf-cache-budget-gb", type=float, default=None,
+                              help="Evict least recently used models from the Hugging Face cache to stay under this size.")
+    sweep_parser.add_argument("--in-process", action="store_true",
+                              help="Run lighteval's Python pipeline in this process, loading each model once for all of its tasks.")
+    sweep_parser.add_argument("--executor", choices=sorted(EXECUTORS), default="local",
+                              help="Where lighteval runs: child processes of this one (local, default) or a Ray cluster (ray).")
+    sweep_parser.add_argument("--ray-address", default=None,
+                              help="Address of the Ray cluster ('auto', 'ray://head:10001'); default: start a local one.")
+    sweep_parser.add_argument("--gpus-per-job", type=float, default=None,
+                              help="GPUs each Ray job asks for; Ray places it on a node with that many free "
+                                   "(default: 1 if the cluster has GPUs, else 0).")
+    sweep_parser.add_argument("--max-node-retries", type=int, default=DEFAULT_MAX_NODE_RETRIES,
+                              help=f"Times a Ray job is rescheduled after losing its node (default: {DEFAULT_MAX_NODE_RETRIES}).")
+
+    cache_parser = subparsers.add_parser(
+        "cache", help="Inspect or evict cached benchmark results.")
+    cache_parser.add_argument("action", choices=["stats", "evict"])
+    cache_parser.add_argument("--max-age-days", type=float, default=None,
+                              help="Evict cached runs older than this many days.")
+    cache_parser.add_argument("--max-size-gb", type=float, default=None,
+                              help="Evict the oldest cached runs until the rest fit in this many GB.")
+    cache_parser.add_argument("--keep-runs", action="store_true",
+                              help="Only drop cache entries; keep the run directories on disk.")
+
+    runs_parser = subparsers.add_parser("runs", help="List and look up finished runs from the run index.")
+    runs_actions = runs_parser.add_subparsers(dest="action", required=True)
+    runs_list_parser = runs_actions.add_parser("list", help="List the most recent runs.")
+    runs_list_parser.add_argument("--model", default=None, help="Only runs of this model ID.")
+    runs_list_parser.add_argument("--limit", type=int, default=20)
+    runs_show_parser = runs_actions.add_parser("show", help="Print a run's manifest.")
+    runs_show_parser.add_argument("run", help="Run ID (or unique prefix) or run directory name.")
+    runs_actions.add_parser("reindex", help="Rebuild the run index from the run manifests on disk.")
+
+    warehouse_parser = subparsers.add_parser(
+        "warehouse", help="Ingest results into a Parquet warehouse and query it.")
+    warehouse_actions = warehouse_parser.add_subparsers(dest="action", required=True)
+    ingest_parser = warehouse_actions.add_parser("ingest", help="Add new run directories to the warehouse.")
+    ingest_parser.add_argument("--rebuild", action="store_true", help="Drop the warehouse and ingest every run again.")
+    leaderboard_parser = warehouse_actions.add_parser(
+        "leaderboard", help="Rank models by their best score on the matching tasks.")
+    leaderboard_parser.add_argument("--metric", default="acc", help="Metric to rank by (default: acc).")
+    leaderboard_parser.add_argument("--suite", default=None, help="Only this suite, e.g. 'helm'.")
+    leaderboard_parser.add_argument("--task", default=None,
+                                    help="Task name pattern within the suite, e.g. 'mmlu:*'.")
+    leaderboard_parser.add_argument("--few-shot", type=int, default=None, help="Only this few-shot setting.")
+    leaderboard_parser.add_argument("--limit", type=int, default=20)
+    diff_parser = warehouse_actions.add_parser("diff", help="Compare two runs task by task.")
+    diff_parser.add_argument("run_a", help="Run ID (or prefix) or run directory.")
+    diff_parser.add_argument("run_b", help="Run ID (or prefix) or run directory.")
+    diff_parser.add_argument("--metric", default=None)
+    regress_parser = warehouse_actions.add_parser(
+        "regressions", help="Flag tasks whose latest run scored lower than the previous one (exit 1 if any).")
+    regress_parser.add_argument("--model", default=None, help="Only check this model ID.")
+    regress_parser.add_argument("--metric", default=None)
+    regress_parser.add_argument("--threshold", type=float, default=0.01,
+                                help="Minimum absolute drop to report (default: 0.01).")
+    regress_parser.add_argument("--stderr-multiple", type=float, default=2.0,
+                                help="Also require the drop to exceed this many combined standard errors.")
+    regress_parser.add_argument("--ignore-stderr", action="store_true",
+                                help="Report every drop above the threshold regardless of stderr.")
+
+    details_parser = subparsers.add_parser(
+        "details", help="Analyse a run's per-sample details: per-task scores, intervals and length buckets.")
+    details_parser.add_argument("run_dir", help="Run directory (path, or name under results/lighteval/) or run ID.")
+    details_parser.add_argument("--compare", default=None, metavar="RUN_DIR",
+                                help="Second run to compare with, sample by sample.")
+    details_parser.add_argument("--metric", default=None,
+                                help="Per-sample metric to score by (default: acc, em, ... whichever is present).")
+    details_parser.add_argument("--batch-size", type=int, default=4096,
+                                help="Rows read per batch; bounds memory use (default: 4096).")
+    details_parser.add_argument("--show", type=int, default=10,
+                                help="With --compare, number of disagreeing samples to print (default: 10).")
+    details_parser.add_argument("--output", default=None,
+                                help="With --compare, write every disagreeing sample to this JSONL file.")
+
+    compare_parser = subparsers.add_parser(
+        "compare", help="Compare two models or run sets task by task with paired bootstrap tests "
+                        "(exit 1 if any task regressed).")
+    compare_parser.add_argument("baseline", help="Model ID (its full runs under results/lighteval/) or "
+                                                 "comma-separated run IDs/directories.")
+    compare_parser.add_argument("candidate", help="Same as baseline, for the model or runs under test.")
+    compare_parser.add_argument("--metric", default=None,
+                                help="Per-sample metric to compare (default: acc, em, ... whichever is present).")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                                help=f"Minimum absolute drop that counts as a regression "
+                                     f"(default: {DEFAULT_REGRESSION_THRESHOLD}).")
+    compare_parser.add_argument("--alpha", type=float, default=DEFAULT_ALPHA,
+                                help=f"Significance level after Holm's correction (default: {DEFAULT_ALPHA}).")
+    compare_parser.add_argument("--bootstrap-samples", type=int, default=DEFAULT_BOOTSTRAP_SAMPLES,
+                                help=f"Bootstrap resamples per task (default: {DEFAULT_BOOTSTRAP_SAMPLES}).")
+    compare_parser.add_argument("--seed", type=int, default=0, help="Seed of the bootstrap (default: 0).")
+    compare_parser.add_argument("--baseline-quantization", choices=[q for q in VALID_QUANTIZATIONS if q != "auto"], default="none",
+                                help="With a model ID, only use its runs in this quantization mode.")
+    compare_parser.add_argument("--candidate-quantization", choices=[q for q in VALID_QUANTIZATIONS if q != "auto"], default="none",
+                                help="With a model ID, only use its runs in this quantization mode.")
+    compare_parser.add_argument("--batch-size", type=int, default=4096,
+                                help="Details rows read per batch (default: 4096).")
+    compare_parser.add_argument("--output", default=None, help="Also write the full report to this JSON file.")
+
+    quick_parser = subparsers.add_parser(
+        "quick", help="Estimate a score from growing subsamples, stopping once the confidence interval is decisive.")
+    quick_parser.add_argument("model_id")
+    quick_parser.add_argument("--tasks", nargs="+", required=True,
+                              help="Task identifiers (suite|task); a trailing '*' matches a prefix, e.g. 'helm|mmlu:*'.")
+    quick_parser.add_argument("--few-shot", type=int, default=0)
+    quick_parser.add_argument("--no-truncation", action="store_true", help="Disallow few-shot truncation.")
+    quick_parser.add_argument("--backend", choices=list(LIGHTEVAL_BACKENDS.keys()), default="accelerate")
+    quick_parser.add_argument("--dtype", choices=VALID_DTYPES, default="auto", help="vllm only.")
+    quick_parser.add_argument("--batch-size", default=1,
+                              type=lambda v: v if v == "auto" else int(v), help="Not used by vllm.")
+    quick_parser.add_argument("--quantization", choices=VALID_QUANTIZATIONS, default="none",
+                              help="bnb-8bit/bnb-4bit: accelerate only; awq/gptq: pre-quantized checkpoints; "
+                                   "auto: the least compressed mode predicted to fit.")
+    quick_parser.add_argument("--skip-memory-check", action="store_true",
+                              help="Run even if the model is not predicted to fit the GPU memory.")
+    quick_parser.add_argument("--metric", default=None,
+                              help="Per-sample metric to estimate (default: acc, em, ... whichever is present).")
+    quick_parser.add_argument("--baseline", default=None, metavar="MODEL_ID",
+                              help="Compare against this model's latest full results in the warehouse.")
+    quick_parser.add_argument("--baseline-revision", default=None, help="Only baseline results of this revision.")
+    quick_parser.add_argument("--tolerance", type=float, default=0.01,
+                              help="Scores within this of the baseline count as equivalent (default: 0.01).")
+    quick_parser.add_argument("--ci-half-width", type=float, default=0.02,
+                              help="Stop once the 95%% interval is this narrow (default: 0.02).")
+    quick_parser.add_argument("--initial-samples", type=int, default=32, help="Samples per task in round 1.")
+    quick_parser.add_argument("--growth", type=float, default=2.0, help="Sample size factor between rounds.")
+    quick_parser.add_argument("--max-rounds", type=int, default=6)
+    _add_endpoint_arguments(quick_parser)
+
+    loadtest_parser = subparsers.add_parser(
+        "loadtest", help="Measure serving throughput and latency (TTFT, inter-token) of a model behind an "
+                         "OpenAI-compatible server at stepped load.")
+    loadtest_parser.add_argument("model_id", help="Model name the server serves.")
+    loadtest_parser.add_argument("--base-url", required=True, help="e.g. http://localhost:8000/v1")
+    loadtest_parser.add_argument("--task", default=None, help="lighteval task (suite|task) to draw prompts from.")
+    loadtest_parser.add_argument("--prompts-file", default=None,
+                                 help="JSONL ({\"prompt\": ...}) or text file of prompts, instead of --task.")
+    load_shape = loadtest_parser.add_mutually_exclusive_group()
+    load_shape.add_argument("--concurrency", nargs="+", type=int, default=None,
+                            help="Closed loop: number of concurrent clients per step (default: 1 2 4 8 16).")
+    load_shape.add_argument("--rate", nargs="+", type=float, default=None,
+                            help="Open loop: Poisson arrival rate in requests/s per step.")
+    loadtest_parser.add_argument("--step-duration", type=float, default=DEFAULT_STEP_DURATION_S,
+                                 help=f"Seconds per step (default: {DEFAULT_STEP_DURATION_S:g}).")
+    loadtest_parser.add_argument("--num-prompts", type=int, default=256,
+                                 help="Prompts sampled from the task, replayed in turn (default: 256).")
+    loadtest_parser.add_argument("--seed", type=int, default=0)
+    loadtest_parser.add_argument("--api", choices=list(API_KINDS), default="completions",
+                                 help="Raw prompts to /completions, or one user message to /chat/completions.")
+    loadtest_parser.add_argument("--max-tokens", type=int, default=None,
+                                 help=f"Completion length (default: the task's generation size, else {DEFAULT_MAX_TOKENS}).")
+    loadtest_parser.add_argument("--api-key-env", default="OPENAI_API_KEY",
+                                 help="Environment variable holding the API key (default: OPENAI_API_KEY).")
+    loadtest_parser.add_argument("--request-timeout", type=float, default=DEFAULT_ENDPOINT_TIMEOUT_S)
+    loadtest_parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT,
+                                 help="Open loop: arrivals beyond this many requests in flight are dropped.")
+    loadtest_parser.add_argument("--p99-slo-ms", type=float, default=None,
+                                 help="Report the highest throughput with p99 latency under this; exit 1 if no step meets it.")
+
+    list_parser = subparsers.add_parser(
+        "list-tasks", help="List task suites, or the tasks matching a prefix.")
+    list_parser.add_argument("query", nargs="?", default=None,
+                             help="Task identifier prefix, e.g. 'helm|mmlu:' (within --suite if given).")
+    list_parser.add_argument("--suite", default=None, help="Only list tasks of this suite.")
+    list_parser.add_argument("--limit", type=int, default=50,
+                             help="Maximum number of tasks to print (default: 50).")
+
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
+    args = parse_args()
+    if args.offline:
+        # Inherited by the lighteval subprocesses as well
+        os.environ["HF_HUB_OFFLINE"] = "1"
+
     os.makedirs(RESULTS_DIR, exist_ok=True)
     gitkeep_path = os.path.join(RESULTS_DIR, ".gitkeep")
     if not os.path.exists(gitkeep_path):
@@ -136,4 +831,26 @@ if __name__ == "__main__":
         except IOError:
             print(f"Warning: Could not create .gitkeep in {RESULTS_DIR}")
 
-    main()
+    if args.command == "sweep":
+        if sum([args.in_process, (args.max_parallel or 1) > 1, args.group_size > 1]) > 1:
+            print("Error: --in-process, --max-parallel and --group-size cannot be combined.")
+            sys.exit(2)
+        sweep_main(args)
+    elif args.command == "cache":
+        cache_main(args)
+    elif args.command == "runs":
+        runs_main(args)
+    elif args.command == "warehouse":
+        warehouse_main(args)
+    elif args.command == "details":
+        details_main(args)
+    elif args.command == "compare":
+        compare_main(args)
+    elif args.command == "quick":
+        quick_main(args)
+    elif args.command == "loadtest":
+        loadtest_main(args)
+    elif args.command == "list-tasks":
+        list_tasks_main(args)
+    else:
+        main()
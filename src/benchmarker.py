@@ -1,21 +1,120 @@
 from abc import ABC, abstractmethod
+import json
 import os
 from .config import RESULTS_DIR
-from typing import Dict, Any, Optional
+from .executors import JobExecutor, LocalExecutor
+from .results.run_layout import RunLayout
+from typing import Dict, Any, List, Optional
+
+PERF_FILENAME = "perf.json"
+PERF_SCHEMA_VERSION = 1
 
 
 class BenchmarkRunner(ABC):
-    def __init__(self, model_id: str, hf_token: Optional[str] = None):
+    def __init__(self, model_id: str, hf_token: Optional[str] = None,
+                 executor: Optional[JobExecutor] = None):
         self.model_id = model_id
         self.hf_token = hf_token
+        # Where the runner's commands run: child processes by default, or a Ray cluster
+        self.executor = executor or LocalExecutor()
         self.results_dir = os.path.join(RESULTS_DIR, self.framework_name())
+        self.last_output_dir: Optional[str] = None
+        self.last_results_file: Optional[str] = None
+        self.last_perf_report: Optional[Dict[str, Any]] = None
         os.makedirs(self.results_dir, exist_ok=True)
+        self.run_layout = RunLayout(self.results_dir)
 
     @staticmethod
     @abstractmethod
     def framework_name() -> str:
         pass
 
+    def run_config(self, tasks: List[str], backend: str, **fields) -> Dict[str, Any]:
+        # Everything that determines a run's results; hashed into the run ID
+        return dict(framework=self.framework_name(), model_id=self.model_id, tasks=tasks,
+                    backend=backend, **fields)
+
+    def make_run_output_dir(self, task_string: str, backend: str, config: Optional[Dict[str, Any]] = None,
+                            output_dir: Optional[str] = None) -> str:
+        # Returns the run's final directory. It only appears once commit_run() succeeds; until
+        # then the run writes to run_staging_dir(). output_dir re-opens a directory chosen
+        # earlier, e.g. by a resumed sweep.
+        config = config or self.run_config([task_string], backend)
+        if output_dir:
+            self.run_layout.prepare(output_dir, config)
+            return output_dir
+        return self.run_layout.allocate(config, [self.model_id, task_string, backend])
+
+    def run_staging_dir(self, run_output_dir: str) -> str:
+        return self.run_layout.staging_dir(run_output_dir)
+
+    def commit_run(self, run_output_dir: str) -> bool:
+        return self.run_layout.commit(run_output_dir)
+
+    def abandon_run(self, run_output_dir: Optional[str], reason: str) -> None:
+        if run_output_dir:
+            self.run_layout.abandon(run_output_dir, reason)
+
+    def write_perf_report(self, run_output_dir: str, backend: str, tasks: List[str], total_s: float,
+                          model_load_s: Optional[float] = None, evaluation_s: Optional[float] = None,
+                          post_processing_s: Optional[float] = None, num_samples: Optional[int] = None,
+                          prompt_tokens: Optional[int] = None, generated_tokens: Optional[int] = None,
+                          time_to_first_token_s: Optional[float] = None,
+                          notes: Optional[List[str]] = None) -> Optional[str]:
+        # Common perf.json layout for every framework runner. Fields a runner cannot
+        # measure stay None; rates are per second of evaluation time when it is known.
+        def rate(count):
+            if count is None:
+                return None
+            elapsed = evaluation_s if evaluation_s else total_s
+            return round(count / elapsed, 3) if elapsed else None
+
+        def seconds(value):
+            return round(value, 3) if value is not None else None
+
+        accounted = [v for v in (model_load_s, evaluation_s, post_processing_s) if v is not None]
+        report = {
+            "schema_version": PERF_SCHEMA_VERSION,
+            "framework": self.framework_name(),
+            "model_id": self.model_id,
+            "backend": backend,
+            "tasks": tasks,
+            "wall_clock_s": {
+                "total": seconds(total_s),
+                "model_load": seconds(model_load_s),
+                "evaluation": seconds(evaluation_s),
+                "post_processing": seconds(post_processing_s),
+                # Process start-up, imports and task/dataset loading outside the phases above
+                "other": seconds(max(0.0, total_s - sum(accounted))) if accounted else None,
+            },
+            "num_samples": num_samples,
+            "samples_per_s": rate(num_samples),
+            "prompt_tokens": prompt_tokens,
+            "prompt_tokens_per_s": rate(prompt_tokens),
+            "generated_tokens": generated_tokens,
+            "generated_tokens_per_s": rate(generated_tokens),
+            "time_to_first_token_s": seconds(time_to_first_token_s),
+            "notes": notes or [],
+        }
+        self.last_perf_report = report
+        perf_file = os.path.join(run_output_dir, PERF_FILENAME)
+        try:
+            with open(perf_file, 'w') as f:
+                json.dump(report, f, indent=2)
+        except OSError as e:
+            print(f"Warning: Could not write {perf_file}: {e}")
+            return None
+
+        summary = f"Performance: {report['wall_clock_s']['total']}s total"
+        if evaluation_s is not None:
+            summary += f", {report['wall_clock_s']['evaluation']}s evaluating"
+        if report["samples_per_s"] is not None:
+            summary += f", {report['samples_per_s']} samples/s"
+        if report["generated_tokens_per_s"] is not None:
+            summary += f", {report['generated_tokens_per_s']} generated tokens/s"
+        print(f"{summary} ({perf_file})")
+        return perf_file
+
     @abstractmethod
     def run(self, task_details: Dict[str, Any], backend: str, **kwargs) -> bool:
         pass
@@ -1,23 +1,42 @@
 import os
-from dotenv import load_dotenv
+import threading
 import warnings
 
-load_dotenv()
-
-HF_TOKEN = os.getenv("HF_TOKEN")
+# Resolved on first use (see get_hf_token) so importing the config stays cheap
+_HF_TOKEN_LOADED = False
+_HF_TOKEN = None
+# Hub lookups and prefetch downloads resolve the token from worker threads
+_HF_TOKEN_LOCK = threading.Lock()
 
 # Don't import task_utils directly here to avoid circular dependency
 
 
 def _load_tasks():
-    from src.utils.task_utils import load_tasks_from_yaml
-    return load_tasks_from_yaml()
-
-
-if not HF_TOKEN:
-    print("Warning: HF_TOKEN not found in .env file. Access to gated models will fail.")
-    warnings.warn(
-        "HF_TOKEN not found in .env file. Please create a .env file with your Hugging Face token.")
+    # Served from the compiled catalog cache; the YAML is only re-parsed when it changes
+    from src.utils.task_utils.task_catalog import get_task_catalog
+    return get_task_catalog().task_set
+
+
+def get_hf_token():
+    global _HF_TOKEN, _HF_TOKEN_LOADED
+    with _HF_TOKEN_LOCK:
+        if not _HF_TOKEN_LOADED:
+            from dotenv import load_dotenv
+            load_dotenv()
+            _HF_TOKEN = os.getenv("HF_TOKEN")
+            _HF_TOKEN_LOADED = True
+            if not _HF_TOKEN:
+                print("Warning: HF_TOKEN not found in .env file. Access to gated models will fail.")
+                warnings.warn(
+                    "HF_TOKEN not found in .env file. Please create a .env file with your Hugging Face token.")
+    return _HF_TOKEN
+
+
+def __getattr__(name):
+    # Keeps `from src.config import HF_TOKEN` working; note it resolves the token at import
+    if name == "HF_TOKEN":
+        return get_hf_token()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # --- Constants ---
 # Load tasks lazily to avoid circular imports
@@ -30,6 +49,8 @@ LIGHTEVAL_BACKENDS = {
     "accelerate": "accelerate",
     "vllm": "vllm",
     "nanotron": "nanotron",
+    # An already-running OpenAI-compatible server (vLLM, TGI, a hosted API) given by base URL
+    "endpoint": "endpoint openai",
 }
 
 VALID_DTYPES = [
@@ -39,6 +60,43 @@ VALID_DTYPES = [
     "auto",
 ]
 
+# Bytes per parameter for the weights of each dtype; 'auto' usually resolves to bf16
+DTYPE_BYTES = {
+    "float32": 4,
+    "float16": 2,
+    "bfloat16": 2,
+    "auto": 2,
+}
+
+# Weight quantization of a run. bitsandbytes quantizes a full-precision checkpoint while
+# accelerate loads it; AWQ and GPTQ are checkpoints quantized ahead of time, which the
+# backend recognizes from their config. 'auto' picks the least compressed mode that the
+# memory-fit predictor expects to fit.
+VALID_QUANTIZATIONS = [
+    "none",
+    "auto",
+    "bnb-8bit",
+    "bnb-4bit",
+    "awq",
+    "gptq",
+]
+
+QUANTIZATION_BACKENDS = {
+    "bnb-8bit": ["accelerate"],
+    "bnb-4bit": ["accelerate"],
+    "awq": ["vllm", "accelerate"],
+    "gptq": ["vllm", "accelerate"],
+}
+
+# Bytes per parameter of quantized weights as loaded: the packed weights plus their scales,
+# and the embeddings and norms that stay in 16 bit (a large share of Gemma's parameters)
+QUANTIZATION_BYTES = {
+    "bnb-8bit": 1.1,
+    "bnb-4bit": 0.6,
+    "awq": 0.6,
+    "gptq": 0.6,
+}
+
 RESULTS_DIR = "results"
 
 # For now, only lighteval is supported
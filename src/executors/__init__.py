@@ -0,0 +1,29 @@
+from typing import Any
+
+from .base import JobExecutor
+from .local import LocalExecutor
+from .ray_executor import RayExecutor, RayProcess, RemoteCommand, DEFAULT_MAX_NODE_RETRIES, NODE_LOST_RETURNCODE
+
+EXECUTORS = {
+    "local": LocalExecutor,
+    "ray": RayExecutor,
+}
+
+
+def get_executor(name: str, **options: Any) -> JobExecutor:
+    if name not in EXECUTORS:
+        raise ValueError(f"Unknown executor '{name}'; expected one of {list(EXECUTORS)}.")
+    return EXECUTORS[name](**options)
+
+
+__all__ = [
+    'JobExecutor',
+    'LocalExecutor',
+    'RayExecutor',
+    'RayProcess',
+    'RemoteCommand',
+    'DEFAULT_MAX_NODE_RETRIES',
+    'NODE_LOST_RETURNCODE',
+    'EXECUTORS',
+    'get_executor'
+]
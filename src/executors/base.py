@@ -0,0 +1,34 @@
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional
+
+from ..utils.process_utils import StreamingProcess
+
+
+class JobExecutor(ABC):
+    # Where the lighteval commands of a runner run. submit() starts a command and returns a
+    # handle with StreamingProcess's interface (poll, wait, terminate, tail, progress,
+    # started_at); the command writes its outputs to log_dir, the run's staging directory,
+    # and they are there, on this machine, once the handle reports that it has exited.
+    # Remote executors run commands on other hosts, so this machine's GPUs, pid-based
+    # telemetry and run history say nothing about their jobs.
+    remote = False
+
+    @staticmethod
+    @abstractmethod
+    def name() -> str:
+        pass
+
+    @abstractmethod
+    def submit(self, command: List[str], log_dir: str, env: Optional[Dict[str, str]] = None,
+               echo: bool = True, stall_timeout: float = 120.0,
+               on_line: Optional[Callable[[str, str, float], None]] = None,
+               device: Optional[int] = None) -> StreamingProcess:
+        # device pins a local command to one GPU; remote executors place commands themselves
+        pass
+
+    def capacity(self) -> Optional[int]:
+        # How many commands can run at once, or None to let the caller decide
+        return None
+
+    def shutdown(self) -> None:
+        pass
@@ -0,0 +1,24 @@
+import os
+from typing import Callable, Dict, List, Optional
+
+from ..utils.process_utils import StreamingProcess
+from .base import JobExecutor
+
+
+class LocalExecutor(JobExecutor):
+    # Runs commands as child processes of this one (the default)
+    @staticmethod
+    def name() -> str:
+        return "local"
+
+    def submit(self, command: List[str], log_dir: str, env: Optional[Dict[str, str]] = None,
+               echo: bool = True, stall_timeout: float = 120.0,
+               on_line: Optional[Callable[[str, str, float], None]] = None,
+               device: Optional[int] = None) -> StreamingProcess:
+        env = dict(env if env is not None else os.environ)
+        if device is not None:
+            env["CUDA_VISIBLE_DEVICES"] = str(device)
+        process = StreamingProcess(command, log_dir=log_dir, env=env, echo=echo,
+                                   stall_timeout=stall_timeout, on_line=on_line)
+        process.start()
+        return process
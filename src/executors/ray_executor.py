@@ -0,0 +1,339 @@
+import collections
+import io
+import os
+import shutil
+import socket
+import tarfile
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..utils.process_utils import StreamingProcess, RotatingLogWriter
+from .base import JobExecutor
+
+DEFAULT_MAX_NODE_RETRIES = 2
+# Returned by a job whose node was lost more often than max_node_retries allows
+NODE_LOST_RETURNCODE = -2
+# Only these reach remote commands: the rest of this machine's environment (paths, caches,
+# CUDA_VISIBLE_DEVICES) does not describe the node, whose own environment is used instead
+PASSTHROUGH_ENV = ("HF_TOKEN", "HUGGING_FACE_HUB_TOKEN", "HF_ENDPOINT", "HF_HUB_OFFLINE",
+                   "HF_DATASETS_OFFLINE", "TRANSFORMERS_OFFLINE", "HF_HUB_ENABLE_HF_TRANSFER",
+                   "TOKENIZERS_PARALLELISM", "OPENAI_API_KEY")
+_READ_BATCH_LINES = 2000
+_POLL_INTERVAL_S = 0.5
+_RPC_TIMEOUT_S = 60.0
+# The package directory, shipped to the nodes of a remote cluster so their workers can
+# import RemoteCommand
+_PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_LOG_NAMES = ("stdout.log", "stderr.log")
+
+
+def _dir_state(path: str) -> Dict[str, Tuple[int, int]]:
+    state = {}
+    for root, _, files in os.walk(path):
+        for name in files:
+            full = os.path.join(root, name)
+            stat = os.stat(full)
+            state[os.path.relpath(full, path)] = (stat.st_size, stat.st_mtime_ns)
+    return state
+
+
+def _pack_dir(path: str, unchanged: Optional[Dict[str, Tuple[int, int]]] = None) -> bytes:
+    # A gzipped tar of the files under path, without the run's logs (which are streamed)
+    # and without files that still match `unchanged`
+    unchanged = unchanged or {}
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        for relpath, state in sorted(_dir_state(path).items()):
+            if os.path.basename(relpath).startswith(_LOG_NAMES) or unchanged.get(relpath) == state:
+                continue
+            tar.add(os.path.join(path, relpath), arcname=relpath)
+    return buffer.getvalue()
+
+
+def _unpack_dir(data: bytes, path: str) -> None:
+    os.makedirs(path, exist_ok=True)
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r:gz") as tar:
+        tar.extractall(path, filter="data")
+
+
+def _rebase(arg: str, old_dir: str, new_dir: str) -> str:
+    if arg == old_dir or arg.startswith(old_dir + os.sep):
+        return new_dir + arg[len(old_dir):]
+    return arg
+
+
+class RemoteCommand:
+    # Runs one command inside a Ray actor, on the node that holds the actor's resources.
+    # The run's staging directory arrives as a tarball and is unpacked into a temporary
+    # directory that stands in for it in the command's arguments (and, the other way round,
+    # in its output lines); output lines are buffered until the driver reads them, and
+    # collect() returns the files the command wrote.
+    def __init__(self):
+        self.workdir = tempfile.mkdtemp(prefix="gemmabench-ray-")
+        self.staging_dir = os.path.join(self.workdir, "staging")
+        self.process: Optional[StreamingProcess] = None
+        self._lines = collections.deque()
+        self._lock = threading.Lock()
+        self._inputs: Dict[str, Tuple[int, int]] = {}
+        self._driver_staging_dir: Optional[str] = None
+
+    def start(self, command: List[str], staging_dir: str, inputs: bytes, env: Dict[str, str]) -> Dict[str, Any]:
+        self._driver_staging_dir = staging_dir
+        _unpack_dir(inputs, self.staging_dir)
+        self._inputs = _dir_state(self.staging_dir)
+        full_env = os.environ.copy()
+        full_env.update(env)
+        self.process = StreamingProcess(
+            [_rebase(arg, staging_dir, self.staging_dir) for arg in command],
+            log_dir=os.path.join(self.workdir, "logs"), env=full_env, echo=False,
+            stall_timeout=float("inf"), on_line=self._on_line)
+        self.process.start()
+        return {"node": socket.gethostname(), "gpus": full_env.get("CUDA_VISIBLE_DEVICES")}
+
+    def _on_line(self, name: str, line: str, now: float) -> None:
+        with self._lock:
+            self._lines.append((name, line.replace(self.staging_dir, self._driver_staging_dir)))
+
+    def read(self, max_lines: int = _READ_BATCH_LINES) -> Tuple[List[Tuple[str, str]], Optional[int]]:
+        # (buffered lines, return code); the return code is only given with the last lines
+        returncode = self.process.poll()  # joins the output readers once the command exits
+        with self._lock:
+            lines = [self._lines.popleft() for _ in range(min(max_lines, len(self._lines)))]
+            if self._lines:
+                returncode = None
+        return lines, returncode
+
+    def collect(self) -> bytes:
+        return _pack_dir(self.staging_dir, unchanged=self._inputs)
+
+    def terminate(self) -> None:
+        if self.process is not None:
+            self.process.terminate()
+
+    def cleanup(self) -> None:
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+class RayProcess(StreamingProcess):
+    # Driver-side handle of a command running in a RemoteCommand actor. A follower thread
+    # pulls the actor's output lines into the local stdout.log/stderr.log (and the console,
+    # progress and tails, as for a local process) and, once the command has exited, unpacks
+    # the files it wrote into the local staging directory. If the actor's node dies, the
+    # command is started again from the original staging files on a new actor.
+    def __init__(self, executor: "RayExecutor", command: List[str], log_dir: str,
+                 env: Optional[Dict[str, str]] = None, echo: bool = True, stall_timeout: float = 120.0,
+                 on_line: Optional[Callable[[str, str, float], None]] = None, num_gpus: float = 0):
+        super().__init__(command, log_dir, env=env, echo=echo, stall_timeout=stall_timeout, on_line=on_line)
+        self.executor = executor
+        self.num_gpus = num_gpus
+        self.node: Optional[str] = None
+        self.node_failures = 0
+        self.returncode: Optional[int] = None
+        self._actor = None
+        self._inputs = b""
+        self._logs: Dict[str, RotatingLogWriter] = {}
+        self._stopping = False
+        self._done = threading.Event()
+
+    @property
+    def pid(self) -> Optional[int]:
+        return None
+
+    @property
+    def location(self) -> str:
+        return f"Ray node {self.node}" if self.node else "Ray (not placed yet)"
+
+    def start(self) -> None:
+        os.makedirs(self.log_dir, exist_ok=True)
+        self._inputs = _pack_dir(self.log_dir)
+        for name in ("stdout", "stderr"):
+            self._logs[name] = RotatingLogWriter(os.path.join(self.log_dir, f"{name}.log"),
+                                                 self.log_max_bytes, self.log_backup_count)
+        self.started_at = self.last_output_at = time.monotonic()
+        # Blocks until the cluster has room for the actor; errors such as a missing
+        # lighteval on the node are raised here, as for a local process
+        try:
+            self._place()
+        except Exception:
+            for log in self._logs.values():
+                log.close()
+            raise
+        thread = threading.Thread(target=self._follow, daemon=True, name="ray-follower")
+        thread.start()
+        self._threads.append(thread)
+
+    def _place(self) -> None:
+        import ray
+        self._actor = self.executor.actor_class().options(
+            num_gpus=self.num_gpus, num_cpus=self.executor.num_cpus_per_job).remote()
+        try:
+            placed = ray.get(self._actor.start.remote(self.command, self.log_dir, self._inputs, self._remote_env()))
+        except Exception:
+            self._release_actor()
+            raise
+        self.node = placed["node"]
+        gpus = f" (CUDA_VISIBLE_DEVICES={placed['gpus']})" if placed.get("gpus") else ""
+        self._note(f"[ray] Running on {self.node}{gpus}")
+
+    def _remote_env(self) -> Dict[str, str]:
+        env = self.env if self.env is not None else os.environ
+        return {key: env[key] for key in PASSTHROUGH_ENV if key in env}
+
+    def _note(self, message: str) -> None:
+        self._handle_line("stderr", message, self._logs["stderr"])
+
+    def _follow(self) -> None:
+        import ray
+        from ray.exceptions import GetTimeoutError, NodeDiedError, ObjectLostError, RayActorError, WorkerCrashedError
+
+        returncode = None
+        try:
+            while returncode is None:
+                try:
+                    if self._actor is None:
+                        self._place()
+                    lines, returncode = ray.get(self._actor.read.remote(), timeout=_RPC_TIMEOUT_S)
+                    for name, line in lines:
+                        self._handle_line(name, line, self._logs[name])
+                    if returncode is not None:
+                        _unpack_dir(ray.get(self._actor.collect.remote()), self.log_dir)
+                    elif not lines:
+                        time.sleep(_POLL_INTERVAL_S)
+                except GetTimeoutError:
+                    continue  # a busy node; silence is left to the stall check
+                except (RayActorError, NodeDiedError, ObjectLostError, WorkerCrashedError) as e:
+                    if self._stopping:
+                        returncode = -15
+                        break
+                    self.node_failures += 1
+                    self._release_actor()
+                    if self.node_failures > self.executor.max_node_retries:
+                        self._note(f"[ray] Lost {self.location} ({type(e).__name__}); giving up after "
+                                   f"{self.node_failures - 1} reschedule(s).")
+                        returncode = NODE_LOST_RETURNCODE
+                        break
+                    self._note(f"[ray] Lost {self.location} ({type(e).__name__}); rescheduling the job "
+                               f"(attempt {self.node_failures + 1}/{self.executor.max_node_retries + 1}).")
+                    self.node = None
+                    self.progress = None
+        except Exception as e:
+            if not self._stopping:
+                self._note(f"[ray] The job failed: {e}")
+            returncode = returncode if returncode is not None else 1
+        finally:
+            self._release_actor()
+            for log in self._logs.values():
+                log.close()
+            self.returncode = returncode
+            self._done.set()
+
+    def _release_actor(self) -> None:
+        import ray
+        actor, self._actor = self._actor, None
+        if actor is None:
+            return
+        try:
+            ray.get(actor.cleanup.remote(), timeout=_RPC_TIMEOUT_S)
+        except Exception:
+            pass  # the node is gone along with its temporary directory
+        ray.kill(actor)
+
+    def poll(self) -> Optional[int]:
+        if not self._done.is_set():
+            self.check_stall()
+            return None
+        self._join_readers()
+        return self.returncode
+
+    def wait(self, poll_interval: float = 1.0) -> int:
+        while True:
+            returncode = self.poll()
+            if returncode is not None:
+                return returncode
+            self._done.wait(poll_interval)
+
+    def terminate(self, grace_period: float = 10.0) -> None:
+        import ray
+        if self._done.is_set():
+            return
+        self._stopping = True
+        actor = self._actor
+        if actor is not None:
+            try:
+                ray.get(actor.terminate.remote(), timeout=grace_period)
+            except Exception:
+                pass
+            ray.kill(actor)
+        self._done.wait(grace_period + _RPC_TIMEOUT_S)
+
+
+class RayExecutor(JobExecutor):
+    # Runs each command in a Ray actor that asks for the job's GPUs (num_gpus_per_job), so
+    # Ray places it on a node with that many free and sets its CUDA_VISIBLE_DEVICES. Logs
+    # stream back while the job runs and its outputs land in the local staging directory,
+    # so runs are committed to RESULTS_DIR like local ones. Jobs whose node dies are
+    # rescheduled up to max_node_retries times.
+    #
+    # address is that of a running cluster ("auto", "ray://head:10001"); without it Ray
+    # starts a local one, which (with num_gpus_per_job=0) is enough to try this on a CPU.
+    remote = True
+
+    def __init__(self, address: Optional[str] = None, num_gpus_per_job: Optional[float] = None,
+                 num_cpus_per_job: float = 1, max_node_retries: int = DEFAULT_MAX_NODE_RETRIES,
+                 local_mode: bool = False):
+        try:
+            import ray
+        except ImportError:
+            raise RuntimeError("The Ray executor needs Ray: pip install 'ray[default]'") from None
+
+        self._owns_ray = False
+        if not ray.is_initialized():
+            # Workers import RemoteCommand from this package, which the nodes of a remote
+            # cluster do not have
+            runtime_env = None if local_mode else {"py_modules": [_PACKAGE_DIR]}
+            ray.init(address=address, local_mode=local_mode, runtime_env=runtime_env,
+                     log_to_driver=False, configure_logging=False)
+            self._owns_ray = True
+        self.resources = ray.cluster_resources()
+        if num_gpus_per_job is None:
+            num_gpus_per_job = 1 if self.resources.get("GPU") else 0
+        self.num_gpus_per_job = num_gpus_per_job
+        self.num_cpus_per_job = num_cpus_per_job
+        self.max_node_retries = max(0, int(max_node_retries))
+        self._actor_class = None
+        print(f"Ray cluster: {int(self.resources.get('CPU', 0))} CPU(s), {int(self.resources.get('GPU', 0))} GPU(s) "
+              f"on {len(ray.nodes())} node(s); {self.num_gpus_per_job:g} GPU(s) per job.")
+
+    @staticmethod
+    def name() -> str:
+        return "ray"
+
+    def actor_class(self):
+        import ray
+        if self._actor_class is None:
+            # A lost actor is replaced by the follower, not restarted by Ray, so that the
+            # job starts again from its original staging files
+            self._actor_class = ray.remote(max_restarts=0, max_concurrency=2)(RemoteCommand)
+        return self._actor_class
+
+    def capacity(self) -> Optional[int]:
+        if self.num_gpus_per_job:
+            return max(1, int(self.resources.get("GPU", 0) // self.num_gpus_per_job))
+        return max(1, int(self.resources.get("CPU", 1) // max(self.num_cpus_per_job, 1e-9)))
+
+    def submit(self, command: List[str], log_dir: str, env: Optional[Dict[str, str]] = None,
+               echo: bool = True, stall_timeout: float = 120.0,
+               on_line: Optional[Callable[[str, str, float], None]] = None,
+               device: Optional[int] = None) -> StreamingProcess:
+        process = RayProcess(self, command, log_dir, env=env, echo=echo, stall_timeout=stall_timeout,
+                             on_line=on_line, num_gpus=self.num_gpus_per_job)
+        process.start()
+        return process
+
+    def shutdown(self) -> None:
+        if self._owns_ray:
+            import ray
+            ray.shutdown()
+            self._owns_ray = False
@@ -1 +1,3 @@
-from .lighteval_runner import LightevalRunner
\ No newline at end of file
+from .lighteval_runner import LightevalRunner
+from .lighteval_python_runner import LightevalPythonRunner
+from .load_test_runner import LoadTestRunner
@@ -0,0 +1,126 @@
+import json
+import os
+import tempfile
+from typing import Dict, Any, Callable, Optional
+
+from ..config import RESULTS_DIR, DTYPE_BYTES, QUANTIZATION_BYTES
+from ..utils.process_utils import StreamingProcess, lines_have_oom
+
+# Rough per-sample activation/KV-cache cost as a fraction of the weights' size. It only
+# seeds the search; the probe runs find the real limit.
+PER_SAMPLE_WEIGHT_FRACTION = 0.05
+MIN_PER_SAMPLE_GB = 0.25
+
+DEFAULT_MAX_BATCH_SIZE = 512
+
+
+class BatchSizeProbeError(RuntimeError):
+    pass
+
+
+def estimate_initial_batch_size(gpu_memory_gb: Optional[float], num_params: Optional[int],
+                                dtype: str = "auto", max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                                quantization: str = "none") -> int:
+    if not isinstance(gpu_memory_gb, (int, float)) or not num_params:
+        return 1
+    weights_gb = num_params * QUANTIZATION_BYTES.get(quantization, DTYPE_BYTES.get(dtype, 2)) / (1024**3)
+    headroom_gb = gpu_memory_gb * 0.9 - weights_gb
+    if headroom_gb <= 0:
+        return 1
+    per_sample_gb = max(MIN_PER_SAMPLE_GB, weights_gb * PER_SAMPLE_WEIGHT_FRACTION)
+    return max(1, min(max_batch_size, int(headroom_gb / per_sample_gb)))
+
+
+def search_batch_size(probe: Callable[[int], bool], start: int = 1,
+                      max_batch_size: int = DEFAULT_MAX_BATCH_SIZE) -> int:
+    # probe(batch_size) returns True when the batch size fits in memory.
+    # Grow geometrically from the estimate until the first OOM, then binary search
+    # between the largest size that fit and the smallest that did not.
+    start = max(1, min(start, max_batch_size))
+    if probe(start):
+        good, bad = start, None
+        while bad is None and good < max_batch_size:
+            candidate = min(good * 2, max_batch_size)
+            if probe(candidate):
+                good = candidate
+            else:
+                bad = candidate
+        if bad is None:
+            return good
+    else:
+        if start == 1:
+            raise BatchSizeProbeError("Batch size 1 does not fit in GPU memory.")
+        good, bad = 0, start
+
+    while bad - good > 1:
+        mid = (good + bad) // 2
+        if probe(mid):
+            good = mid
+        else:
+            bad = mid
+    if good == 0:
+        raise BatchSizeProbeError("Batch size 1 does not fit in GPU memory.")
+    return good
+
+
+class BatchSizeStore:
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(RESULTS_DIR, "autotune", "batch_sizes.json")
+
+    @staticmethod
+    def make_key(model_id: str, gpu_name: str, dtype: str) -> str:
+        return f"{model_id}|{gpu_name}|{dtype}"
+
+    def _load(self) -> Dict[str, Any]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def get(self, model_id: str, gpu_name: str, dtype: str) -> Optional[int]:
+        entry = self._load().get(self.make_key(model_id, gpu_name, dtype))
+        return entry["batch_size"] if entry else None
+
+    def put(self, model_id: str, gpu_name: str, dtype: str, batch_size: int) -> None:
+        data = self._load()
+        data[self.make_key(model_id, gpu_name, dtype)] = {
+            "model_id": model_id,
+            "gpu_name": gpu_name,
+            "dtype": dtype,
+            "batch_size": batch_size,
+        }
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def make_lighteval_probe(runner, task_details: Dict[str, Any], backend: str,
+                         max_samples: int = 16, **kwargs) -> Callable[[int], bool]:
+    # Short lighteval runs on a handful of samples; OOM means the batch size is too large.
+    # Each probe evaluates at least batch_size samples: with fewer, the batch is never full
+    # and any batch size would seem to fit.
+    def probe(batch_size: int) -> bool:
+        with tempfile.TemporaryDirectory(prefix="gemmabench_autotune_") as probe_dir:
+            probe_kwargs = dict(kwargs)
+            probe_kwargs["override-batch-size"] = batch_size
+            probe_kwargs["output_dir"] = probe_dir
+            probe_kwargs["save_details"] = False
+            command, _ = runner.build_command(task_details, backend, **probe_kwargs)
+            command.extend(["--max-samples", str(max(batch_size, max_samples))])
+            print(f"  Probing batch size {batch_size}...")
+            process = StreamingProcess(command, log_dir=probe_dir, env=os.environ.copy(), echo=False)
+            process.start()
+            returncode = process.wait()
+            if returncode == 0:
+                return True
+            if lines_have_oom(process.tail("stderr")):
+                return False
+            raise BatchSizeProbeError(
+                f"Probe run failed with return code {returncode} (not an OOM):\n"
+                + "\n".join(process.tail("stderr")[-20:]))
+    return probe
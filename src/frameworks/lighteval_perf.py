@@ -0,0 +1,55 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+from ..utils.process_utils import parse_progress
+
+# lighteval's pipeline logs a banner such as "--- RUNNING MODEL ---" at each stage
+_STAGE_MARKER_RE = re.compile(r"--- ([A-Z][A-Z ]*[A-Z]) ---")
+
+
+class LightevalPhaseTracker:
+    # Splits a lighteval run's wall-clock time into phases from the output lines it
+    # produces (passed in as StreamingProcess's on_line callback). Stage banners are used
+    # when present; otherwise the first and last progress bar bound the evaluation.
+    def __init__(self):
+        self.stage_times: Dict[str, float] = {}
+        self.first_progress_at: Optional[float] = None
+        self.last_progress_at: Optional[float] = None
+
+    def on_line(self, name: str, line: str, now: float) -> None:
+        match = _STAGE_MARKER_RE.search(line)
+        if match:
+            self.stage_times.setdefault(match.group(1), now)
+            return
+        if parse_progress(line) is not None:
+            if self.first_progress_at is None:
+                self.first_progress_at = now
+            self.last_progress_at = now
+
+    def _next_stage_after(self, stage: str) -> Optional[float]:
+        start = self.stage_times[stage]
+        later = [t for t in self.stage_times.values() if t > start]
+        return min(later) if later else None
+
+    def phases(self, started_at: float, ended_at: float) -> Tuple[Dict[str, Optional[float]], List[str]]:
+        phases = {"model_load": None, "evaluation": None, "post_processing": None}
+        notes: List[str] = []
+
+        if "RUNNING MODEL" in self.stage_times:
+            if "LOADING MODEL" in self.stage_times:
+                load_end = self._next_stage_after("LOADING MODEL") or self.stage_times["RUNNING MODEL"]
+                phases["model_load"] = load_end - self.stage_times["LOADING MODEL"]
+            eval_start = self.stage_times["RUNNING MODEL"]
+            eval_end = self._next_stage_after("RUNNING MODEL") or self.last_progress_at or ended_at
+            phases["evaluation"] = eval_end - eval_start
+            phases["post_processing"] = ended_at - eval_end
+        elif self.first_progress_at is not None:
+            notes.append("No lighteval stage banners in the output; phases estimated from progress bars "
+                         "(model_load includes process start-up and task loading).")
+            phases["model_load"] = self.first_progress_at - started_at
+            phases["evaluation"] = self.last_progress_at - self.first_progress_at
+            phases["post_processing"] = ended_at - self.last_progress_at
+        else:
+            notes.append("No lighteval stage banners or progress bars in the output; only the total is known.")
+
+        return phases, notes
@@ -0,0 +1,243 @@
+import gc
+import os
+import time
+import traceback
+from typing import Dict, Any, List, Optional, Callable
+
+from ..benchmarker import BenchmarkRunner
+from ..config import VALID_DTYPES, QUANTIZATION_BACKENDS
+from ..results import find_results_file, load_results_file, count_samples, details_token_stats
+from ..utils.process_utils import TelemetrySampler, DEFAULT_TELEMETRY_INTERVAL_S
+from .lighteval_runner import LightevalRunner
+
+# Backends that lighteval's Python pipeline can drive in this process
+PYTHON_PIPELINE_BACKENDS = ("accelerate", "vllm")
+
+
+class LightevalPythonRunner(BenchmarkRunner):
+    # Drives lighteval's Pipeline in-process so one loaded model serves many tasks,
+    # instead of paying the model load (and vLLM engine start) once per CLI invocation.
+    def __init__(self, model_id: str, hf_token: Optional[str] = None):
+        super().__init__(model_id=model_id, hf_token=hf_token)
+        self._model = None
+        self._model_key = None
+        # Results are cached under the CLI runner's keys: its runs and these are interchangeable
+        self._cli_runner = LightevalRunner(model_id=model_id, hf_token=hf_token)
+
+    @staticmethod
+    def framework_name() -> str:
+        # Same results layout as the CLI runner so the two are interchangeable
+        return "lighteval"
+
+    def _model_config(self, backend: str, **kwargs):
+        # AWQ/GPTQ checkpoints are recognized from their own config by both backends;
+        # bitsandbytes modes quantize while transformers loads the weights
+        quantization = kwargs.get("quantization") or "none"
+        if quantization != "none" and backend not in QUANTIZATION_BACKENDS.get(quantization, []):
+            raise ValueError(f"Quantization '{quantization}' is not supported on the {backend} backend.")
+        # Pinned to the commit the results are cached under
+        options = {"pretrained": self.model_id, "trust_remote_code": True}
+        revision = self._cli_runner.model_revision()
+        if revision:
+            options["revision"] = revision
+        if backend == "vllm":
+            from lighteval.models.vllm.vllm_model import VLLMModelConfig
+            dtype = kwargs.get("dtype", "auto")
+            if dtype not in VALID_DTYPES:
+                print(f"Warning: Invalid dtype '{dtype}'. Using 'auto' instead.")
+                dtype = "auto"
+            if quantization == "awq":
+                dtype = "float16"  # vLLM's AWQ kernels only run in float16
+            return VLLMModelConfig(dtype=dtype, **options)
+
+        from lighteval.models.transformers.transformers_model import TransformersModelConfig
+        if quantization.startswith("bnb-"):
+            from .lighteval_quantized import bnb_config
+            return TransformersModelConfig(quantization_config=bnb_config(quantization), **options)
+        return TransformersModelConfig(**options)
+
+    def _pipeline_parameters(self, backend: str, **kwargs):
+        from lighteval.pipeline import ParallelismManager, PipelineParameters
+        launcher_type = ParallelismManager.VLLM if backend == "vllm" else ParallelismManager.ACCELERATE
+        params = {"launcher_type": launcher_type}
+        if backend != "vllm":
+            params["override_batch_size"] = int(kwargs.get("override-batch-size", 1))
+        if kwargs.get("max_samples"):
+            params["max_samples"] = int(kwargs["max_samples"])
+        return PipelineParameters(**params)
+
+    def release_model(self) -> None:
+        if self._model is None:
+            return
+        try:
+            self._model.cleanup()
+        except Exception as e:
+            print(f"Warning: Model cleanup failed: {e}")
+        self._model = None
+        self._model_key = None
+        gc.collect()
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+
+    def _evaluate(self, task_details: Dict[str, Any], backend: str, **kwargs) -> bool:
+        from lighteval.logging.evaluation_tracker import EvaluationTracker
+        from lighteval.pipeline import Pipeline
+
+        task_string = (f"{task_details['task_identifier']}|{task_details['num_few_shot']}"
+                       f"|{int(task_details['allow_truncation'])}")
+        batch_size = None if backend == "vllm" else int(kwargs.get("override-batch-size", 1))
+        dtype = kwargs.get("dtype", "auto") if backend == "vllm" else "auto"
+        quantization = kwargs.get("quantization") or "none"
+        quantization_fields = {"quantization": quantization} if quantization != "none" else {}
+        config = self.run_config([task_string], backend, dtype=dtype, batch_size=batch_size,
+                                 max_samples=kwargs.get("max_samples"), **quantization_fields)
+        run_output_dir = self.make_run_output_dir(task_string, backend, config=config,
+                                                  output_dir=kwargs.get("output_dir"))
+        staging_dir = self.run_staging_dir(run_output_dir)
+        self.last_output_dir = run_output_dir
+        print(f"\nEvaluating {task_string} in-process (output: {run_output_dir})")
+
+        model_key = (backend, kwargs.get("dtype", "auto"), kwargs.get("override-batch-size", 1), quantization)
+        if self._model is not None and self._model_key != model_key:
+            self.release_model()
+
+        evaluation_tracker = EvaluationTracker(output_dir=staging_dir, save_details=True)
+        pipeline_kwargs = {
+            "tasks": task_string,
+            "pipeline_parameters": self._pipeline_parameters(backend, **kwargs),
+            "evaluation_tracker": evaluation_tracker,
+        }
+        if self._model is None:
+            print(f"Loading model {self.model_id} ({backend})...")
+            pipeline_kwargs["model_config"] = self._model_config(backend, **kwargs)
+        else:
+            pipeline_kwargs["model"] = self._model
+
+        sampler = None
+        telemetry_interval = kwargs.get("telemetry_interval", DEFAULT_TELEMETRY_INTERVAL_S)
+        if telemetry_interval:
+            # The model runs in this process, so this process is the one sampled
+            sampler = TelemetrySampler(os.getpid(), staging_dir, interval_s=telemetry_interval)
+            sampler.start()
+        try:
+            started_at = time.monotonic()
+            pipeline = Pipeline(**pipeline_kwargs)
+            # Keep the loaded model for the following tasks
+            self._model = pipeline.model
+            self._model_key = model_key
+
+            evaluation_started_at = time.monotonic()
+            pipeline.evaluate()
+            evaluation_ended_at = time.monotonic()
+            pipeline.save_and_push_results()
+            pipeline.show_results()
+            ended_at = time.monotonic()
+        finally:
+            if sampler is not None:
+                telemetry_file = sampler.stop()
+                if telemetry_file:
+                    print(f"Resource telemetry: {telemetry_file}")
+
+        results_file = find_results_file(staging_dir)
+        if results_file is None:
+            print(f"Evaluation completed, but no results file found in {staging_dir}.")
+
+        token_stats = details_token_stats(staging_dir) or {}
+        num_samples = token_stats.get("num_samples")
+        if not num_samples and results_file is not None:
+            results = load_results_file(results_file)
+            num_samples = count_samples(results) if results else None
+        # Pipeline construction loads the tasks as well as the model; with a reused model
+        # model_load is only the task loading
+        notes = [] if "model_config" in pipeline_kwargs else ["Model was already loaded by a previous task."]
+        self.write_perf_report(
+            staging_dir, backend, [task_string], total_s=ended_at - started_at,
+            model_load_s=evaluation_started_at - started_at,
+            evaluation_s=evaluation_ended_at - evaluation_started_at,
+            post_processing_s=ended_at - evaluation_ended_at, num_samples=num_samples,
+            prompt_tokens=token_stats.get("prompt_tokens"),
+            generated_tokens=token_stats.get("generated_tokens"), notes=notes)
+        if not self.commit_run(run_output_dir):
+            return False
+        self.last_results_file = find_results_file(run_output_dir)
+        if self.last_results_file is not None:
+            print(f"Main results file: {self.last_results_file}")
+        return True
+
+    def run_tasks(self, task_details_list: List[Dict[str, Any]], backend: str,
+                  keep_model_loaded: bool = False,
+                  on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+                  **kwargs) -> List[Dict[str, Any]]:
+        # Returns one {"task_details", "success", "output_dir"} record per task, in order.
+        # on_result is called as soon as each task finishes (e.g. to journal progress).
+        # Tasks with cached results are not evaluated again unless force_rerun is set.
+        records = []
+        setup_error = None
+        quantization = None
+        if backend not in PYTHON_PIPELINE_BACKENDS:
+            setup_error = (f"Backend '{backend}' is not supported by the in-process runner. "
+                           f"Supported backends: {list(PYTHON_PIPELINE_BACKENDS)}")
+        else:
+            # Resolved as the CLI runner resolves it, so the runs of both are cached under the same key
+            quantization = self._cli_runner.resolve_quantization(backend, **kwargs)
+            if quantization is None:
+                setup_error = f"Quantization '{kwargs.get('quantization')}' cannot be used for {self.model_id}."
+            kwargs["quantization"] = quantization
+        if not setup_error:
+            try:
+                import lighteval  # noqa: F401
+            except ImportError:
+                setup_error = "lighteval is not installed in this environment (pip install lighteval...)."
+        if setup_error:
+            print(f"\nError: {setup_error}")
+
+        try:
+            for task_details in task_details_list:
+                self.last_output_dir = None
+                self.last_results_file = None
+                cached = None
+                if quantization is not None:
+                    cached = self._cli_runner.lookup_cached_run(task_details, backend, **kwargs)
+                if cached is not None:
+                    print(f"\nFound cached results for {task_details['task_identifier']}: {cached['results_file']}")
+                    self.last_output_dir = cached["run_output_dir"]
+                    self.last_results_file = cached["results_file"]
+                    success = True
+                elif setup_error:
+                    success = False
+                else:
+                    try:
+                        success = self._evaluate(task_details, backend, **kwargs)
+                    except KeyboardInterrupt:
+                        raise
+                    except Exception as e:
+                        print(f"\nError: In-process evaluation of {task_details['task_identifier']} failed: {e}")
+                        traceback.print_exc()
+                        self.abandon_run(self.last_output_dir, str(e))
+                        success = False
+                    if success and self.last_results_file is not None:
+                        self._cli_runner.store_cached_run(task_details, backend, self.last_output_dir, **kwargs)
+                record = {
+                    "task_details": task_details,
+                    "success": success,
+                    "output_dir": self.last_output_dir,
+                    "results_file": self.last_results_file,
+                }
+                records.append(record)
+                if on_result is not None:
+                    on_result(record)
+        finally:
+            if not keep_model_loaded:
+                self.release_model()
+        return records
+
+    def run(self, task_details: Dict[str, Any], backend: str, **kwargs) -> bool:
+        print(f"\nStarting in-process lighteval benchmark for model: {self.model_id}")
+        print(f"Task details: {task_details}")
+        print(f"Using backend: {backend}")
+        records = self.run_tasks([task_details], backend, **kwargs)
+        return records[0]["success"]
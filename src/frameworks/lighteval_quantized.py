@@ -0,0 +1,54 @@
+# Runs the lighteval CLI with bitsandbytes quantization:
+#
+#   python -m src.frameworks.lighteval_quantized bnb-4bit accelerate "pretrained=..." <tasks> ...
+#
+# lighteval's accelerate command only takes a BitsAndBytesConfig through a model YAML
+# file, whose loader in lighteval 0.8.x fails on its own example config. This launcher gives
+# every TransformersModelConfig the requested quantization config instead, then hands the
+# remaining arguments to lighteval's CLI unchanged.
+import sys
+
+BNB_MODES = ("bnb-8bit", "bnb-4bit")
+
+
+def bnb_config(quantization: str):
+    import torch
+    from transformers import BitsAndBytesConfig
+
+    if quantization == "bnb-8bit":
+        return BitsAndBytesConfig(load_in_8bit=True)
+    if quantization == "bnb-4bit":
+        # Gemma's activations overflow in float16, so compute in bfloat16 where supported
+        compute_dtype = torch.bfloat16 if torch.cuda.is_available() and torch.cuda.is_bf16_supported() \
+            else torch.float16
+        return BitsAndBytesConfig(load_in_4bit=True, bnb_4bit_quant_type="nf4",
+                                  bnb_4bit_compute_dtype=compute_dtype)
+    raise ValueError(f"Unknown bitsandbytes mode '{quantization}'; expected one of {BNB_MODES}.")
+
+
+def main() -> None:
+    if len(sys.argv) < 3 or sys.argv[1] not in BNB_MODES:
+        print(f"usage: python -m {__package__ or 'src.frameworks'}.lighteval_quantized "
+              f"{{{','.join(BNB_MODES)}}} <lighteval arguments>", file=sys.stderr)
+        sys.exit(2)
+    quantization_config = bnb_config(sys.argv[1])
+
+    from lighteval.models.transformers import transformers_model
+    base_config = transformers_model.TransformersModelConfig
+
+    class QuantizedModelConfig(base_config):
+        def __post_init__(self):
+            if self.quantization_config is None:
+                self.quantization_config = quantization_config
+            super().__post_init__()
+
+    # main_accelerate imports the config class when the command runs, so it gets this one
+    transformers_model.TransformersModelConfig = QuantizedModelConfig
+
+    from lighteval.__main__ import app
+    sys.argv = ["lighteval", *sys.argv[2:]]
+    app()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,43 +1,345 @@
-import subprocess
 import os
+import sys
 import json
-import datetime
 import shlex
-from typing import Dict
+import time
+import yaml
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 from ..benchmarker import BenchmarkRunner
-from ..config import LIGHTEVAL_BACKENDS, VALID_DTYPES
+from ..executors import JobExecutor
+from ..config import LIGHTEVAL_BACKENDS, VALID_DTYPES, VALID_QUANTIZATIONS, QUANTIZATION_BACKENDS
+from ..results import (find_results_file, load_results, write_task_results, ResultCache,
+                       RunHistory, count_samples, details_token_stats, analyze_details)
+from ..utils.hf_utils import (get_model_revision, get_model_parameter_count, get_model_checkpoint_bytes,
+                              get_model_quantization)
+from ..utils.system_utils import get_system_info, predict_memory_fit, fit_quantization
+from .batch_autotune import (BatchSizeStore, BatchSizeProbeError, estimate_initial_batch_size,
+                             search_batch_size, make_lighteval_probe)
+from ..utils.process_utils import TelemetrySampler, lines_have_oom, DEFAULT_TELEMETRY_INTERVAL_S
+from ..utils.endpoint_utils import (get_endpoint_proxy, LATENCY_FILENAME, DEFAULT_ENDPOINT_CONCURRENCY,
+                                    DEFAULT_ENDPOINT_MAX_RETRIES, DEFAULT_ENDPOINT_TIMEOUT_S)
+from ..results.run_layout import run_id_from_dir, safe_name
+from .lighteval_perf import LightevalPhaseTracker
+from .quick_eval import (round_sample_sizes, stratified_estimate, decide, quick_record,
+                         DEFAULT_INITIAL_SAMPLES, DEFAULT_GROWTH, DEFAULT_MAX_ROUNDS,
+                         DEFAULT_TARGET_HALF_WIDTH, DEFAULT_TOLERANCE)
 
 
 class LightevalRunner(BenchmarkRunner):
+    def __init__(self, model_id: str, hf_token: Optional[str] = None, executor: Optional[JobExecutor] = None):
+        super().__init__(model_id=model_id, hf_token=hf_token, executor=executor)
+        self._revision: Optional[str] = None
+        self._revision_resolved = False
+        self._num_params: Optional[int] = None
+        self._num_params_resolved = False
+        self._quant_method: Optional[str] = None
+        self._quant_method_resolved = False
+        # Endpoint runs in flight: run key -> the proxy their requests go through
+        self._endpoint_runs: Dict[str, object] = {}
+
     @staticmethod
     def framework_name() -> str:
         return "lighteval"
 
-    def run(self, task_details: Dict, backend: str, **kwargs) -> bool:
-        print(f"\nStarting lighteval benchmark for model: {self.model_id}")
-        print(f"Task details: {task_details}")
-        print(f"Using backend: {backend}")
+    def _resolve_dtype(self, backend: str, **kwargs) -> str:
+        if backend != "vllm":
+            return "auto"
+        selected_dtype = kwargs.get("dtype", "auto")
+        return selected_dtype if selected_dtype in VALID_DTYPES else "auto"
+
+    def checkpoint_quantization(self) -> Optional[str]:
+        # quant_method of a checkpoint quantized ahead of time, or None
+        if not self._quant_method_resolved:
+            self._quant_method = get_model_quantization(self.model_id)
+            self._quant_method_resolved = True
+        return self._quant_method
+
+    def resolve_quantization(self, backend: str, **kwargs) -> Optional[str]:
+        # The quantization mode a run will use, or None (after printing why) when the run
+        # cannot go ahead as asked. Modes are checked against the memory-fit predictor: 'auto'
+        # downgrades to the least compressed mode that fits, a quantized mode that does not fit
+        # is rejected (unless skip_memory_check is set) and 'none' only warns.
+        quantization = kwargs.get("quantization") or "none"
+        if quantization not in VALID_QUANTIZATIONS:
+            print(f"Error: Unknown quantization '{quantization}'. Choose from: {VALID_QUANTIZATIONS}")
+            return None
+        if quantization not in ("none", "auto") and backend not in QUANTIZATION_BACKENDS[quantization]:
+            print(f"Error: Quantization '{quantization}' needs one of the backends "
+                  f"{QUANTIZATION_BACKENDS[quantization]}, not '{backend}'.")
+            return None
+        if backend not in ("accelerate", "vllm"):
+            return "none"
+
+        quant_method = self.checkpoint_quantization()
+        if quant_method in ("awq", "gptq"):
+            if quantization in ("none", "auto"):
+                print(f"{self.model_id} is quantized with {quant_method.upper()}; evaluating it as '{quant_method}'.")
+                quantization = quant_method
+            elif quantization != quant_method:
+                print(f"Error: {self.model_id} is quantized with {quant_method.upper()} and cannot be "
+                      f"evaluated as '{quantization}'.")
+                return None
+        elif quantization in ("awq", "gptq"):
+            print(f"Error: {self.model_id} is not quantized with {quantization.upper()} (its config has no "
+                  f"quantization_config with quant_method '{quantization}').")
+            return None
+        elif quant_method is not None:
+            # Quantized ahead of time some other way (e.g. a saved bitsandbytes model): it loads as stored
+            if quantization not in ("none", "auto"):
+                print(f"Error: {self.model_id} is already quantized ({quant_method}); "
+                      f"'{quantization}' cannot be applied on top.")
+                return None
+            return "none"
+
+        if kwargs.get("skip_memory_check") or self.executor.remote:
+            if quantization == "auto":
+                print("Quantization auto: no memory check for this run, using 'none'.")
+                return "none"
+            return quantization
+
+        system_info = get_system_info()
+        dtype = self._resolve_dtype(backend, **kwargs)
+        num_params = self.model_parameter_count()
+        if quantization == "auto":
+            quantization, fit = fit_quantization(system_info, backend, num_params, dtype=dtype)
+            print(f"Quantization auto: using '{quantization}'.")
+        else:
+            checkpoint_bytes = get_model_checkpoint_bytes(self.model_id) if quantization in ("awq", "gptq") else None
+            fit = predict_memory_fit(system_info, backend, num_params, dtype=dtype, quantization=quantization,
+                                     checkpoint_bytes=checkpoint_bytes)
+        print(f"Memory check: {fit['reason']}")
+        if fit["fits"] is False and quantization == "none":
+            # Full precision is what runs always did; the prediction is rough, so only warn
+            print(f"Warning: {self.model_id} is not expected to fit this machine's GPU memory unquantized. "
+                  f"Consider quantization 'auto'.")
+        elif fit["fits"] is False:
+            print(f"Error: {self.model_id} is not expected to fit this machine's GPU memory with "
+                  f"quantization '{quantization}' on {backend}.")
+            print("Choose a more compressed quantization (or 'auto'), or pass skip_memory_check to run anyway.")
+            return None
+        return quantization
+
+    def cache_params(self, task_details: Dict, backend: str, **kwargs) -> Optional[Dict]:
+        if backend == "endpoint":
+            return None  # what a server answers can change without a revision to key on
+        revision = self.model_revision()
+        if revision is None:
+            return None
+        return {
+            "framework": self.framework_name(),
+            "model_id": self.model_id,
+            "revision": revision,
+            "task": task_details['task_identifier'],
+            "num_few_shot": int(task_details['num_few_shot']),
+            "allow_truncation": int(task_details['allow_truncation']),
+            "backend": backend,
+            "dtype": self._resolve_dtype(backend, **kwargs),
+            "batch_size": None if backend == "vllm" else self._cache_batch_size(kwargs.get("override-batch-size", 1)),
+            **self._quantization_fields(**kwargs),
+        }
+
+    @staticmethod
+    def _cache_batch_size(batch_size: Any) -> Any:
+        # "auto" is a key of its own: runs that asked for it are stored under it as well as
+        # under the batch size autotune picked, so a repeat finds them without probing
+        return batch_size if batch_size == "auto" else int(batch_size)
+
+    def _store_cached_runs(self, task_details: Dict, backend: str, run_output_dir: str,
+                           results_file: Optional[str] = None, auto_batch_size: bool = False,
+                           **kwargs) -> None:
+        self.store_cached_run(task_details, backend, run_output_dir, results_file=results_file, **kwargs)
+        if auto_batch_size:
+            self.store_cached_run(task_details, backend, run_output_dir, results_file=results_file,
+                                  **dict(kwargs, **{"override-batch-size": "auto"}))
+
+    @staticmethod
+    def _quantization_fields(**kwargs) -> Dict[str, str]:
+        # Only quantized runs carry the field, so full-precision run IDs and cache keys are unchanged
+        quantization = kwargs.get("quantization") or "none"
+        return {"quantization": quantization} if quantization not in ("none", "auto") else {}
+
+    def model_revision(self) -> Optional[str]:
+        # The commit sha results are cached under, asked of the Hub itself (not its metadata
+        # cache) once per runner
+        if not self._revision_resolved:
+            self._revision = get_model_revision(self.model_id, refresh=True)
+            self._revision_resolved = True
+        return self._revision
+
+    def model_parameter_count(self) -> Optional[int]:
+        if not self._num_params_resolved:
+            self._num_params = get_model_parameter_count(self.model_id)
+            self._num_params_resolved = True
+        return self._num_params
+
+    def lookup_cached_run(self, task_details: Dict, backend: str, **kwargs) -> Optional[Dict]:
+        if kwargs.get("force_rerun") or not kwargs.get("use_cache", True):
+            return None
+        params = self.cache_params(task_details, backend, **kwargs)
+        if params is None:
+            return None
+        return ResultCache().lookup(params)
+
+    def store_cached_run(self, task_details: Dict, backend: str, run_output_dir: str,
+                         results_file: Optional[str] = None, **kwargs) -> None:
+        if not kwargs.get("use_cache", True):
+            return
+        params = self.cache_params(task_details, backend, **kwargs)
+        if params is not None:
+            ResultCache().store(params, run_output_dir, results_file=results_file)
+
+    def record_run_history(self, backend: str, success: bool, oom: bool, device: Optional[int] = None,
+                           **kwargs) -> None:
+        # Feeds the backend recommender: what ran on which hardware, how fast, and whether it fit.
+        # Endpoint runs, and runs on other hosts, say nothing about the local hardware.
+        if backend == "endpoint" or self.executor.remote:
+            return
+        system_info = get_system_info()
+        gpus = system_info.get('gpu_devices') or []
+        if device is not None:
+            gpus = [gpu for gpu in gpus if gpu.get('index') == device]
+        perf = self.last_perf_report or {}
+        RunHistory().append({
+            "timestamp": time.time(),
+            "model_id": self.model_id,
+            "num_params": self.model_parameter_count(),
+            "backend": backend,
+            "dtype": self._resolve_dtype(backend, **kwargs),
+            "batch_size": None if backend == "vllm" else kwargs.get("override-batch-size", 1),
+            "quantization": kwargs.get("quantization") or "none",
+            "gpu_name": gpus[0].get('name') if gpus else None,
+            "gpu_count": len(gpus),
+            "gpu_memory_gb": gpus[0].get('memory_total_gb') if gpus else None,
+            "success": success,
+            "oom": oom,
+            "samples_per_s": perf.get("samples_per_s") if success else None,
+            "generated_tokens_per_s": perf.get("generated_tokens_per_s") if success else None,
+        })
+
+    def autotune_batch_size(self, task_details: Dict, backend: str, **kwargs) -> int:
+        if self.executor.remote:
+            # The probes would measure this machine's GPU, not the one the job lands on
+            print(f"Batch size autotune: jobs run on {self.executor.name()} nodes, using batch size 1.")
+            return 1
+        system_info = get_system_info()
+        gpus = system_info.get('gpu_devices') or []
+        if not system_info.get('gpu_available') or not gpus:
+            print("Batch size autotune: no GPU detected, using batch size 1.")
+            return 1
+
+        gpu = gpus[0]
+        gpu_name = gpu.get('name', 'unknown')
+        dtype = self._resolve_dtype(backend, **kwargs)
+        quantization = kwargs.get("quantization") or "none"
+        # Quantized runs get their own entry: smaller weights leave room for bigger batches
+        store_dtype = dtype if quantization == "none" else f"{dtype}+{quantization}"
+        store = BatchSizeStore()
+        stored = store.get(self.model_id, gpu_name, store_dtype)
+        if stored is not None:
+            print(f"Batch size autotune: using stored batch size {stored} for {self.model_id} on {gpu_name}.")
+            return stored
 
+        gpu_memory_gb = gpu.get('memory_free_gb')
+        if not isinstance(gpu_memory_gb, (int, float)):
+            gpu_memory_gb = gpu.get('memory_total_gb')
+        num_params = self.model_parameter_count()
+        start = estimate_initial_batch_size(gpu_memory_gb, num_params, dtype, quantization=quantization)
+        print(f"Batch size autotune: starting from estimate {start} "
+              f"({num_params or 'unknown'} parameters, {gpu_memory_gb} GB on {gpu_name}).")
+
+        probe_kwargs = {k: v for k, v in kwargs.items() if k not in ("override-batch-size", "output_dir")}
+        probe = make_lighteval_probe(self, task_details, backend, **probe_kwargs)
+        try:
+            batch_size = search_batch_size(probe, start=start)
+        except BatchSizeProbeError as e:
+            print(f"Warning: Batch size autotune failed ({e}). Using batch size 1.")
+            return 1
+
+        store.put(self.model_id, gpu_name, store_dtype, batch_size)
+        print(f"Batch size autotune: selected batch size {batch_size}.")
+        return batch_size
+
+    @staticmethod
+    def task_string(task_details: Dict) -> str:
+        # Format: suite|task_name|num_few_shot|allow_truncation
+        return (f"{task_details['task_identifier']}|{task_details['num_few_shot']}"
+                f"|{int(task_details['allow_truncation'])}")
+
+    def build_command(self, task_details: Union[Dict, List[Dict]], backend: str,
+                      **kwargs) -> Optional[Tuple[List[str], str]]:
+        # A list of task details is packed into a single comma-separated lighteval task argument
         if backend not in LIGHTEVAL_BACKENDS:
             print(
                 f"Error: Backend '{backend}' is not recognized for lighteval.")
             print(f"Supported backends: {list(LIGHTEVAL_BACKENDS.keys())}")
-            return False
+            return None
 
         lighteval_launcher = LIGHTEVAL_BACKENDS[backend]
+        task_details_list = task_details if isinstance(task_details, list) else [task_details]
+        if backend == "endpoint" and not kwargs.get("base_url"):
+            print("Error: The endpoint backend needs the server's base URL (base_url).")
+            return None
+
+        # "endpoint openai" is a sub-command. bitsandbytes runs go through a launcher that
+        # hands lighteval's CLI the quantization config it cannot take as an argument.
+        quantization = kwargs.get("quantization") or "none"
+        if quantization.startswith("bnb-"):
+            command = [sys.executable, "-m", f"{__package__}.lighteval_quantized", quantization,
+                       *lighteval_launcher.split()]
+        else:
+            command = ["lighteval", *lighteval_launcher.split()]
+        task_strings = [self.task_string(t) for t in task_details_list]
+
+        # Output directory: lighteval writes to the staging directory, which _execute
+        # renames to run_output_dir once the run has succeeded
+        batch_size = None
+        if backend not in ("vllm", "endpoint"):
+            batch_size = kwargs.get("override-batch-size", 1)
+        endpoint_fields = {"base_url": kwargs["base_url"]} if backend == "endpoint" else {}
+        dir_label = task_strings[0] if len(task_strings) == 1 else f"{task_strings[0]}+{len(task_strings) - 1}more"
+        config = self.run_config(task_strings, backend, dtype=self._resolve_dtype(backend, **kwargs),
+                                 batch_size=batch_size, max_samples=kwargs.get("max_samples"),
+                                 **self._quantization_fields(**kwargs), **endpoint_fields)
+        run_output_dir = self.make_run_output_dir(dir_label, backend, config=config,
+                                                  output_dir=kwargs.get("output_dir"))
+        staging_dir = self.run_staging_dir(run_output_dir)
 
-        task_identifier = task_details['task_identifier']
-        num_few_shot = task_details['num_few_shot']
-        allow_truncation = task_details['allow_truncation']  # Boolean
-        allow_truncation_int = int(allow_truncation)
+        # --- Model arguments ---
+        if backend == "endpoint":
+            command.append(self.write_endpoint_config(staging_dir, **kwargs))
+        else:
+            command.append(self._model_args_string(backend, **kwargs))
 
-        command = ["lighteval", lighteval_launcher]
+        # --- Task arguments string ---
+        command.append(",".join(task_strings))
 
-        # --- Model arguments string ---
+        # --- Optional arguments ---
+        # Override batch size (optional)
+        if batch_size is not None:
+            command.extend(["--override-batch-size", str(batch_size)])
+
+        # Per-sample details (parquet) unless save_details=False: the only source of token
+        # counts, and what the details and compare commands read. Then a cap on samples per
+        # task (lighteval takes the first N).
+        if kwargs.get("save_details", True) and backend != "nanotron":
+            command.append("--save-details")
+        if kwargs.get("max_samples"):
+            command.extend(["--max-samples", str(int(kwargs["max_samples"]))])
+
+        command.extend(["--output-dir", staging_dir])
+
+        return command, run_output_dir
+
+    def _model_args_string(self, backend: str, **kwargs) -> str:
         model_args_list = [
             f"pretrained={self.model_id}",
             "trust_remote_code=True"
         ]
+        # Evaluate the commit the run is cached under, not whatever the branch points at
+        # by the time lighteval downloads the weights
+        revision = self.model_revision()
+        if revision:
+            model_args_list.append(f"revision={revision}")
 
         if backend == "vllm":
             model_args_str = ",".join(model_args_list)
@@ -48,71 +350,344 @@ class LightevalRunner(BenchmarkRunner):
                         f"Warning: Invalid dtype '{selected_dtype}'. Using 'auto' instead.")
                     selected_dtype = "auto"
 
+                if kwargs.get("quantization") == "awq" and selected_dtype != "float16":
+                    # vLLM's AWQ kernels only run in float16
+                    selected_dtype = "float16"
                 print(f"Using vLLM backend with dtype={selected_dtype}")
                 model_args_list.append(f"dtype={selected_dtype}")
             else:
                 print(
                     "Warning: dtype already specified in model_args_list. Skipping automatic addition.")
 
-        model_args_string = ",".join(model_args_list)
-        command.append(model_args_string)
+        return ",".join(model_args_list)
 
-        # --- Task arguments string ---
-        # Format: suite|task_name:num_few_shot:allow_truncation
-        task_string = f"{task_identifier}|{num_few_shot}|{allow_truncation_int}"
-        command.append(task_string)
+    @staticmethod
+    def _endpoint_run_key(run_output_dir: str) -> str:
+        return run_id_from_dir(run_output_dir) or safe_name(os.path.basename(os.path.normpath(run_output_dir)))
 
-        # --- Optional arguments ---
-        # Override batch size (optional)
-        if backend != "vllm":
-            batch_size = kwargs.get("override-batch-size", 1)
-            command.extend(["--override-batch-size", str(batch_size)])
+    def write_endpoint_config(self, staging_dir: str, **kwargs) -> str:
+        # lighteval's OpenAI client reads its model and server from a YAML file. Its requests
+        # are pointed at the shared local proxy, which holds the real base URL and key,
+        # pools the connections and times every request.
+        proxy = get_endpoint_proxy(
+            kwargs["base_url"], api_key=kwargs.get("api_key") or os.getenv("OPENAI_API_KEY"),
+            concurrency=kwargs.get("concurrency") or DEFAULT_ENDPOINT_CONCURRENCY,
+            max_retries=kwargs.get("max_retries", DEFAULT_ENDPOINT_MAX_RETRIES),
+            request_timeout=kwargs.get("request_timeout") or DEFAULT_ENDPOINT_TIMEOUT_S)
+        run_key = self._endpoint_run_key(staging_dir)
+        self._endpoint_runs[run_key] = proxy
+        generation = {"temperature": 0.0}
+        if kwargs.get("max_new_tokens"):
+            generation["max_new_tokens"] = int(kwargs["max_new_tokens"])
+        endpoint_config = {
+            "model": {"model_name": self.model_id, "generation": generation},
+            # The proxy replaces the key; the OpenAI client just refuses to start without one
+            "api": {"base_url": proxy.url_for(run_key), "api_key": "gemmabench-proxy"},
+        }
+        os.makedirs(staging_dir, exist_ok=True)
+        config_path = os.path.join(staging_dir, "endpoint.yaml")
+        with open(config_path, 'w') as f:
+            yaml.safe_dump(endpoint_config, f, sort_keys=False)
+        print(f"Using endpoint backend: {kwargs['base_url']} (up to {proxy.concurrency} concurrent "
+              f"request(s), {proxy.max_retries} retries)")
+        return config_path
+
+    def run(self, task_details: Dict, backend: str, **kwargs) -> bool:
+        print(f"\nStarting lighteval benchmark for model: {self.model_id}")
+        print(f"Task details: {task_details}")
+        print(f"Using backend: {backend}")
 
-        # Output directory
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_model_name = self.model_id.replace("/", "_")
-        safe_task_string = task_string.replace(":", "_")
-        run_output_dir_name = f"{safe_model_name}_{safe_task_string}_{backend}_{timestamp}"
-        run_output_dir = os.path.join(self.results_dir, run_output_dir_name)
-        command.extend(["--output-dir", run_output_dir])
+        if backend in LIGHTEVAL_BACKENDS:
+            kwargs["quantization"] = self.resolve_quantization(backend, **kwargs)
+            if kwargs["quantization"] is None:
+                return False
 
-        print("\nExecuting command:")
-        print(shlex.join(command))
+        # The cache is checked before autotuning, whose probe runs a cached run does not need
+        if backend in LIGHTEVAL_BACKENDS:
+            cached = self.lookup_cached_run(task_details, backend, **kwargs)
+            if cached is not None:
+                print(f"\nFound cached results for this model revision and configuration: {cached['run_output_dir']}")
+                print("Skipping evaluation (use force_rerun to evaluate again).")
+                self.last_output_dir = cached["run_output_dir"]
+                self.last_results_file = cached["results_file"]
+                return True
 
-        try:
-            process = subprocess.run(
-                command, capture_output=True, text=True, check=True, env=os.environ)
-            print("\n--- lighteval stdout ---")
-            print(process.stdout)
-            if process.stderr:
-                print("--- lighteval stderr ---")
-                print(process.stderr)
-            print("\nBenchmark finished successfully.")
-
-            results_file = os.path.join(run_output_dir, "results.json")
-            if os.path.exists(results_file):
-                print(f"Results saved in directory: {run_output_dir}")
-                print(f"Main results file: {results_file}")
+        auto_batch_size = backend in LIGHTEVAL_BACKENDS and backend not in ("vllm", "endpoint") \
+            and kwargs.get("override-batch-size") == "auto"
+        if auto_batch_size:
+            kwargs["override-batch-size"] = self.autotune_batch_size(task_details, backend, **kwargs)
+
+        built = self.build_command(task_details, backend, **kwargs)
+        if built is None:
+            return False
+        command, run_output_dir = built
+        self.last_output_dir = run_output_dir
+        self.last_results_file = None
+
+        if not self._execute(command, run_output_dir, backend, [self.task_string(task_details)], **kwargs):
+            return False
+
+        results_file = find_results_file(run_output_dir)
+        if results_file is not None:
+            print(f"Results saved in directory: {run_output_dir}")
+            print(f"Main results file: {results_file}")
+            self.last_results_file = results_file
+            self._store_cached_runs(task_details, backend, run_output_dir, auto_batch_size=auto_batch_size, **kwargs)
+        else:
+            print(
+                f"Benchmark completed, but results.json not found in {run_output_dir}. Check logs/stdout.")
+
+        return True
+
+    def run_many(self, task_details_list: List[Dict], backend: str, group_size: int = 8,
+                 on_result: Optional[Callable[[int, Dict], None]] = None, **kwargs) -> List[Dict]:
+        # Evaluates several tasks with as few lighteval processes as possible: uncached tasks
+        # are packed group_size at a time into one command, and the combined results file is
+        # split back into one results file per task. Returns one record per task, in order;
+        # on_result(index, record) is called as soon as each task's record is known.
+        print(f"\nStarting lighteval benchmark for model: {self.model_id}")
+        print(f"{len(task_details_list)} task(s), up to {group_size} per lighteval invocation")
+        print(f"Using backend: {backend}")
+
+        kwargs["quantization"] = self.resolve_quantization(backend, **kwargs)
+        if kwargs["quantization"] is None:
+            records = [{"task_details": td, "success": False, "output_dir": None, "results_file": None}
+                       for td in task_details_list]
+            if on_result is not None:
+                for i, record in enumerate(records):
+                    on_result(i, record)
+            return records
+
+        records: Dict[int, Dict] = {}
+        to_run = []
+        for i, task_details in enumerate(task_details_list):
+            cached = self.lookup_cached_run(task_details, backend, **kwargs)
+            if cached is not None:
+                print(f"Found cached results for {self.task_string(task_details)}: {cached['results_file']}")
+                records[i] = {"task_details": task_details, "success": True,
+                              "output_dir": cached["run_output_dir"], "results_file": cached["results_file"]}
+                if on_result is not None:
+                    on_result(i, records[i])
             else:
-                print(
-                    f"Benchmark completed, but results.json not found in {run_output_dir}. Check logs/stdout.")
+                to_run.append(i)
 
-            return True
+        # Autotuned only once the cache has left tasks to run
+        auto_batch_size = backend not in ("vllm", "endpoint") and kwargs.get("override-batch-size") == "auto"
+        if auto_batch_size and to_run:
+            kwargs["override-batch-size"] = self.autotune_batch_size(task_details_list[to_run[0]], backend, **kwargs)
 
+        group_size = max(1, group_size)
+        for start in range(0, len(to_run), group_size):
+            group = to_run[start:start + group_size]
+            group_details = [task_details_list[i] for i in group]
+            built = self.build_command(group_details, backend, **kwargs)
+            if built is None:
+                success = False
+                run_output_dir = None
+            else:
+                command, run_output_dir = built
+                success = self._execute(command, run_output_dir, backend,
+                                        [self.task_string(td) for td in group_details], **kwargs)
+
+            combined = load_results(run_output_dir) if success else None
+            if success and combined is None:
+                print(f"Benchmark completed, but no results file found in {run_output_dir}. Check logs/stdout.")
+            for i, task_details in zip(group, group_details):
+                results_file = None
+                if combined is not None:
+                    results_file = write_task_results(combined, task_details, run_output_dir)
+                    if results_file is None:
+                        print(f"Warning: No results for {self.task_string(task_details)} in the combined results file.")
+                    else:
+                        self._store_cached_runs(task_details, backend, run_output_dir, results_file=results_file,
+                                                auto_batch_size=auto_batch_size, **kwargs)
+                records[i] = {"task_details": task_details, "success": results_file is not None,
+                              "output_dir": run_output_dir, "results_file": results_file}
+                if on_result is not None:
+                    on_result(i, records[i])
+
+        return [records[i] for i in range(len(task_details_list))]
+
+    def run_quick(self, task_details_list: List[Dict], backend: str, metric: Optional[str] = None,
+                  baseline: Optional[Dict] = None, initial_samples: int = DEFAULT_INITIAL_SAMPLES,
+                  growth: float = DEFAULT_GROWTH, max_rounds: int = DEFAULT_MAX_ROUNDS,
+                  target_half_width: float = DEFAULT_TARGET_HALF_WIDTH,
+                  tolerance: float = DEFAULT_TOLERANCE, **kwargs) -> Optional[Dict]:
+        # Evaluates growing --max-samples subsets of every task (one lighteval process per
+        # round) until the 95% interval of the score decides against the baseline score or
+        # is narrower than target_half_width. Returns the sampled-estimate record, also
+        # written as quick_estimate.json into the last round's directory. Sampled runs are
+        # never stored in the result cache.
+        kwargs["quantization"] = self.resolve_quantization(backend, **kwargs)
+        if kwargs["quantization"] is None:
+            return None
+        if backend not in ("vllm", "endpoint") and kwargs.get("override-batch-size") == "auto":
+            kwargs["override-batch-size"] = self.autotune_batch_size(task_details_list[0], backend, **kwargs)
+        kwargs = {k: v for k, v in kwargs.items() if k != "output_dir"}
+        task_strings = [self.task_string(td) for td in task_details_list]
+        baseline_score = baseline["score"] if baseline else None
+
+        rounds: List[Dict] = []
+        decision = None
+        run_output_dir = None
+        for round_index, max_samples in enumerate(round_sample_sizes(initial_samples, growth, max_rounds), start=1):
+            print(f"\n=== Quick round {round_index}: up to {max_samples} sample(s) per task, "
+                  f"{len(task_strings)} task(s) ===")
+            built = self.build_command(task_details_list, backend, max_samples=max_samples,
+                                       save_details=True, **kwargs)
+            if built is None:
+                return None
+            command, run_output_dir = built
+            self.last_output_dir = run_output_dir
+            if not self._execute(command, run_output_dir, backend, task_strings, **kwargs):
+                return None
+
+            report = analyze_details(run_output_dir, metric=metric)
+            metric = metric or (report["metric"] if report["metric"] != "mixed" else None)
+            estimate = stratified_estimate(report["tasks"])
+            rounds.append({"max_samples": max_samples, "run_output_dir": run_output_dir,
+                           "estimate": estimate, "tasks": report["tasks"]})
+            if estimate is None:
+                print("Error: No per-sample scores in the details files; cannot estimate.")
+                break
+            against = f"; baseline {baseline_score:.4f}" if baseline_score is not None else ""
+            print(f"Quick estimate: {report['metric']} = {estimate['score']:.4f} "
+                  f"(95% CI [{estimate['ci_low']:.4f}, {estimate['ci_high']:.4f}], "
+                  f"{estimate['n']} samples){against}")
+
+            decision = decide(estimate, baseline_score, tolerance=tolerance, target_half_width=target_half_width)
+            if decision is not None:
+                break
+            if all(task["n"] < max_samples for task in report["tasks"]):
+                # Nothing left to sample: this was the full evaluation
+                decision = decide(estimate, baseline_score, tolerance=tolerance, target_half_width=1.0)
+                decision["reason"] = "every task was evaluated in full"
+                break
+
+        record = quick_record(self.model_id, backend, task_strings, metric, rounds, baseline, decision)
+        record["quantization"] = kwargs["quantization"]
+        if run_output_dir is not None:
+            record_path = os.path.join(run_output_dir, "quick_estimate.json")
+            with open(record_path, 'w') as f:
+                json.dump(record, f, indent=2)
+            record["record_path"] = record_path
+        return record
+
+    def _execute(self, command: List[str], run_output_dir: str, backend: str, tasks: List[str],
+                 **kwargs) -> bool:
+        print("\nExecuting command:")
+        print(shlex.join(command))
+
+        self.last_perf_report = None
+        staging_dir = self.run_staging_dir(run_output_dir)
+        phase_tracker = LightevalPhaseTracker()
+        process = None
+        sampler = None
+        try:
+            print("\n--- lighteval output (streaming, also logged to stdout.log/stderr.log) ---")
+            process = self.executor.submit(
+                command, log_dir=staging_dir, env=os.environ.copy(),
+                stall_timeout=kwargs.get("stall_timeout", 120), on_line=phase_tracker.on_line)
+            telemetry_interval = kwargs.get("telemetry_interval", DEFAULT_TELEMETRY_INTERVAL_S)
+            # Telemetry samples a local pid; remote jobs have none
+            if telemetry_interval and process.pid is not None:
+                sampler = TelemetrySampler(process.pid, staging_dir, interval_s=telemetry_interval)
+                sampler.start()
+            returncode = process.wait()
+            ended_at = time.monotonic()
         except FileNotFoundError:
             print("\nError: 'lighteval' command not found.")
             print(
                 "Please ensure lighteval is installed correctly in your environment (pip install lighteval...).")
+            self.abandon_run(run_output_dir, "lighteval command not found")
             return False
-        except subprocess.CalledProcessError as e:
-            print("\nError: lighteval command failed.")
-            print(f"Return code: {e.returncode}")
-            print("--- stdout ---")
-            print(e.stdout)
-            print("--- stderr ---")
-            print(e.stderr)
-            return False
+        except KeyboardInterrupt:
+            print("\nInterrupted. Stopping lighteval...")
+            if process is not None:
+                process.terminate()
+            raise
         except Exception as e:
             print(
                 f"\nAn unexpected error occurred during benchmark execution: {e}")
+            if process is not None:
+                process.terminate()
+            self.abandon_run(run_output_dir, str(e))
+            return False
+        finally:
+            if sampler is not None:
+                telemetry_file = sampler.stop()
+                if telemetry_file:
+                    print(f"Resource telemetry: {telemetry_file}")
+
+        if returncode != 0:
+            print("\nError: lighteval command failed.")
+            print(f"Return code: {returncode}")
+            print("--- last stderr lines ---")
+            print("\n".join(process.tail("stderr")[-40:]))
+            print(f"Full logs: {os.path.join(staging_dir, 'stderr.log')}")
+            self.abandon_run(run_output_dir, f"lighteval exited with return code {returncode}")
+            self.record_run_history(backend, success=False,
+                                    oom=lines_have_oom(process.tail("stderr")), **kwargs)
             return False
+
+        print("\nBenchmark finished successfully.")
+        self.write_run_perf(staging_dir, backend, tasks, phase_tracker, process.started_at, ended_at)
+        self.record_run_history(backend, success=True, oom=False, **kwargs)
+        return self.commit_run(run_output_dir)
+
+    def write_run_perf(self, run_output_dir: str, backend: str, tasks: List[str],
+                       phase_tracker: LightevalPhaseTracker, started_at: float, ended_at: float) -> None:
+        phases, notes = phase_tracker.phases(started_at, ended_at)
+        token_stats = details_token_stats(run_output_dir) or {}
+        num_samples = token_stats.get("num_samples")
+        if not num_samples:
+            results = load_results(run_output_dir)
+            num_samples = count_samples(results) if results else None
+        endpoint_stats = self.write_endpoint_latency(run_output_dir) if backend == "endpoint" else None
+        if endpoint_stats and token_stats.get("generated_tokens") is None:
+            # The server's usage counts stand in for the token IDs the API does not return
+            token_stats["generated_tokens"] = endpoint_stats.get("completion_tokens")
+            token_stats.setdefault("prompt_tokens", endpoint_stats.get("prompt_tokens"))
+            if token_stats["generated_tokens"] is not None:
+                notes.append("Token counts are the endpoint's reported usage.")
+        if token_stats.get("prompt_tokens") is None and token_stats.get("generated_tokens") is None:
+            # lighteval's results files count samples but not tokens
+            notes.append("Token counts need the run's details parquet files, which were not saved.")
+        elif token_stats.get("generated_tokens") is None:
+            notes.append("Generated token counts need details parquet files from generative tasks.")
+        notes.append("time_to_first_token_s is not measurable through the lighteval CLI.")
+        self.write_perf_report(
+            run_output_dir, backend, tasks, total_s=ended_at - started_at,
+            model_load_s=phases["model_load"], evaluation_s=phases["evaluation"],
+            post_processing_s=phases["post_processing"], num_samples=num_samples,
+            prompt_tokens=token_stats.get("prompt_tokens"),
+            generated_tokens=token_stats.get("generated_tokens"), notes=notes)
+
+    def write_endpoint_latency(self, run_output_dir: str) -> Optional[Dict]:
+        # Moves an endpoint run's request stats out of the proxy into latency.json
+        run_key = self._endpoint_run_key(run_output_dir)
+        proxy = self._endpoint_runs.pop(run_key, None)
+        stats = proxy.pop_stats(run_key) if proxy is not None else None
+        if stats is None:
+            return None
+        latency_file = os.path.join(run_output_dir, LATENCY_FILENAME)
+        try:
+            with open(latency_file, 'w') as f:
+                json.dump(dict(stats, base_url=proxy.base_url, concurrency=proxy.concurrency,
+                               max_retries=proxy.max_retries), f, indent=2)
+        except OSError as e:
+            print(f"Warning: Could not write {latency_file}: {e}")
+        latency = stats["latency_s"]
+        if latency["p50"] is not None:
+            print(f"Endpoint latency: p50 {latency['p50']:.3f}s, p90 {latency['p90']:.3f}s, "
+                  f"p99 {latency['p99']:.3f}s over {stats['succeeded']} request(s) "
+                  f"({stats['failed']} failed, {stats['retries']} retried) ({latency_file})")
+        else:
+            print(f"Endpoint: no successful requests ({stats['failed']} failed) ({latency_file})")
+        return stats
+
+    def abandon_run(self, run_output_dir: Optional[str], reason: str) -> None:
+        # A failed endpoint run keeps its request stats next to its logs
+        if run_output_dir and self._endpoint_run_key(run_output_dir) in self._endpoint_runs:
+            self.write_endpoint_latency(self.run_staging_dir(run_output_dir))
+        super().abandon_run(run_output_dir, reason)
@@ -0,0 +1,126 @@
+import json
+import os
+import time
+from typing import Dict, Any, List, Optional
+
+from ..benchmarker import BenchmarkRunner
+from ..utils.endpoint_utils import (LoadGenerator, sustained_throughput, DEFAULT_STEP_DURATION_S,
+                                    DEFAULT_MAX_TOKENS, DEFAULT_MAX_IN_FLIGHT, DEFAULT_ENDPOINT_TIMEOUT_S)
+from ..utils.task_utils import load_task_prompts, load_prompts_file
+
+LOADTEST_FILENAME = "loadtest.json"
+PROMPTS_FILENAME = "prompts.jsonl"
+DEFAULT_NUM_PROMPTS = 256
+
+
+def format_step(step: Dict[str, Any]) -> str:
+    def ms(summary, q):
+        value = summary[q]
+        return f"{value * 1000:.0f}" if value is not None else "-"
+
+    level = f"c={step['concurrency']}" if step["mode"] == "concurrency" else f"{step['rate_rps']:g} req/s offered"
+    failed = f", {step['failed']} failed" if step["failed"] else ""
+    dropped = f", {step['dropped']} dropped" if step["dropped"] else ""
+    latency, ttft, itl = step["latency_s"], step["ttft_s"], step["itl_s"]
+    return (f"{level}: {step['throughput_rps']} req/s, {step['output_tokens_per_s']} tok/s | "
+            f"latency p50/p95/p99 {ms(latency, 'p50')}/{ms(latency, 'p95')}/{ms(latency, 'p99')} ms | "
+            f"TTFT p50/p99 {ms(ttft, 'p50')}/{ms(ttft, 'p99')} ms | "
+            f"ITL p50/p99 {ms(itl, 'p50')}/{ms(itl, 'p99')} ms ({step['succeeded']} ok{failed}{dropped})")
+
+
+class LoadTestRunner(BenchmarkRunner):
+    # Serving throughput and latency of a model behind an OpenAI-compatible server (a local
+    # vLLM/TGI server, or anything the endpoint backend can reach), measured by replaying
+    # prompts from a lighteval task at stepped load. Runs use the same layout as evaluation
+    # runs (staging, manifest, index) under results/loadtest/.
+    @staticmethod
+    def framework_name() -> str:
+        return "loadtest"
+
+    def run(self, task_details: Dict[str, Any], backend: str = "endpoint", **kwargs) -> bool:
+        return self.run_load_test(task_identifier=task_details.get("task_identifier"), **kwargs) is not None
+
+    def load_prompts(self, task_identifier: Optional[str] = None, prompts_file: Optional[str] = None,
+                     num_prompts: int = DEFAULT_NUM_PROMPTS, seed: int = 0,
+                     max_tokens: Optional[int] = None) -> List[Dict[str, Any]]:
+        if prompts_file:
+            return load_prompts_file(prompts_file, max_tokens=max_tokens)[:num_prompts]
+        print(f"Loading up to {num_prompts} prompts from {task_identifier} (downloads the dataset if needed)...")
+        return load_task_prompts(task_identifier, num_prompts, seed=seed, max_tokens=max_tokens)
+
+    def run_load_test(self, base_url: str, mode: str, levels: List[float], task_identifier: Optional[str] = None,
+                      prompts_file: Optional[str] = None, num_prompts: int = DEFAULT_NUM_PROMPTS, seed: int = 0,
+                      api: str = "completions", api_key: Optional[str] = None, max_tokens: Optional[int] = None,
+                      step_duration_s: float = DEFAULT_STEP_DURATION_S,
+                      request_timeout: float = DEFAULT_ENDPOINT_TIMEOUT_S,
+                      max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                      p99_slo_ms: Optional[float] = None, **kwargs) -> Optional[Dict[str, Any]]:
+        # Returns the report also written to loadtest.json, or None if the test could not run
+        if not task_identifier and not prompts_file:
+            print("Error: A load test needs a task to draw prompts from, or a prompts file.")
+            return None
+        try:
+            prompts = self.load_prompts(task_identifier, prompts_file, num_prompts, seed, max_tokens)
+        except Exception as e:
+            print(f"Error: Could not load prompts: {e}")
+            return None
+        source = task_identifier or os.path.basename(prompts_file)
+
+        config = self.run_config([source], "endpoint", base_url=base_url, mode=mode, levels=levels, api=api,
+                                 max_tokens=max_tokens, step_duration_s=step_duration_s,
+                                 num_prompts=len(prompts), seed=seed)
+        run_output_dir = self.make_run_output_dir(f"{source}_{mode}", "endpoint", config=config,
+                                                  output_dir=kwargs.get("output_dir"))
+        staging_dir = self.run_staging_dir(run_output_dir)
+        self.last_output_dir = run_output_dir
+        with open(os.path.join(staging_dir, PROMPTS_FILENAME), 'w') as f:
+            for prompt in prompts:
+                f.write(json.dumps(prompt) + "\n")
+
+        unit = "concurrent clients" if mode == "concurrency" else "requests/s"
+        print(f"\nLoad test of {self.model_id} at {base_url}: {len(prompts)} prompt(s) from {source}, "
+              f"{len(levels)} step(s) of {step_duration_s:g}s ({unit}: {', '.join(f'{l:g}' for l in levels)})")
+        generator = LoadGenerator(base_url, self.model_id, prompts, api=api, api_key=api_key,
+                                  max_tokens=max_tokens or DEFAULT_MAX_TOKENS, step_duration_s=step_duration_s,
+                                  request_timeout=request_timeout, max_in_flight=max_in_flight, seed=seed)
+        started_at = time.time()
+        try:
+            steps = generator.run(mode, levels, on_step=lambda step: print(f"  {format_step(step)}"))
+        except KeyboardInterrupt:
+            self.abandon_run(run_output_dir, "interrupted")
+            raise
+        except Exception as e:
+            print(f"Error: The load test failed: {e}")
+            self.abandon_run(run_output_dir, str(e))
+            return None
+
+        report = {
+            "model_id": self.model_id,
+            "base_url": base_url,
+            "api": api,
+            "prompt_source": source,
+            "num_prompts": len(prompts),
+            "mode": mode,
+            "step_duration_s": step_duration_s,
+            "started_at": started_at,
+            "steps": steps,
+            "slo": None,
+        }
+        if p99_slo_ms is not None:
+            best = sustained_throughput(steps, p99_slo_ms / 1000)
+            report["slo"] = {"p99_latency_ms": p99_slo_ms, "met": best is not None,
+                             "sustained_throughput_rps": best["throughput_rps"] if best else None,
+                             "step": best}
+            if best is not None:
+                print(f"Sustained throughput at p99 latency < {p99_slo_ms:g} ms: {best['throughput_rps']} req/s "
+                      f"({format_step(best).split(':')[0]})")
+            else:
+                print(f"No step met p99 latency < {p99_slo_ms:g} ms without failures.")
+
+        with open(os.path.join(staging_dir, LOADTEST_FILENAME), 'w') as f:
+            json.dump(report, f, indent=2)
+        if not self.commit_run(run_output_dir):
+            return None
+        print(f"Load test results: {os.path.join(run_output_dir, LOADTEST_FILENAME)}")
+        report["run_output_dir"] = run_output_dir
+        return report
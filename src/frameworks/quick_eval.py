@@ -0,0 +1,113 @@
+import math
+import time
+from typing import Dict, Any, List, Optional
+
+from ..results import ResultsWarehouse
+from ..results.details_analysis import Z_95
+
+DEFAULT_INITIAL_SAMPLES = 32
+DEFAULT_GROWTH = 2.0
+DEFAULT_MAX_ROUNDS = 6
+DEFAULT_TARGET_HALF_WIDTH = 0.02
+DEFAULT_TOLERANCE = 0.01
+
+
+def round_sample_sizes(initial: int = DEFAULT_INITIAL_SAMPLES, growth: float = DEFAULT_GROWTH,
+                       max_rounds: int = DEFAULT_MAX_ROUNDS) -> List[int]:
+    # Samples per task in each round: 32, 64, 128, ... Every round re-runs from the start
+    # (lighteval has no sample offset), so the total cost stays below growth/(growth-1)
+    # times the last round's.
+    sizes = []
+    size = max(1, initial)
+    for _ in range(max_rounds):
+        sizes.append(size)
+        size = max(size + 1, int(math.ceil(size * growth)))
+    return sizes
+
+
+def stratified_estimate(task_summaries: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    # Macro average over tasks (each subject is a stratum, as in lighteval's "all"), with
+    # the stratified standard error sqrt(sum se_k^2) / K. One task keeps its Wilson interval.
+    tasks = [t for t in task_summaries if t["n"]]
+    if not tasks:
+        return None
+    if len(tasks) == 1:
+        task = tasks[0]
+        return {"score": task["score"], "stderr": task["stderr"], "ci_low": task["ci_low"],
+                "ci_high": task["ci_high"], "n": task["n"], "num_tasks": 1}
+    k = len(tasks)
+    score = sum(t["score"] for t in tasks) / k
+    stderr = math.sqrt(sum(t["stderr"] ** 2 for t in tasks)) / k
+    return {"score": score, "stderr": stderr, "ci_low": score - Z_95 * stderr,
+            "ci_high": score + Z_95 * stderr, "n": sum(t["n"] for t in tasks), "num_tasks": k}
+
+
+def decide(estimate: Dict[str, Any], baseline: Optional[float], tolerance: float = DEFAULT_TOLERANCE,
+           target_half_width: float = DEFAULT_TARGET_HALF_WIDTH) -> Optional[Dict[str, str]]:
+    # Returns {"verdict", "reason"} once the interval answers the question, else None.
+    # Against a baseline: "worse"/"better" when the whole interval is more than tolerance
+    # away from it, "equivalent" when it lies within baseline +- tolerance.
+    low, high = estimate["ci_low"], estimate["ci_high"]
+    if baseline is not None:
+        if high < baseline - tolerance:
+            return {"verdict": "worse", "reason": f"interval is entirely below baseline - {tolerance}"}
+        if low > baseline + tolerance:
+            return {"verdict": "better", "reason": f"interval is entirely above baseline + {tolerance}"}
+        if baseline - tolerance <= low and high <= baseline + tolerance:
+            return {"verdict": "equivalent", "reason": f"interval is within baseline +- {tolerance}"}
+    if (high - low) / 2 <= target_half_width:
+        return {"verdict": "inconclusive" if baseline is not None else "estimated",
+                "reason": f"interval half-width is below {target_half_width}"}
+    return None
+
+
+def warehouse_baseline(model_id: str, tasks: List[str], num_few_shot: int, metric: str,
+                       revision: Optional[str] = None,
+                       warehouse: Optional[ResultsWarehouse] = None) -> Optional[Dict[str, Any]]:
+    # Baseline score from the results warehouse: the latest full (not sampled) result of
+    # the baseline model for each task, averaged like the estimate. tasks are "suite|task".
+    warehouse = warehouse or ResultsWarehouse()
+    warehouse.ingest()
+    table = warehouse.query(columns=["run_id", "created_at", "revision", "suite", "task", "value"],
+                            model_id=model_id, metric=metric, num_few_shot=num_few_shot,
+                            include_sampled=False)
+    wanted = set(tasks)
+    latest: Dict[str, Dict[str, Any]] = {}
+    for row in table.to_pylist():
+        task = f"{row['suite']}|{row['task']}"
+        if task not in wanted or (revision and not (row["revision"] or "").startswith(revision)):
+            continue
+        if task not in latest or row["created_at"] > latest[task]["created_at"]:
+            latest[task] = row
+    if not latest:
+        return None
+    return {
+        "model_id": model_id, "revision": revision, "metric": metric,
+        "score": sum(row["value"] for row in latest.values()) / len(latest),
+        "num_tasks": len(latest), "missing_tasks": sorted(wanted - set(latest)),
+        "run_ids": sorted({row["run_id"] for row in latest.values()}),
+    }
+
+
+def quick_record(model_id: str, backend: str, tasks: List[str], metric: Optional[str],
+                 rounds: List[Dict[str, Any]], baseline: Optional[Dict[str, Any]],
+                 decision: Optional[Dict[str, str]]) -> Dict[str, Any]:
+    final = rounds[-1]["estimate"] if rounds else None
+    return {
+        "kind": "sampled_estimate",
+        "created_at": time.time(),
+        "model_id": model_id,
+        "backend": backend,
+        "tasks": tasks,
+        "metric": metric,
+        "sampling": "first max_samples documents of each task (lighteval --max-samples), equal per task",
+        "score": final["score"] if final else None,
+        "ci_low": final["ci_low"] if final else None,
+        "ci_high": final["ci_high"] if final else None,
+        "confidence": 0.95,
+        "samples_evaluated": sum(r["estimate"]["n"] for r in rounds if r["estimate"]),
+        "baseline": baseline,
+        "verdict": decision["verdict"] if decision else "undecided",
+        "stop_reason": decision["reason"] if decision else "ran out of rounds",
+        "rounds": rounds,
+    }
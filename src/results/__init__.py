@@ -0,0 +1,41 @@
+from .reader import (find_results_file, load_results, load_results_file, summarize_metrics,
+                     split_task_results, write_task_results)
+from .cache import ResultCache, compute_cache_key
+from .details import find_details_files, count_samples, details_token_stats
+from .details_analysis import analyze_details, compare_details, resolve_run_dir, wilson_interval
+from .compare import select_runs, compare_run_sets, paired_bootstrap, load_task_scores, holm_adjust
+from .history import RunHistory
+from .warehouse import ResultsWarehouse, leaderboard, diff_runs, find_regressions
+from .run_layout import RunLayout, RunIndex, read_manifest, safe_name
+
+__all__ = [
+    'find_results_file',
+    'load_results',
+    'load_results_file',
+    'summarize_metrics',
+    'split_task_results',
+    'write_task_results',
+    'ResultCache',
+    'compute_cache_key',
+    'find_details_files',
+    'count_samples',
+    'details_token_stats',
+    'analyze_details',
+    'compare_details',
+    'resolve_run_dir',
+    'wilson_interval',
+    'select_runs',
+    'compare_run_sets',
+    'paired_bootstrap',
+    'load_task_scores',
+    'holm_adjust',
+    'RunHistory',
+    'ResultsWarehouse',
+    'leaderboard',
+    'diff_runs',
+    'find_regressions',
+    'RunLayout',
+    'RunIndex',
+    'read_manifest',
+    'safe_name'
+]
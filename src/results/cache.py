@@ -0,0 +1,162 @@
+import collections
+import hashlib
+import json
+import os
+import shutil
+import time
+import warnings
+from typing import Dict, Any, List, Optional
+
+from ..config import RESULTS_DIR
+from .reader import find_results_file
+
+# Parameters that identify a run; two runs with the same values produce the same results
+CACHE_KEY_FIELDS = (
+    "framework", "model_id", "revision", "task", "num_few_shot",
+    "allow_truncation", "backend", "dtype", "batch_size",
+)
+# Parameters only some runs have (e.g. quantized runs); keyed when present, so the keys of
+# runs without them stay as they were
+OPTIONAL_CACHE_KEY_FIELDS = ("quantization",)
+
+
+def compute_cache_key(params: Dict[str, Any]) -> str:
+    missing = [field for field in CACHE_KEY_FIELDS if field not in params]
+    if missing:
+        raise ValueError(f"Cache key parameters missing fields: {missing}")
+    fields = CACHE_KEY_FIELDS + tuple(field for field in OPTIONAL_CACHE_KEY_FIELDS if field in params)
+    canonical = json.dumps({field: params[field] for field in fields},
+                           sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _dir_size_bytes(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                continue
+    return total
+
+
+class ResultCache:
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or os.path.join(RESULTS_DIR, "cache")
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def lookup(self, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        entry_path = self._entry_path(compute_cache_key(params))
+        if not os.path.exists(entry_path):
+            return None
+        try:
+            with open(entry_path, 'r') as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        # The run directory may have been deleted by hand; drop the stale entry
+        if not os.path.exists(entry["results_file"]):
+            os.remove(entry_path)
+            return None
+        return entry
+
+    def store(self, params: Dict[str, Any], run_output_dir: str,
+              results_file: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        # results_file defaults to the run's main results file; runs covering several
+        # tasks pass the per-task split instead
+        results_file = results_file or find_results_file(run_output_dir)
+        if results_file is None:
+            return None
+
+        key = compute_cache_key(params)
+        key_fields = CACHE_KEY_FIELDS + tuple(field for field in OPTIONAL_CACHE_KEY_FIELDS if field in params)
+        entry = {
+            "key": key,
+            # Exactly the fields keyed, so the params reproduce the key
+            "params": {field: params[field] for field in key_fields},
+            # The mode the run was evaluated with, after 'auto' and pre-quantized checkpoints were resolved
+            "quantization": params.get("quantization") or "none",
+            "run_output_dir": run_output_dir,
+            "results_file": results_file,
+            "created_at": time.time(),
+            "size_bytes": _dir_size_bytes(run_output_dir),
+        }
+        entry_path = self._entry_path(key)
+        os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+        tmp_path = entry_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f, indent=2)
+        os.replace(tmp_path, entry_path)
+        return entry
+
+    def entries(self) -> List[Dict[str, Any]]:
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                try:
+                    with open(os.path.join(root, name), 'r') as f:
+                        entries.append(json.load(f))
+                except (OSError, json.JSONDecodeError) as e:
+                    warnings.warn(f"Skipping unreadable cache entry {name}: {e}")
+        return entries
+
+    @staticmethod
+    def total_size_bytes(entries: List[Dict[str, Any]]) -> int:
+        # Disk space of the entries' runs; the tasks of a grouped run share one directory,
+        # which counts once
+        return sum(_run_sizes(entries).values())
+
+    def evict(self, max_age_days: Optional[float] = None, max_size_gb: Optional[float] = None,
+              delete_runs: bool = True) -> List[Dict[str, Any]]:
+        # Oldest entries go first; a size budget evicts until the remaining runs fit. A run
+        # directory is only deleted (and its size only freed) once no remaining entry uses it.
+        entries = sorted(self.entries(), key=lambda e: e["created_at"])
+        sizes = _run_sizes(entries)
+        references = collections.Counter(e["run_output_dir"] for e in entries)
+        evicted = []
+
+        def release(entry: Dict[str, Any]) -> bool:
+            # True once the entry's run directory has no references left
+            evicted.append(entry)
+            references[entry["run_output_dir"]] -= 1
+            return references[entry["run_output_dir"]] == 0
+
+        if max_age_days is not None:
+            cutoff = time.time() - max_age_days * 86400
+            for entry in [e for e in entries if e["created_at"] < cutoff]:
+                release(entry)
+            entries = [e for e in entries if e["created_at"] >= cutoff]
+
+        if max_size_gb is not None:
+            budget = max_size_gb * (1024**3)
+            total = sum(size for run_dir, size in sizes.items() if references[run_dir] > 0)
+            while entries and total > budget:
+                oldest = entries.pop(0)
+                if release(oldest):
+                    total -= sizes[oldest["run_output_dir"]]
+
+        for entry in evicted:
+            entry_path = self._entry_path(entry["key"])
+            if os.path.exists(entry_path):
+                os.remove(entry_path)
+            run_dir = entry["run_output_dir"]
+            if delete_runs and references[run_dir] == 0 and os.path.isdir(run_dir):
+                shutil.rmtree(run_dir, ignore_errors=True)
+        return evicted
+
+
+def _run_sizes(entries: List[Dict[str, Any]]) -> Dict[str, int]:
+    # Size of each run directory the entries point to
+    sizes = {}
+    for entry in entries:
+        run_dir = entry["run_output_dir"]
+        sizes[run_dir] = max(sizes.get(run_dir, 0), entry["size_bytes"])
+    return sizes
@@ -0,0 +1,225 @@
+import os
+from typing import Dict, Any, List, Optional, Tuple
+
+from .details import find_details_files
+from .details_analysis import (DEFAULT_METRICS, DETAILS_BATCH_SIZE, details_task_name, resolve_run_dir,
+                               _open_details, _resolve_metric, _sample_metrics, _scan, _sample_key)
+from .reader import find_results_file, load_results_file
+from .run_layout import RunIndex
+from .warehouse import _split_task_key
+
+DEFAULT_BOOTSTRAP_SAMPLES = 10000
+DEFAULT_REGRESSION_THRESHOLD = 0.01
+DEFAULT_ALPHA = 0.05
+# Score differences with at most this many distinct values (0/1 metrics have three) are
+# resampled as multinomial counts per value, which costs nothing per sample
+MAX_DISCRETE_VALUES = 64
+# Resampled differences held in memory at once otherwise (resamples x samples)
+BOOTSTRAP_CHUNK_ELEMENTS = 1 << 22
+
+
+def select_runs(ref: str, runs_root: str, quantization: str = "none") -> Optional[Dict[str, Any]]:
+    # One side of a comparison: comma-separated run references (directories or run IDs), or
+    # a model ID, meaning every complete full (not --max-samples) run of that model with the
+    # given quantization mode. Returns {"label", "run_dirs"} with the run directories oldest
+    # first, so a later run of a task takes precedence; None when nothing matches.
+    run_dirs = [resolve_run_dir(part.strip(), runs_root) for part in ref.split(",") if part.strip()]
+    if run_dirs and all(run_dirs):
+        return {"label": ref, "run_dirs": run_dirs}
+
+    index = RunIndex(runs_root)
+    run_dirs = [index.run_dir(entry) for entry in index.entries()
+                if entry.get("model_id") == ref and not entry.get("max_samples")
+                and entry.get("quantization", "none") == quantization
+                and os.path.isdir(index.run_dir(entry))]
+    if not run_dirs:
+        return None
+    label = ref if quantization == "none" else f"{ref} ({quantization})"
+    return {"label": label, "run_dirs": run_dirs}
+
+
+def _details_by_task(run_dirs: List[str]) -> Dict[str, str]:
+    files = {}
+    for run_dir in run_dirs:
+        for details_file in find_details_files(run_dir):
+            files[details_task_name(details_file)] = details_file
+    return files
+
+
+def _results_by_task(run_dirs: List[str]) -> Dict[str, Dict[str, Any]]:
+    # Each task's aggregate metrics from the runs' results files, keyed like the details
+    # ("helm|mmlu:anatomy|5"); for tasks whose runs saved no per-sample details
+    metrics = {}
+    for run_dir in run_dirs:
+        results_file = find_results_file(run_dir)
+        results = load_results_file(results_file) if results_file else None
+        for task_key, task_metrics in ((results or {}).get("results") or {}).items():
+            split = _split_task_key(task_key)
+            if split is not None and isinstance(task_metrics, dict):
+                metrics["|".join(str(part) for part in split)] = task_metrics
+    return metrics
+
+
+def _aggregate_row(task: str, metrics_a: Dict[str, Any], metrics_b: Dict[str, Any],
+                   metric: Optional[str], reason: str) -> Optional[Dict[str, Any]]:
+    # The difference of the two sides' reported scores, without a significance test
+    shared = [name for name in ([metric] if metric else DEFAULT_METRICS + sorted(metrics_a))
+              if isinstance(metrics_a.get(name), (int, float)) and isinstance(metrics_b.get(name), (int, float))
+              and not name.endswith("_stderr")]
+    if not shared:
+        return None
+    task_metric = shared[0]
+    return {"task": task, "metric": task_metric, "baseline": float(metrics_a[task_metric]),
+            "candidate": float(metrics_b[task_metric]),
+            "delta": float(metrics_b[task_metric]) - float(metrics_a[task_metric]),
+            "status": "no_per_sample_data", "reason": reason}
+
+
+def load_task_scores(details_file: str, metric: Optional[str] = None,
+                     batch_size: int = DETAILS_BATCH_SIZE) -> Optional[Tuple[str, Any, Any]]:
+    # (metric, sample keys as uint64, scores as float64) of one task's details, without
+    # the samples that have no score; None when the file has no usable per-sample metric.
+    # Keys are the same query hashes (or positions) compare_details pairs samples by.
+    import numpy as np
+    details = _open_details(details_file)
+    task_metric = _resolve_metric(details, metric)
+    if task_metric is None:
+        return None
+    keys, scores = [], []
+    position = 0
+    for batch_scores, batch in _scan(details, task_metric, ["example"], batch_size):
+        examples = batch.column("example").to_pylist() if "example" in batch.schema.names \
+            else [None] * batch.num_rows
+        keys.append(b"".join(_sample_key(example, position + i) for i, example in enumerate(examples)))
+        scores.append(batch_scores.to_numpy(zero_copy_only=False))
+        position += batch.num_rows
+    keys = np.frombuffer(b"".join(keys), dtype="<u8")
+    scores = np.concatenate(scores) if scores else np.empty(0)
+    scored = ~np.isnan(scores)
+    return task_metric, keys[scored], scores[scored]
+
+
+def paired_bootstrap(scores_a, scores_b, num_samples: int = DEFAULT_BOOTSTRAP_SAMPLES, rng=None):
+    # Means of num_samples resamples (with replacement) of the paired differences b - a.
+    # When the differences take few distinct values, a resample is fully described by how
+    # often it draws each value, so the counts are drawn from a multinomial instead of
+    # drawing n indices; both give the same distribution.
+    import numpy as np
+    rng = rng if rng is not None else np.random.default_rng()
+    differences = np.asarray(scores_b, dtype=np.float64) - np.asarray(scores_a, dtype=np.float64)
+    n = len(differences)
+    values, counts = np.unique(differences, return_counts=True)
+    if len(values) <= MAX_DISCRETE_VALUES:
+        return rng.multinomial(n, counts / n, size=num_samples) @ values / n
+
+    means = np.empty(num_samples)
+    chunk = max(1, BOOTSTRAP_CHUNK_ELEMENTS // n)
+    for start in range(0, num_samples, chunk):
+        stop = min(num_samples, start + chunk)
+        means[start:stop] = differences[rng.integers(0, n, size=(stop - start, n))].mean(axis=1)
+    return means
+
+
+def _bootstrap_summary(delta: float, resampled) -> Dict[str, float]:
+    # Percentile interval, and the two-sided p-value of "no difference": twice the share of
+    # resamples on the far side of zero
+    import numpy as np
+    low, high = np.percentile(resampled, [2.5, 97.5])
+    p_value = min(1.0, 2 * min(float(np.mean(resampled <= 0)), float(np.mean(resampled >= 0))))
+    return {"delta": delta, "ci_low": float(low), "ci_high": float(high), "p_value": p_value}
+
+
+def holm_adjust(p_values: List[float]) -> List[float]:
+    # Holm-Bonferroni adjusted p-values: comparing dozens of subtasks at once would
+    # otherwise flag a few by chance alone
+    import numpy as np
+    if not p_values:
+        return []
+    p = np.asarray(p_values, dtype=np.float64)
+    order = np.argsort(p)
+    m = len(p)
+    adjusted = np.minimum(1.0, np.maximum.accumulate((m - np.arange(m)) * p[order]))
+    result = np.empty(m)
+    result[order] = adjusted
+    return result.tolist()
+
+
+def compare_run_sets(baseline_dirs: List[str], candidate_dirs: List[str], metric: Optional[str] = None,
+                     threshold: float = DEFAULT_REGRESSION_THRESHOLD, alpha: float = DEFAULT_ALPHA,
+                     num_bootstrap: int = DEFAULT_BOOTSTRAP_SAMPLES, seed: Optional[int] = 0,
+                     batch_size: int = DETAILS_BATCH_SIZE) -> Dict[str, Any]:
+    # Aligns the per-sample details of the tasks both sides evaluated and tests each task's
+    # score difference (candidate - baseline) with a paired bootstrap. A task has
+    # "regressed" when it dropped by at least threshold and the drop is significant at alpha
+    # after Holm's correction over all tasks ("improved" likewise). The overall row is the
+    # macro average over tasks, bootstrapped per task (tasks as strata). Tasks that both
+    # sides evaluated but at least one saved no details for are listed under "unpaired"
+    # with their aggregate scores and the status "no_per_sample_data"; they are never
+    # counted as regressions.
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    files_a, files_b = _details_by_task(baseline_dirs), _details_by_task(candidate_dirs)
+    results_a, results_b = _results_by_task(baseline_dirs), _results_by_task(candidate_dirs)
+    tasks_a, tasks_b = set(files_a) | set(results_a), set(files_b) | set(results_b)
+    report = {"metric": metric, "threshold": threshold, "alpha": alpha, "bootstrap_samples": num_bootstrap,
+              "tasks": [], "unpaired": [], "skipped": [], "only_in_baseline": sorted(tasks_a - tasks_b),
+              "only_in_candidate": sorted(tasks_b - tasks_a)}
+
+    for task in sorted((tasks_a & tasks_b) - (set(files_a) & set(files_b))):
+        missing = [side for side, files in (("baseline", files_a), ("candidate", files_b)) if task not in files]
+        reason = f"the {' and '.join(missing)} saved no per-sample details"
+        row = _aggregate_row(task, results_a.get(task, {}), results_b.get(task, {}), metric, reason)
+        if row is None:
+            report["skipped"].append({"task": task, "reason": reason})
+        else:
+            report["unpaired"].append(row)
+
+    resampled_by_task = []
+    metrics_used = set()
+    for task in sorted(set(files_a) & set(files_b)):
+        loaded_a = load_task_scores(files_a[task], metric, batch_size=batch_size)
+        loaded_b = load_task_scores(files_b[task], loaded_a[0], batch_size=batch_size) if loaded_a else None
+        if loaded_b is None:
+            available = ", ".join(_sample_metrics(_open_details(files_a[task]))) or "none"
+            report["skipped"].append({"task": task, "reason": f"the runs do not share a per-sample "
+                                                              f"'{metric or 'score'}' metric (available: {available})"})
+            continue
+        task_metric, keys_a, scores_a = loaded_a
+        _, keys_b, scores_b = loaded_b
+        _, index_a, index_b = np.intersect1d(keys_a, keys_b, return_indices=True)
+        if len(index_a) == 0:
+            report["skipped"].append({"task": task, "reason": "no samples in common"})
+            continue
+        paired_a, paired_b = scores_a[index_a], scores_b[index_b]
+        resampled = paired_bootstrap(paired_a, paired_b, num_samples=num_bootstrap, rng=rng)
+        score_a, score_b = float(paired_a.mean()), float(paired_b.mean())
+        metrics_used.add(task_metric)
+        resampled_by_task.append(resampled)
+        report["tasks"].append(dict(_bootstrap_summary(score_b - score_a, resampled),
+                                    task=task, metric=task_metric, paired=len(index_a),
+                                    samples_baseline=len(scores_a), samples_candidate=len(scores_b),
+                                    baseline=score_a, candidate=score_b))
+
+    for row, p_adjusted in zip(report["tasks"], holm_adjust([row["p_value"] for row in report["tasks"]])):
+        row["p_adjusted"] = p_adjusted
+        significant = p_adjusted < alpha
+        if row["delta"] <= -threshold and significant:
+            row["status"] = "regressed"
+        elif row["delta"] >= threshold and significant:
+            row["status"] = "improved"
+        else:
+            row["status"] = "unchanged"
+
+    metrics_used = metrics_used or {row["metric"] for row in report["unpaired"]}
+    report["metric"] = metric or (metrics_used.pop() if len(metrics_used) == 1 else "mixed")
+    report["overall"] = None
+    if report["tasks"]:
+        baseline = float(np.mean([row["baseline"] for row in report["tasks"]]))
+        candidate = float(np.mean([row["candidate"] for row in report["tasks"]]))
+        report["overall"] = dict(_bootstrap_summary(candidate - baseline, np.mean(resampled_by_task, axis=0)),
+                                 baseline=baseline, candidate=candidate, num_tasks=len(report["tasks"]),
+                                 paired=sum(row["paired"] for row in report["tasks"]))
+    report["regressions"] = [row["task"] for row in report["tasks"] if row["status"] == "regressed"]
+    report["status"] = "compared" if report["tasks"] else \
+        "no_per_sample_data" if report["unpaired"] else "no_tasks_in_common"
+    return report
@@ -0,0 +1,68 @@
+import glob
+import os
+import warnings
+from typing import Dict, Any, List, Optional
+
+
+def find_details_files(run_output_dir: str) -> List[str]:
+    # lighteval writes one parquet per task: details/<org>/<model>/<timestamp>/details_<task>_<timestamp>.parquet
+    return sorted(glob.glob(os.path.join(
+        run_output_dir, "details", "**", "details_*.parquet"), recursive=True))
+
+
+def count_samples(results: Dict[str, Any]) -> Optional[int]:
+    # Every sample is counted as either truncated or not in the results' summary
+    summary = results.get("summary_general", {})
+    if "truncated" not in summary or "non_truncated" not in summary:
+        return None
+    return int(summary["truncated"]) + int(summary["non_truncated"])
+
+
+def _list_type_is_text(data_type) -> bool:
+    import pyarrow as pa
+    return pa.types.is_list(data_type) and (
+        pa.types.is_string(data_type.value_type) or pa.types.is_large_string(data_type.value_type))
+
+
+def _total_tokens(column) -> int:
+    # Token columns hold one list of token ids per model response: list<list<int>>
+    import pyarrow.compute as pc
+    values = column
+    while hasattr(values.type, "value_type"):
+        lengths = pc.list_value_length(values)
+        if not hasattr(values.type.value_type, "value_type"):
+            return int(pc.sum(lengths).as_py() or 0)
+        values = pc.list_flatten(values)
+    return 0
+
+
+def details_token_stats(run_output_dir: str) -> Optional[Dict[str, Any]]:
+    # Sample and token counts from the details parquet files. generated_tokens is only
+    # summed for generative tasks (string predictions); for loglikelihood tasks the
+    # continuation tokens are the scored choices, not model output.
+    details_files = find_details_files(run_output_dir)
+    if not details_files:
+        return None
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        warnings.warn("pyarrow is not installed; cannot read lighteval details for token counts.")
+        return None
+
+    stats = {"num_samples": 0, "prompt_tokens": 0, "generated_tokens": None}
+    for details_file in details_files:
+        try:
+            schema = pq.read_schema(details_file)
+            columns = [name for name in ("predictions", "input_tokens", "cont_tokens") if name in schema.names]
+            table = pq.read_table(details_file, columns=columns)
+        except Exception as e:
+            warnings.warn(f"Could not read details file {details_file}: {e}")
+            continue
+        stats["num_samples"] += table.num_rows
+        if "input_tokens" in columns:
+            stats["prompt_tokens"] += _total_tokens(table.column("input_tokens").combine_chunks())
+        if "cont_tokens" in columns and "predictions" in columns \
+                and _list_type_is_text(schema.field("predictions").type):
+            stats["generated_tokens"] = (stats["generated_tokens"] or 0) + \
+                _total_tokens(table.column("cont_tokens").combine_chunks())
+    return stats
@@ -0,0 +1,260 @@
+import hashlib
+import math
+import os
+import warnings
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+from .details import find_details_files
+from .run_layout import RunIndex
+
+# Per-sample metrics used as the sample's score, in order of preference, when none is given
+DEFAULT_METRICS = ["acc", "em", "qem", "pqem", "quasi_exact_match", "exact_match", "acc_norm", "mc1"]
+DETAILS_BATCH_SIZE = 4096
+# Prompt length buckets, in tokens: [0, 128), [128, 256), ... [8192, inf)
+LENGTH_BUCKET_EDGES = [0, 128, 256, 512, 1024, 2048, 4096, 8192]
+Z_95 = 1.959963984540054
+
+
+def details_task_name(details_file: str) -> str:
+    # details_<task>_<date>.parquet, e.g. "details_helm|mmlu:anatomy|5_2025-01-01T10-00-00.000000.parquet"
+    name = os.path.basename(details_file)[len("details_"):-len(".parquet")]
+    return name.rsplit("_", 1)[0] if "_" in name else name
+
+
+def wilson_interval(successes: float, n: int, z: float = Z_95) -> Tuple[float, float]:
+    if n == 0:
+        return 0.0, 1.0
+    p = successes / n
+    denominator = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+class ScoreAccumulator:
+    # Running sums of per-sample scores. The interval is Wilson's for 0/1 scores and a
+    # normal approximation for anything else (e.g. F1-style partial credit).
+    def __init__(self):
+        self.n = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.binary = True
+
+    def add(self, scores) -> None:
+        import pyarrow.compute as pc
+        scores = pc.drop_null(scores)
+        if len(scores) == 0:
+            return
+        self.n += len(scores)
+        self.total += pc.sum(scores).as_py()
+        self.total_sq += pc.sum(pc.multiply(scores, scores)).as_py()
+        if self.binary:
+            self.binary = bool(pc.all(pc.is_in(scores, value_set=_binary_values())).as_py())
+
+    def summary(self) -> Dict[str, Any]:
+        if self.n == 0:
+            return {"n": 0, "score": None, "stderr": None, "ci_low": None, "ci_high": None, "binary": self.binary}
+        mean = self.total / self.n
+        stderr = math.sqrt(max(0.0, self.total_sq / self.n - mean * mean) / self.n)
+        if self.binary:
+            low, high = wilson_interval(self.total, self.n)
+        else:
+            low, high = mean - Z_95 * stderr, mean + Z_95 * stderr
+        return {"n": self.n, "score": mean, "stderr": stderr, "ci_low": low, "ci_high": high,
+                "binary": self.binary}
+
+
+def _binary_values():
+    import pyarrow as pa
+    return pa.array([0.0, 1.0])
+
+
+def _open_details(details_file: str):
+    # Memory-mapped, and without pre-buffering, so only the pages of the projected columns
+    # are touched and they are decoded one batch at a time (a dataset scan would
+    # materialise a whole row group, which lighteval can make very large)
+    import pyarrow.parquet as pq
+    return pq.ParquetFile(details_file, memory_map=True, pre_buffer=False)
+
+
+def _sample_metrics(details) -> List[str]:
+    import pyarrow as pa
+    schema = details.schema_arrow
+    if "metrics" not in schema.names:
+        return []
+    metrics_type = schema.field("metrics").type
+    if not pa.types.is_struct(metrics_type):
+        return []
+    return [metrics_type.field(i).name for i in range(metrics_type.num_fields)
+            if pa.types.is_integer(metrics_type.field(i).type)
+            or pa.types.is_floating(metrics_type.field(i).type)
+            or pa.types.is_boolean(metrics_type.field(i).type)]
+
+
+def _resolve_metric(details, metric: Optional[str]) -> Optional[str]:
+    available = _sample_metrics(details)
+    if metric is not None:
+        return metric if metric in available else None
+    for name in DEFAULT_METRICS:
+        if name in available:
+            return name
+    return available[0] if available else None
+
+
+def _scan(details, metric: str, extra_columns: List[str], batch_size: int):
+    # Yields (scores, batch): the metric as float64, and a record batch holding only the
+    # requested columns that exist; nothing else is read from disk
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    columns = [f"metrics.{metric}"] + [name for name in extra_columns if name in details.schema_arrow.names]
+    for batch in details.iter_batches(batch_size=batch_size, columns=columns):
+        scores = pc.cast(pc.struct_field(batch.column("metrics"), [metric]), pa.float64())
+        yield scores, batch
+
+
+def _prompt_lengths(batch):
+    # Prompt length per sample: the longest request context in input_tokens (list<list<int>>).
+    # Samples without tokens are null.
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    if "input_tokens" not in batch.schema.names:
+        return pa.nulls(batch.num_rows, pa.int64())
+    tokens = batch.column("input_tokens")
+    requests = pc.list_flatten(tokens)
+    if not pa.types.is_list(requests.type) and not pa.types.is_large_list(requests.type):
+        return pc.cast(pc.list_value_length(tokens), pa.int64())
+    per_request = pa.table({"row": pc.list_parent_indices(tokens),
+                            "length": pc.list_value_length(requests)})
+    longest = per_request.group_by("row").aggregate([("length", "max")])
+    lengths = [None] * batch.num_rows
+    for row, length in zip(longest.column("row").to_pylist(), longest.column("length_max").to_pylist()):
+        lengths[row] = length
+    return pa.array(lengths, pa.int64())
+
+
+def _bucket_label(index: int) -> str:
+    low = LENGTH_BUCKET_EDGES[index]
+    if index + 1 < len(LENGTH_BUCKET_EDGES):
+        return f"{low}-{LENGTH_BUCKET_EDGES[index + 1] - 1}"
+    return f"{low}+"
+
+
+def _add_length_buckets(buckets: List[ScoreAccumulator], scores, lengths) -> None:
+    import pyarrow.compute as pc
+    for index, low in enumerate(LENGTH_BUCKET_EDGES):
+        mask = pc.greater_equal(lengths, low)
+        if index + 1 < len(LENGTH_BUCKET_EDGES):
+            mask = pc.and_(mask, pc.less(lengths, LENGTH_BUCKET_EDGES[index + 1]))
+        selected = pc.filter(scores, pc.fill_null(mask, False))
+        if len(selected):
+            buckets[index].add(selected)
+
+
+def resolve_run_dir(run_ref: str, runs_root: str) -> Optional[str]:
+    # A run directory path, the name of one under runs_root, or a run ID (or unique prefix)
+    for candidate in (run_ref, os.path.join(runs_root, run_ref)):
+        if os.path.isdir(candidate):
+            return candidate
+    index = RunIndex(runs_root)
+    entry = index.lookup(run_ref)
+    return index.run_dir(entry) if entry else None
+
+
+def analyze_details(run_dir: str, metric: Optional[str] = None,
+                    batch_size: int = DETAILS_BATCH_SIZE) -> Dict[str, Any]:
+    # Streams every details file of a run once. Memory use is bounded by one record batch
+    # of the projected columns regardless of the file sizes.
+    details_files = find_details_files(run_dir)
+    report = {"run_dir": run_dir, "metric": metric, "tasks": [], "groups": [], "overall": None,
+              "length_buckets": [], "skipped": []}
+    if not details_files:
+        return report
+
+    overall = ScoreAccumulator()
+    groups: Dict[str, ScoreAccumulator] = {}
+    buckets = [ScoreAccumulator() for _ in LENGTH_BUCKET_EDGES]
+    metrics_used = set()
+    for details_file in details_files:
+        task = details_task_name(details_file)
+        details = _open_details(details_file)
+        task_metric = _resolve_metric(details, metric)
+        if task_metric is None:
+            available = ", ".join(_sample_metrics(details)) or "none"
+            report["skipped"].append({"task": task, "reason": f"no per-sample '{metric or 'score'}' metric "
+                                                              f"(available: {available})"})
+            continue
+        metrics_used.add(task_metric)
+        accumulator = ScoreAccumulator()
+        # "helm|mmlu:anatomy|5" belongs to the "helm|mmlu" group
+        parts = task.split("|")
+        group_name = f"{parts[0]}|{parts[1].split(':')[0]}" if len(parts) > 1 else task
+        group = groups.setdefault(group_name, ScoreAccumulator())
+        for scores, batch in _scan(details, task_metric, ["input_tokens"], batch_size):
+            for target in (accumulator, group, overall):
+                target.add(scores)
+            _add_length_buckets(buckets, scores, _prompt_lengths(batch))
+        report["tasks"].append(dict(accumulator.summary(), task=task, metric=task_metric))
+
+    report["metric"] = metric or (metrics_used.pop() if len(metrics_used) == 1 else "mixed")
+    report["groups"] = [dict(acc.summary(), group=name) for name, acc in sorted(groups.items())
+                        if sum(1 for t in report["tasks"] if t["task"].startswith(name)) > 1]
+    report["overall"] = overall.summary()
+    report["length_buckets"] = [dict(acc.summary(), bucket=_bucket_label(i))
+                                for i, acc in enumerate(buckets) if acc.n]
+    return report
+
+
+def _sample_key(example: Optional[str], position: int) -> bytes:
+    if example is None:
+        return position.to_bytes(8, "little")
+    return hashlib.blake2b(example.encode("utf-8"), digest_size=8).digest()
+
+
+def compare_details(run_a: str, run_b: str, metric: Optional[str] = None,
+                    batch_size: int = DETAILS_BATCH_SIZE,
+                    on_disagreement: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    # Pairs the samples of the tasks both runs evaluated (by a hash of the sample's query,
+    # or its position when there is none) and counts where the two models agree. Scores
+    # above 0.5 count as correct. Only one task's keys from run A are held in memory.
+    files_a = {details_task_name(f): f for f in find_details_files(run_a)}
+    files_b = {details_task_name(f): f for f in find_details_files(run_b)}
+    report = {"metric": metric, "tasks": [], "only_in_a": sorted(set(files_a) - set(files_b)),
+              "only_in_b": sorted(set(files_b) - set(files_a))}
+
+    for task in sorted(set(files_a) & set(files_b)):
+        details_a, details_b = _open_details(files_a[task]), _open_details(files_b[task])
+        task_metric = _resolve_metric(details_a, metric)
+        if task_metric is None or _resolve_metric(details_b, task_metric) is None:
+            warnings.warn(f"Skipping {task}: the runs do not share a per-sample '{metric or 'score'}' metric.")
+            continue
+
+        correct_a: Dict[bytes, bool] = {}
+        position = 0
+        for scores, batch in _scan(details_a, task_metric, ["example"], batch_size):
+            examples = batch.column("example").to_pylist() if "example" in batch.schema.names \
+                else [None] * batch.num_rows
+            for example, score in zip(examples, scores.to_pylist()):
+                if score is not None:
+                    correct_a[_sample_key(example, position)] = score > 0.5
+                position += 1
+
+        counts = {"both_correct": 0, "only_a": 0, "only_b": 0, "both_wrong": 0}
+        position = 0
+        for scores, batch in _scan(details_b, task_metric, ["example"], batch_size):
+            examples = batch.column("example").to_pylist() if "example" in batch.schema.names \
+                else [None] * batch.num_rows
+            for example, score in zip(examples, scores.to_pylist()):
+                key = _sample_key(example, position)
+                position += 1
+                if score is None or key not in correct_a:
+                    continue
+                a, b = correct_a[key], score > 0.5
+                outcome = ("both_correct" if b else "only_a") if a else ("only_b" if b else "both_wrong")
+                counts[outcome] += 1
+                if a != b and on_disagreement is not None:
+                    on_disagreement({"task": task, "sample": key.hex(), "example": example,
+                                     "a_correct": a, "b_correct": b})
+        paired = sum(counts.values())
+        report["tasks"].append(dict(counts, task=task, metric=task_metric, paired=paired,
+                                    samples_a=len(correct_a), samples_b=position))
+    return report
@@ -0,0 +1,36 @@
+import json
+import os
+import warnings
+from typing import Dict, Any, List, Optional
+
+from ..config import RESULTS_DIR
+
+
+class RunHistory:
+    # Append-only log of finished runs (hardware, configuration, throughput, OOM outcome)
+    # that the backend recommender learns from. One JSON object per line.
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(RESULTS_DIR, "history", "runs.jsonl")
+
+    def append(self, record: Dict[str, Any]) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(record, sort_keys=True) + "\n")
+        except OSError as e:
+            warnings.warn(f"Could not append to run history {self.path}: {e}")
+
+    def records(self) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # a run killed mid-write leaves a partial last line
+        return records
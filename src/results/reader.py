@@ -0,0 +1,92 @@
+import glob
+import json
+import os
+import warnings
+from typing import Dict, Any, List, Optional, Tuple
+
+
+def find_results_file(run_output_dir: str) -> Optional[str]:
+    # Older lighteval versions write results.json at the top of the output dir,
+    # newer ones write results/<org>/<model>/results_<timestamp>.json
+    direct_path = os.path.join(run_output_dir, "results.json")
+    if os.path.exists(direct_path):
+        return direct_path
+
+    candidates = glob.glob(os.path.join(
+        run_output_dir, "results", "**", "results_*.json"), recursive=True)
+    if not candidates:
+        return None
+    return max(candidates, key=os.path.getmtime)
+
+
+def load_results(run_output_dir: str) -> Optional[Dict[str, Any]]:
+    results_file = find_results_file(run_output_dir)
+    if results_file is None:
+        return None
+    return load_results_file(results_file)
+
+
+def summarize_metrics(results: Dict[str, Any]) -> Dict[str, float]:
+    # Flatten the "all" aggregate into {metric: value}, dropping stderr entries
+    aggregate = results.get("results", {}).get("all", {})
+    return {
+        metric: value for metric, value in aggregate.items()
+        if not metric.endswith("_stderr") and isinstance(value, (int, float))
+    }
+
+
+def task_results_key(task_details: Dict[str, Any]) -> str:
+    # The file name of a task's split results: suite:task:num_few_shot
+    return f"{task_details['task_identifier'].replace('|', ':')}:{task_details['num_few_shot']}"
+
+
+def _task_results_keys(task_details: Dict[str, Any]) -> List[Tuple[str, str]]:
+    # (full key, base key) pairs a task's entries may be under: lighteval 0.8 keys results by
+    # suite|task|num_few_shot, older versions by suite:task:num_few_shot
+    identifier = task_details['task_identifier']
+    colon_identifier = identifier.replace('|', ':')
+    return [(f"{identifier}|{task_details['num_few_shot']}", identifier),
+            (f"{colon_identifier}:{task_details['num_few_shot']}", colon_identifier)]
+
+
+def split_task_results(results: Dict[str, Any], task_details: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    # Extract one task's entries from a results file that covers several tasks
+    task_metrics = None
+    for full_key, base_key in _task_results_keys(task_details):
+        task_metrics = results.get("results", {}).get(full_key)
+        if task_metrics is not None:
+            break
+    if task_metrics is None:
+        return None
+
+    split = {key: value for key, value in results.items() if not isinstance(value, dict)}
+    split["config_general"] = results.get("config_general", {})
+    for section in ("results", "versions", "config_tasks", "summary_tasks"):
+        entries = results.get(section)
+        if isinstance(entries, dict):
+            split[section] = {key: value for key, value in entries.items()
+                              if key in (full_key, base_key)}
+    split["results"]["all"] = task_metrics
+    return split
+
+
+def write_task_results(results: Dict[str, Any], task_details: Dict[str, Any],
+                       run_output_dir: str) -> Optional[str]:
+    split = split_task_results(results, task_details)
+    if split is None:
+        return None
+    tasks_dir = os.path.join(run_output_dir, "tasks")
+    os.makedirs(tasks_dir, exist_ok=True)
+    results_file = os.path.join(tasks_dir, f"{task_results_key(task_details)}.json")
+    with open(results_file, 'w') as f:
+        json.dump(split, f, indent=2)
+    return results_file
+
+
+def load_results_file(results_file: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(results_file, 'r') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        warnings.warn(f"Could not read results file {results_file}: {e}")
+        return None
@@ -0,0 +1,288 @@
+import datetime
+import hashlib
+import json
+import os
+import re
+import secrets
+import shutil
+import time
+import warnings
+from typing import Dict, Any, List, Optional
+
+from ..config import RESULTS_DIR
+from .reader import find_results_file
+
+# Runs are evaluated in <runs_root>/.staging/<name> and renamed to <runs_root>/<name> only
+# once they succeed, so a directory directly under the root is always a complete run.
+# Every committed run has a manifest.json and one line in <runs_root>/index.jsonl.
+RUN_MANIFEST_FILENAME = "manifest.json"
+RUN_INDEX_FILENAME = "index.jsonl"
+STAGING_DIRNAME = ".staging"
+RUN_LAYOUT_VERSION = 1
+CONFIG_HASH_CHARS = 12
+MAX_NAME_PART_CHARS = 80
+# What lighteval writes into a run besides its logs
+PARTIAL_OUTPUT_NAMES = ("results", "details", "tasks", "results.json")
+
+# Run IDs are "<config hash>-<random suffix>": runs of the same configuration share the prefix
+RUN_ID_RE = re.compile(r"^[0-9a-f]{%d}-[0-9a-f]{6}$" % CONFIG_HASH_CHARS)
+_UNSAFE_CHARS_RE = re.compile(r"[^A-Za-z0-9.+=-]+")
+
+
+def safe_name(value: str, max_chars: int = MAX_NAME_PART_CHARS) -> str:
+    # "helm|mmlu:anatomy|5|1" -> "helm_mmlu_anatomy_5_1"; anything that is not portable in
+    # a file name (path separators, '|', ':', spaces, ...) becomes '_'
+    name = _UNSAFE_CHARS_RE.sub("_", value).strip("_.") or "run"
+    return name[:max_chars]
+
+
+def config_hash(config: Dict[str, Any]) -> str:
+    canonical = json.dumps(config, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:CONFIG_HASH_CHARS]
+
+
+def new_run_id(config: Dict[str, Any]) -> str:
+    return f"{config_hash(config)}-{secrets.token_hex(3)}"
+
+
+def run_id_from_dir(run_dir: str) -> Optional[str]:
+    # The run ID is the part of the directory name after its last '_'
+    name = os.path.basename(os.path.normpath(run_dir))
+    candidate = name.rsplit("_", 1)[-1]
+    return candidate if RUN_ID_RE.match(candidate) else None
+
+
+def _write_json_atomic(path: str, data: Dict[str, Any]) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_manifest(run_dir: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(run_dir, RUN_MANIFEST_FILENAME), 'r') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+class RunIndex:
+    # Append-only JSONL index of committed runs (one compact line per run), read
+    # incrementally: only the lines appended since the last read are parsed, so repeated
+    # listings and lookups never walk the run directories.
+    def __init__(self, runs_root: str):
+        self.runs_root = runs_root
+        self.path = os.path.join(runs_root, RUN_INDEX_FILENAME)
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._by_name: Dict[str, str] = {}
+        self._offset = 0
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        # One write per line on an O_APPEND file, so concurrent runs do not interleave
+        os.makedirs(self.runs_root, exist_ok=True)
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _refresh(self) -> None:
+        try:
+            with open(self.path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size < self._offset:
+                    # Rewritten by rebuild(): start over
+                    self._entries, self._by_name, self._offset = {}, {}, 0
+                f.seek(self._offset)
+                data = f.read()
+        except OSError:
+            return
+        # A line still being written has no newline yet; leave it for the next read
+        complete = data[:data.rfind(b"\n") + 1]
+        self._offset += len(complete)
+        for line in complete.decode("utf-8", errors="replace").splitlines():
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                warnings.warn(f"Ignoring malformed line in run index {self.path}: {line[:80]}")
+                continue
+            self._entries[entry["run_id"]] = entry
+            self._by_name[entry["name"]] = entry["run_id"]
+
+    def entries(self) -> List[Dict[str, Any]]:
+        # Oldest first. Runs deleted from disk since they were indexed are still listed.
+        self._refresh()
+        return sorted(self._entries.values(), key=lambda e: e["created_at"])
+
+    def run_dir(self, entry: Dict[str, Any]) -> str:
+        return os.path.join(self.runs_root, entry["name"])
+
+    def lookup(self, run_ref: str) -> Optional[Dict[str, Any]]:
+        # A run ID, a unique run ID prefix, or a directory name; None if the run is
+        # unknown, ambiguous or no longer on disk
+        self._refresh()
+        ref = os.path.basename(os.path.normpath(run_ref))
+        entry = self._entries.get(ref) or self._entries.get(self._by_name.get(ref, ""))
+        if entry is None and len(ref) >= 4:
+            matches = [e for run_id, e in self._entries.items() if run_id.startswith(ref)]
+            if len(matches) > 1:
+                warnings.warn(f"Run reference '{run_ref}' is ambiguous ({len(matches)} runs).")
+            entry = matches[0] if len(matches) == 1 else None
+        if entry is None or not os.path.isdir(self.run_dir(entry)):
+            return None
+        return entry
+
+    def rebuild(self) -> int:
+        # Rewrites the index from the manifests on disk, dropping deleted runs; returns the
+        # number of runs indexed
+        entries = []
+        if os.path.isdir(self.runs_root):
+            with os.scandir(self.runs_root) as scan:
+                for dir_entry in scan:
+                    if not dir_entry.is_dir() or dir_entry.name.startswith("."):
+                        continue
+                    manifest = read_manifest(dir_entry.path)
+                    if manifest and manifest.get("status") == "complete":
+                        entries.append(index_entry(manifest))
+        entries.sort(key=lambda e: e["created_at"])
+        os.makedirs(self.runs_root, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.writelines(json.dumps(entry, separators=(",", ":")) + "\n" for entry in entries)
+        os.replace(tmp_path, self.path)
+        self._entries, self._by_name, self._offset = {}, {}, 0
+        return len(entries)
+
+
+def index_entry(manifest: Dict[str, Any]) -> Dict[str, Any]:
+    config = manifest.get("config", {})
+    return {
+        "run_id": manifest["run_id"],
+        "name": manifest["name"],
+        "model_id": config.get("model_id"),
+        "backend": config.get("backend"),
+        "quantization": config.get("quantization") or "none",
+        "tasks": config.get("tasks"),
+        "max_samples": config.get("max_samples"),
+        "results_file": manifest.get("results_file"),
+        "created_at": manifest["created_at"],
+        "finished_at": manifest.get("finished_at"),
+    }
+
+
+class RunLayout:
+    # Allocates run directories and commits them. Directories outside runs_root (e.g. the
+    # batch size probes' temporary directories) are written in place and never indexed.
+    def __init__(self, runs_root: Optional[str] = None):
+        self.runs_root = runs_root or os.path.join(RESULTS_DIR, "lighteval")
+        self.staging_root = os.path.join(self.runs_root, STAGING_DIRNAME)
+        self.index = RunIndex(self.runs_root)
+
+    def manages(self, run_dir: str) -> bool:
+        return os.path.dirname(os.path.abspath(run_dir)) == os.path.abspath(self.runs_root)
+
+    def staging_dir(self, run_dir: str) -> str:
+        # Where a run is written until it is committed; the directory itself otherwise
+        if not self.manages(run_dir):
+            return run_dir
+        return os.path.join(self.staging_root, os.path.basename(os.path.normpath(run_dir)))
+
+    def _new_manifest(self, run_id: str, name: str, config: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "layout_version": RUN_LAYOUT_VERSION,
+            "run_id": run_id,
+            "config_hash": config_hash(config),
+            "name": name,
+            "status": "running",
+            "created_at": time.time(),
+            "finished_at": None,
+            "config": config,
+        }
+
+    def _write_manifest(self, directory: str, manifest: Dict[str, Any]) -> None:
+        _write_json_atomic(os.path.join(directory, RUN_MANIFEST_FILENAME), manifest)
+
+    def allocate(self, config: Dict[str, Any], name_parts: List[str]) -> str:
+        # Creates the staging directory of a new run and returns the run's final directory,
+        # <part>_..._<timestamp>_<run id>. The random suffix keeps identical configurations
+        # started in the same second apart; the exclusive mkdir catches the rare collision.
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        os.makedirs(self.staging_root, exist_ok=True)
+        while True:
+            run_id = new_run_id(config)
+            name = "_".join([safe_name(part) for part in name_parts] + [timestamp, run_id])
+            run_dir = os.path.join(self.runs_root, name)
+            if os.path.exists(run_dir):
+                continue
+            try:
+                os.mkdir(self.staging_dir(run_dir))
+            except FileExistsError:
+                continue
+            break
+        self._write_manifest(self.staging_dir(run_dir), self._new_manifest(run_id, name, config))
+        return run_dir
+
+    def prepare(self, run_dir: str, config: Dict[str, Any]) -> None:
+        # Re-opens a run directory chosen earlier (a resumed sweep job) for writing. Whatever
+        # lighteval left in its staging directory is kept; a directory written in place by
+        # an older version is moved back into staging first.
+        if not self.manages(run_dir):
+            os.makedirs(run_dir, exist_ok=True)
+            return
+        staging = self.staging_dir(run_dir)
+        os.makedirs(self.staging_root, exist_ok=True)
+        if os.path.isdir(run_dir) and not os.path.exists(staging):
+            os.rename(run_dir, staging)
+        os.makedirs(staging, exist_ok=True)
+        manifest = read_manifest(staging)
+        if manifest is None:
+            name = os.path.basename(os.path.normpath(run_dir))
+            manifest = self._new_manifest(run_id_from_dir(run_dir) or new_run_id(config), name, config)
+        manifest.update(status="running", finished_at=None)
+        manifest.pop("error", None)
+        self._write_manifest(staging, manifest)
+
+    def commit(self, run_dir: str) -> bool:
+        # Marks the run complete and renames its staging directory into place. The rename is
+        # atomic, so readers see either no run or a complete one. Returns False, leaving the
+        # staging directory for inspection, when the rename is impossible.
+        if not self.manages(run_dir):
+            return True
+        staging = self.staging_dir(run_dir)
+        manifest = read_manifest(staging)
+        if manifest is None:
+            print(f"Warning: {staging} has no {RUN_MANIFEST_FILENAME}; the run was not committed.")
+            return False
+        results_file = find_results_file(staging)
+        manifest.update(status="complete", finished_at=time.time(),
+                        results_file=os.path.relpath(results_file, staging) if results_file else None)
+        self._write_manifest(staging, manifest)
+        try:
+            os.rename(staging, run_dir)
+        except OSError as e:
+            print(f"Warning: Could not move the finished run into {run_dir}: {e}. "
+                  f"Its files are in {staging}.")
+            return False
+        self.index.append(index_entry(manifest))
+        return True
+
+    def abandon(self, run_dir: str, reason: str) -> None:
+        # A failed run stays in the staging area with its logs; the manifest records why.
+        # Whatever results it wrote part of are deleted, so nothing reads them as a run's.
+        if not self.manages(run_dir):
+            return
+        staging = self.staging_dir(run_dir)
+        manifest = read_manifest(staging)
+        if manifest is None:
+            return
+        for name in PARTIAL_OUTPUT_NAMES:
+            path = os.path.join(staging, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            elif os.path.exists(path):
+                os.remove(path)
+        manifest.update(status="failed", finished_at=time.time(), error=reason)
+        self._write_manifest(staging, manifest)
@@ -0,0 +1,378 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+import warnings
+from typing import Dict, Any, List, Optional, Tuple
+
+from ..config import RESULTS_DIR, LIGHTEVAL_BACKENDS
+from .reader import find_results_file, load_results_file
+from .run_layout import RunIndex, run_id_from_dir, read_manifest
+
+# Incremental Parquet store of every run's flattened results. One row per
+# (run, task, metric); run metadata and perf figures are repeated on each row so queries
+# never need a join. Rows are partitioned by suite (metrics/suite=helm/part-*.parquet).
+WAREHOUSE_SCHEMA_VERSION = 4
+COMPACT_AFTER_FILES = 64
+
+_RUN_DIR_RE = re.compile(
+    r"^(?P<prefix>.+)_(?P<backend>" + "|".join(LIGHTEVAL_BACKENDS) + r")_(?P<timestamp>\d{8}_\d{6})"
+    r"(?:_[0-9a-f]+-[0-9a-f]+)?$")
+
+METRIC_COLUMNS = [
+    "run_id", "run_dir", "created_at", "model_id", "revision", "backend", "dtype", "batch_size",
+    "quantization", "suite", "task", "num_few_shot", "metric", "value", "stderr",
+    "samples_per_s", "generated_tokens_per_s", "total_s", "max_samples",
+    "latency_p50_s", "latency_p99_s",
+]
+
+
+def _schema():
+    import pyarrow as pa
+    return pa.schema([
+        ("run_id", pa.string()), ("run_dir", pa.string()), ("created_at", pa.float64()),
+        ("model_id", pa.string()), ("revision", pa.string()), ("backend", pa.string()),
+        ("dtype", pa.string()), ("batch_size", pa.int64()),
+        # Weight quantization mode from the run's manifest ("none" for full-precision runs)
+        ("quantization", pa.string()),
+        ("suite", pa.string()), ("task", pa.string()), ("num_few_shot", pa.int64()),
+        ("metric", pa.string()), ("value", pa.float64()), ("stderr", pa.float64()),
+        ("samples_per_s", pa.float64()), ("generated_tokens_per_s", pa.float64()), ("total_s", pa.float64()),
+        # Set for runs limited with --max-samples (e.g. quick mode); their scores are estimates
+        ("max_samples", pa.int64()),
+        # Request latency percentiles of endpoint runs (latency.json); None for local backends
+        ("latency_p50_s", pa.float64()), ("latency_p99_s", pa.float64()),
+    ])
+
+
+def _split_task_key(task_key: str) -> Optional[Tuple[str, str, int]]:
+    # "helm|mmlu:anatomy|5" (lighteval 0.8) or "helm:mmlu:anatomy:5" -> ("helm", "mmlu:anatomy", 5)
+    if "|" in task_key:
+        parts = task_key.split("|")
+        if len(parts) != 3 or not parts[-1].isdigit():
+            return None
+        return parts[0], parts[1], int(parts[-1])
+    parts = task_key.split(":")
+    if len(parts) < 3 or not parts[-1].isdigit():
+        return None
+    return parts[0], ":".join(parts[1:-1]), int(parts[-1])
+
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def flatten_run(run_dir: str, results_file: str, run_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    results = load_results_file(results_file)
+    if not results:
+        return []
+    config = results.get("config_general", {})
+    perf = _read_json(os.path.join(run_dir, "perf.json")) or {}
+    latency = (_read_json(os.path.join(run_dir, "latency.json")) or {}).get("latency_s") or {}
+    name_match = _RUN_DIR_RE.match(os.path.basename(os.path.normpath(run_dir)))
+
+    model_id = perf.get("model_id") or config.get("model_name")
+    backend = perf.get("backend") or (name_match.group("backend") if name_match else None)
+    batch_size = config.get("override_batch_size")
+    max_samples = config.get("max_samples")
+    run_config = (read_manifest(run_dir) or {}).get("config") or {}
+    wall_clock = perf.get("wall_clock_s") or {}
+    run = {
+        # Run directories from before the run layout have no ID; hash their results path
+        "run_id": run_id or run_id_from_dir(run_dir)
+                  or hashlib.sha256(os.path.abspath(results_file).encode("utf-8")).hexdigest()[:16],
+        "run_dir": run_dir,
+        "created_at": os.path.getmtime(results_file),
+        "model_id": model_id,
+        "revision": config.get("model_sha") or None,
+        "backend": backend,
+        "dtype": config.get("model_dtype") or None,
+        "batch_size": int(batch_size) if isinstance(batch_size, int) else None,
+        "quantization": run_config.get("quantization") or "none",
+        "samples_per_s": perf.get("samples_per_s"),
+        "generated_tokens_per_s": perf.get("generated_tokens_per_s"),
+        "total_s": wall_clock.get("total"),
+        "max_samples": int(max_samples) if isinstance(max_samples, int) else None,
+        "latency_p50_s": latency.get("p50"),
+        "latency_p99_s": latency.get("p99"),
+    }
+
+    rows = []
+    for task_key, metrics in results.get("results", {}).items():
+        split = _split_task_key(task_key)
+        if split is None or not isinstance(metrics, dict):
+            continue  # the "all" aggregate is derivable from the task rows
+        suite, task, num_few_shot = split
+        for metric, value in metrics.items():
+            if metric.endswith("_stderr") or not isinstance(value, (int, float)):
+                continue
+            stderr = metrics.get(f"{metric}_stderr")
+            rows.append(dict(run, suite=suite, task=task, num_few_shot=num_few_shot, metric=metric,
+                             value=float(value),
+                             stderr=float(stderr) if isinstance(stderr, (int, float)) else None))
+    return rows
+
+
+class ResultsWarehouse:
+    def __init__(self, warehouse_dir: Optional[str] = None, runs_root: Optional[str] = None):
+        self.warehouse_dir = warehouse_dir or os.path.join(RESULTS_DIR, "warehouse")
+        self.runs_root = runs_root or os.path.join(RESULTS_DIR, "lighteval")
+        self.metrics_dir = os.path.join(self.warehouse_dir, "metrics")
+        self.state_path = os.path.join(self.warehouse_dir, "state.json")
+
+    def _load_state(self) -> Optional[Dict[str, Any]]:
+        # None when there is no state or it was written for another schema version
+        state = _read_json(self.state_path)
+        if not state or state.get("version") != WAREHOUSE_SCHEMA_VERSION:
+            return None
+        return state
+
+    def _save_state(self, state: Dict[str, Any]) -> None:
+        os.makedirs(self.warehouse_dir, exist_ok=True)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _candidate_run_dirs(self) -> List[str]:
+        if not os.path.isdir(self.runs_root):
+            return []
+        with os.scandir(self.runs_root) as entries:
+            return sorted(entry.path for entry in entries
+                          if entry.is_dir() and not entry.name.startswith(".")
+                          and entry.name not in ("sweeps", "cache"))
+
+    def _data_files(self) -> List[str]:
+        files = []
+        for root, _, names in os.walk(self.metrics_dir):
+            files.extend(os.path.join(root, name) for name in names if name.endswith(".parquet"))
+        return files
+
+    def ingest(self, rebuild: bool = False) -> Dict[str, int]:
+        # Only run directories not seen before are read; re-running a run creates a new
+        # directory, and runs appear only once complete, so processed ones never change.
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        state = None if rebuild else self._load_state()
+        if state is None:
+            # Files written with an older schema cannot be queried together with new ones
+            if os.path.isdir(self.metrics_dir):
+                shutil.rmtree(self.metrics_dir)
+            state = {"version": WAREHOUSE_SCHEMA_VERSION, "ingested": {}}
+        ingested = state["ingested"]
+
+        # Committed runs name their results file in the run index; only older run
+        # directories need searching
+        indexed = {os.path.join(self.runs_root, entry["name"]): entry
+                   for entry in RunIndex(self.runs_root).entries()}
+        rows = []
+        new_runs = skipped = 0
+        for run_dir in self._candidate_run_dirs():
+            if run_dir in ingested:
+                continue
+            entry = indexed.get(run_dir)
+            if entry is not None and entry.get("results_file"):
+                results_file = os.path.join(run_dir, entry["results_file"])
+            else:
+                results_file = find_results_file(run_dir)
+            if results_file is None:
+                skipped += 1  # failed, or not a run directory
+                continue
+            rows.extend(flatten_run(run_dir, results_file, run_id=entry["run_id"] if entry else None))
+            ingested[run_dir] = results_file
+            new_runs += 1
+
+        if rows:
+            table = pa.Table.from_pylist(rows, schema=_schema())
+            ds.write_dataset(
+                table, self.metrics_dir, format="parquet", partitioning=["suite"],
+                partitioning_flavor="hive", existing_data_behavior="overwrite_or_ignore",
+                # Unique per ingest: existing files with the same name would be overwritten
+                basename_template=f"part-{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:12]}-{{i}}.parquet")
+        self._save_state(state)
+
+        if len(self._data_files()) > COMPACT_AFTER_FILES:
+            self.compact()
+        return {"new_runs": new_runs, "rows": len(rows), "skipped": skipped, "total_runs": len(ingested)}
+
+    def compact(self) -> None:
+        # Rewrites the many small per-ingest files into one file per suite
+        import pyarrow.dataset as ds
+        if not os.path.isdir(self.metrics_dir):
+            return
+        table = self._dataset().to_table()
+        tmp_dir = self.metrics_dir + ".compact"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        ds.write_dataset(table, tmp_dir, format="parquet", partitioning=["suite"],
+                         partitioning_flavor="hive", basename_template="part-compacted-{i}.parquet")
+        old_dir = self.metrics_dir + ".old"
+        shutil.rmtree(old_dir, ignore_errors=True)
+        os.replace(self.metrics_dir, old_dir)
+        os.replace(tmp_dir, self.metrics_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+    def _dataset(self):
+        import pyarrow.dataset as ds
+        return ds.dataset(self.metrics_dir, format="parquet", partitioning="hive", schema=_schema())
+
+    def query(self, columns: Optional[List[str]] = None, suite: Optional[str] = None,
+              model_id: Optional[str] = None, metric: Optional[str] = None,
+              num_few_shot: Optional[int] = None, run_ids: Optional[List[str]] = None,
+              include_sampled: bool = True):
+        # Returns a pyarrow Table; filters are pushed down so only matching partitions and
+        # row groups are read
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        if not os.path.isdir(self.metrics_dir):
+            return _schema().empty_table()
+        conditions = []
+        if suite is not None:
+            conditions.append(ds.field("suite") == suite)
+        if model_id is not None:
+            conditions.append(ds.field("model_id") == model_id)
+        if metric is not None:
+            conditions.append(ds.field("metric") == metric)
+        if num_few_shot is not None:
+            conditions.append(ds.field("num_few_shot") == num_few_shot)
+        if run_ids:
+            conditions.append(ds.field("run_id").isin(pa.array(run_ids)))
+        if not include_sampled:
+            conditions.append(ds.field("max_samples").is_null())
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return self._dataset().to_table(columns=columns, filter=expression)
+
+    def resolve_run(self, run_ref: str) -> Optional[str]:
+        # Accepts a run_id (or unique prefix) or a run directory path/name
+        import pyarrow.compute as pc
+        table = self.query(columns=["run_id", "run_dir"])
+        ref = os.path.basename(os.path.normpath(run_ref))
+        hits = pc.or_(pc.starts_with(table.column("run_id"), run_ref),
+                      pc.ends_with(table.column("run_dir"), ref))
+        table = table.filter(hits)
+        matches = {run_id for run_id, run_dir in zip(table.column("run_id").to_pylist(),
+                                                     table.column("run_dir").to_pylist())
+                   if run_id.startswith(run_ref) or os.path.basename(os.path.normpath(run_dir)) == ref}
+        if len(matches) > 1:
+            warnings.warn(f"Run reference '{run_ref}' is ambiguous ({len(matches)} runs).")
+            return None
+        return matches.pop() if matches else None
+
+
+def _glob_to_regex(pattern: str) -> str:
+    # Arrow's RE2 engine does not accept fnmatch.translate's Python-only syntax
+    regex = "".join(".*" if ch == "*" else "." if ch == "?" else re.escape(ch) for ch in pattern)
+    return f"^{regex}$"
+
+
+def _task_filter(table, task_pattern: Optional[str]):
+    import pyarrow.compute as pc
+    if not task_pattern or table.num_rows == 0:
+        return table
+    return table.filter(pc.match_substring_regex(table.column("task"), _glob_to_regex(task_pattern)))
+
+
+def leaderboard(warehouse: ResultsWarehouse, metric: str, suite: Optional[str] = None,
+                task_pattern: Optional[str] = None, num_few_shot: Optional[int] = None,
+                limit: int = 20) -> List[Dict[str, Any]]:
+    # Best score per (model, revision, quantization, task), averaged over the matching tasks.
+    # A quantized model is ranked apart from its full-precision runs, and models that cover
+    # fewer tasks are listed with their task count so partial coverage is visible.
+    import pyarrow.compute as pc
+    table = warehouse.query(columns=["model_id", "revision", "quantization", "suite", "task", "num_few_shot",
+                                     "value"],
+                            suite=suite, metric=metric, num_few_shot=num_few_shot, include_sampled=False)
+    table = _task_filter(table, task_pattern)
+    if table.num_rows == 0:
+        return []
+    table = table.set_column(table.schema.get_field_index("revision"), "revision",
+                             pc.fill_null(table.column("revision"), ""))
+    best = table.group_by(["model_id", "revision", "quantization", "suite", "task", "num_few_shot"]).aggregate(
+        [("value", "max")])
+    per_model = best.group_by(["model_id", "revision", "quantization"]).aggregate(
+        [("value_max", "mean"), ("value_max", "count")])
+    rows = per_model.to_pylist()
+    rows.sort(key=lambda r: r["value_max_mean"], reverse=True)
+    return [{"model_id": r["model_id"], "revision": r["revision"] or None, "quantization": r["quantization"],
+             "score": r["value_max_mean"], "num_tasks": r["value_max_count"]} for r in rows[:limit]]
+
+
+def diff_runs(warehouse: ResultsWarehouse, run_a: str, run_b: str,
+              metric: Optional[str] = None) -> List[Dict[str, Any]]:
+    table = warehouse.query(columns=["run_id", "suite", "task", "num_few_shot", "metric", "value", "stderr"],
+                            metric=metric, run_ids=[run_a, run_b])
+    values: Dict[Tuple, Dict[str, Any]] = {}
+    for row in table.to_pylist():
+        key = (row["suite"], row["task"], row["num_few_shot"], row["metric"])
+        values.setdefault(key, {})[row["run_id"]] = row
+    diffs = []
+    for (suite, task, num_few_shot, metric_name), by_run in sorted(values.items()):
+        a, b = by_run.get(run_a), by_run.get(run_b)
+        diffs.append({
+            "task": f"{suite}:{task}:{num_few_shot}", "metric": metric_name,
+            "a": a["value"] if a else None, "b": b["value"] if b else None,
+            "delta": b["value"] - a["value"] if a and b else None,
+        })
+    return diffs
+
+
+def find_regressions(warehouse: ResultsWarehouse, model_id: Optional[str] = None,
+                     metric: Optional[str] = None, threshold: float = 0.01,
+                     stderr_multiple: Optional[float] = 2.0) -> List[Dict[str, Any]]:
+    # Compares each (model, backend, quantization, task, metric)'s latest run with the run
+    # before it and reports drops larger than threshold and, when stderr is known, than
+    # stderr_multiple times the combined standard error. A 4-bit run following a
+    # full-precision one is a different series, not a regression.
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    key_columns = ["model_id", "backend", "quantization", "suite", "task", "num_few_shot", "metric"]
+    table = warehouse.query(columns=key_columns + ["created_at", "run_id", "value", "stderr"],
+                            model_id=model_id, metric=metric, include_sampled=False)
+    if table.num_rows == 0:
+        return []
+    # After sorting, each series' runs are adjacent and in time order; a row is compared
+    # with the one before it when both belong to the same series and it is the series' last
+    table = table.sort_by([(name, "ascending") for name in key_columns + ["created_at"]])
+    n = table.num_rows
+    same_as_previous = pa.array([False] * n)
+    if n > 1:
+        same = None
+        for name in key_columns:
+            column = table.column(name)
+            equal = pc.fill_null(pc.equal(column.slice(1), column.slice(0, n - 1)), False)
+            both_null = pc.and_(pc.is_null(column.slice(1)), pc.is_null(column.slice(0, n - 1)))
+            equal = pc.or_(equal, both_null)
+            same = equal if same is None else pc.and_(same, equal)
+        same_as_previous = pa.concat_arrays([pa.array([False]), pa.concat_arrays(same.chunks)])
+    is_last = pa.concat_arrays([pc.invert(same_as_previous.slice(1)), pa.array([True])])
+    candidates = pc.indices_nonzero(pc.and_(same_as_previous, is_last)).to_pylist()
+
+    columns = {name: table.column(name) for name in table.column_names}
+    regressions = []
+    for i in candidates:
+        row = {name: column[i].as_py() for name, column in columns.items()}
+        previous = {name: columns[name][i - 1].as_py() for name in ("value", "stderr", "run_id")}
+        drop = previous["value"] - row["value"]
+        if drop <= threshold:
+            continue
+        if stderr_multiple is not None and previous["stderr"] is not None and row["stderr"] is not None:
+            combined = (previous["stderr"] ** 2 + row["stderr"] ** 2) ** 0.5
+            if drop <= stderr_multiple * combined:
+                continue
+        regressions.append({
+            "model_id": row["model_id"], "backend": row["backend"], "quantization": row["quantization"],
+            "task": f"{row['suite']}:{row['task']}:{row['num_few_shot']}",
+            "metric": row["metric"], "previous": previous["value"], "latest": row["value"],
+            "drop": drop, "previous_run": previous["run_id"], "latest_run": row["run_id"],
+        })
+    regressions.sort(key=lambda r: r["drop"], reverse=True)
+    return regressions
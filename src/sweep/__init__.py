@@ -0,0 +1,10 @@
+from .spec import load_sweep_spec, expand_sweep, validate_jobs, SweepSpecError
+from .sweep_runner import run_sweep
+
+__all__ = [
+    'load_sweep_spec',
+    'expand_sweep',
+    'validate_jobs',
+    'SweepSpecError',
+    'run_sweep'
+]
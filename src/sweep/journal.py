@@ -0,0 +1,64 @@
+import hashlib
+import json
+import os
+import time
+import warnings
+from typing import Dict, Any, Optional
+
+JOB_STATES = ("queued", "running", "done", "failed", "interrupted")
+
+
+def compute_job_id(job: Dict[str, Any]) -> str:
+    fields = {key: value for key, value in job.items() if key != "job_id"}
+    canonical = json.dumps(fields, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+class SweepJournal:
+    # Append-only JSONL log of job state transitions. Every line is flushed and fsynced
+    # so a preempted machine loses at most the transition it was writing.
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        record["ts"] = time.time()
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def start_fresh(self) -> None:
+        # Earlier state stays in the file but is ignored when replaying
+        self._append({"event": "reset"})
+
+    def record(self, job_id: str, state: str, output_dir: Optional[str] = None, **fields) -> None:
+        if state not in JOB_STATES:
+            raise ValueError(f"Unknown job state '{state}'. Expected one of {JOB_STATES}.")
+        self._append({"job_id": job_id, "state": state, "output_dir": output_dir, **fields})
+
+    def replay(self) -> Dict[str, Dict[str, Any]]:
+        # Latest record per job since the last reset
+        states: Dict[str, Dict[str, Any]] = {}
+        if not os.path.exists(self.path):
+            return states
+        with open(self.path, 'r') as f:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a hard kill; everything before it is intact
+                    warnings.warn(f"Ignoring malformed line {line_number} in journal {self.path}")
+                    continue
+                if record.get("event") == "reset":
+                    states = {}
+                    continue
+                previous = states.get(record["job_id"], {})
+                # Keep the last known output dir when a later record does not carry one
+                if record.get("output_dir") is None and previous.get("output_dir"):
+                    record["output_dir"] = previous["output_dir"]
+                states[record["job_id"]] = record
+        return states
@@ -0,0 +1,337 @@
+import collections
+import os
+import shlex
+import time
+from typing import Dict, Any, List, Optional
+
+from ..config import get_hf_token, LIGHTEVAL_BACKENDS
+from ..executors import JobExecutor, LocalExecutor
+from ..frameworks import LightevalRunner
+from ..frameworks.lighteval_perf import LightevalPhaseTracker
+from ..utils.process_utils import (TelemetrySampler, format_progress, lines_have_oom,
+                                   DEFAULT_TELEMETRY_INTERVAL_S)
+from ..utils.hf_utils import WeightPrefetcher
+from ..utils.system_utils import _run_nvidia_smi, estimate_memory_needed_gb
+from .journal import SweepJournal
+from .spec import job_task_details, job_runner_kwargs
+
+# Sentinel returned by _pick_device when GPUs exist but none can take the job right now
+_NO_DEVICE_FREE = -1
+
+
+# Runs lighteval jobs concurrently, pinning each one to the GPU with the most free memory,
+# or handing them to a remote executor (Ray) that places them itself
+class GpuScheduler:
+    def __init__(self, max_parallel: Optional[int] = None, min_free_gb: float = 0.0,
+                 max_oom_retries: int = 1, poll_interval: float = 2.0,
+                 reservation_s: float = 60.0, status_interval: float = 30.0,
+                 force_rerun: bool = False, journal: Optional[SweepJournal] = None,
+                 telemetry_interval: float = DEFAULT_TELEMETRY_INTERVAL_S,
+                 prefetcher: Optional[WeightPrefetcher] = None,
+                 executor: Optional[JobExecutor] = None):
+        self.max_parallel = max_parallel
+        self.min_free_gb = min_free_gb
+        self.max_oom_retries = max_oom_retries
+        self.poll_interval = poll_interval
+        # nvidia-smi only reflects a job's memory once its model is loaded, so each job's
+        # estimated memory (at least min_free_gb) is reserved on its device for this long
+        # after launch.
+        self.reservation_s = reservation_s
+        self.status_interval = status_interval
+        self.force_rerun = force_rerun
+        self.journal = journal
+        self.telemetry_interval = telemetry_interval
+        # Downloads the models of queued jobs while others run; launches do not wait for
+        # it, since lighteval blocks on the same cache file locks
+        self.prefetcher = prefetcher
+        self.executor = executor or LocalExecutor()
+        self._runners: Dict[str, LightevalRunner] = {}
+
+    def _runner_for(self, model_id: str) -> LightevalRunner:
+        if model_id not in self._runners:
+            self._runners[model_id] = LightevalRunner(
+                model_id=model_id, hf_token=get_hf_token(), executor=self.executor)
+        return self._runners[model_id]
+
+    def _journal(self, entry: Dict[str, Any], state: str, output_dir: Optional[str] = None) -> None:
+        if self.journal is not None:
+            self.journal.record(entry["job"]["job_id"], state, output_dir=output_dir,
+                                attempts=entry["attempts"])
+
+    def _resolve_quantization(self, entry: Dict[str, Any]) -> bool:
+        # As LightevalRunner.run() does before its cache lookup: 'auto' and checkpoints
+        # quantized ahead of time become the concrete mode the job runs with (and is cached,
+        # reserved and recorded under); False (after the runner printed why) when the job's
+        # mode cannot run here
+        job = entry["job"]
+        if job["backend"] not in LIGHTEVAL_BACKENDS:
+            return True
+        quantization = self._runner_for(job["model_id"]).resolve_quantization(
+            job["backend"], **job_runner_kwargs(job))
+        if quantization is None:
+            return False
+        if quantization != "none" or job.get("quantization"):
+            job["quantization"] = quantization
+        return True
+
+    def _cached_run(self, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if self.force_rerun or entry["attempts"] > 0:
+            return None
+        job = entry["job"]
+        return self._runner_for(job["model_id"]).lookup_cached_run(
+            job_task_details(job), job["backend"], **job_runner_kwargs(job))
+
+    def _reservation_gb(self, job: Dict[str, Any]) -> float:
+        # The job's predicted memory need, from the model's parameter count
+        num_params = self._runner_for(job["model_id"]).model_parameter_count()
+        needed_gb = estimate_memory_needed_gb(num_params, dtype=job.get("dtype", "auto"),
+                                              quantization=job.get("quantization", "none"))
+        return max(self.min_free_gb, needed_gb or 0.0)
+
+    def _pick_device(self, entry: Dict[str, Any], running: List[Dict[str, Any]]) -> Optional[int]:
+        if self.executor.remote:
+            return None  # the executor places jobs on its own nodes
+        gpus = _run_nvidia_smi()
+        if not gpus:
+            return None  # CPU-only or no nvidia-smi: run unpinned
+
+        now = time.monotonic()
+        reserved = collections.Counter()
+        jobs_on_device = collections.Counter()
+        for other in running:
+            if other["device"] is None:
+                continue
+            jobs_on_device[other["device"]] += 1
+            if now - other["started_at"] < self.reservation_s:
+                reserved[other["device"]] += other["reserved_gb"]
+
+        if all(gpu["index"] in entry["excluded_devices"] for gpu in gpus):
+            # Every device has OOM'd on this job already; allow any device again
+            entry["excluded_devices"].clear()
+        candidates = [(gpu["memory_free_gb"] - reserved[gpu["index"]], gpu["index"])
+                      for gpu in gpus if gpu["index"] not in entry["excluded_devices"]]
+        # Among the devices with room for the job, the one running the fewest jobs, then the
+        # one with the most free memory: free memory alone would send a whole launch burst
+        # to one GPU when the reservations are unknown (no parameter count, min_free_gb 0)
+        needed_gb = self._reservation_gb(entry["job"])
+        roomy = [(-jobs_on_device[index], free, index) for free, index in candidates if free >= needed_gb]
+        if roomy:
+            _, best_free, best_index = max(roomy)
+        else:
+            best_free, best_index = max(candidates)
+        if best_free >= self.min_free_gb:
+            return best_index
+        if not running:
+            print(
+                f"Warning: No GPU has {self.min_free_gb} GB free (best: GPU {best_index} with "
+                f"{best_free:.2f} GB). Launching there anyway.")
+            return best_index
+        return _NO_DEVICE_FREE
+
+    def _launch(self, entry: Dict[str, Any], device: Optional[int]) -> bool:
+        job = entry["job"]
+        runner = self._runner_for(job["model_id"])
+        built = runner.build_command(
+            job_task_details(job), job["backend"], **job_runner_kwargs(job))
+        if built is None:
+            return False
+        command, run_output_dir = built
+        staging_dir = runner.run_staging_dir(run_output_dir)
+
+        entry["output_dir"] = run_output_dir
+        entry["device"] = device
+        entry["reserved_gb"] = self._reservation_gb(job) if device is not None else 0.0
+        entry["attempts"] += 1
+        entry["started_at"] = time.monotonic()
+
+        pinned = f" on GPU {device}" if device is not None else ""
+        print(f"Launching job {entry['index']}{pinned} (attempt {entry['attempts']}): {shlex.join(command)}")
+        # Output of concurrent jobs would interleave on the console, so it only goes to the
+        # per-run log files; progress is reported by the scheduler loop instead.
+        entry["phase_tracker"] = LightevalPhaseTracker()
+        try:
+            entry["process"] = self.executor.submit(
+                command, log_dir=staging_dir, env=os.environ.copy(), echo=False,
+                on_line=entry["phase_tracker"].on_line, device=device)
+        except FileNotFoundError:
+            print("\nError: 'lighteval' command not found.")
+            runner.abandon_run(run_output_dir, "lighteval command not found")
+            return False
+        except Exception as e:
+            print(f"\nError: Could not start job {entry['index']}: {e}")
+            runner.abandon_run(run_output_dir, str(e))
+            return False
+        if self.executor.remote:
+            print(f"Job {entry['index']} placed on {entry['process'].location}")
+        entry["sampler"] = None
+        # Telemetry samples a local pid; remote jobs have none
+        if self.telemetry_interval and entry["process"].pid is not None:
+            entry["sampler"] = TelemetrySampler(
+                entry["process"].pid, staging_dir, interval_s=self.telemetry_interval,
+                gpu_indices=[device] if device is not None else None)
+            entry["sampler"].start()
+        self._journal(entry, "running", run_output_dir)
+        return True
+
+    def _print_status(self, running: List[Dict[str, Any]]) -> None:
+        for entry in running:
+            progress = entry["process"].progress
+            status = format_progress(progress) if progress else "[progress] starting"
+            print(f"  Job {entry['index']}: {status}")
+
+    def _should_retry_oom(self, entry: Dict[str, Any]) -> bool:
+        if entry["attempts"] > self.max_oom_retries:
+            return False
+        if not lines_have_oom(entry["process"].tail("stderr")):
+            return False
+
+        job = entry["job"]
+        if entry["device"] is not None:
+            entry["excluded_devices"].add(entry["device"])
+        if job["backend"] != "vllm" and job["batch_size"] and job["batch_size"] > 1:
+            job["batch_size"] = max(1, job["batch_size"] // 2)
+            print(
+                f"Job {entry['index']} ran out of GPU memory; retrying with batch size {job['batch_size']}.")
+        else:
+            print(f"Job {entry['index']} ran out of GPU memory; retrying on another device.")
+        return True
+
+    def _terminate_running(self, running: List[Dict[str, Any]]) -> None:
+        print(f"\nStopping {len(running)} running job(s)...")
+        for entry in running:
+            entry["process"].terminate()
+            if entry["sampler"] is not None:
+                entry["sampler"].stop()
+            self._journal(entry, "interrupted", entry["output_dir"])
+
+    def run(self, jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        running: List[Dict[str, Any]] = []
+        try:
+            return self._run_loop(jobs, running)
+        except KeyboardInterrupt:
+            self._terminate_running(running)
+            raise
+
+    def _run_loop(self, jobs: List[Dict[str, Any]], running: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        max_parallel = self.max_parallel
+        if max_parallel is None:
+            max_parallel = self.executor.capacity()
+        if max_parallel is None:
+            gpus = _run_nvidia_smi()
+            max_parallel = max(1, len(gpus)) if gpus else 1
+
+        pending = collections.deque(
+            {"index": i, "job": dict(job), "attempts": 0, "excluded_devices": set(), "resolved": False}
+            for i, job in enumerate(jobs, start=1))
+        records: Dict[int, Dict[str, Any]] = {}
+        last_status = time.monotonic()
+
+        while pending or running:
+            for entry in list(running):
+                returncode = entry["process"].poll()
+                if returncode is None:
+                    continue
+                running.remove(entry)
+                duration = time.monotonic() - entry["started_at"]
+                if entry["sampler"] is not None:
+                    entry["sampler"].stop()
+
+                job = entry["job"]
+                runner = self._runner_for(job["model_id"])
+                runner.last_perf_report = None
+                if returncode == 0:
+                    runner.write_run_perf(
+                        runner.run_staging_dir(entry["output_dir"]), job["backend"],
+                        [runner.task_string(job_task_details(job))],
+                        entry["phase_tracker"], entry["process"].started_at, time.monotonic())
+                else:
+                    runner.abandon_run(entry["output_dir"], f"lighteval exited with return code {returncode}")
+                runner.record_run_history(
+                    job["backend"], success=returncode == 0,
+                    oom=returncode != 0 and lines_have_oom(entry["process"].tail("stderr")),
+                    device=entry["device"], **job_runner_kwargs(job))
+
+                if returncode != 0 and self._should_retry_oom(entry):
+                    pending.appendleft(entry)
+                    continue
+
+                if returncode == 0 and not runner.commit_run(entry["output_dir"]):
+                    returncode = -1
+                if returncode == 0:
+                    runner.store_cached_run(
+                        job_task_details(job), job["backend"], entry["output_dir"], **job_runner_kwargs(job))
+
+                self._journal(entry, "done" if returncode == 0 else "failed", entry["output_dir"])
+                status = "finished" if returncode == 0 else f"failed (return code {returncode})"
+                print(f"Job {entry['index']} {status} after {duration:.1f}s: {entry['output_dir']}")
+                records[entry["index"]] = {
+                    "job": entry["job"],
+                    "success": returncode == 0,
+                    "output_dir": entry["output_dir"],
+                    "duration_s": round(duration, 2),
+                    "device": entry["device"],
+                    "attempts": entry["attempts"],
+                }
+
+            if self.prefetcher is not None:
+                self.prefetcher.prefetch_upcoming([e["job"]["model_id"] for e in pending],
+                                                  running=[e["job"]["model_id"] for e in running])
+
+            while pending and len(running) < max_parallel:
+                entry = pending[0]
+                if not entry["resolved"]:
+                    entry["resolved"] = True
+                    if not self._resolve_quantization(entry):
+                        pending.popleft()
+                        print(f"Job {entry['index']} failed: quantization "
+                              f"'{entry['job'].get('quantization', 'none')}' cannot be used.")
+                        self._journal(entry, "failed")
+                        records[entry["index"]] = {
+                            "job": entry["job"],
+                            "success": False,
+                            "output_dir": None,
+                            "duration_s": 0.0,
+                            "device": None,
+                            "attempts": 0,
+                        }
+                        continue
+                cached = self._cached_run(entry)
+                if cached is not None:
+                    pending.popleft()
+                    print(f"Job {entry['index']} has cached results: {cached['run_output_dir']}")
+                    self._journal(entry, "done", cached["run_output_dir"])
+                    records[entry["index"]] = {
+                        "job": entry["job"],
+                        "success": True,
+                        "output_dir": cached["run_output_dir"],
+                        "results_file": cached["results_file"],
+                        "duration_s": 0.0,
+                        "device": None,
+                        "attempts": 0,
+                        "cached": True,
+                    }
+                    continue
+                device = self._pick_device(entry, running)
+                if device == _NO_DEVICE_FREE:
+                    break
+                pending.popleft()
+                if self._launch(entry, device):
+                    running.append(entry)
+                else:
+                    self._journal(entry, "failed", entry.get("output_dir"))
+                    records[entry["index"]] = {
+                        "job": entry["job"],
+                        "success": False,
+                        "output_dir": entry.get("output_dir"),
+                        "duration_s": 0.0,
+                        "device": device,
+                        "attempts": entry["attempts"],
+                    }
+
+            if running:
+                if time.monotonic() - last_status >= self.status_interval:
+                    self._print_status(running)
+                    last_status = time.monotonic()
+                time.sleep(self.poll_interval)
+
+        return [records[i] for i in sorted(records)]
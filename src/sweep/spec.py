@@ -0,0 +1,194 @@
+import fnmatch
+import itertools
+import json
+import os
+import yaml
+from typing import Dict, Any, List
+
+from ..config import (LIGHTEVAL_BACKENDS, VALID_DTYPES, VALID_QUANTIZATIONS, QUANTIZATION_BACKENDS,
+                      get_supported_tasks)
+from .journal import compute_job_id
+
+# Matrix axes and their defaults when omitted from the spec
+SWEEP_AXES_DEFAULTS = {
+    "backends": ["accelerate"],
+    "num_few_shot": [5],
+    "allow_truncation": [1],
+    "dtype": ["auto"],
+    "batch_size": [1],
+    "quantization": ["none"],
+}
+# Settings of the 'endpoint' backend, from the spec's 'endpoint' mapping. The API key is
+# read from the environment variable named by api_key_env, never from the spec itself.
+ENDPOINT_SPEC_KEYS = ("base_url", "api_key_env", "concurrency", "max_retries", "request_timeout")
+
+
+class SweepSpecError(ValueError):
+    pass
+
+
+def load_sweep_spec(filepath: str) -> Dict[str, Any]:
+    if not os.path.exists(filepath):
+        raise SweepSpecError(f"Sweep spec file not found: {filepath}")
+
+    with open(filepath, 'r') as f:
+        if filepath.endswith(".json"):
+            spec = json.load(f)
+        else:
+            spec = yaml.safe_load(f)
+
+    if not isinstance(spec, dict):
+        raise SweepSpecError(
+            f"Sweep spec {filepath} must be a mapping with 'models' and 'tasks' keys.")
+    for key in ("models", "tasks"):
+        if not spec.get(key):
+            raise SweepSpecError(f"Sweep spec {filepath} is missing '{key}'.")
+
+    endpoint = spec.get("endpoint")
+    if endpoint is not None:
+        if not isinstance(endpoint, dict) or not endpoint.get("base_url"):
+            raise SweepSpecError(f"Sweep spec {filepath}: 'endpoint' must be a mapping with a 'base_url'.")
+        unknown = set(endpoint) - set(ENDPOINT_SPEC_KEYS)
+        if unknown:
+            raise SweepSpecError(
+                f"Sweep spec {filepath}: unknown 'endpoint' key(s) {sorted(unknown)}; "
+                f"expected {list(ENDPOINT_SPEC_KEYS)}.")
+
+    if not isinstance(spec.get("save_details", True), bool):
+        raise SweepSpecError(f"Sweep spec {filepath}: 'save_details' must be true or false.")
+
+    spec.setdefault("name", os.path.splitext(os.path.basename(filepath))[0])
+    return spec
+
+
+def _as_list(value) -> List[Any]:
+    if isinstance(value, list):
+        return value
+    return [value]
+
+
+def expand_task_patterns(patterns: List[str]) -> List[str]:
+    # Entries may be exact task identifiers or shell-style patterns such as 'helm|mmlu:*'
+    supported_tasks = sorted(get_supported_tasks())
+    expanded = []
+    for pattern in patterns:
+        if any(ch in pattern for ch in "*?["):
+            matches = fnmatch.filter(supported_tasks, pattern)
+            if not matches:
+                raise SweepSpecError(
+                    f"Task pattern '{pattern}' did not match any supported task.")
+            expanded.extend(matches)
+        else:
+            expanded.append(pattern)
+    # Preserve order, drop duplicates
+    return list(dict.fromkeys(expanded))
+
+
+def expand_sweep(spec: Dict[str, Any]) -> List[Dict[str, Any]]:
+    models = _as_list(spec["models"])
+    tasks = expand_task_patterns(_as_list(spec["tasks"]))
+    axes = {key: _as_list(spec.get(key, default))
+            for key, default in SWEEP_AXES_DEFAULTS.items()}
+    endpoint = spec.get("endpoint") or {}
+
+    jobs = []
+    seen = set()
+    for model_id, task, backend, num_few_shot, allow_truncation, dtype, batch_size, quantization in itertools.product(
+            models, tasks, axes["backends"], axes["num_few_shot"], axes["allow_truncation"],
+            axes["dtype"], axes["batch_size"], axes["quantization"]):
+        # The runner only forwards dtype to vLLM and batch size to the local backends,
+        # so collapse the axes that do not apply to avoid running identical cells twice.
+        if backend != "vllm":
+            dtype = "auto"
+        if backend in ("vllm", "endpoint"):
+            batch_size = None
+        if quantization in QUANTIZATION_BACKENDS and backend not in QUANTIZATION_BACKENDS[quantization]:
+            quantization = "none"
+
+        job = {
+            "model_id": model_id,
+            "task_identifier": task,
+            "num_few_shot": num_few_shot,
+            "allow_truncation": allow_truncation,
+            "backend": backend,
+            "dtype": dtype,
+            "batch_size": batch_size,
+        }
+        if quantization != "none":
+            # Only quantized jobs carry the field, so existing job IDs are unchanged
+            job["quantization"] = quantization
+        if backend == "endpoint":
+            # Part of the job's identity: another server is another job
+            job["base_url"] = endpoint.get("base_url")
+        job_key = tuple(job.values())
+        if job_key in seen:
+            continue
+        seen.add(job_key)
+        job["job_id"] = compute_job_id(job)
+        if backend == "endpoint":
+            job["endpoint_options"] = {key: endpoint[key] for key in ENDPOINT_SPEC_KEYS[1:] if key in endpoint}
+        if spec.get("save_details") is False:
+            # Per-sample details are saved by default; turning them off does not change the results
+            job["save_details"] = False
+        jobs.append(job)
+    return jobs
+
+
+def validate_jobs(jobs: List[Dict[str, Any]]) -> List[str]:
+    supported_tasks = get_supported_tasks()
+    errors = []
+    for i, job in enumerate(jobs):
+        prefix = f"Job {i} ({job['model_id']} / {job['task_identifier']} / {job['backend']})"
+        if job["task_identifier"] not in supported_tasks:
+            errors.append(
+                f"{prefix}: task '{job['task_identifier']}' is not supported.")
+        if job["backend"] not in LIGHTEVAL_BACKENDS:
+            errors.append(
+                f"{prefix}: backend '{job['backend']}' is not one of {list(LIGHTEVAL_BACKENDS.keys())}.")
+        if job["backend"] == "endpoint" and not job.get("base_url"):
+            errors.append(f"{prefix}: the endpoint backend needs an 'endpoint' mapping with a 'base_url'.")
+        if job["dtype"] not in VALID_DTYPES:
+            errors.append(
+                f"{prefix}: dtype '{job['dtype']}' is not one of {VALID_DTYPES}.")
+        quantization = job.get("quantization", "none")
+        if quantization == "auto" or quantization not in VALID_QUANTIZATIONS:
+            # A sweep compares fixed configurations, so 'auto' is left to single runs
+            errors.append(f"{prefix}: quantization '{quantization}' is not one of "
+                          f"{[q for q in VALID_QUANTIZATIONS if q != 'auto']}.")
+        if not isinstance(job["num_few_shot"], int) or job["num_few_shot"] < 0:
+            errors.append(
+                f"{prefix}: num_few_shot must be a non-negative integer.")
+        if job["allow_truncation"] not in (0, 1):
+            errors.append(f"{prefix}: allow_truncation must be 0 or 1.")
+        if job["batch_size"] not in (None, "auto") and (not isinstance(job["batch_size"], int) or job["batch_size"] < 1):
+            errors.append(f"{prefix}: batch_size must be a positive integer or 'auto'.")
+    return errors
+
+
+def job_runner_kwargs(job: Dict[str, Any]) -> Dict[str, Any]:
+    kwargs = {}
+    if job["backend"] == "vllm":
+        kwargs["dtype"] = job["dtype"]
+    elif job["backend"] == "endpoint":
+        options = dict(job.get("endpoint_options") or {})
+        kwargs["base_url"] = job["base_url"]
+        kwargs["api_key"] = os.getenv(options.pop("api_key_env", "OPENAI_API_KEY"))
+        kwargs.update(options)
+    elif job["batch_size"] is not None:
+        kwargs["override-batch-size"] = job["batch_size"]
+    if job.get("quantization"):
+        kwargs["quantization"] = job["quantization"]
+    if job.get("save_details") is False:
+        kwargs["save_details"] = False
+    if job.get("output_dir"):
+        # Resumed jobs write into the directory of their interrupted attempt
+        kwargs["output_dir"] = job["output_dir"]
+    return kwargs
+
+
+def job_task_details(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "task_identifier": job["task_identifier"],
+        "num_few_shot": job["num_few_shot"],
+        "allow_truncation": job["allow_truncation"],
+    }
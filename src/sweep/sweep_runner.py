@@ -0,0 +1,365 @@
+import datetime
+import json
+import os
+import signal
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from ..config import RESULTS_DIR, get_hf_token
+from ..executors import JobExecutor, get_executor
+from ..frameworks import LightevalRunner, LightevalPythonRunner
+from ..results import find_results_file, load_results, load_results_file, summarize_metrics
+from ..utils.hf_utils import (check_models_exist, WeightPrefetcher, DEFAULT_PREFETCH_LOOKAHEAD,
+                              DEFAULT_PREFETCH_WORKERS)
+from ..utils.process_utils import DEFAULT_TELEMETRY_INTERVAL_S
+from .journal import SweepJournal
+from .scheduler import GpuScheduler
+from .spec import load_sweep_spec, expand_sweep, validate_jobs, job_task_details, job_runner_kwargs, SweepSpecError
+
+
+def prepare_sweep(spec_path: str, check_models: bool = True) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    spec = load_sweep_spec(spec_path)
+    jobs = expand_sweep(spec)
+
+    errors = validate_jobs(jobs)
+    if check_models:
+        # Endpoint jobs name whatever model the server serves, which need not be on the Hub
+        local_models = (job["model_id"] for job in jobs if job["backend"] != "endpoint")
+        for model_id, exists in check_models_exist(local_models).items():
+            if not exists:
+                errors.append(f"Model '{model_id}' could not be verified on the Hugging Face Hub.")
+    if errors:
+        raise SweepSpecError(
+            "Sweep spec failed validation:\n  " + "\n  ".join(errors))
+    return spec, jobs
+
+
+def write_sweep_summary(sweep_name: str, records: List[Dict[str, Any]], results_dir: str) -> str:
+    summary_dir = os.path.join(results_dir, "sweeps")
+    os.makedirs(summary_dir, exist_ok=True)
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    summary_path = os.path.join(summary_dir, f"{sweep_name}_{timestamp}.json")
+    summary = {
+        "sweep": sweep_name,
+        "created_at": timestamp,
+        "num_jobs": len(records),
+        "num_succeeded": sum(1 for r in records if r["success"]),
+        "jobs": records,
+    }
+    with open(summary_path, 'w') as f:
+        json.dump(summary, f, indent=2)
+    return summary_path
+
+
+def print_sweep_table(records: List[Dict[str, Any]]) -> None:
+    print("\n--- Sweep Summary ---")
+    for record in records:
+        job = record["job"]
+        status = "ok" if record["success"] else "FAILED"
+        metrics = ", ".join(f"{k}={v:.4f}" for k, v in record["metrics"].items())
+        print(
+            f"[{status:>6}] {job['model_id']} | {job['task_identifier']}|{job['num_few_shot']}|{job['allow_truncation']}"
+            f" | {job['backend']}{'/' + job['quantization'] if job.get('quantization') else ''}"
+            f" | {record['duration_s']:.1f}s | {metrics or 'no metrics'}")
+    print("---------------------")
+
+
+def _prefetch_for(prefetcher: Optional[WeightPrefetcher], model_id: str, queued_model_ids: List[str]) -> None:
+    # Starts downloading the upcoming models, then waits for the current one so its
+    # download is not counted in the run's timings
+    if prefetcher is None:
+        return
+    prefetcher.prefetch_upcoming(queued_model_ids, running=[model_id])
+    prefetcher.wait(model_id)
+
+
+def _run_sequential(jobs: List[Dict[str, Any]], journal: SweepJournal,
+                    force_rerun: bool = False,
+                    telemetry_interval: float = DEFAULT_TELEMETRY_INTERVAL_S,
+                    prefetcher: Optional[WeightPrefetcher] = None,
+                    executor: Optional[JobExecutor] = None) -> List[Dict[str, Any]]:
+    runners = {}
+    records = []
+    for i, job in enumerate(jobs, start=1):
+        print(f"\n=== Sweep job {i}/{len(jobs)} ===")
+        runner = runners.get(job["model_id"])
+        if runner is None:
+            runner = LightevalRunner(model_id=job["model_id"], hf_token=get_hf_token(), executor=executor)
+            runners[job["model_id"]] = runner
+        _prefetch_for(prefetcher, job["model_id"], [j["model_id"] for j in jobs[i:]])
+
+        runner.last_output_dir = None
+        journal.record(job["job_id"], "running", output_dir=job.get("output_dir"))
+        start = time.monotonic()
+        try:
+            success = runner.run(task_details=job_task_details(job),
+                                 backend=job["backend"], force_rerun=force_rerun,
+                                 telemetry_interval=telemetry_interval, **job_runner_kwargs(job))
+        except KeyboardInterrupt:
+            journal.record(job["job_id"], "interrupted", output_dir=runner.last_output_dir)
+            raise
+        journal.record(job["job_id"], "done" if success else "failed",
+                       output_dir=runner.last_output_dir)
+        records.append({
+            "job": job,
+            "success": success,
+            "output_dir": runner.last_output_dir,
+            "results_file": runner.last_results_file,
+            "duration_s": round(time.monotonic() - start, 2),
+        })
+    return records
+
+
+def _group_jobs(jobs: List[Dict[str, Any]]) -> Dict[Tuple, List[Dict[str, Any]]]:
+    # Jobs that differ only in task (and few-shot/truncation) can share one model load
+    groups: Dict[Tuple, List[Dict[str, Any]]] = {}
+    for job in jobs:
+        key = (job["model_id"], job["backend"], job["dtype"], job["batch_size"], job.get("quantization", "none"))
+        groups.setdefault(key, []).append(job)
+    return groups
+
+
+def _run_grouped(jobs: List[Dict[str, Any]], journal: SweepJournal, group_size: int,
+                 force_rerun: bool = False,
+                 telemetry_interval: float = DEFAULT_TELEMETRY_INTERVAL_S,
+                 prefetcher: Optional[WeightPrefetcher] = None,
+                 executor: Optional[JobExecutor] = None) -> List[Dict[str, Any]]:
+    records = []
+    groups = _group_jobs(jobs)
+    group_models = [key[0] for key in groups]
+    for g, ((model_id, backend, _, _, _), group_jobs) in enumerate(groups.items(), start=1):
+        print(f"\n=== Sweep group: {model_id} ({backend}), {len(group_jobs)} task(s) ===")
+        runner = LightevalRunner(model_id=model_id, hf_token=get_hf_token(), executor=executor)
+        _prefetch_for(prefetcher, model_id, group_models[g:])
+        for job in group_jobs:
+            journal.record(job["job_id"], "running")
+
+        finished = set()
+        group_start = time.monotonic()
+
+        def on_result(index, result):
+            job = group_jobs[index]
+            finished.add(index)
+            journal.record(job["job_id"], "done" if result["success"] else "failed",
+                           output_dir=result["output_dir"])
+            records.append({
+                "job": job,
+                "success": result["success"],
+                "output_dir": result["output_dir"],
+                "results_file": result["results_file"],
+                # Tasks packed into one process share its wall-clock time
+                "duration_s": round(time.monotonic() - group_start, 2),
+            })
+
+        kwargs = {k: v for k, v in job_runner_kwargs(group_jobs[0]).items() if k != "output_dir"}
+        try:
+            runner.run_many([job_task_details(job) for job in group_jobs], backend,
+                            group_size=group_size, on_result=on_result,
+                            force_rerun=force_rerun, telemetry_interval=telemetry_interval,
+                            **kwargs)
+        except KeyboardInterrupt:
+            for index, job in enumerate(group_jobs):
+                if index not in finished:
+                    journal.record(job["job_id"], "interrupted")
+            raise
+    return records
+
+
+def _run_in_process(jobs: List[Dict[str, Any]], journal: SweepJournal,
+                    force_rerun: bool = False,
+                    telemetry_interval: float = DEFAULT_TELEMETRY_INTERVAL_S,
+                    prefetcher: Optional[WeightPrefetcher] = None) -> List[Dict[str, Any]]:
+    records = []
+    groups = _group_jobs(jobs)
+    group_models = [key[0] for key in groups]
+    for g, ((model_id, backend, _, _, _), group_jobs) in enumerate(groups.items(), start=1):
+        print(f"\n=== In-process group: {model_id} ({backend}), {len(group_jobs)} task(s) ===")
+        runner = LightevalPythonRunner(model_id=model_id, hf_token=get_hf_token())
+        _prefetch_for(prefetcher, model_id, group_models[g:])
+        for job in group_jobs:
+            journal.record(job["job_id"], "running")
+
+        pending = list(group_jobs)
+        last_finished = time.monotonic()
+
+        def on_result(result):
+            nonlocal last_finished
+            job = pending.pop(0)
+            journal.record(job["job_id"], "done" if result["success"] else "failed",
+                           output_dir=result["output_dir"])
+            records.append({
+                "job": job,
+                "success": result["success"],
+                "output_dir": result["output_dir"],
+                "results_file": result["results_file"],
+                "duration_s": round(time.monotonic() - last_finished, 2),
+            })
+            last_finished = time.monotonic()
+
+        # Resumed jobs get fresh directories; lighteval cannot continue a partial in-process run
+        kwargs = {k: v for k, v in job_runner_kwargs(group_jobs[0]).items() if k != "output_dir"}
+        try:
+            runner.run_tasks([job_task_details(job) for job in group_jobs], backend,
+                             on_result=on_result, force_rerun=force_rerun,
+                             telemetry_interval=telemetry_interval, **kwargs)
+        except KeyboardInterrupt:
+            for job in pending:
+                journal.record(job["job_id"], "interrupted")
+            raise
+    return records
+
+
+def _plan_resume(jobs: List[Dict[str, Any]], journal: SweepJournal) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    # Split jobs into those already completed by an earlier invocation and those left to run
+    previous = journal.replay()
+    completed, remaining = [], []
+    for job in jobs:
+        state = previous.get(job["job_id"])
+        output_dir = state.get("output_dir") if state else None
+        # A job killed after lighteval wrote its results is as good as done
+        if output_dir and find_results_file(output_dir) and state["state"] in ("done", "running", "interrupted"):
+            completed.append({
+                "job": job,
+                "success": True,
+                "output_dir": output_dir,
+                "duration_s": 0.0,
+                "resumed": True,
+            })
+            if state["state"] != "done":
+                journal.record(job["job_id"], "done", output_dir=output_dir)
+            continue
+        if output_dir and state["state"] in ("running", "interrupted"):
+            # Re-run into the same directory so anything lighteval left there is kept
+            job["output_dir"] = output_dir
+        remaining.append(job)
+    return completed, remaining
+
+
+def _resolve_auto_batch_sizes(jobs: List[Dict[str, Any]], executor: Optional[JobExecutor] = None,
+                              force_rerun: bool = False) -> None:
+    # Autotune once per model, dtype and quantization, then share the result with every job of that model.
+    # Jobs with cached results keep "auto", the key their results are cached under, and probe nothing.
+    runners = {}
+    resolved = {}
+    for job in jobs:
+        if job["batch_size"] != "auto":
+            continue
+        if job["model_id"] not in runners:
+            runners[job["model_id"]] = LightevalRunner(model_id=job["model_id"], hf_token=get_hf_token(),
+                                                       executor=executor)
+        runner = runners[job["model_id"]]
+        if not force_rerun:
+            kwargs = job_runner_kwargs(job)
+            kwargs["quantization"] = runner.resolve_quantization(job["backend"], **kwargs)
+            if kwargs["quantization"] is not None and \
+                    runner.lookup_cached_run(job_task_details(job), job["backend"], **kwargs) is not None:
+                continue
+        key = (job["model_id"], job["dtype"], job["backend"], job.get("quantization", "none"))
+        if key not in resolved:
+            resolved[key] = runner.autotune_batch_size(
+                job_task_details(job), job["backend"], dtype=job["dtype"],
+                quantization=job.get("quantization", "none"))
+        job["batch_size"] = resolved[key]
+
+
+def _raise_keyboard_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def run_sweep(spec_path: str, check_models: bool = True, dry_run: bool = False,
+              max_parallel: Optional[int] = 1, min_free_gb: float = 0.0, max_oom_retries: int = 1,
+              force_rerun: bool = False, resume: bool = False, in_process: bool = False,
+              group_size: int = 1, telemetry_interval: float = DEFAULT_TELEMETRY_INTERVAL_S,
+              prefetch_lookahead: int = DEFAULT_PREFETCH_LOOKAHEAD,
+              prefetch_workers: int = DEFAULT_PREFETCH_WORKERS, safetensors_only: bool = False,
+              hf_cache_budget_gb: Optional[float] = None, executor: str = "local",
+              executor_options: Optional[Dict[str, Any]] = None) -> bool:
+    # max_parallel=None runs as many jobs at once as the executor has room for (one per GPU
+    # locally, one per free GPU slot of a Ray cluster)
+    spec, jobs = prepare_sweep(spec_path, check_models=check_models)
+    print(f"Sweep '{spec['name']}' expanded to {len(jobs)} job(s).")
+
+    if dry_run:
+        for job in jobs:
+            print(f"  - {job}")
+        return True
+    if in_process and any(job["backend"] == "endpoint" for job in jobs):
+        print("Error: The endpoint backend cannot run in-process; run the sweep without --in-process.")
+        return False
+    if executor != "local":
+        if in_process:
+            print(f"Error: In-process sweeps run on this machine; they cannot use the {executor} executor.")
+            return False
+        if any(job["backend"] == "endpoint" for job in jobs):
+            # lighteval reaches the endpoint through a proxy bound to this machine's loopback
+            print(f"Error: Endpoint jobs run on this machine; run them without --executor {executor}.")
+            return False
+    try:
+        job_executor = get_executor(executor, **(executor_options or {}))
+    except (RuntimeError, ValueError) as e:
+        print(f"Error: {e}")
+        return False
+
+    sweeps_dir = os.path.join(RESULTS_DIR, LightevalRunner.framework_name(), "sweeps")
+    journal = SweepJournal(os.path.join(sweeps_dir, f"{spec['name']}.journal.jsonl"))
+    if resume:
+        records, jobs = _plan_resume(jobs, journal)
+        print(f"Resuming sweep: {len(records)} job(s) already done, {len(jobs)} left to run.")
+    else:
+        journal.start_fresh()
+        records = []
+    _resolve_auto_batch_sizes(jobs, executor=job_executor, force_rerun=force_rerun)
+    for job in jobs:
+        journal.record(job["job_id"], "queued", output_dir=job.get("output_dir"))
+
+    prefetcher = None
+    # Endpoint jobs load nothing locally, and remote executors load models on their nodes
+    has_local_jobs = not job_executor.remote and any(job["backend"] != "endpoint" for job in jobs)
+    if has_local_jobs and (prefetch_lookahead > 0 or hf_cache_budget_gb is not None):
+        prefetcher = WeightPrefetcher(lookahead=prefetch_lookahead, max_workers=prefetch_workers,
+                                      safetensors_only=safetensors_only, cache_budget_gb=hf_cache_budget_gb)
+
+    # Treat SIGTERM (spot preemption, scheduler kill) like Ctrl+C so children are stopped
+    # and their jobs are journaled as resumable.
+    previous_handler = signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+    try:
+        if in_process:
+            records.extend(_run_in_process(jobs, journal=journal, force_rerun=force_rerun,
+                                           telemetry_interval=telemetry_interval, prefetcher=prefetcher))
+        elif group_size > 1:
+            records.extend(_run_grouped(jobs, journal=journal, group_size=group_size,
+                                        force_rerun=force_rerun, telemetry_interval=telemetry_interval,
+                                        prefetcher=prefetcher, executor=job_executor))
+        elif max_parallel is None or max_parallel > 1:
+            scheduler = GpuScheduler(max_parallel=max_parallel, min_free_gb=min_free_gb,
+                                     max_oom_retries=max_oom_retries, force_rerun=force_rerun,
+                                     journal=journal, telemetry_interval=telemetry_interval,
+                                     prefetcher=prefetcher, executor=job_executor)
+            records.extend(scheduler.run(jobs))
+        else:
+            records.extend(_run_sequential(jobs, force_rerun=force_rerun, journal=journal,
+                                           telemetry_interval=telemetry_interval, prefetcher=prefetcher,
+                                           executor=job_executor))
+    except KeyboardInterrupt:
+        print(f"\nSweep interrupted. Progress is saved in {journal.path}; "
+              f"run again with --resume to continue.")
+        raise
+    finally:
+        signal.signal(signal.SIGTERM, previous_handler)
+        if prefetcher is not None:
+            prefetcher.shutdown()
+        job_executor.shutdown()
+
+    for record in records:
+        results = None
+        if record["success"] and record.get("results_file"):
+            results = load_results_file(record["results_file"])
+        elif record["success"]:
+            results = load_results(record["output_dir"])
+        record["metrics"] = summarize_metrics(results) if results else {}
+
+    print_sweep_table(records)
+    summary_path = write_sweep_summary(
+        spec["name"], records, os.path.join(RESULTS_DIR, LightevalRunner.framework_name()))
+    print(f"Sweep summary written to: {summary_path}")
+    return all(record["success"] for record in records)
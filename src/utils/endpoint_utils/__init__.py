@@ -0,0 +1,27 @@
+from .proxy import (EndpointProxy, RequestStats, get_endpoint_proxy, percentile, backoff_delay,
+                    LATENCY_FILENAME, DEFAULT_ENDPOINT_CONCURRENCY, DEFAULT_ENDPOINT_MAX_RETRIES,
+                    DEFAULT_ENDPOINT_TIMEOUT_S)
+from .load_generator import (LoadGenerator, StreamingClient, summarize_step, sustained_throughput,
+                             LOAD_MODES, API_KINDS, DEFAULT_STEP_DURATION_S, DEFAULT_MAX_TOKENS,
+                             DEFAULT_MAX_IN_FLIGHT)
+
+__all__ = [
+    'EndpointProxy',
+    'RequestStats',
+    'get_endpoint_proxy',
+    'percentile',
+    'backoff_delay',
+    'LATENCY_FILENAME',
+    'DEFAULT_ENDPOINT_CONCURRENCY',
+    'DEFAULT_ENDPOINT_MAX_RETRIES',
+    'DEFAULT_ENDPOINT_TIMEOUT_S',
+    'LoadGenerator',
+    'StreamingClient',
+    'summarize_step',
+    'sustained_throughput',
+    'LOAD_MODES',
+    'API_KINDS',
+    'DEFAULT_STEP_DURATION_S',
+    'DEFAULT_MAX_TOKENS',
+    'DEFAULT_MAX_IN_FLIGHT'
+]
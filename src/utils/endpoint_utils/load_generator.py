@@ -0,0 +1,230 @@
+import asyncio
+import json
+import random
+import time
+from typing import Dict, Any, List, Optional
+
+from .proxy import percentile, LATENCY_PERCENTILES
+
+DEFAULT_STEP_DURATION_S = 20.0
+DEFAULT_MAX_TOKENS = 128
+DEFAULT_REQUEST_TIMEOUT_S = 300.0
+# Open-loop arrivals beyond this many requests in flight are dropped (and counted), so an
+# overloaded server cannot make the generator itself run out of memory or sockets
+DEFAULT_MAX_IN_FLIGHT = 1024
+LOAD_MODES = ("concurrency", "rate")
+API_KINDS = ("completions", "chat")
+
+
+def _summarize(values: List[float]) -> Dict[str, Optional[float]]:
+    ordered = sorted(values)
+    summary = {"mean": round(sum(ordered) / len(ordered), 4) if ordered else None}
+    for q in LATENCY_PERCENTILES:
+        value = percentile(ordered, q)
+        summary[f"p{q}"] = round(value, 4) if value is not None else None
+    summary["max"] = round(ordered[-1], 4) if ordered else None
+    return summary
+
+
+class StreamingClient:
+    # Sends one streaming (SSE) completion request per call and times it: time to the first
+    # content chunk (TTFT), the gaps between later chunks (inter-token latency, one chunk
+    # per token as OpenAI-compatible servers stream them) and the whole request.
+    def __init__(self, session, base_url: str, model: str, api: str = "completions",
+                 api_key: Optional[str] = None, max_tokens: int = DEFAULT_MAX_TOKENS):
+        self.session = session
+        self.url = f"{base_url.rstrip('/')}/{'chat/completions' if api == 'chat' else 'completions'}"
+        self.model = model
+        self.api = api
+        self.max_tokens = max_tokens
+        self.headers = {"Content-Type": "application/json"}
+        if api_key:
+            self.headers["Authorization"] = f"Bearer {api_key}"
+
+    def _body(self, prompt: Dict[str, Any]) -> Dict[str, Any]:
+        body = {"model": self.model, "stream": True, "temperature": 0.0,
+                "max_tokens": prompt.get("max_tokens") or self.max_tokens,
+                "stream_options": {"include_usage": True}}
+        if self.api == "chat":
+            body["messages"] = [{"role": "user", "content": prompt["prompt"]}]
+        else:
+            body["prompt"] = prompt["prompt"]
+        return body
+
+    @staticmethod
+    def _chunk_text(chunk: Dict[str, Any]) -> str:
+        choices = chunk.get("choices") or []
+        if not choices:
+            return ""
+        choice = choices[0]
+        if "delta" in choice:
+            return (choice["delta"] or {}).get("content") or ""
+        return choice.get("text") or ""
+
+    async def request(self, prompt: Dict[str, Any]) -> Dict[str, Any]:
+        import aiohttp
+        started = time.monotonic()
+        record = {"started_at": started, "ok": False, "status": None, "ttft_s": None, "latency_s": None,
+                  "itl_s": [], "output_tokens": 0, "error": None}
+        last_token_at = None
+        chunks = 0
+        usage_tokens = None
+        try:
+            async with self.session.post(self.url, json=self._body(prompt), headers=self.headers) as response:
+                record["status"] = response.status
+                if response.status != 200:
+                    record["error"] = (await response.text())[:200]
+                    return record
+                async for raw_line in response.content:
+                    line = raw_line.strip()
+                    if not line.startswith(b"data:"):
+                        continue
+                    data = line[len(b"data:"):].strip()
+                    if data == b"[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    if chunk.get("usage"):
+                        usage_tokens = chunk["usage"].get("completion_tokens")
+                    if not self._chunk_text(chunk):
+                        continue
+                    now = time.monotonic()
+                    if last_token_at is None:
+                        record["ttft_s"] = now - started
+                    else:
+                        record["itl_s"].append(now - last_token_at)
+                    last_token_at = now
+                    chunks += 1
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+            return record
+        record["latency_s"] = time.monotonic() - started
+        record["output_tokens"] = usage_tokens if usage_tokens is not None else chunks
+        record["ok"] = True
+        return record
+
+
+def summarize_step(records: List[Dict[str, Any]], mode: str, level: float, started_at: float,
+                   ended_at: float, dropped: int = 0) -> Dict[str, Any]:
+    ok = [r for r in records if r["ok"]]
+    elapsed = ended_at - started_at
+    output_tokens = sum(r["output_tokens"] for r in ok)
+    errors: Dict[str, int] = {}
+    for r in records:
+        if not r["ok"]:
+            key = str(r["status"]) if r["status"] is not None else (r["error"] or "error").split(":")[0]
+            errors[key] = errors.get(key, 0) + 1
+    return {
+        "mode": mode,
+        "concurrency" if mode == "concurrency" else "rate_rps": level,
+        "duration_s": round(elapsed, 3),
+        "requests": len(records),
+        "succeeded": len(ok),
+        "failed": len(records) - len(ok),
+        "dropped": dropped,
+        "errors": errors,
+        "throughput_rps": round(len(ok) / elapsed, 3) if elapsed > 0 else None,
+        "output_tokens": output_tokens,
+        "output_tokens_per_s": round(output_tokens / elapsed, 3) if elapsed > 0 else None,
+        "latency_s": _summarize([r["latency_s"] for r in ok]),
+        "ttft_s": _summarize([r["ttft_s"] for r in ok if r["ttft_s"] is not None]),
+        "itl_s": _summarize([gap for r in ok for gap in r["itl_s"]]),
+    }
+
+
+class LoadGenerator:
+    # Replays prompts against a server, one step per load level: a fixed number of
+    # concurrent clients that each send their next request as soon as the previous one
+    # finishes (closed loop), or Poisson arrivals at a fixed rate whatever the server's
+    # state (open loop). A step lasts step_duration_s; requests still in flight when it
+    # ends are awaited and counted in it, so steps never overlap.
+    def __init__(self, base_url: str, model: str, prompts: List[Dict[str, Any]], api: str = "completions",
+                 api_key: Optional[str] = None, max_tokens: int = DEFAULT_MAX_TOKENS,
+                 step_duration_s: float = DEFAULT_STEP_DURATION_S,
+                 request_timeout: float = DEFAULT_REQUEST_TIMEOUT_S,
+                 max_in_flight: int = DEFAULT_MAX_IN_FLIGHT, seed: int = 0):
+        if not prompts:
+            raise ValueError("The load generator needs at least one prompt.")
+        self.base_url = base_url
+        self.model = model
+        self.prompts = prompts
+        self.api = api
+        self.api_key = api_key
+        self.max_tokens = max_tokens
+        self.step_duration_s = step_duration_s
+        self.request_timeout = request_timeout
+        self.max_in_flight = max_in_flight
+        self._rng = random.Random(seed)
+        self._next_prompt = 0
+
+    def _prompt(self) -> Dict[str, Any]:
+        prompt = self.prompts[self._next_prompt % len(self.prompts)]
+        self._next_prompt += 1
+        return prompt
+
+    async def _closed_loop(self, client: StreamingClient, concurrency: int) -> Dict[str, Any]:
+        records: List[Dict[str, Any]] = []
+        started = time.monotonic()
+        deadline = started + self.step_duration_s
+
+        async def worker():
+            while time.monotonic() < deadline:
+                records.append(await client.request(self._prompt()))
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return summarize_step(records, "concurrency", concurrency, started, time.monotonic())
+
+    async def _open_loop(self, client: StreamingClient, rate_rps: float) -> Dict[str, Any]:
+        records: List[Dict[str, Any]] = []
+        in_flight = set()
+        dropped = 0
+        started = time.monotonic()
+        deadline = started + self.step_duration_s
+        next_arrival = started
+        while True:
+            next_arrival += self._rng.expovariate(rate_rps)
+            if next_arrival >= deadline:
+                break
+            await asyncio.sleep(max(0.0, next_arrival - time.monotonic()))
+            if len(in_flight) >= self.max_in_flight:
+                dropped += 1
+                continue
+            task = asyncio.ensure_future(client.request(self._prompt()))
+            in_flight.add(task)
+            task.add_done_callback(lambda t: (in_flight.discard(t), records.append(t.result())))
+        if in_flight:
+            await asyncio.gather(*in_flight)
+        return summarize_step(records, "rate", rate_rps, started, time.monotonic(), dropped=dropped)
+
+    async def _run(self, mode: str, levels: List[float], on_step=None) -> List[Dict[str, Any]]:
+        import aiohttp
+        limit = int(max(levels)) if mode == "concurrency" else self.max_in_flight
+        connector = aiohttp.TCPConnector(limit=limit, limit_per_host=limit, keepalive_timeout=60)
+        timeout = aiohttp.ClientTimeout(total=self.request_timeout)
+        steps = []
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            client = StreamingClient(session, self.base_url, self.model, api=self.api,
+                                     api_key=self.api_key, max_tokens=self.max_tokens)
+            for level in levels:
+                if mode == "concurrency":
+                    step = await self._closed_loop(client, int(level))
+                else:
+                    step = await self._open_loop(client, float(level))
+                steps.append(step)
+                if on_step is not None:
+                    on_step(step)
+        return steps
+
+    def run(self, mode: str, levels: List[float], on_step=None) -> List[Dict[str, Any]]:
+        # mode is "concurrency" (levels are client counts) or "rate" (levels are requests/s);
+        # on_step(summary) is called after each step
+        if mode not in LOAD_MODES:
+            raise ValueError(f"Unknown load mode '{mode}'; expected one of {LOAD_MODES}.")
+        return asyncio.run(self._run(mode, levels, on_step=on_step))
+
+
+def sustained_throughput(steps: List[Dict[str, Any]], p99_slo_s: float) -> Optional[Dict[str, Any]]:
+    # The step with the highest throughput whose p99 request latency met the SLO and that
+    # had no failed or dropped requests
+    passing = [s for s in steps if s["succeeded"] and not s["failed"] and not s["dropped"]
+               and s["latency_s"]["p99"] is not None and s["latency_s"]["p99"] <= p99_slo_s]
+    return max(passing, key=lambda s: s["throughput_rps"]) if passing else None
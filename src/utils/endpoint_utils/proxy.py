@@ -0,0 +1,282 @@
+import asyncio
+import atexit
+import json
+import math
+import random
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+LATENCY_FILENAME = "latency.json"
+DEFAULT_ENDPOINT_CONCURRENCY = 16
+DEFAULT_ENDPOINT_MAX_RETRIES = 4
+DEFAULT_ENDPOINT_TIMEOUT_S = 300.0
+BACKOFF_BASE_S = 0.5
+BACKOFF_MAX_S = 30.0
+# Throttling and transient server errors are retried; other 4xx are the caller's fault
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+LATENCY_PERCENTILES = (50, 90, 95, 99)
+# Headers that describe one hop of the connection, not the request
+_HOP_BY_HOP_HEADERS = {"connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te",
+                       "trailers", "transfer-encoding", "upgrade", "host", "content-length",
+                       "content-encoding"}
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    # Linear interpolation between the closest ranks (numpy's default)
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * q / 100
+    low, high = math.floor(position), math.ceil(position)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None, base_s: float = BACKOFF_BASE_S,
+                  max_s: float = BACKOFF_MAX_S) -> float:
+    # Exponential backoff with full jitter; a numeric Retry-After from the server wins
+    if retry_after:
+        try:
+            return min(max_s, max(0.0, float(retry_after)))
+        except ValueError:
+            pass  # an HTTP date; fall back to our own schedule
+    return random.uniform(0, min(max_s, base_s * (2 ** attempt)))
+
+
+class RequestStats:
+    # Latencies and outcomes of the requests of one run. Latency is the duration of the
+    # attempt that produced the response, so time spent queueing for a connection slot or
+    # backing off between retries is not counted.
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.status_counts: Dict[str, int] = {}
+        self.retries = 0
+        self.failed = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.first_request_at: Optional[float] = None
+        self.last_response_at: Optional[float] = None
+
+    def record(self, status: int, latency_s: Optional[float], usage: Optional[Dict[str, Any]],
+               started_at: float) -> None:
+        self.status_counts[str(status)] = self.status_counts.get(str(status), 0) + 1
+        if self.first_request_at is None or started_at < self.first_request_at:
+            self.first_request_at = started_at
+        self.last_response_at = time.monotonic()
+        if not 200 <= status < 300:
+            self.failed += 1
+            return
+        if latency_s is not None:
+            self.latencies.append(latency_s)
+        if usage:
+            self.prompt_tokens += int(usage.get("prompt_tokens") or 0)
+            self.completion_tokens += int(usage.get("completion_tokens") or 0)
+
+    def summary(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        elapsed = (self.last_response_at - self.first_request_at) if self.first_request_at is not None else None
+
+        def rate(count):
+            return round(count / elapsed, 3) if elapsed else None
+
+        latency = {"mean": round(sum(latencies) / len(latencies), 4) if latencies else None,
+                   "max": round(latencies[-1], 4) if latencies else None}
+        for q in LATENCY_PERCENTILES:
+            value = percentile(latencies, q)
+            latency[f"p{q}"] = round(value, 4) if value is not None else None
+        return {
+            "requests": sum(self.status_counts.values()),
+            "succeeded": len(latencies),
+            "failed": self.failed,
+            "retries": self.retries,
+            "status_counts": self.status_counts,
+            "latency_s": latency,
+            "elapsed_s": round(elapsed, 3) if elapsed is not None else None,
+            "requests_per_s": rate(len(latencies)),
+            "prompt_tokens": self.prompt_tokens or None,
+            "completion_tokens": self.completion_tokens or None,
+            "completion_tokens_per_s": rate(self.completion_tokens) if self.completion_tokens else None,
+        }
+
+
+class EndpointProxy:
+    # Local reverse proxy between lighteval's OpenAI client and an OpenAI-compatible server.
+    # lighteval keeps building prompts and scoring answers; its requests go to
+    # http://127.0.0.1:<port>/runs/<run key>/v1 and are forwarded over one pooled aiohttp
+    # session (at most `concurrency` requests in flight, connections kept alive), retried
+    # with backoff on connection errors, timeouts, 429 and 5xx, and timed per run.
+    # The event loop runs in a daemon thread so the synchronous runners can share it.
+    def __init__(self, base_url: str, api_key: Optional[str] = None,
+                 concurrency: int = DEFAULT_ENDPOINT_CONCURRENCY,
+                 max_retries: int = DEFAULT_ENDPOINT_MAX_RETRIES,
+                 request_timeout: float = DEFAULT_ENDPOINT_TIMEOUT_S):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.concurrency = max(1, int(concurrency))
+        self.max_retries = max(0, int(max_retries))
+        self.request_timeout = request_timeout
+        self.port: Optional[int] = None
+        self._stats: Dict[str, RequestStats] = {}
+        self._stats_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._startup_error: Optional[BaseException] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop_event: Optional[asyncio.Event] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._thread_main, daemon=True, name="endpoint-proxy")
+        self._thread.start()
+        self._ready.wait()
+        if self._startup_error is not None:
+            self._thread = None
+            raise RuntimeError(f"Could not start the endpoint proxy: {self._startup_error}")
+
+    def url_for(self, run_key: str) -> str:
+        # The base URL lighteval should use for one run; requests made through it are
+        # counted in that run's stats
+        self.start()
+        with self._stats_lock:
+            self._stats.setdefault(run_key, RequestStats())
+        return f"http://127.0.0.1:{self.port}/runs/{run_key}/v1"
+
+    def pop_stats(self, run_key: str) -> Optional[Dict[str, Any]]:
+        with self._stats_lock:
+            stats = self._stats.pop(run_key, None)
+        return stats.summary() if stats is not None else None
+
+    def stop(self) -> None:
+        if self._thread is None or self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._stop_event.set)
+        self._thread.join(timeout=10)
+        self._thread = None
+
+    def _thread_main(self) -> None:
+        loop = asyncio.new_event_loop()
+        self._loop = loop
+        try:
+            loop.run_until_complete(self._serve())
+        except BaseException as e:
+            self._startup_error = e
+            self._ready.set()
+        finally:
+            loop.close()
+
+    async def _serve(self) -> None:
+        import aiohttp
+        from aiohttp import web
+
+        self._stop_event = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.concurrency,
+                                         keepalive_timeout=60)
+        self._session = aiohttp.ClientSession(
+            connector=connector, timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+            auto_decompress=True)
+        app = web.Application(client_max_size=64 * 1024 ** 2)
+        app.router.add_route("*", "/runs/{run_key}/v1/{path:.*}", self._handle)
+        app_runner = web.AppRunner(app, access_log=None)
+        try:
+            await app_runner.setup()
+            site = web.TCPSite(app_runner, "127.0.0.1", 0)
+            await site.start()
+            self.port = site._server.sockets[0].getsockname()[1]
+            self._ready.set()
+            await self._stop_event.wait()
+        finally:
+            await app_runner.cleanup()
+            await self._session.close()
+
+    def _stats_for(self, run_key: str) -> RequestStats:
+        with self._stats_lock:
+            return self._stats.setdefault(run_key, RequestStats())
+
+    async def _handle(self, request):
+        from aiohttp import web
+
+        stats = self._stats_for(request.match_info["run_key"])
+        url = f"{self.base_url}/{request.match_info['path']}"
+        if request.query_string:
+            url += f"?{request.query_string}"
+        body = await request.read()
+        headers = {k: v for k, v in request.headers.items() if k.lower() not in _HOP_BY_HOP_HEADERS}
+        headers.pop("Authorization", None)
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+
+        started_at = time.monotonic()
+        async with self._semaphore:
+            status, response_headers, payload, latency = await self._forward(
+                request.method, url, headers, body, stats)
+
+        usage = None
+        if 200 <= status < 300 and "json" in response_headers.get("Content-Type", ""):
+            try:
+                usage = json.loads(payload).get("usage")
+            except (ValueError, AttributeError):
+                usage = None
+        with self._stats_lock:
+            stats.record(status, latency, usage if isinstance(usage, dict) else None, started_at)
+        return web.Response(status=status, body=payload, headers={
+            k: v for k, v in response_headers.items() if k.lower() not in _HOP_BY_HOP_HEADERS})
+
+    async def _forward(self, method: str, url: str, headers: Dict[str, str], body: bytes,
+                       stats: RequestStats) -> Tuple[int, Dict[str, str], bytes, Optional[float]]:
+        # Returns (status, headers, body, latency of the last attempt); a request that never
+        # got a response becomes a 502 carrying the last error
+        import aiohttp
+
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            attempt_started = time.monotonic()
+            try:
+                async with self._session.request(method, url, headers=headers, data=body) as response:
+                    payload = await response.read()
+                    latency = time.monotonic() - attempt_started
+                    if response.status not in RETRY_STATUSES or attempt == self.max_retries:
+                        return response.status, dict(response.headers), payload, latency
+                    retry_after = response.headers.get("Retry-After")
+                    last_error = f"HTTP {response.status}"
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                last_error = f"{type(e).__name__}: {e}"
+                if attempt == self.max_retries:
+                    break
+            with self._stats_lock:
+                stats.retries += 1
+            await asyncio.sleep(backoff_delay(attempt, retry_after))
+
+        error = {"error": {"message": f"Endpoint request failed after {self.max_retries + 1} attempt(s): "
+                                      f"{last_error}", "type": "gemmabench_proxy_error"}}
+        return 502, {"Content-Type": "application/json"}, json.dumps(error).encode("utf-8"), None
+
+
+# One proxy per endpoint configuration, shared by every runner in the process
+_PROXIES: Dict[Tuple, EndpointProxy] = {}
+_PROXIES_LOCK = threading.Lock()
+
+
+def get_endpoint_proxy(base_url: str, api_key: Optional[str] = None,
+                       concurrency: int = DEFAULT_ENDPOINT_CONCURRENCY,
+                       max_retries: int = DEFAULT_ENDPOINT_MAX_RETRIES,
+                       request_timeout: float = DEFAULT_ENDPOINT_TIMEOUT_S) -> EndpointProxy:
+    key = (base_url.rstrip("/"), api_key, int(concurrency), int(max_retries), float(request_timeout))
+    with _PROXIES_LOCK:
+        proxy = _PROXIES.get(key)
+        if proxy is None:
+            proxy = EndpointProxy(base_url, api_key=api_key, concurrency=concurrency,
+                                  max_retries=max_retries, request_timeout=request_timeout)
+            proxy.start()
+            _PROXIES[key] = proxy
+    return proxy
+
+
+@atexit.register
+def _stop_proxies() -> None:
+    with _PROXIES_LOCK:
+        proxies = list(_PROXIES.values())
+        _PROXIES.clear()
+    for proxy in proxies:
+        proxy.stop()
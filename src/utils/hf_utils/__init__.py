@@ -1,7 +1,22 @@
-from .model import check_model_exists
+from .model import (check_model_exists, check_models_exist, get_model_revision, get_model_parameter_count,
+                    get_model_checkpoint_bytes, get_model_quantization)
+from .hub_client import HubClient, get_hub_client, hub_offline, local_model_info
+from .prefetch import WeightPrefetcher, DEFAULT_PREFETCH_LOOKAHEAD, DEFAULT_PREFETCH_WORKERS
 from .token import save_hf_token_globally
 
 __all__ = [
     'check_model_exists',
+    'check_models_exist',
+    'get_model_revision',
+    'get_model_parameter_count',
+    'get_model_checkpoint_bytes',
+    'get_model_quantization',
+    'HubClient',
+    'get_hub_client',
+    'hub_offline',
+    'local_model_info',
+    'WeightPrefetcher',
+    'DEFAULT_PREFETCH_LOOKAHEAD',
+    'DEFAULT_PREFETCH_WORKERS',
     'save_hf_token_globally'
 ]
\ No newline at end of file
@@ -0,0 +1,222 @@
+import json
+import logging
+import math
+import os
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, List, Optional
+
+from ...config import RESULTS_DIR, get_hf_token
+
+logger = logging.getLogger(__name__)
+
+HUB_CACHE_PATH = os.path.join(RESULTS_DIR, "hub", "model_info.json")
+HUB_INFO_TTL_S = 6 * 3600
+HUB_MAX_WORKERS = 8
+_TRUE_VALUES = ("1", "true", "yes", "on")
+
+
+def hub_offline() -> bool:
+    # Same switch huggingface_hub and lighteval's subprocesses honour
+    return os.environ.get("HF_HUB_OFFLINE", "").strip().lower() in _TRUE_VALUES
+
+
+def _local_hub_cache_dir() -> str:
+    if os.environ.get("HF_HUB_CACHE"):
+        return os.environ["HF_HUB_CACHE"]
+    hf_home = os.environ.get("HF_HOME") or os.path.join(os.path.expanduser("~"), ".cache", "huggingface")
+    return os.path.join(hf_home, "hub")
+
+
+def _safetensors_parameters(paths: List[str]) -> Optional[Dict[str, int]]:
+    # Parameter counts per safetensors dtype ("BF16", "I32", ...). A safetensors file starts
+    # with a little-endian u64 header length and a JSON header listing every tensor's dtype
+    # and shape, so the count needs no tensor data.
+    counts: Dict[str, int] = {}
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                header_len = struct.unpack("<Q", f.read(8))[0]
+                header = json.loads(f.read(header_len))
+        except (OSError, ValueError, struct.error):
+            return None
+        for name, tensor in header.items():
+            if name != "__metadata__":
+                counts[tensor["dtype"]] = counts.get(tensor["dtype"], 0) + math.prod(tensor["shape"])
+    return counts or None
+
+
+def _quant_method(config: Optional[Dict[str, Any]]) -> Optional[str]:
+    # The method of a checkpoint quantized ahead of time ("awq", "gptq", "bitsandbytes", ...)
+    quantization_config = (config or {}).get("quantization_config")
+    if isinstance(quantization_config, dict) and quantization_config.get("quant_method"):
+        return str(quantization_config["quant_method"]).lower()
+    return None
+
+
+def local_model_info(model_id: str, revision: str = "main") -> Optional[Dict[str, Any]]:
+    # Resolves a model from the local huggingface_hub cache
+    # (<cache>/models--org--name/{refs,snapshots}) without any network access
+    repo_dir = os.path.join(_local_hub_cache_dir(), "models--" + model_id.replace("/", "--"))
+    ref_path = os.path.join(repo_dir, "refs", revision)
+    try:
+        with open(ref_path, 'r') as f:
+            sha = f.read().strip()
+    except OSError:
+        sha = revision  # revision may already be a commit sha
+    snapshot_dir = os.path.join(repo_dir, "snapshots", sha)
+    if not os.path.isdir(snapshot_dir):
+        return None
+    siblings = []
+    for root, _, names in os.walk(snapshot_dir):
+        siblings.extend(os.path.relpath(os.path.join(root, name), snapshot_dir) for name in names)
+    siblings.sort()
+    weights = [os.path.join(snapshot_dir, name) for name in siblings if name.endswith(".safetensors")]
+    parameters = _safetensors_parameters(weights) if weights else None
+    try:
+        with open(os.path.join(snapshot_dir, "config.json"), 'r') as f:
+            config = json.load(f)
+    except (OSError, ValueError):
+        config = None
+    return {"model_id": model_id, "status": "found", "sha": sha, "siblings": siblings,
+            "num_params": sum(parameters.values()) if parameters else None,
+            "parameters_by_dtype": parameters, "quant_method": _quant_method(config),
+            "private": None, "gated": None, "source": "local_cache", "fetched_at": time.time()}
+
+
+class HubClient:
+    # Model metadata from the Hugging Face Hub through one shared HfApi, cached on disk for
+    # ttl_s. In offline mode (HF_HUB_OFFLINE=1 or offline=True) the disk cache is used
+    # regardless of age, then the local huggingface_hub cache. Every lookup returns a dict
+    # with "status": "found", "not_found" or "error"; pass api= or endpoint= to point it at
+    # a stand-in server.
+    def __init__(self, cache_path: Optional[str] = HUB_CACHE_PATH, ttl_s: float = HUB_INFO_TTL_S,
+                 offline: Optional[bool] = None, api=None, endpoint: Optional[str] = None,
+                 max_workers: int = HUB_MAX_WORKERS):
+        self.cache_path = cache_path
+        self.ttl_s = ttl_s
+        self.offline = hub_offline() if offline is None else offline
+        self.max_workers = max_workers
+        self._api = api
+        self._endpoint = endpoint
+        self._lock = threading.Lock()
+        self._api_lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+
+    @property
+    def api(self):
+        # huggingface_hub is imported on first use; it is slow to import. Its HTTP session
+        # is reused across calls made through this instance.
+        with self._api_lock:
+            if self._api is None:
+                from huggingface_hub import HfApi
+                self._api = HfApi(endpoint=self._endpoint, token=get_hf_token())
+        return self._api
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is None:
+            entries = {}
+            if self.cache_path:
+                try:
+                    with open(self.cache_path, 'r') as f:
+                        entries = json.load(f)
+                except (OSError, json.JSONDecodeError):
+                    entries = {}
+            self._entries = entries
+        return self._entries
+
+    def _save(self) -> None:
+        if not self.cache_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self._entries, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Could not write the Hub metadata cache {self.cache_path}: {e}")
+
+    def _cached(self, model_id: str, fresh_only: bool) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._load().get(model_id)
+        if entry is None:
+            return None
+        if fresh_only and time.time() - entry.get("fetched_at", 0) > self.ttl_s:
+            return None
+        return dict(entry, source="disk_cache")
+
+    def _fetch(self, model_id: str) -> Dict[str, Any]:
+        from huggingface_hub.utils import RepositoryNotFoundError
+        try:
+            info = self.api.model_info(model_id)
+        except RepositoryNotFoundError:
+            return {"model_id": model_id, "status": "not_found", "source": "hub"}
+        except Exception as e:
+            return {"model_id": model_id, "status": "error", "error": str(e), "source": "hub"}
+        return {
+            "model_id": model_id, "status": "found", "sha": info.sha,
+            "siblings": sorted(s.rfilename for s in (info.siblings or [])),
+            "num_params": info.safetensors.total if info.safetensors is not None else None,
+            "parameters_by_dtype": dict(info.safetensors.parameters) if info.safetensors is not None else None,
+            "quant_method": _quant_method(info.config),
+            "private": info.private, "gated": info.gated, "source": "hub", "fetched_at": time.time(),
+        }
+
+    def _offline_lookup(self, model_id: str, reason: str) -> Dict[str, Any]:
+        cached = self._cached(model_id, fresh_only=False)
+        if cached is not None:
+            return cached
+        local = local_model_info(model_id)
+        if local is not None:
+            return local
+        return {"model_id": model_id, "status": "error", "source": "offline",
+                "error": f"{reason}, and '{model_id}' is not in the local Hugging Face cache."}
+
+    def _lookup(self, model_id: str, refresh: bool) -> Dict[str, Any]:
+        if self.offline:
+            return self._offline_lookup(model_id, "Offline mode")
+        if not refresh:
+            cached = self._cached(model_id, fresh_only=True)
+            if cached is not None:
+                return cached
+        result = self._fetch(model_id)
+        if result["status"] == "error":
+            # Unreachable Hub: a stale entry or the local cache is better than nothing
+            fallback = self._offline_lookup(model_id, f"Hub request failed ({result['error']})")
+            return fallback if fallback["status"] == "found" else result
+        return result
+
+    def model_infos(self, model_ids: Iterable[str], refresh: bool = False) -> Dict[str, Dict[str, Any]]:
+        # Looks up many models concurrently; the cache file is written once at the end
+        model_ids = list(dict.fromkeys(model_ids))
+        if not model_ids:
+            return {}
+        workers = max(1, min(self.max_workers, len(model_ids)))
+        if workers == 1:
+            results = [self._lookup(model_id, refresh) for model_id in model_ids]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hub") as pool:
+                results = list(pool.map(lambda model_id: self._lookup(model_id, refresh), model_ids))
+
+        fetched = {r["model_id"]: r for r in results if r["status"] == "found" and r["source"] == "hub"}
+        if fetched:
+            with self._lock:
+                self._load().update(fetched)
+                self._save()
+        return dict(zip(model_ids, results))
+
+    def model_info(self, model_id: str, refresh: bool = False) -> Dict[str, Any]:
+        return self.model_infos([model_id], refresh=refresh)[model_id]
+
+
+_CLIENT: Optional[HubClient] = None
+
+
+def get_hub_client() -> HubClient:
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = HubClient()
+    return _CLIENT
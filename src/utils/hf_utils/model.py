@@ -1,23 +1,78 @@
 import logging
-from huggingface_hub import HfApi
-from huggingface_hub.utils import RepositoryNotFoundError
-from ...config import HF_TOKEN
+from typing import Dict, Iterable, Optional
+from .hub_client import get_hub_client
 
 logger = logging.getLogger(__name__)
 
 
-def check_model_exists(model_id: str) -> bool:
-    print(f"Verifying model '{model_id}' on Hugging Face Hub...")
-    api = HfApi()
-    try:
-        api.model_info(model_id, token=HF_TOKEN)
-        print(f"Model '{model_id}' found.")
+def _report_lookup(info) -> bool:
+    model_id = info["model_id"]
+    if info["status"] == "found":
+        source = "" if info["source"] == "hub" else f" ({info['source'].replace('_', ' ')})"
+        print(f"Model '{model_id}' found{source}.")
         return True
-    except RepositoryNotFoundError:
+    if info["status"] == "not_found":
         print(f"Error: Model '{model_id}' not found on Hugging Face Hub.")
         return False
-    except Exception as e:
-        logger.error(
-            f"An unexpected error occurred while checking the model: {e}")
-        print(f"An unexpected error occurred while checking the model: {e}")
+    if info["source"] == "offline":
+        print(f"Error: {info['error']}")
         return False
+    logger.error(f"An unexpected error occurred while checking the model: {info['error']}")
+    print(f"An unexpected error occurred while checking the model: {info['error']}")
+    return False
+
+
+def check_model_exists(model_id: str) -> bool:
+    print(f"Verifying model '{model_id}' on Hugging Face Hub...")
+    return _report_lookup(get_hub_client().model_info(model_id))
+
+
+def check_models_exist(model_ids: Iterable[str]) -> Dict[str, bool]:
+    # Verifies many models with concurrent Hub requests
+    model_ids = list(dict.fromkeys(model_ids))
+    print(f"Verifying {len(model_ids)} model(s) on Hugging Face Hub...")
+    infos = get_hub_client().model_infos(model_ids)
+    return {model_id: _report_lookup(infos[model_id]) for model_id in model_ids}
+
+
+def get_model_revision(model_id: str, refresh: bool = False) -> Optional[str]:
+    # Commit sha of the model's default branch. Callers that key cached results on it pass
+    # refresh=True: a commit pushed within the Hub client's cache TTL would otherwise be
+    # mistaken for the previous one. Offline (or with the Hub unreachable) the cached or
+    # locally downloaded sha is used either way.
+    info = get_hub_client().model_info(model_id, refresh=refresh)
+    if info["status"] != "found":
+        logger.warning(f"Could not resolve revision for '{model_id}': {info.get('error', info['status'])}")
+        return None
+    return info["sha"]
+
+
+def get_model_parameter_count(model_id: str) -> Optional[int]:
+    # Total parameter count from the safetensors metadata the Hub computes for each repo
+    info = get_hub_client().model_info(model_id)
+    if info["status"] != "found":
+        logger.warning(f"Could not fetch model info for '{model_id}': {info.get('error', info['status'])}")
+        return None
+    return info["num_params"]
+
+
+# Bytes per element of each safetensors dtype
+_SAFETENSORS_DTYPE_BYTES = {"F64": 8, "I64": 8, "U64": 8, "F32": 4, "I32": 4, "U32": 4, "F16": 2, "BF16": 2,
+                            "I16": 2, "U16": 2, "F8_E4M3": 1, "F8_E5M2": 1, "I8": 1, "U8": 1, "BOOL": 1}
+
+
+def get_model_checkpoint_bytes(model_id: str) -> Optional[int]:
+    # Size of the checkpoint's safetensors weights as stored; for checkpoints quantized
+    # ahead of time (weights packed into int32) this is close to what the backend loads
+    info = get_hub_client().model_info(model_id)
+    parameters = info.get("parameters_by_dtype") if info["status"] == "found" else None
+    if not parameters:
+        return None
+    return sum(count * _SAFETENSORS_DTYPE_BYTES.get(dtype, 2) for dtype, count in parameters.items())
+
+
+def get_model_quantization(model_id: str) -> Optional[str]:
+    # quant_method from the checkpoint's config ("awq", "gptq", ...), or None for a
+    # full-precision checkpoint or when the model's info is unavailable
+    info = get_hub_client().model_info(model_id)
+    return info.get("quant_method") if info["status"] == "found" else None
@@ -0,0 +1,178 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Iterable, List, Optional, Set
+
+from ...config import get_hf_token
+from .hub_client import hub_offline
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PREFETCH_LOOKAHEAD = 2
+DEFAULT_PREFETCH_WORKERS = 2
+# With safetensors_only, the weights plus everything transformers/vLLM need to load them
+SAFETENSORS_ALLOW_PATTERNS = ["*.safetensors", "*.safetensors.index.json", "*.json", "*.model",
+                              "*.tiktoken", "*.txt", "tokenizer*"]
+
+
+def _silence_download_progress() -> None:
+    # Per-file progress bars from background downloads would interleave with the
+    # lighteval output being streamed to the console
+    from huggingface_hub.utils import disable_progress_bars
+    disable_progress_bars("huggingface_hub.http_get")
+    disable_progress_bars("huggingface_hub.xet_get")
+
+
+def _silent_tqdm():
+    from tqdm.auto import tqdm
+
+    class SilentTqdm(tqdm):
+        def __init__(self, *args, **kwargs):
+            kwargs["disable"] = True
+            super().__init__(*args, **kwargs)
+    return SilentTqdm
+
+
+class WeightPrefetcher:
+    # Downloads the weights of upcoming models into the Hugging Face cache while the current
+    # job evaluates, so lighteval finds them locally and the download stays out of the
+    # timed run. snapshot_download resumes partial files and takes the same per-file locks
+    # as lighteval's own download, so a model is never fetched twice. With cache_budget_gb,
+    # the least recently used models are evicted from the cache after each download,
+    # except the ones the sweep is running or about to run.
+    def __init__(self, lookahead: int = DEFAULT_PREFETCH_LOOKAHEAD, max_workers: int = DEFAULT_PREFETCH_WORKERS,
+                 safetensors_only: bool = False, cache_budget_gb: Optional[float] = None,
+                 cache_dir: Optional[str] = None, endpoint: Optional[str] = None):
+        self.lookahead = lookahead
+        self.max_workers = max_workers
+        self.allow_patterns = SAFETENSORS_ALLOW_PATTERNS if safetensors_only else None
+        self.cache_budget_gb = cache_budget_gb
+        self.cache_dir = cache_dir
+        self.endpoint = endpoint
+        # Daemon threads, so an interrupted sweep exits without waiting for a download
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._closed = False
+        self._silenced = False
+        self._futures: Dict[str, Future] = {}
+        self._protected: Set[str] = set()
+        self._lock = threading.Lock()
+        self._evict_lock = threading.Lock()
+
+    def _should_fetch(self, model_id: str) -> bool:
+        # Local checkpoints and air-gapped runs have nothing to download
+        return not os.path.isdir(model_id) and not hub_offline()
+
+    def _download(self, model_id: str) -> Optional[str]:
+        from huggingface_hub import snapshot_download
+        start = time.monotonic()
+        try:
+            path = snapshot_download(model_id, cache_dir=self.cache_dir, allow_patterns=self.allow_patterns,
+                                     token=get_hf_token(), endpoint=self.endpoint, tqdm_class=_silent_tqdm())
+        except Exception as e:
+            # lighteval will try (and report) the download itself when the job runs
+            logger.warning(f"Prefetch of '{model_id}' failed: {e}")
+            print(f"[prefetch] Could not download '{model_id}' ahead of time: {e}")
+            return None
+        print(f"[prefetch] '{model_id}' is in the local cache ({time.monotonic() - start:.1f}s).")
+        if self.cache_budget_gb is not None:
+            self.evict()
+        return path
+
+    def prefetch(self, model_id: str) -> Optional[Future]:
+        if not self._should_fetch(model_id):
+            return None
+        with self._lock:
+            future = self._futures.get(model_id)
+            if future is not None and not (future.done() and future.result() is None):
+                return future  # in flight or done; failed downloads are retried
+            if not self._silenced:
+                _silence_download_progress()
+                self._silenced = True
+            future = Future()
+            self._futures[model_id] = future
+        threading.Thread(target=self._worker, args=(model_id, future), daemon=True,
+                         name=f"prefetch-{model_id}").start()
+        return future
+
+    def _worker(self, model_id: str, future: Future) -> None:
+        with self._slots:
+            future.set_result(None if self._closed else self._download(model_id))
+
+    def prefetch_upcoming(self, queued_model_ids: Iterable[str], running: Iterable[str] = ()) -> None:
+        # running: models of the jobs in progress; queued_model_ids: the job queue after them.
+        # Both the running models and the next `lookahead` distinct queued ones are fetched
+        # (a no-op once cached) and protected from eviction.
+        running = list(dict.fromkeys(running))
+        window: List[str] = []
+        for model_id in queued_model_ids:
+            if len(window) >= self.lookahead:
+                break
+            if model_id not in window and model_id not in running:
+                window.append(model_id)
+        with self._lock:
+            self._protected = set(running) | set(window)
+        for model_id in running + window:
+            self.prefetch(model_id)
+
+    def wait(self, model_id: str, timeout: Optional[float] = None) -> bool:
+        # Blocks until a started prefetch of model_id finishes; True if it is in the cache
+        with self._lock:
+            future = self._futures.get(model_id)
+        if future is None:
+            return False
+        if not future.done():
+            print(f"[prefetch] Waiting for '{model_id}' to finish downloading before the run starts...")
+        try:
+            return future.result(timeout=timeout) is not None
+        except Exception:
+            return False
+
+    def evict(self, budget_gb: Optional[float] = None) -> List[str]:
+        # Deletes whole model repos, least recently accessed first, until the cache fits
+        # in the budget. Returns the evicted repo IDs.
+        from huggingface_hub import scan_cache_dir
+        budget_gb = self.cache_budget_gb if budget_gb is None else budget_gb
+        if budget_gb is None:
+            return []
+        with self._evict_lock:
+            try:
+                cache = scan_cache_dir(self.cache_dir)
+            except Exception as e:
+                logger.warning(f"Could not scan the Hugging Face cache for eviction: {e}")
+                return []
+            with self._lock:
+                protected = set(self._protected)
+                protected.update(model_id for model_id, future in self._futures.items() if not future.done())
+
+            budget_bytes = budget_gb * (1024**3)
+            size = cache.size_on_disk
+            evicted, revisions = [], []
+            for repo in sorted(cache.repos, key=lambda r: r.last_accessed):
+                if size <= budget_bytes:
+                    break
+                if repo.repo_type != "model" or repo.repo_id in protected:
+                    continue
+                revisions.extend(revision.commit_hash for revision in repo.revisions)
+                size -= repo.size_on_disk
+                evicted.append(repo.repo_id)
+            if revisions:
+                strategy = cache.delete_revisions(*revisions)
+                strategy.execute()
+                print(f"[prefetch] Evicted {', '.join(evicted)} from the Hugging Face cache "
+                      f"({strategy.expected_freed_size / (1024**3):.2f} GB freed).")
+            if size > budget_bytes:
+                print(f"[prefetch] Warning: the Hugging Face cache ({size / (1024**3):.2f} GB) is over the "
+                      f"{budget_gb} GB budget, but the remaining models are in use.")
+            return evicted
+
+    def shutdown(self, wait: bool = False) -> None:
+        # Queued downloads are dropped. Running ones finish in the background unless wait
+        # is set; if the process exits first, the next download resumes them.
+        self._closed = True
+        if wait:
+            with self._lock:
+                futures = list(self._futures.values())
+            for future in futures:
+                future.result()
@@ -1,14 +1,15 @@
 import logging
-from huggingface_hub import HfFolder
-from ...config import HF_TOKEN
+from ...config import get_hf_token
 
 logger = logging.getLogger(__name__)
 
 
 def save_hf_token_globally() -> bool:
-    if HF_TOKEN:
+    hf_token = get_hf_token()
+    if hf_token:
         try:
-            HfFolder.save_token(HF_TOKEN)
+            from huggingface_hub import HfFolder
+            HfFolder.save_token(hf_token)
             print("HF token saved globally for CLI tools.")
             return True
         except Exception as e:
@@ -0,0 +1,15 @@
+from .stream import StreamingProcess, RotatingLogWriter, parse_progress, format_progress
+from .oom import OOM_MARKERS, lines_have_oom
+from .telemetry import TelemetrySampler, TELEMETRY_FILENAME, DEFAULT_TELEMETRY_INTERVAL_S
+
+__all__ = [
+    'StreamingProcess',
+    'RotatingLogWriter',
+    'parse_progress',
+    'format_progress',
+    'OOM_MARKERS',
+    'lines_have_oom',
+    'TelemetrySampler',
+    'TELEMETRY_FILENAME',
+    'DEFAULT_TELEMETRY_INTERVAL_S'
+]
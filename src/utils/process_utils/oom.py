@@ -0,0 +1,12 @@
+from typing import List
+
+OOM_MARKERS = (
+    "CUDA out of memory",
+    "OutOfMemoryError",
+    "CUBLAS_STATUS_ALLOC_FAILED",
+    "No available memory for the cache blocks",
+)
+
+
+def lines_have_oom(lines: List[str]) -> bool:
+    return any(marker in line for line in lines for marker in OOM_MARKERS)
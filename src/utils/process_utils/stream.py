@@ -0,0 +1,250 @@
+import collections
+import os
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, Any, List, Optional, Callable
+
+# Matches tqdm progress bars such as
+# "Greedy generation:  42%|████▏     | 57/135 [00:12<00:16,  4.77it/s]"
+_PROGRESS_RE = re.compile(
+    r"(?P<desc>[^\r\n|]*?):\s*(?P<percent>\d+)%\|[^|]*\|\s*(?P<n>\d+)/(?P<total>\d+)\s*"
+    r"\[(?P<elapsed>[\d:]+)<(?P<remaining>[\d:?]+)")
+
+# Lines longer than this are flushed without waiting for a newline, so a process
+# that never emits one cannot grow the read buffer without bound.
+_MAX_LINE_BYTES = 64 * 1024
+
+
+def parse_progress(line: str) -> Optional[Dict[str, Any]]:
+    match = _PROGRESS_RE.search(line)
+    if match is None:
+        return None
+    return {
+        "desc": match.group("desc").strip(),
+        "percent": int(match.group("percent")),
+        "n": int(match.group("n")),
+        "total": int(match.group("total")),
+        "elapsed": match.group("elapsed"),
+        "remaining": match.group("remaining"),
+    }
+
+
+def format_progress(progress: Dict[str, Any]) -> str:
+    return (f"[progress] {progress['desc'] or 'running'}: {progress['n']}/{progress['total']} "
+            f"({progress['percent']}%) elapsed {progress['elapsed']}, ETA {progress['remaining']}")
+
+
+class RotatingLogWriter:
+    def __init__(self, path: str, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 3):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._file = open(path, 'a', encoding='utf-8')
+        self._size = self._file.tell()
+
+    def _rotate(self) -> None:
+        self._file.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._size = 0
+
+    def write_line(self, line: str) -> None:
+        data = line + "\n"
+        if self._size + len(data) > self.max_bytes and self._size > 0:
+            self._rotate()
+        self._file.write(data)
+        self._file.flush()
+        self._size += len(data)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class StreamingProcess:
+    def __init__(self, command: List[str], log_dir: str, env: Optional[Dict[str, str]] = None,
+                 echo: bool = True, stall_timeout: float = 120.0, tail_lines: int = 200,
+                 log_max_bytes: int = 10 * 1024 * 1024, log_backup_count: int = 3,
+                 on_line: Optional[Callable[[str, str, float], None]] = None):
+        self.command = command
+        self.log_dir = log_dir
+        self.env = env
+        self.echo = echo
+        self.stall_timeout = stall_timeout
+        self.log_max_bytes = log_max_bytes
+        self.log_backup_count = log_backup_count
+        self.on_line = on_line
+        self.process: Optional[subprocess.Popen] = None
+        self.progress: Optional[Dict[str, Any]] = None
+        self.started_at: Optional[float] = None
+        self.last_output_at: Optional[float] = None
+        self._tails = {name: collections.deque(maxlen=tail_lines) for name in ("stdout", "stderr")}
+        self._threads: List[threading.Thread] = []
+        self._console_lock = threading.Lock()
+        self._progress_shown = False
+        self._last_progress_print = 0.0
+        self._stall_warned = False
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid if self.process else None
+
+    @property
+    def location(self) -> str:
+        # Where the command runs, for messages
+        return f"pid {self.pid}"
+
+    def start(self) -> None:
+        os.makedirs(self.log_dir, exist_ok=True)
+        # In its own process group (POSIX), so terminate() also reaches the workers it
+        # spawns (accelerate launchers, vLLM engine processes) rather than orphaning them
+        self.process = subprocess.Popen(
+            self.command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=self.env,
+            start_new_session=os.name == "posix")
+        self.started_at = self.last_output_at = time.monotonic()
+        for name, pipe in (("stdout", self.process.stdout), ("stderr", self.process.stderr)):
+            log = RotatingLogWriter(os.path.join(self.log_dir, f"{name}.log"),
+                                    self.log_max_bytes, self.log_backup_count)
+            thread = threading.Thread(
+                target=self._pump, args=(name, pipe, log), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _pump(self, name: str, pipe, log: RotatingLogWriter) -> None:
+        buffer = b""
+        try:
+            while True:
+                chunk = pipe.read1(65536)
+                if not chunk:
+                    break
+                buffer += chunk
+                # tqdm redraws with '\r', so treat it as a line break as well
+                parts = re.split(rb"\r\n|\r|\n", buffer)
+                buffer = parts.pop()
+                if len(buffer) > _MAX_LINE_BYTES:
+                    parts.append(buffer)
+                    buffer = b""
+                for part in parts:
+                    if part:
+                        self._handle_line(name, part.decode('utf-8', errors='replace'), log)
+            if buffer:
+                self._handle_line(name, buffer.decode('utf-8', errors='replace'), log)
+        finally:
+            log.close()
+            pipe.close()
+
+    def _handle_line(self, name: str, line: str, log: RotatingLogWriter) -> None:
+        now = time.monotonic()
+        self.last_output_at = now
+        self._stall_warned = False
+        log.write_line(line)
+        if self.on_line is not None:
+            self.on_line(name, line, now)
+
+        progress = parse_progress(line)
+        if progress is not None:
+            self.progress = progress
+            if self.echo:
+                self._show_progress(progress, now)
+            return
+
+        self._tails[name].append(line)
+        if self.echo:
+            with self._console_lock:
+                if self._progress_shown:
+                    sys.stdout.write("\n")
+                    self._progress_shown = False
+                target = sys.stderr if name == "stderr" else sys.stdout
+                target.write(line + "\n")
+                target.flush()
+
+    def _show_progress(self, progress: Dict[str, Any], now: float) -> None:
+        with self._console_lock:
+            if sys.stdout.isatty():
+                sys.stdout.write("\r\033[K" + format_progress(progress))
+                sys.stdout.flush()
+                self._progress_shown = True
+            elif now - self._last_progress_print >= 10 or progress["n"] == progress["total"]:
+                # Non-interactive output (CI logs, nohup): print a throttled status line
+                print(format_progress(progress), flush=True)
+                self._last_progress_print = now
+
+    def check_stall(self) -> Optional[float]:
+        # Returns the number of seconds without output once it exceeds stall_timeout
+        if self.last_output_at is None:
+            return None
+        silent_for = time.monotonic() - self.last_output_at
+        if silent_for < self.stall_timeout:
+            return None
+        if not self._stall_warned:
+            self._stall_warned = True
+            with self._console_lock:
+                print(f"\nWarning: no output from '{self.command[0]}' for {silent_for:.0f}s "
+                      f"({self.location}). The run may be stalled; see logs in {self.log_dir}.",
+                      flush=True)
+        return silent_for
+
+    def poll(self) -> Optional[int]:
+        returncode = self.process.poll()
+        if returncode is None:
+            self.check_stall()
+            return None
+        self._join_readers()
+        return returncode
+
+    def wait(self, poll_interval: float = 1.0) -> int:
+        # Blocks in Popen.wait rather than sleeping, so it returns as soon as the process
+        # exits; poll_interval only paces the stall check
+        while True:
+            returncode = self.poll()
+            if returncode is not None:
+                return returncode
+            try:
+                self.process.wait(timeout=poll_interval)
+            except subprocess.TimeoutExpired:
+                pass
+
+    def _stop(self, kill: bool = False) -> None:
+        # Signals the whole process group on POSIX; elsewhere only the direct child
+        if os.name == "posix":
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL if kill else signal.SIGTERM)
+                return
+            except ProcessLookupError:
+                pass
+        if kill:
+            self.process.kill()
+        else:
+            self.process.terminate()
+
+    def terminate(self, grace_period: float = 10.0) -> None:
+        if self.process is None or self.process.poll() is not None:
+            return
+        self._stop()
+        try:
+            self.process.wait(timeout=grace_period)
+        except subprocess.TimeoutExpired:
+            self._stop(kill=True)
+            self.process.wait()
+
+    def _join_readers(self) -> None:
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        with self._console_lock:
+            if self._progress_shown:
+                sys.stdout.write("\n")
+                self._progress_shown = False
+
+    def tail(self, name: str) -> List[str]:
+        return list(self._tails[name])
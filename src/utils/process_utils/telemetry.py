@@ -0,0 +1,179 @@
+import json
+import os
+import subprocess
+import threading
+import time
+import warnings
+from typing import Dict, Any, List, Optional
+
+TELEMETRY_FILENAME = "telemetry.json"
+DEFAULT_TELEMETRY_INTERVAL_S = 1.0
+
+_GPU_QUERY = "index,utilization.gpu,memory.used,memory.total"
+
+
+def _parse_number(value: str) -> Optional[float]:
+    # nvidia-smi reports unsupported fields as "[N/A]" or "[Not Supported]"
+    try:
+        return float(value.strip())
+    except ValueError:
+        return None
+
+
+def _summarize(values: List[Optional[float]]) -> Dict[str, Optional[float]]:
+    values = [v for v in values if v is not None]
+    if not values:
+        return {"mean": None, "peak": None}
+    return {"mean": round(sum(values) / len(values), 2), "peak": round(max(values), 2)}
+
+
+class TelemetrySampler:
+    # Samples GPU utilisation/memory and the child process tree's CPU/RSS while a run is
+    # alive. GPU samples come from one long-lived `nvidia-smi -lms` process rather than a
+    # spawn per sample; either source is skipped (and noted in the output) if unavailable.
+    def __init__(self, pid: int, output_dir: str, interval_s: float = DEFAULT_TELEMETRY_INTERVAL_S,
+                 gpu_indices: Optional[List[int]] = None):
+        self.pid = pid
+        self.output_path = os.path.join(output_dir, TELEMETRY_FILENAME)
+        self.interval_s = interval_s
+        self.gpu_indices = gpu_indices
+        self.gpu_samples: List[List[Any]] = []
+        self.process_samples: List[List[Any]] = []
+        self.notes: List[str] = []
+        self._started_at: Optional[float] = None
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._nvidia_smi: Optional[subprocess.Popen] = None
+
+    def start(self) -> None:
+        self._started_at = time.monotonic()
+        self._start_gpu_sampling()
+        thread = threading.Thread(target=self._sample_process, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _start_gpu_sampling(self) -> None:
+        command = ["nvidia-smi", f"--query-gpu={_GPU_QUERY}", "--format=csv,noheader,nounits",
+                   f"-lms={max(1, int(self.interval_s * 1000))}"]
+        if self.gpu_indices:
+            command.append(f"--id={','.join(str(i) for i in self.gpu_indices)}")
+        try:
+            self._nvidia_smi = subprocess.Popen(
+                command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, bufsize=1)
+        except (FileNotFoundError, OSError) as e:
+            self.notes.append(f"GPU sampling disabled: could not start nvidia-smi ({e}).")
+            return
+        thread = threading.Thread(target=self._read_gpu_samples, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _read_gpu_samples(self) -> None:
+        for line in self._nvidia_smi.stdout:
+            row = [field.strip() for field in line.split(",")]
+            if len(row) != 4:
+                continue
+            try:
+                index = int(row[0])
+            except ValueError:
+                continue
+            memory_used = _parse_number(row[2])
+            memory_total = _parse_number(row[3])
+            self.gpu_samples.append([
+                round(time.monotonic() - self._started_at, 3),
+                index,
+                _parse_number(row[1]),
+                round(memory_used / 1024, 3) if memory_used is not None else None,
+                round(memory_total / 1024, 3) if memory_total is not None else None,
+            ])
+        if self._nvidia_smi.poll() not in (None, 0) and not self.gpu_samples:
+            self.notes.append("GPU sampling disabled: nvidia-smi exited without producing samples.")
+
+    def _sample_process(self) -> None:
+        try:
+            import psutil
+        except ImportError:
+            self.notes.append("Process sampling disabled: psutil is not installed.")
+            return
+        try:
+            root = psutil.Process(self.pid)
+        except psutil.Error as e:
+            self.notes.append(f"Process sampling disabled: {e}")
+            return
+
+        known: Dict[int, Any] = {}
+        while not self._stop.is_set():
+            try:
+                processes = [root] + root.children(recursive=True)
+            except psutil.Error:
+                break  # the run has exited
+            cpu_percent = 0.0
+            rss_bytes = 0
+            for process in processes:
+                # cpu_percent needs the same Process object across calls to measure an interval
+                process = known.setdefault(process.pid, process)
+                try:
+                    cpu_percent += process.cpu_percent(interval=None)
+                    rss_bytes += process.memory_info().rss
+                except psutil.Error:
+                    continue
+            self.process_samples.append([
+                round(time.monotonic() - self._started_at, 3),
+                round(cpu_percent, 1),
+                round(rss_bytes / (1024**3), 3),
+            ])
+            self._stop.wait(self.interval_s)
+
+    def summary(self) -> Dict[str, Any]:
+        devices: Dict[str, Dict[str, Any]] = {}
+        for index in sorted({sample[1] for sample in self.gpu_samples}):
+            samples = [s for s in self.gpu_samples if s[1] == index]
+            devices[str(index)] = {
+                "utilization_pct": _summarize([s[2] for s in samples]),
+                "memory_used_gb": _summarize([s[3] for s in samples]),
+                "memory_total_gb": samples[-1][4],
+                "num_samples": len(samples),
+            }
+        # The first psutil reading of each process is always 0% CPU, so it is left out
+        cpu_samples = self.process_samples[1:]
+        return {
+            "gpu": devices,
+            "process": {
+                "cpu_percent": _summarize([s[1] for s in cpu_samples]),
+                "rss_gb": _summarize([s[2] for s in self.process_samples]),
+                "num_samples": len(self.process_samples),
+            },
+        }
+
+    def stop(self) -> Optional[str]:
+        # Stops sampling and writes telemetry.json; returns its path
+        if self._started_at is None:
+            return None
+        self._stop.set()
+        if self._nvidia_smi is not None and self._nvidia_smi.poll() is None:
+            self._nvidia_smi.terminate()
+            try:
+                self._nvidia_smi.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._nvidia_smi.kill()
+        for thread in self._threads:
+            thread.join(timeout=5)
+
+        telemetry = {
+            "pid": self.pid,
+            "interval_s": self.interval_s,
+            "duration_s": round(time.monotonic() - self._started_at, 2),
+            "summary": self.summary(),
+            "notes": self.notes,
+            "gpu_sample_fields": ["t_s", "index", "utilization_pct", "memory_used_gb", "memory_total_gb"],
+            "gpu_samples": self.gpu_samples,
+            "process_sample_fields": ["t_s", "cpu_percent", "rss_gb"],
+            "process_samples": self.process_samples,
+        }
+        try:
+            os.makedirs(os.path.dirname(self.output_path), exist_ok=True)
+            with open(self.output_path, 'w') as f:
+                json.dump(telemetry, f)
+        except OSError as e:
+            warnings.warn(f"Could not write telemetry to {self.output_path}: {e}")
+            return None
+        return self.output_path
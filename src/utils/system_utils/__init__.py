@@ -1,10 +1,16 @@
 from .system_info import get_system_info, display_system_info
-from .backend import recommend_backend
+from .backend import (recommend_backend, recommend_run_config, estimate_weights_gb, estimate_memory_needed_gb,
+                      predict_memory_fit, fit_quantization)
 from .nvidia import _run_nvidia_smi
 
 __all__ = [
     'get_system_info',
     'display_system_info',
     'recommend_backend',
+    'recommend_run_config',
+    'estimate_weights_gb',
+    'estimate_memory_needed_gb',
+    'predict_memory_fit',
+    'fit_quantization',
     '_run_nvidia_smi'
 ]
@@ -1,33 +1,224 @@
-from typing import Dict, Any
-
-
-def recommend_backend(system_info: Dict[str, Any]) -> str:
-    if system_info.get('gpu_available', False) and system_info.get('gpu_devices'):
-        # Use total memory of the first GPU for the heuristic
-        first_gpu = system_info['gpu_devices'][0]
-        first_gpu_mem_gb = first_gpu.get('memory_total_gb', 0)
-
-        if isinstance(first_gpu_mem_gb, (int, float)):
-            if first_gpu_mem_gb >= 20:
-                print("Recommendation: Sufficient total GPU memory detected.")
-                recommended = "vllm"  # VLLM is often faster for large batches/throughput if memory allows
-            elif first_gpu_mem_gb >= 10:
-                print("Recommendation: Moderate total GPU memory detected.")
-                recommended = "accelerate"
-            else:
-                print("Recommendation: Limited total GPU memory detected.")
-                recommended = "accelerate"  # Accelerate might handle lower memory better
-        else:
-            print("Recommendation: Could not determine numeric GPU memory.")
-            recommended = "accelerate"
-
-        # Show free memory if available
-        if system_info.get('gpu_source') == 'nvidia-smi':
-            first_gpu_free_mem = first_gpu.get('memory_free_gb', 'N/A')
-            print(
-                f"  -> Note: Currently free memory on GPU 0 is approx. {first_gpu_free_mem} GB.")
-
-        return recommended
+import statistics
+from typing import Dict, Any, List, Optional, Tuple
+
+from ...config import DTYPE_BYTES, QUANTIZATION_BYTES
+from ...results import RunHistory
+from ..hf_utils import get_model_parameter_count
+
+# Headroom on top of the weights for activations, KV cache and CUDA context
+WEIGHTS_OVERHEAD_FACTOR = 1.2
+WEIGHTS_OVERHEAD_GB = 1.0
+# vLLM preallocates this fraction of one GPU (lighteval runs it without tensor parallelism)
+VLLM_GPU_MEMORY_UTILIZATION = 0.9
+# Past runs of models within this factor of the parameter count are comparable
+SIMILAR_MODEL_SIZE_FACTOR = 1.5
+# Quantization modes 'auto' tries in turn, least compressed first
+QUANTIZATION_FALLBACKS = {
+    "accelerate": ["none", "bnb-8bit", "bnb-4bit"],
+}
+
+
+def _usable_memory_gb(gpu: Dict[str, Any]) -> Optional[float]:
+    free = gpu.get('memory_free_gb')
+    if isinstance(free, (int, float)):
+        return free
+    total = gpu.get('memory_total_gb')
+    return total if isinstance(total, (int, float)) else None
+
+
+def _threshold_recommendation(system_info: Dict[str, Any]) -> Dict[str, Any]:
+    # Original heuristic on the first GPU's total memory, used when the model size is unknown
+    first_gpu_mem_gb = system_info['gpu_devices'][0].get('memory_total_gb')
+    if isinstance(first_gpu_mem_gb, (int, float)):
+        if first_gpu_mem_gb >= 20:
+            # VLLM is often faster for large batches/throughput if memory allows
+            return {"backend": "vllm", "reason": "Sufficient total GPU memory detected."}
+        elif first_gpu_mem_gb >= 10:
+            return {"backend": "accelerate", "reason": "Moderate total GPU memory detected."}
+        # Accelerate might handle lower memory better
+        return {"backend": "accelerate", "reason": "Limited total GPU memory detected."}
+    return {"backend": "accelerate", "reason": "Could not determine numeric GPU memory."}
+
+
+def estimate_weights_gb(num_params: Optional[int], dtype: str = "auto", quantization: str = "none",
+                        checkpoint_bytes: Optional[int] = None) -> Optional[float]:
+    # Checkpoints quantized ahead of time load about as stored; everything else from the
+    # parameter count at the dtype's (or the quantization's) bytes per parameter
+    if quantization in ("awq", "gptq") and checkpoint_bytes:
+        return checkpoint_bytes / (1024**3)
+    if not num_params:
+        return None
+    return num_params * QUANTIZATION_BYTES.get(quantization, DTYPE_BYTES.get(dtype, 2)) / (1024**3)
+
+
+def estimate_memory_needed_gb(num_params: Optional[int], dtype: str = "auto", quantization: str = "none",
+                              checkpoint_bytes: Optional[int] = None) -> Optional[float]:
+    # GPU memory a run needs: its weights plus activation/KV headroom
+    weights_gb = estimate_weights_gb(num_params, dtype, quantization, checkpoint_bytes)
+    if weights_gb is None:
+        return None
+    return weights_gb * WEIGHTS_OVERHEAD_FACTOR + WEIGHTS_OVERHEAD_GB
+
+
+def predict_memory_fit(system_info: Dict[str, Any], backend: str, num_params: Optional[int],
+                       dtype: str = "auto", quantization: str = "none",
+                       checkpoint_bytes: Optional[int] = None) -> Dict[str, Any]:
+    # Whether a run's weights (plus activation/KV headroom) fit this machine's GPUs: one GPU
+    # for vLLM, all of them for accelerate, which shards models across devices. Returns
+    # {"fits": True/False/None, "weights_gb", "needed_gb", "usable_gb", "reason"}; fits is
+    # None when there is nothing to judge by.
+    fit = {"fits": None, "weights_gb": None, "needed_gb": None, "usable_gb": None}
+    if backend == "endpoint":
+        return dict(fit, reason="The model is served elsewhere.")
+    weights_gb = estimate_weights_gb(num_params, dtype, quantization, checkpoint_bytes)
+    if weights_gb is None:
+        return dict(fit, reason="The model's parameter count is unknown.")
+    fit["weights_gb"] = round(weights_gb, 2)
+    fit["needed_gb"] = round(estimate_memory_needed_gb(num_params, dtype, quantization, checkpoint_bytes), 2)
+    memory = []
+    if system_info.get('gpu_available') and system_info.get('gpu_devices'):
+        memory = [m for m in (_usable_memory_gb(gpu) for gpu in system_info['gpu_devices']) if m is not None]
+    if not memory:
+        return dict(fit, reason="No GPU memory information.")
+
+    if backend == "vllm":
+        usable_gb, where = max(memory) * VLLM_GPU_MEMORY_UTILIZATION, "one GPU"
     else:
-        print("Recommendation: No compatible GPU detected or issue obtaining GPU info.")
-        return "accelerate"
+        usable_gb, where = sum(memory), f"{len(memory)} GPU(s)"
+    fit["usable_gb"] = round(usable_gb, 2)
+    fit["fits"] = fit["needed_gb"] <= usable_gb
+    label = quantization if quantization != "none" else "unquantized"
+    verdict = "fits" if fit["fits"] else "does not fit"
+    fit["reason"] = (f"~{weights_gb:.1f} GB of {label} weights, ~{fit['needed_gb']:.1f} GB needed; "
+                     f"{verdict} in {usable_gb:.1f} GB usable on {where}.")
+    return fit
+
+
+def fit_quantization(system_info: Dict[str, Any], backend: str, num_params: Optional[int],
+                     dtype: str = "auto") -> Tuple[str, Dict[str, Any]]:
+    # The least compressed quantization mode predicted to fit, or the most compressed one
+    # (with its failing prediction) when none does
+    modes = QUANTIZATION_FALLBACKS.get(backend, ["none"])
+    for mode in modes:
+        fit = predict_memory_fit(system_info, backend, num_params, dtype=dtype, quantization=mode)
+        if fit["fits"] is not False:
+            return mode, fit
+    return modes[-1], fit
+
+
+def _memory_recommendation(system_info: Dict[str, Any], num_params: int,
+                           dtype: Optional[str]) -> Optional[Dict[str, Any]]:
+    # None when the GPUs report no memory figures to compare against
+    dtype = dtype or "auto"
+    weights_gb = estimate_weights_gb(num_params, dtype)
+    needed_gb = estimate_memory_needed_gb(num_params, dtype)
+    memory = [m for m in (_usable_memory_gb(gpu) for gpu in system_info['gpu_devices']) if m is not None]
+    if not memory:
+        return None
+
+    largest_gb = max(memory)
+    combined_gb = sum(memory)
+    size = f"~{weights_gb:.1f} GB of {dtype} weights"
+    if needed_gb <= largest_gb * VLLM_GPU_MEMORY_UTILIZATION:
+        return {"backend": "vllm", "dtype": dtype,
+                "reason": f"Model ({size}) fits on one GPU ({largest_gb:.1f} GB usable); vLLM is usually fastest."}
+    if needed_gb <= combined_gb:
+        return {"backend": "accelerate", "dtype": dtype, "batch_size": "auto",
+                "reason": f"Model ({size}) needs to be sharded across {len(memory)} GPU(s) "
+                          f"({combined_gb:.1f} GB usable in total); accelerate can split it."}
+    return {"backend": "accelerate", "dtype": dtype, "batch_size": 1,
+            "reason": f"Model ({size}) likely does not fit in GPU memory ({combined_gb:.1f} GB usable); "
+                      f"accelerate can offload to CPU but will be slow."}
+
+
+def _comparable_runs(history: List[Dict[str, Any]], system_info: Dict[str, Any],
+                     model_id: Optional[str], num_params: Optional[int]) -> List[Dict[str, Any]]:
+    gpus = system_info['gpu_devices']
+    gpu_name = gpus[0].get('name')
+    # Runs on fewer GPUs of the same model (e.g. sweep jobs pinned to one device) still apply
+    same_hardware = [r for r in history
+                     if r.get('gpu_name') == gpu_name and 0 < (r.get('gpu_count') or 0) <= len(gpus)]
+
+    # Runs of the same model are the best evidence; otherwise use models of similar size
+    same_model = [r for r in same_hardware if model_id and r.get('model_id') == model_id]
+    if same_model:
+        return same_model
+    if not num_params:
+        return []
+    return [r for r in same_hardware if r.get('num_params')
+            and 1 / SIMILAR_MODEL_SIZE_FACTOR <= r['num_params'] / num_params <= SIMILAR_MODEL_SIZE_FACTOR]
+
+
+def _history_recommendation(runs: List[Dict[str, Any]], dtype: Optional[str]) -> Optional[Dict[str, Any]]:
+    configs: Dict[tuple, Dict[str, Any]] = {}
+    for run in runs:
+        if dtype and run.get('dtype') != dtype:
+            continue
+        # Quantized runs trade accuracy for memory; they are not suggested as the default
+        if run.get('quantization', 'none') != 'none':
+            continue
+        key = (run.get('backend'), run.get('dtype'), run.get('batch_size'))
+        config = configs.setdefault(key, {"throughputs": [], "oom": False})
+        if run.get('oom'):
+            config["oom"] = True
+        elif run.get('success') and isinstance(run.get('samples_per_s'), (int, float)):
+            config["throughputs"].append(run['samples_per_s'])
+
+    # Configurations that ever ran out of memory here are not recommended again
+    scored = [(statistics.median(c["throughputs"]), key, len(c["throughputs"]))
+              for key, c in configs.items() if c["throughputs"] and not c["oom"]]
+    if not scored:
+        return None
+    samples_per_s, (backend, best_dtype, batch_size), num_runs = max(scored, key=lambda s: s[0])
+    return {"backend": backend, "dtype": best_dtype, "batch_size": batch_size,
+            "reason": f"Fastest configuration in {len(runs)} comparable past run(s) on this hardware: "
+                      f"{samples_per_s:.2f} samples/s (median of {num_runs})."}
+
+
+def recommend_run_config(system_info: Dict[str, Any], model_id: Optional[str] = None,
+                         num_params: Optional[int] = None, dtype: Optional[str] = None,
+                         history: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    # Returns {"backend", "dtype", "batch_size", "source", "reason"}. Tries, in order: past
+    # runs on the same hardware, a memory estimate from the parameter count, and the GPU
+    # memory thresholds. dtype/batch_size are None when there is nothing to suggest.
+    if not (system_info.get('gpu_available', False) and system_info.get('gpu_devices')):
+        recommendation = {"backend": "accelerate", "source": "no_gpu",
+                          "reason": "No compatible GPU detected or issue obtaining GPU info."}
+    else:
+        if history is None:
+            history = RunHistory().records()
+        recommendation = None
+        runs = _comparable_runs(history, system_info, model_id, num_params)
+        if runs:
+            recommendation = _history_recommendation(runs, dtype)
+            if recommendation is not None:
+                recommendation["source"] = "history"
+        if recommendation is None and num_params:
+            recommendation = _memory_recommendation(system_info, num_params, dtype)
+            if recommendation is not None:
+                recommendation["source"] = "memory_estimate"
+        if recommendation is None:
+            recommendation = _threshold_recommendation(system_info)
+            recommendation["source"] = "gpu_memory_threshold"
+
+    recommendation.setdefault("dtype", None)
+    recommendation.setdefault("batch_size", None)
+    return recommendation
+
+
+def recommend_backend(system_info: Dict[str, Any], model_id: Optional[str] = None,
+                      num_params: Optional[int] = None, dtype: Optional[str] = None) -> str:
+    if model_id and num_params is None and system_info.get('gpu_devices'):
+        num_params = get_model_parameter_count(model_id)
+    recommendation = recommend_run_config(system_info, model_id=model_id, num_params=num_params, dtype=dtype)
+    print(f"Recommendation: {recommendation['reason']}")
+    details = [f"{key}={recommendation[key]}" for key in ("dtype", "batch_size") if recommendation[key] is not None]
+    if details:
+        print(f"  -> Suggested settings for {recommendation['backend']}: {', '.join(details)}")
+
+    # Show free memory if available
+    if system_info.get('gpu_source') == 'nvidia-smi' and system_info.get('gpu_devices'):
+        first_gpu_free_mem = system_info['gpu_devices'][0].get('memory_free_gb', 'N/A')
+        print(
+            f"  -> Note: Currently free memory on GPU 0 is approx. {first_gpu_free_mem} GB.")
+    return recommendation["backend"]
@@ -10,7 +10,7 @@ def _run_nvidia_smi() -> Optional[List[Dict[str, Any]]]:
     try:
         command = [
             "nvidia-smi",
-            "--query-gpu=index,name,memory.total,memory.used,memory.free",
+            "--query-gpu=index,name,uuid,driver_version,memory.total,memory.used,memory.free",
             "--format=csv,noheader,nounits"
         ]
         result = subprocess.run(
@@ -19,17 +19,21 @@ def _run_nvidia_smi() -> Optional[List[Dict[str, Any]]]:
         reader = csv.reader(csvfile)
 
         for row in reader:
-            if len(row) == 5:
+            if len(row) == 7:
                 try:
                     index = int(row[0].strip())
                     name = row[1].strip()
-                    total_mem_mib = int(row[2].strip())
-                    used_mem_mib = int(row[3].strip())
-                    free_mem_mib = int(row[4].strip())
+                    uuid = row[2].strip()
+                    driver_version = row[3].strip()
+                    total_mem_mib = int(row[4].strip())
+                    used_mem_mib = int(row[5].strip())
+                    free_mem_mib = int(row[6].strip())
 
                     gpu_info_list.append({
                         "index": index,
                         "name": name,
+                        "uuid": uuid,
+                        "driver_version": driver_version,
                         "memory_total_gb": round(total_mem_mib / 1024, 2),
                         "memory_used_gb": round(used_mem_mib / 1024, 2),
                         "memory_free_gb": round(free_mem_mib / 1024, 2),
@@ -1,13 +1,85 @@
-import psutil
-import torch
+import json
+import os
 import platform
+import time
 import warnings
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
+from ...config import RESULTS_DIR
 from .nvidia import _run_nvidia_smi
 
+# torch and psutil are imported inside _probe_system_info: torch alone takes seconds to
+# import, and the probe result is cached on disk for SYSTEM_INFO_TTL_S.
+SYSTEM_INFO_CACHE_PATH = os.path.join(RESULTS_DIR, "system", "system_info.json")
+SYSTEM_INFO_TTL_S = 600
+
+
+def _torch_cuda_available() -> bool:
+    try:
+        import torch
+    except ImportError:
+        warnings.warn("PyTorch is not installed; GPU detection falls back to nvidia-smi only.")
+        return False
+    return torch.cuda.is_available()
+
+
+def _system_fingerprint(nvidia_smi_data: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    # A new driver or a different set of devices invalidates the cached probe
+    devices = None
+    if nvidia_smi_data is not None:
+        devices = [[gpu.get("uuid"), gpu.get("name"), gpu.get("driver_version")]
+                   for gpu in nvidia_smi_data]
+    return {"platform": platform.system(), "architecture": platform.machine(),
+            "node": platform.node(), "gpu_devices": devices}
+
+
+def _load_cached_info(fingerprint: Dict[str, Any], max_age_s: float) -> Optional[Dict[str, Any]]:
+    try:
+        with open(SYSTEM_INFO_CACHE_PATH, 'r') as f:
+            cached = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if cached.get("fingerprint") != fingerprint:
+        return None
+    if time.time() - cached.get("created_at", 0) > max_age_s:
+        return None
+    return cached.get("info")
+
+
+def _store_cached_info(fingerprint: Dict[str, Any], info: Dict[str, Any]) -> None:
+    try:
+        os.makedirs(os.path.dirname(SYSTEM_INFO_CACHE_PATH), exist_ok=True)
+        tmp_path = SYSTEM_INFO_CACHE_PATH + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"fingerprint": fingerprint, "created_at": time.time(), "info": info}, f, indent=2)
+        os.replace(tmp_path, SYSTEM_INFO_CACHE_PATH)
+    except OSError as e:
+        warnings.warn(f"Could not cache system info: {e}")
+
+
+def get_system_info(max_age_s: float = SYSTEM_INFO_TTL_S) -> Dict[str, Any]:
+    # nvidia-smi runs every time: it is cheap, keys the cache and keeps GPU memory
+    # figures current. max_age_s=0 forces a fresh probe.
+    nvidia_smi_data = None
+    if platform.system() in ["Linux", "Windows"]:
+        nvidia_smi_data = _run_nvidia_smi()
+    fingerprint = _system_fingerprint(nvidia_smi_data)
+
+    if max_age_s > 0:
+        info = _load_cached_info(fingerprint, max_age_s)
+        if info is not None:
+            if info.get('gpu_source') == "nvidia-smi":
+                info['gpu_devices'] = nvidia_smi_data
+            return info
+
+    info = _probe_system_info(nvidia_smi_data)
+    _store_cached_info(fingerprint, info)
+    return info
+
+
+def _probe_system_info(nvidia_smi_data: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    import psutil
 
-def get_system_info() -> Dict[str, Any]:
     info = {}
 
     # --- CPU ---
@@ -22,13 +94,12 @@ def get_system_info() -> Dict[str, Any]:
     info['ram_available_gb'] = round(svmem.available / (1024**3), 2)
 
     # --- GPU ---
-    info['gpu_available_torch'] = torch.cuda.is_available()
+    info['gpu_available_torch'] = _torch_cuda_available()
     info['gpu_devices'] = []
     info['gpu_driver_info'] = None
 
     # Prioritize nvidia-smi if platform is Linux/Windows and NVIDIA GPU expected
     if info['platform'] in ["Linux", "Windows"]:
-        nvidia_smi_data = _run_nvidia_smi()
         if nvidia_smi_data is not None:
             info['gpu_available'] = len(nvidia_smi_data) > 0
             info['gpu_count'] = len(nvidia_smi_data)
@@ -48,6 +119,7 @@ def get_system_info() -> Dict[str, Any]:
 
             if info['gpu_available']:
                 try:
+                    import torch
                     num_gpus = torch.cuda.device_count()
                     info['gpu_count'] = num_gpus
 
@@ -74,6 +146,7 @@ def get_system_info() -> Dict[str, Any]:
         info['gpu_available'] = info['gpu_available_torch']
 
         if info['gpu_available']:
+            import torch
             if torch.backends.mps.is_available():  # Check specifically for Apple Silicon MPS
                 info['gpu_count'] = 1  # Typically only one MPS device
                 info['gpu_devices'].append({
@@ -2,10 +2,17 @@ from .task_loader import load_tasks_from_yaml
 from .task_validator import validate_task
 from .task_discovery import get_available_task_suites
 from .task_interactive import get_task_details_interactive
+from .task_catalog import TaskCatalog, build_task_catalog, get_task_catalog
+from .task_prompts import load_task_prompts, load_prompts_file
 
 __all__ = [
     'load_tasks_from_yaml',
     'validate_task',
     'get_available_task_suites',
-    'get_task_details_interactive'
+    'get_task_details_interactive',
+    'TaskCatalog',
+    'build_task_catalog',
+    'get_task_catalog',
+    'load_task_prompts',
+    'load_prompts_file'
 ]
@@ -0,0 +1,142 @@
+import bisect
+import difflib
+import hashlib
+import os
+import pickle
+import warnings
+from typing import Dict, List, Optional
+
+from ...config import RESULTS_DIR
+from .task_loader import load_tasks_from_yaml, DEFAULT_TASKS_YAML
+
+# Bump when the pickled layout changes so stale caches are rebuilt
+CATALOG_FORMAT_VERSION = 1
+CATALOG_CACHE_PATH = os.path.join(RESULTS_DIR, "catalog", "task_catalog.pickle")
+
+
+class TaskCatalog:
+    def __init__(self, tasks: List[str]):
+        # Sorted list doubles as the prefix index: all tasks sharing a prefix are contiguous
+        self.tasks = sorted(set(tasks))
+        self.task_set = frozenset(self.tasks)
+        self.suites: Dict[str, List[str]] = {}
+        for task in self.tasks:
+            if '|' in task:
+                self.suites.setdefault(task.split('|')[0], []).append(task)
+        # Bare task names (without suite) for suggestions when the suite is missing or wrong
+        self._names: Dict[str, List[str]] = {}
+        for task in self.tasks:
+            self._names.setdefault(task.split('|', 1)[-1], []).append(task)
+
+    def __contains__(self, task: str) -> bool:
+        return task in self.task_set
+
+    def __len__(self) -> int:
+        return len(self.tasks)
+
+    def suite_names(self) -> List[str]:
+        return sorted(self.suites)
+
+    def suite_tasks(self, suite: str) -> List[str]:
+        return self.suites.get(suite, [])
+
+    def search_prefix(self, prefix: str, limit: Optional[int] = None) -> List[str]:
+        start = bisect.bisect_left(self.tasks, prefix)
+        matches = []
+        for task in self.tasks[start:]:
+            if not task.startswith(prefix):
+                break
+            matches.append(task)
+            if limit is not None and len(matches) >= limit:
+                break
+        return matches
+
+    def suggest(self, query: str, limit: int = 5, cutoff: float = 0.6) -> List[str]:
+        # "Did you mean" candidates: close full identifiers first, then tasks whose
+        # name matches regardless of suite
+        suggestions = difflib.get_close_matches(query, self.tasks, n=limit, cutoff=cutoff)
+        name = query.split('|', 1)[-1]
+        for close_name in difflib.get_close_matches(name, list(self._names), n=limit, cutoff=cutoff):
+            for task in self._names[close_name]:
+                if task not in suggestions:
+                    suggestions.append(task)
+        return suggestions[:limit]
+
+    def suggest_suite(self, query: str, limit: int = 3) -> List[str]:
+        return difflib.get_close_matches(query, self.suite_names(), n=limit, cutoff=0.5)
+
+
+def _file_sha256(filepath: str) -> str:
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_cache(cache_path: str) -> Optional[Dict]:
+    try:
+        with open(cache_path, 'rb') as f:
+            cached = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if not isinstance(cached, dict) or cached.get("version") != CATALOG_FORMAT_VERSION:
+        return None
+    return cached
+
+
+def _write_cache(cache_path: str, cached: Dict) -> None:
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(cached, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        warnings.warn(f"Could not write task catalog cache {cache_path}: {e}")
+
+
+def build_task_catalog(filepath: Optional[str] = None,
+                       cache_path: Optional[str] = None) -> TaskCatalog:
+    # The YAML is only parsed when it changed: an unchanged mtime/size reuses the cache
+    # directly, and a touched-but-identical file is recognised by its sha256.
+    filepath = filepath or DEFAULT_TASKS_YAML
+    cache_path = cache_path or CATALOG_CACHE_PATH
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return TaskCatalog(load_tasks_from_yaml(filepath))
+
+    cached = _read_cache(cache_path)
+    if cached is not None and cached["source"] == os.path.abspath(filepath):
+        if (cached["source_mtime_ns"], cached["source_size"]) == (stat.st_mtime_ns, stat.st_size):
+            return cached["catalog"]
+        source_sha256 = _file_sha256(filepath)
+        if cached["source_sha256"] == source_sha256:
+            cached.update(source_mtime_ns=stat.st_mtime_ns, source_size=stat.st_size)
+            _write_cache(cache_path, cached)
+            return cached["catalog"]
+    else:
+        source_sha256 = _file_sha256(filepath)
+
+    catalog = TaskCatalog(load_tasks_from_yaml(filepath))
+    if len(catalog):
+        _write_cache(cache_path, {
+            "version": CATALOG_FORMAT_VERSION,
+            "source": os.path.abspath(filepath),
+            "source_mtime_ns": stat.st_mtime_ns,
+            "source_size": stat.st_size,
+            "source_sha256": source_sha256,
+            "catalog": catalog,
+        })
+    return catalog
+
+
+_CATALOG: Optional[TaskCatalog] = None
+
+
+def get_task_catalog() -> TaskCatalog:
+    global _CATALOG
+    if _CATALOG is None:
+        _CATALOG = build_task_catalog()
+    return _CATALOG
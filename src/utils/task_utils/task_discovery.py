@@ -1,11 +1,6 @@
 from typing import List
-from ...config import get_supported_tasks
+from .task_catalog import get_task_catalog
 
 
 def get_available_task_suites() -> List[str]:
-    suites = set()
-    for task in get_supported_tasks():
-        if '|' in task:
-            suite = task.split('|')[0]
-            suites.add(suite)
-    return sorted(list(suites))
+    return get_task_catalog().suite_names()
@@ -1,11 +1,11 @@
 from typing import Optional, Dict, Any
 from .task_validator import validate_task
-from .task_discovery import get_available_task_suites
-from ...config import get_supported_tasks
+from .task_catalog import get_task_catalog
 
 
 def get_task_details_interactive() -> Optional[Dict[str, Any]]:
-    available_suites = get_available_task_suites()
+    catalog = get_task_catalog()
+    available_suites = catalog.suite_names()
 
     print("\n--- Task Selection ---")
     print(f"Available task suites: {', '.join(available_suites)}")
@@ -20,11 +20,13 @@ def get_task_details_interactive() -> Optional[Dict[str, Any]]:
         if task_suite not in available_suites:
             print(
                 f"Error: '{task_suite}' is not a valid task suite. Please choose from: {', '.join(available_suites)}")
+            close_suites = catalog.suggest_suite(task_suite)
+            if close_suites:
+                print(f"Did you mean: {', '.join(close_suites)}?")
             continue
         break
 
-    suite_tasks = [
-        t for t in get_supported_tasks() if t.startswith(f"{task_suite}|")]
+    suite_tasks = catalog.suite_tasks(task_suite)
 
     print(f"\nAvailable tasks for suite '{task_suite}':")
     # Show first 20 tasks to avoid overwhelming output
@@ -40,6 +42,20 @@ def get_task_details_interactive() -> Optional[Dict[str, Any]]:
             print("Task identifier cannot be empty.")
             continue
 
+        # A partial identifier that matches a handful of tasks lists them instead of failing
+        if task_input not in catalog:
+            prefix_matches = catalog.search_prefix(task_input, limit=21)
+            if len(prefix_matches) > 1:
+                print(f"'{task_input}' matches several tasks:")
+                for task in prefix_matches[:20]:
+                    print(f"  - {task}")
+                if len(prefix_matches) > 20:
+                    print("  ... (type more of the name to narrow it down)")
+                continue
+            if len(prefix_matches) == 1:
+                task_input = prefix_matches[0]
+                print(f"Completed to: {task_input}")
+
         if not validate_task(task_input):
             retry = input(
                 "Would you like to try a different task? (y/N): ").lower()
@@ -3,12 +3,13 @@ import yaml
 import os
 from typing import Set, Dict, Any
 
+# Default path relative to the project root
+DEFAULT_TASKS_YAML = os.path.join("src", "data", "lighteval_supported_tasks.yaml")
+
 
 def load_tasks_from_yaml(filepath=None) -> Set[str]:
     if filepath is None:
-        # Default path relative to the project root
-        filepath = os.path.join(
-            "src", "data", "lighteval_supported_tasks.yaml")
+        filepath = DEFAULT_TASKS_YAML
 
     try:
         with open(filepath, 'r') as f:
@@ -0,0 +1,41 @@
+import json
+import random
+from typing import Dict, Any, List, Optional
+
+
+def load_task_prompts(task_identifier: str, num_prompts: int, seed: int = 0,
+                      max_tokens: Optional[int] = None) -> List[Dict[str, Any]]:
+    # A seeded random sample of a lighteval task's evaluation documents, as zero-shot
+    # prompts: {"prompt", "max_tokens", "doc_index"}. max_tokens defaults to the task's own
+    # generation size (None for log-likelihood tasks). Downloads the task's dataset.
+    from lighteval.tasks.lighteval_task import LightevalTask
+    from lighteval.tasks.registry import Registry
+
+    task = Registry().get_task_dict([task_identifier])[task_identifier]
+    LightevalTask.load_datasets([task])
+    docs = task.eval_docs()
+    if not docs:
+        raise ValueError(f"Task '{task_identifier}' has no evaluation documents.")
+    indices = random.Random(seed).sample(range(len(docs)), min(num_prompts, len(docs)))
+    return [{"prompt": docs[i].query, "max_tokens": max_tokens or task.generation_size, "doc_index": i}
+            for i in indices]
+
+
+def load_prompts_file(path: str, max_tokens: Optional[int] = None) -> List[Dict[str, Any]]:
+    # JSONL with a "prompt" (and optionally "max_tokens") per line, or plain text with one
+    # prompt per line; for replaying recorded traffic, or for runs without the datasets
+    prompts = []
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line.strip():
+                continue
+            if line.lstrip().startswith("{"):
+                entry = json.loads(line)
+                prompts.append({"prompt": entry["prompt"],
+                                "max_tokens": max_tokens or entry.get("max_tokens")})
+            else:
+                prompts.append({"prompt": line, "max_tokens": max_tokens})
+    if not prompts:
+        raise ValueError(f"No prompts in {path}.")
+    return prompts
@@ -1,4 +1,5 @@
 from ...config import LIGHTEVAL_TASKS_URL, get_supported_tasks
+from .task_catalog import get_task_catalog
 
 
 def validate_task(task_name: str) -> bool:
@@ -9,5 +10,8 @@ def validate_task(task_name: str) -> bool:
         return True
 
     print(f"Error: Task '{task_name}' is not supported.")
+    suggestions = get_task_catalog().suggest(task_name)
+    if suggestions:
+        print(f"Did you mean: {', '.join(suggestions)}?")
     print(f"For a full list of tasks in lighteval, see: {LIGHTEVAL_TASKS_URL}")
     return False
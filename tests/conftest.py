@@ -0,0 +1,74 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+from helpers import REPO_ROOT, STUBS_DIR, free_port, write_executable
+
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # results/ and every cache are relative to the working directory, so each test gets its
+    # own; offline, with the stub lighteval (and anything the test puts in bin/) on PATH
+    from src.utils.hf_utils import hub_client
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("PATH", os.pathsep.join([str(bin_dir), STUBS_DIR, os.environ.get("PATH", "")]))
+    monkeypatch.setenv("HF_HUB_OFFLINE", "1")
+    monkeypatch.setenv("HF_HUB_CACHE", str(tmp_path / "hf_cache"))
+    monkeypatch.setenv("HF_TOKEN", "hf_test")
+    monkeypatch.setattr(hub_client, "_CLIENT", None)
+    return tmp_path
+
+
+@pytest.fixture
+def model_revision(workdir, monkeypatch):
+    # Offline, stub models have no revision and their runs skip the result cache; this one
+    # resolves every model to the same sha so runs are cached
+    sha = "abc123"
+    monkeypatch.setattr("src.frameworks.lighteval_runner.get_model_revision", lambda model_id, refresh=False: sha)
+    return sha
+
+
+@pytest.fixture
+def fake_nvidia_smi(workdir):
+    # Installs an nvidia-smi that reports the given free memory (MiB) per GPU
+    def install(free_mib):
+        rows = [f"{i}, Fake GPU, GPU-{i:04d}, 550.00, 16384, {16384 - free}, {free}"
+                for i, free in enumerate(free_mib)]
+        return write_executable(workdir / "bin" / "nvidia-smi", f"print({chr(10).join(rows)!r})\n")
+    return install
+
+
+@pytest.fixture
+def openai_server():
+    # Starts benchmarks/stubs/openai_server.py with the given options; returns its base URL
+    servers = []
+
+    def start(*options) -> str:
+        port = free_port()
+        server = subprocess.Popen([sys.executable, os.path.join(STUBS_DIR, "openai_server.py"),
+                                   "--port", str(port), *options],
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        servers.append(server)
+        deadline = time.monotonic() + 20
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+                return f"http://127.0.0.1:{port}/v1"
+            except OSError:
+                if server.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError(f"The stub OpenAI server did not start: {server.stderr.read()}")
+                time.sleep(0.05)
+
+    yield start
+    for server in servers:
+        server.terminate()
+        server.wait()
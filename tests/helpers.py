@@ -0,0 +1,29 @@
+import os
+import socket
+import stat
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUBS_DIR = os.path.join(REPO_ROOT, "benchmarks", "stubs")
+
+
+def write_executable(path, source: str) -> str:
+    with open(path, 'w') as f:
+        f.write(f"#!{sys.executable}\n{source}")
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return str(path)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def make_job(index: int, model_id: str = "stub/model", task: str = "helm|mmlu:anatomy", **fields):
+    from src.sweep.journal import compute_job_id
+    job = {"model_id": model_id, "task_identifier": f"{task}{index}" if index else task, "num_few_shot": 0,
+           "allow_truncation": 1, "backend": "accelerate", "dtype": "auto", "batch_size": 1}
+    job.update(fields)
+    job["job_id"] = compute_job_id(job)
+    return job
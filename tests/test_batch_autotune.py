@@ -0,0 +1,82 @@
+import pytest
+
+from helpers import make_job
+from src.frameworks.batch_autotune import (BatchSizeProbeError, make_lighteval_probe, search_batch_size)
+from src.frameworks.lighteval_runner import LightevalRunner
+from src.sweep.sweep_runner import _resolve_auto_batch_sizes
+
+TASK = {"task_identifier": "helm|mmlu:anatomy", "num_few_shot": 0, "allow_truncation": 1}
+
+
+def _fits_below(limit: int):
+    probed = []
+
+    def probe(batch_size: int) -> bool:
+        probed.append(batch_size)
+        return batch_size < limit
+    return probe, probed
+
+
+@pytest.mark.parametrize("start", [1, 4, 37, 100, 512])
+def test_search_finds_the_largest_fitting_batch(start):
+    probe, _ = _fits_below(38)
+    assert search_batch_size(probe, start=start) == 37
+
+
+def test_search_stops_at_the_maximum():
+    probe, probed = _fits_below(10_000)
+    assert search_batch_size(probe, start=8, max_batch_size=64) == 64
+    assert probed == [8, 16, 32, 64]
+
+
+def test_search_fails_when_nothing_fits():
+    probe, _ = _fits_below(1)
+    with pytest.raises(BatchSizeProbeError):
+        search_batch_size(probe, start=8)
+
+
+def test_probe_fills_the_batch_it_tests(workdir, monkeypatch):
+    # The stub runs out of memory once a batch of 24 samples is filled; probes with only
+    # 16 samples could never fill one
+    monkeypatch.setenv("LIGHTEVAL_STUB_OOM_BATCH_SIZE", "24")
+    probe = make_lighteval_probe(LightevalRunner("stub/model"), TASK, "accelerate")
+    assert probe(16)
+    assert not probe(32)
+    assert search_batch_size(probe, start=4) == 23
+
+
+def test_cached_auto_run_skips_autotune(workdir, fake_nvidia_smi, model_revision, monkeypatch):
+    fake_nvidia_smi([16000])
+    monkeypatch.setenv("LIGHTEVAL_STUB_OOM_BATCH_SIZE", "24")
+    runner = LightevalRunner("stub/model")
+    assert runner.run(dict(TASK), "accelerate", **{"override-batch-size": "auto"})
+    first_run = runner.last_output_dir
+
+    def no_autotune(*args, **kwargs):
+        raise AssertionError("autotune ran for a cached run")
+    monkeypatch.setattr(LightevalRunner, "autotune_batch_size", no_autotune)
+    runner = LightevalRunner("stub/model")
+    assert runner.run(dict(TASK), "accelerate", **{"override-batch-size": "auto"})
+    assert runner.last_output_dir == first_run
+
+
+def test_sweep_autotunes_only_uncached_jobs(workdir, fake_nvidia_smi, model_revision, monkeypatch):
+    fake_nvidia_smi([16000])
+    assert LightevalRunner("stub/model").run(dict(TASK), "accelerate", **{"override-batch-size": "auto"})
+
+    probed = []
+
+    def autotune(self, task_details, backend, **kwargs):
+        probed.append(task_details["task_identifier"])
+        return 8
+    monkeypatch.setattr(LightevalRunner, "autotune_batch_size", autotune)
+    jobs = [make_job(i, batch_size="auto") for i in range(3)]
+    _resolve_auto_batch_sizes(jobs)
+    # The cached job keeps the key it was stored under; the two misses share one probe
+    assert probed == ["helm|mmlu:anatomy1"]
+    assert [job["batch_size"] for job in jobs] == ["auto", 8, 8]
+
+    probed.clear()
+    jobs = [make_job(0, batch_size="auto")]
+    _resolve_auto_batch_sizes(jobs, force_rerun=True)
+    assert (probed, jobs[0]["batch_size"]) == (["helm|mmlu:anatomy"], 8)
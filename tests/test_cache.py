@@ -0,0 +1,84 @@
+import json
+import os
+import time
+
+from src.results import ResultCache
+from src.results.cache import compute_cache_key
+
+GROUPED_TASKS = ("helm|mmlu:anatomy|0|1", "helm|mmlu:astronomy|0|1")
+SINGLE_TASK = "helm|boolq|0|1"
+
+
+def _params(task: str) -> dict:
+    return {"framework": "lighteval", "model_id": "stub/model", "revision": "abc123", "task": task,
+            "num_few_shot": 0, "allow_truncation": 1, "backend": "accelerate", "dtype": "auto",
+            "batch_size": 1}
+
+
+def _make_run(path, size: int) -> str:
+    results_dir = path / "results" / "stub" / "model"
+    results_dir.mkdir(parents=True)
+    (results_dir / "results_2026-01-01T00-00-00.json").write_text("{}")
+    (path / "payload.bin").write_bytes(b"x" * size)
+    return str(path)
+
+
+def _populated_cache(tmp_path, grouped_size: int):
+    # One grouped run shared by two task entries, and a single-task run
+    cache = ResultCache(str(tmp_path / "cache"))
+    grouped = _make_run(tmp_path / "grouped", grouped_size)
+    for task in GROUPED_TASKS:
+        cache.store(_params(task), grouped)
+    single = _make_run(tmp_path / "single", 1024)
+    cache.store(_params(SINGLE_TASK), single)
+    return cache, grouped, single
+
+
+def _backdate(cache: ResultCache, days_by_task: dict) -> None:
+    for entry in cache.entries():
+        entry["created_at"] = time.time() - days_by_task[entry["params"]["task"]] * 86400
+        with open(cache._entry_path(entry["key"]), 'w') as f:
+            json.dump(entry, f)
+
+
+def test_shared_run_directory_counts_once(tmp_path):
+    cache, grouped, single = _populated_cache(tmp_path, 4096)
+    entries = cache.entries()
+    assert len(entries) == 3
+    assert cache.total_size_bytes(entries) == sum(
+        os.path.getsize(os.path.join(root, name)) for run in (grouped, single)
+        for root, _, files in os.walk(run) for name in files)
+
+
+def test_evicting_one_task_keeps_the_shared_run(tmp_path):
+    cache, grouped, _ = _populated_cache(tmp_path, 4096)
+    _backdate(cache, {GROUPED_TASKS[0]: 10, GROUPED_TASKS[1]: 0, SINGLE_TASK: 0})
+
+    evicted = cache.evict(max_age_days=5)
+    assert [e["params"]["task"] for e in evicted] == [GROUPED_TASKS[0]]
+    assert os.path.isdir(grouped)
+    assert cache.lookup(_params(GROUPED_TASKS[1])) is not None
+
+
+def test_size_budget_deletes_a_run_once_unreferenced(tmp_path):
+    cache, grouped, single = _populated_cache(tmp_path, 1 << 20)
+    _backdate(cache, {GROUPED_TASKS[0]: 3, GROUPED_TASKS[1]: 2, SINGLE_TASK: 1})
+
+    evicted = cache.evict(max_size_gb=0.5 / 1024)
+    assert sorted(e["params"]["task"] for e in evicted) == sorted(GROUPED_TASKS)
+    assert not os.path.exists(grouped)
+    assert os.path.isdir(single)
+    assert cache.lookup(_params(SINGLE_TASK)) is not None
+
+
+def test_entries_record_the_resolved_quantization(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    run = _make_run(tmp_path / "run", 16)
+    full = cache.store(_params(SINGLE_TASK), run)
+    quantized = cache.store(dict(_params(SINGLE_TASK), quantization="gptq"), run)
+    assert quantized["key"] != full["key"]
+    assert (quantized["quantization"], quantized["params"]["quantization"]) == ("gptq", "gptq")
+    assert full["quantization"] == "none" and "quantization" not in full["params"]
+    for entry in cache.entries():
+        assert compute_cache_key(entry["params"]) == entry["key"]
+    assert cache.lookup(dict(_params(SINGLE_TASK), quantization="gptq"))["quantization"] == "gptq"
@@ -0,0 +1,67 @@
+import json
+import os
+import subprocess
+import sys
+
+from helpers import REPO_ROOT
+from src.frameworks import LightevalRunner
+from src.results import compare_run_sets
+
+TASK = {"task_identifier": "helm|mmlu:anatomy", "num_few_shot": 0, "allow_truncation": 1}
+
+
+def _run(monkeypatch, model_id: str, acc: float, save_details: bool = True) -> str:
+    monkeypatch.setenv("LIGHTEVAL_STUB_ACC", str(acc))
+    runner = LightevalRunner(model_id)
+    assert runner.run(dict(TASK), "accelerate", save_details=save_details)
+    return runner.last_output_dir
+
+
+def _compare_command(*args) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, os.path.join(REPO_ROOT, "run_benchmark.py"), "compare", *args,
+                           "--bootstrap-samples", "2000"], capture_output=True, text=True)
+
+
+def test_paired_comparison_finds_a_regression(workdir, monkeypatch):
+    baseline = _run(monkeypatch, "stub/base", 0.9)
+    candidate = _run(monkeypatch, "stub/cand", 0.4)
+    report = compare_run_sets([baseline], [candidate], num_bootstrap=2000)
+    assert report["status"] == "compared"
+    assert report["unpaired"] == []
+    row = report["tasks"][0]
+    assert (row["task"], row["metric"], row["paired"]) == ("helm|mmlu:anatomy|0", "acc", 64)
+    assert row["status"] == "regressed"
+    assert report["regressions"] == ["helm|mmlu:anatomy|0"]
+
+    result = _compare_command("stub/base", "stub/cand")
+    assert result.returncode == 1, result.stdout + result.stderr
+    assert "REGRESSED" in result.stdout
+
+
+def test_runs_without_details_fall_back_to_reported_scores(workdir, monkeypatch):
+    baseline = _run(monkeypatch, "stub/base", 0.9)
+    candidate = _run(monkeypatch, "stub/cand", 0.4, save_details=False)
+    report = compare_run_sets([baseline], [candidate], num_bootstrap=2000)
+    assert (report["status"], report["tasks"], report["regressions"]) == ("no_per_sample_data", [], [])
+    assert report["only_in_baseline"] == report["only_in_candidate"] == []
+    row = report["unpaired"][0]
+    assert (row["task"], row["metric"], row["status"]) == ("helm|mmlu:anatomy|0", "acc", "no_per_sample_data")
+    assert row["delta"] < 0
+    assert "candidate saved no per-sample details" in row["reason"]
+
+    result = _compare_command("stub/base", "stub/cand", "--output", "compare.json")
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "No per-sample data" in result.stdout
+    with open(workdir / "compare.json", 'r') as f:
+        assert json.load(f)["status"] == "no_per_sample_data"
+
+
+def test_tasks_with_details_are_still_paired_next_to_ones_without(workdir, monkeypatch):
+    baseline = _run(monkeypatch, "stub/base", 0.5, save_details=False)
+    paired_baseline = _run(monkeypatch, "stub/base", 0.5)
+    candidate = _run(monkeypatch, "stub/cand", 0.5)
+    # The later baseline run, with details, covers the task
+    report = compare_run_sets([baseline, paired_baseline], [candidate], num_bootstrap=2000)
+    assert report["status"] == "compared"
+    assert [row["status"] for row in report["tasks"]] == ["unchanged"]
+    assert report["unpaired"] == []
@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+
+from helpers import REPO_ROOT
+from src.frameworks import LightevalRunner
+from src.results import analyze_details, find_details_files
+from src.sweep import spec as sweep_spec
+from src.sweep.spec import expand_sweep, job_runner_kwargs, job_task_details
+
+TASK = {"task_identifier": "helm|mmlu:anatomy", "num_few_shot": 0, "allow_truncation": 1}
+
+
+def _details_command(*args) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, os.path.join(REPO_ROOT, "run_benchmark.py"), "details", *args],
+                          capture_output=True, text=True)
+
+
+def test_details_of_a_normal_run(workdir):
+    runner = LightevalRunner("stub/model")
+    assert runner.run(dict(TASK), "accelerate")
+    report = analyze_details(runner.last_output_dir)
+    assert [row["task"] for row in report["tasks"]] == ["helm|mmlu:anatomy|0"]
+    assert report["tasks"][0]["n"] == 64
+
+    result = _details_command(runner.last_output_dir)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "helm|mmlu:anatomy|0" in result.stdout
+
+
+def test_details_of_a_run_without_them(workdir):
+    runner = LightevalRunner("stub/model")
+    assert runner.run(dict(TASK), "accelerate", save_details=False)
+    result = _details_command(runner.last_output_dir)
+    assert result.returncode == 1
+    assert "no per-sample details" in result.stdout
+
+
+def test_sweep_spec_can_turn_details_off(workdir, monkeypatch):
+    monkeypatch.setattr(sweep_spec, "get_supported_tasks", lambda: ["helm|mmlu:anatomy"])
+    spec = {"models": ["stub/model"], "tasks": ["helm|mmlu:anatomy"], "num_few_shot": 0}
+    job = expand_sweep(spec)[0]
+    job_off = expand_sweep(dict(spec, save_details=False))[0]
+    # Not part of the job's identity: the results are the same either way
+    assert job_off["job_id"] == job["job_id"]
+    assert "save_details" not in job_runner_kwargs(job)
+
+    runner = LightevalRunner(job_off["model_id"])
+    assert runner.run(job_task_details(job_off), job_off["backend"], **job_runner_kwargs(job_off))
+    assert not find_details_files(runner.last_output_dir)
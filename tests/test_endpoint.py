@@ -0,0 +1,47 @@
+import json
+import os
+
+from src.frameworks import LightevalRunner
+from src.utils.endpoint_utils import LATENCY_FILENAME
+
+TASK = {"task_identifier": "lighteval|gsm8k", "num_few_shot": 0, "allow_truncation": 1}
+
+
+def _read(run_output_dir: str, name: str) -> dict:
+    with open(os.path.join(run_output_dir, name), 'r') as f:
+        return json.load(f)
+
+
+def test_endpoint_run_retries_through_the_proxy(workdir, openai_server):
+    # Every third request fails with a 503; the proxy retries them all
+    base_url = openai_server("--latency-ms", "5", "--fail-every", "3")
+    runner = LightevalRunner("stub/served-model")
+    assert runner.run(dict(TASK), "endpoint", base_url=base_url, api_key="sk-test",
+                      concurrency=4, max_retries=3)
+
+    latency = _read(runner.last_output_dir, LATENCY_FILENAME)
+    assert latency["base_url"] == base_url
+    assert (latency["succeeded"], latency["failed"]) == (8, 0)
+    assert latency["retries"] >= 2
+    assert latency["latency_s"]["p50"] > 0
+
+    perf = _read(runner.last_output_dir, "perf.json")
+    # The server's usage counts: a one-token answer per request
+    assert perf["generated_tokens"] == 8
+    assert "Token counts are the endpoint's reported usage." in perf["notes"]
+
+
+def test_endpoint_runs_are_never_cached(workdir, openai_server, model_revision):
+    base_url = openai_server("--latency-ms", "1")
+    runner = LightevalRunner("stub/served-model")
+    output_dirs = []
+    for _ in range(2):
+        assert runner.run(dict(TASK), "endpoint", base_url=base_url, api_key="sk-test")
+        output_dirs.append(runner.last_output_dir)
+    assert output_dirs[0] != output_dirs[1]
+
+
+def test_endpoint_run_fails_when_the_server_does(workdir, openai_server):
+    base_url = openai_server("--latency-ms", "1", "--fail-every", "1")
+    runner = LightevalRunner("stub/served-model")
+    assert not runner.run(dict(TASK), "endpoint", base_url=base_url, api_key="sk-test", max_retries=1)
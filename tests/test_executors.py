@@ -0,0 +1,125 @@
+import os
+import sys
+
+import pytest
+
+from helpers import make_job
+from src.executors import LocalExecutor, RayExecutor, RemoteCommand, NODE_LOST_RETURNCODE, get_executor
+from src.frameworks import LightevalRunner
+from src.results import find_details_files
+from src.sweep.scheduler import GpuScheduler
+
+TASK = {"task_identifier": "helm|mmlu:anatomy", "num_few_shot": 0, "allow_truncation": 1}
+
+
+def _python(source: str) -> list:
+    return [sys.executable, "-c", source]
+
+
+def _log(log_dir, name: str = "stdout.log") -> str:
+    with open(os.path.join(log_dir, name), 'r') as f:
+        return f.read()
+
+
+@pytest.fixture(scope="module")
+def ray_executor():
+    # Ray's local mode runs the actors in this process, which is enough to exercise the
+    # staging round trip, log streaming and rescheduling without starting a cluster
+    executor = RayExecutor(local_mode=True, num_gpus_per_job=0)
+    yield executor
+    executor.shutdown()
+
+
+def test_unknown_executor():
+    with pytest.raises(ValueError, match="Unknown executor"):
+        get_executor("slurm")
+
+
+def test_local_executor_pins_the_device(tmp_path):
+    process = get_executor("local").submit(
+        _python("import os; print(os.environ.get('CUDA_VISIBLE_DEVICES'))"), str(tmp_path), echo=False, device=1)
+    assert process.wait(poll_interval=0.05) == 0
+    assert _log(tmp_path).strip() == "1"
+    assert LocalExecutor().capacity() is None
+
+
+def test_local_executor_reports_the_return_code(tmp_path):
+    process = LocalExecutor().submit(_python("import sys; print('oops', file=sys.stderr); sys.exit(3)"),
+                                     str(tmp_path), echo=False)
+    assert process.wait(poll_interval=0.05) == 3
+    assert process.tail("stderr") == ["oops"]
+
+
+def test_ray_job_outputs_land_in_the_local_staging_dir(tmp_path, ray_executor):
+    staging = tmp_path / "staging"
+    staging.mkdir()
+    (staging / "input.txt").write_text("from the driver")
+    # The command sees the staging directory by its driver path, rewritten to the actor's copy
+    command = _python("import os, sys; d = sys.argv[1]; "
+                      "open(os.path.join(d, 'output.txt'), 'w').write(open(os.path.join(d, 'input.txt')).read()); "
+                      "print('wrote', os.path.join(d, 'output.txt'))") + [str(staging)]
+    process = ray_executor.submit(command, str(staging), echo=False)
+    assert process.wait(poll_interval=0.05) == 0
+    assert (staging / "output.txt").read_text() == "from the driver"
+    assert f"wrote {staging / 'output.txt'}" in _log(staging)
+    assert process.node is not None
+
+
+def test_ray_job_failure_is_reported(tmp_path, ray_executor):
+    process = ray_executor.submit(_python("import sys; sys.exit(5)"), str(tmp_path), echo=False)
+    assert process.wait(poll_interval=0.05) == 5
+
+
+class _FlakyNode(RemoteCommand):
+    # The node of the first `losses` actors dies on the first read
+    losses = 0
+
+    def read(self, *args, **kwargs):
+        from ray.exceptions import RayActorError
+        if _FlakyNode.losses > 0:
+            _FlakyNode.losses -= 1
+            raise RayActorError()
+        return super().read(*args, **kwargs)
+
+
+@pytest.fixture
+def flaky_nodes(ray_executor, monkeypatch):
+    import ray
+    monkeypatch.setattr(ray_executor, "_actor_class", ray.remote(max_restarts=0, max_concurrency=2)(_FlakyNode))
+
+    def lose(count: int):
+        _FlakyNode.losses = count
+    yield lose
+    _FlakyNode.losses = 0
+
+
+def test_ray_job_is_rescheduled_when_its_node_dies(tmp_path, ray_executor, flaky_nodes):
+    flaky_nodes(1)
+    process = ray_executor.submit(_python("print('done')"), str(tmp_path), echo=False)
+    assert process.wait(poll_interval=0.05) == 0
+    assert process.node_failures == 1
+    assert "rescheduling the job" in _log(tmp_path, "stderr.log")
+    assert "done" in _log(tmp_path)
+
+
+def test_ray_job_gives_up_after_max_node_retries(tmp_path, ray_executor, flaky_nodes, monkeypatch):
+    monkeypatch.setattr(ray_executor, "max_node_retries", 1)
+    flaky_nodes(2)
+    process = ray_executor.submit(_python("print('done')"), str(tmp_path), echo=False)
+    assert process.wait(poll_interval=0.05) == NODE_LOST_RETURNCODE
+    assert "giving up after 1 reschedule(s)" in _log(tmp_path, "stderr.log")
+
+
+def test_lighteval_run_on_ray(workdir, ray_executor):
+    runner = LightevalRunner("stub/model", executor=ray_executor)
+    assert runner.run(dict(TASK), "accelerate")
+    assert os.path.exists(os.path.join(runner.last_output_dir, "perf.json"))
+    assert find_details_files(runner.last_output_dir)
+
+
+def test_scheduler_hands_jobs_to_ray(workdir, ray_executor):
+    records = GpuScheduler(poll_interval=0.05, telemetry_interval=0, executor=ray_executor).run(
+        [make_job(i) for i in range(2)])
+    assert all(record["success"] for record in records)
+    # Ray places the jobs, so the scheduler pins none to a local GPU
+    assert [record["device"] for record in records] == [None, None]
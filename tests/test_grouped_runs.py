@@ -0,0 +1,81 @@
+import json
+import os
+
+import pytest
+
+from helpers import make_job
+from src.frameworks import LightevalRunner
+from src.results import load_results_file, split_task_results, write_task_results
+from src.results.warehouse import _split_task_key
+from src.sweep.journal import SweepJournal
+from src.sweep.spec import job_task_details
+from src.sweep.sweep_runner import _run_grouped
+
+TASK = {"task_identifier": "helm|mmlu:anatomy", "num_few_shot": 5, "allow_truncation": 1}
+
+
+def _combined_results(separator: str) -> dict:
+    # A results file covering two tasks, keyed the way lighteval 0.8 (|) or older versions (:) key it
+    def key(task, *parts):
+        return separator.join(["helm", task, *parts])
+    return {
+        "config_general": {"model_name": "stub/model"},
+        "results": {key("mmlu:anatomy", "5"): {"acc": 0.5}, key("mmlu:astronomy", "5"): {"acc": 0.7},
+                    "all": {"acc": 0.6}},
+        "versions": {key("mmlu:anatomy", "5"): 0, key("mmlu:astronomy", "5"): 0},
+        "config_tasks": {key("mmlu:anatomy"): {"name": "mmlu:anatomy"}, key("mmlu:astronomy"): {}},
+    }
+
+
+@pytest.mark.parametrize("separator", ["|", ":"])
+def test_split_task_results_finds_either_key_form(separator):
+    split = split_task_results(_combined_results(separator), TASK)
+    assert split["results"]["all"] == {"acc": 0.5}
+    assert len(split["results"]) == 2
+    assert list(split["versions"]) == [key for key in _combined_results(separator)["versions"] if "anatomy" in key]
+    assert list(split["config_tasks"].values()) == [{"name": "mmlu:anatomy"}]
+    assert split_task_results(_combined_results(separator), dict(TASK, num_few_shot=0)) is None
+
+
+def test_write_task_results(tmp_path):
+    results_file = write_task_results(_combined_results("|"), TASK, str(tmp_path))
+    assert results_file == os.path.join(str(tmp_path), "tasks", "helm:mmlu:anatomy:5.json")
+    with open(results_file, 'r') as f:
+        assert json.load(f)["results"]["all"] == {"acc": 0.5}
+
+
+@pytest.mark.parametrize("task_key", ["helm|mmlu:anatomy|5", "helm:mmlu:anatomy:5"])
+def test_split_task_key(task_key):
+    assert _split_task_key(task_key) == ("helm", "mmlu:anatomy", 5)
+
+
+@pytest.mark.parametrize("task_key", ["all", "helm|mmlu:anatomy", "helm|mmlu|anatomy|5", "helm:mmlu"])
+def test_split_task_key_rejects_other_keys(task_key):
+    assert _split_task_key(task_key) is None
+
+
+def test_run_many_splits_packed_tasks_and_caches_each(workdir, model_revision):
+    tasks = [job_task_details(make_job(i)) for i in range(3)]
+    records = LightevalRunner("stub/model").run_many(tasks, "accelerate", group_size=2, telemetry_interval=0)
+    assert [record["success"] for record in records] == [True, True, True]
+    # Two lighteval invocations: the first two tasks share one run directory
+    assert records[0]["output_dir"] == records[1]["output_dir"] != records[2]["output_dir"]
+    for task, record in zip(tasks, records):
+        results = load_results_file(record["results_file"])
+        assert list(results["results"]) == [f"{task['task_identifier']}|0", "all"]
+
+    # Each task has a cache entry of its own, pointing at its split results file
+    for task, record in zip(tasks, records):
+        cached = LightevalRunner("stub/model").lookup_cached_run(task, "accelerate")
+        assert (cached["run_output_dir"], cached["results_file"]) == (record["output_dir"], record["results_file"])
+    again = LightevalRunner("stub/model").run_many(tasks[1:], "accelerate", group_size=2, telemetry_interval=0)
+    assert [record["results_file"] for record in again] == [record["results_file"] for record in records[1:]]
+
+
+def test_grouped_sweep_journals_every_packed_task(workdir, model_revision):
+    jobs = [make_job(i) for i in range(3)]
+    journal = SweepJournal(str(workdir / "journal.jsonl"))
+    records = _run_grouped(jobs, journal=journal, group_size=3, telemetry_interval=0)
+    assert all(record["success"] for record in records)
+    assert len({record["output_dir"] for record in records}) == 1
+    assert [state["state"] for state in journal.replay().values()] == ["done", "done", "done"]
@@ -0,0 +1,147 @@
+import json
+import struct
+import threading
+from types import SimpleNamespace
+
+import pytest
+from huggingface_hub.utils import RepositoryNotFoundError
+
+from src.utils.hf_utils import get_model_parameter_count, get_model_revision
+from src.utils.hf_utils.hub_client import HubClient
+
+
+class FakeHfApi:
+    # Stands in for huggingface_hub.HfApi: serves model_info from a dict and counts calls
+    def __init__(self, models, error=None):
+        self.models = models
+        self.error = error
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def model_info(self, model_id):
+        with self._lock:
+            self.calls.append(model_id)
+        if self.error is not None:
+            raise self.error
+        if model_id not in self.models:
+            raise RepositoryNotFoundError(f"{model_id} not found")
+        return self.models[model_id]
+
+
+def _hub_model(sha: str, num_params: int = 2_000_000_000, quant_method=None):
+    return SimpleNamespace(
+        sha=sha, siblings=[SimpleNamespace(rfilename=name) for name in ("model.safetensors", "config.json")],
+        safetensors=SimpleNamespace(total=num_params, parameters={"BF16": num_params}),
+        config={"quantization_config": {"quant_method": quant_method}} if quant_method else {},
+        private=False, gated=False)
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "hub" / "model_info.json")
+
+
+def test_lookup_fetches_once_then_serves_the_disk_cache(cache_path):
+    api = FakeHfApi({"google/gemma-2b": _hub_model("abc123")})
+    info = HubClient(cache_path=cache_path, offline=False, api=api).model_info("google/gemma-2b")
+    assert (info["status"], info["source"], info["sha"], info["num_params"]) == ("found", "hub", "abc123", 2_000_000_000)
+    assert info["siblings"] == ["config.json", "model.safetensors"]
+
+    again = HubClient(cache_path=cache_path, offline=False, api=api).model_info("google/gemma-2b")
+    assert (again["source"], again["sha"]) == ("disk_cache", "abc123")
+    assert api.calls == ["google/gemma-2b"]
+
+
+def test_missing_model_is_not_found(cache_path):
+    info = HubClient(cache_path=cache_path, offline=False, api=FakeHfApi({})).model_info("nobody/nothing")
+    assert info["status"] == "not_found"
+
+
+def test_quant_method_comes_from_the_config(cache_path):
+    api = FakeHfApi({"org/model-awq": _hub_model("q1", quant_method="AWQ")})
+    assert HubClient(cache_path=cache_path, offline=False, api=api).model_info("org/model-awq")["quant_method"] == "awq"
+
+
+def test_many_lookups_run_concurrently_without_duplicates(cache_path):
+    model_ids = [f"org/model-{i}" for i in range(20)]
+    api = FakeHfApi({model_id: _hub_model(f"sha{i}") for i, model_id in enumerate(model_ids)})
+    infos = HubClient(cache_path=cache_path, offline=False, api=api).model_infos(model_ids + model_ids[:5])
+    assert [infos[model_id]["sha"] for model_id in model_ids] == [f"sha{i}" for i in range(20)]
+    assert sorted(api.calls) == sorted(model_ids)
+    with open(cache_path, 'r') as f:
+        assert sorted(json.load(f)) == sorted(model_ids)
+
+
+def test_stale_entries_and_refresh_go_back_to_the_hub(cache_path):
+    api = FakeHfApi({"google/gemma-2b": _hub_model("abc123")})
+    HubClient(cache_path=cache_path, offline=False, api=api).model_info("google/gemma-2b")
+    api.models["google/gemma-2b"] = _hub_model("def456")
+    assert HubClient(cache_path=cache_path, offline=False, api=api).model_info("google/gemma-2b")["sha"] == "abc123"
+    assert HubClient(cache_path=cache_path, offline=False, api=api, ttl_s=0).model_info("google/gemma-2b")["sha"] == "def456"
+    client = HubClient(cache_path=cache_path, offline=False, api=api)
+    api.models["google/gemma-2b"] = _hub_model("fed789")
+    assert client.model_info("google/gemma-2b", refresh=True)["sha"] == "fed789"
+
+
+def test_unreachable_hub_falls_back_to_a_stale_entry(cache_path):
+    api = FakeHfApi({"google/gemma-2b": _hub_model("abc123")})
+    HubClient(cache_path=cache_path, offline=False, api=api).model_info("google/gemma-2b")
+    down = FakeHfApi({}, error=ConnectionError("Hub unreachable"))
+    client = HubClient(cache_path=cache_path, offline=False, api=down, ttl_s=0)
+    assert client.model_info("google/gemma-2b")["sha"] == "abc123"
+    info = client.model_info("google/other")
+    assert info["status"] == "error"
+    assert "Hub unreachable" in info["error"]
+
+
+def test_offline_uses_any_cached_entry_without_the_hub(cache_path):
+    HubClient(cache_path=cache_path, offline=False, api=FakeHfApi({"google/gemma-2b": _hub_model("abc123")})) \
+        .model_info("google/gemma-2b")
+    api = FakeHfApi({})
+    info = HubClient(cache_path=cache_path, offline=True, api=api, ttl_s=0).model_info("google/gemma-2b")
+    assert (info["status"], info["sha"]) == ("found", "abc123")
+    assert api.calls == []
+
+
+def _write_local_snapshot(hub_cache, model_id: str, sha: str, shapes) -> None:
+    # The huggingface_hub cache layout, with a safetensors file holding only its header
+    repo_dir = hub_cache / ("models--" + model_id.replace("/", "--"))
+    (repo_dir / "refs").mkdir(parents=True)
+    (repo_dir / "refs" / "main").write_text(sha)
+    snapshot = repo_dir / "snapshots" / sha
+    snapshot.mkdir(parents=True)
+    header = json.dumps({f"w{i}": {"dtype": "BF16", "shape": shape, "data_offsets": [0, 0]}
+                         for i, shape in enumerate(shapes)}).encode("utf-8")
+    (snapshot / "model.safetensors").write_bytes(struct.pack("<Q", len(header)) + header)
+    (snapshot / "config.json").write_text(json.dumps({"model_type": "gemma"}))
+
+
+def test_offline_resolves_models_from_the_local_hf_cache(workdir):
+    _write_local_snapshot(workdir / "hf_cache", "google/gemma-2b", "local999", [[256, 1024], [1024]])
+    assert get_model_revision("google/gemma-2b") == "local999"
+    assert get_model_parameter_count("google/gemma-2b") == 256 * 1024 + 1024
+    assert get_model_revision("google/not-downloaded") is None
+
+
+
+def test_cache_keys_use_the_current_sha(workdir, cache_path, monkeypatch):
+    from src.frameworks import LightevalRunner
+    from src.utils.hf_utils import hub_client
+    api = FakeHfApi({"google/gemma-2b": _hub_model("abc123")})
+    monkeypatch.setattr(hub_client, "_CLIENT", HubClient(cache_path=cache_path, offline=False, api=api))
+    assert get_model_revision("google/gemma-2b") == "abc123"
+    # A commit pushed within the metadata cache's TTL
+    api.models["google/gemma-2b"] = _hub_model("def456")
+    assert get_model_revision("google/gemma-2b") == "abc123"
+    task = {"task_identifier": "helm|mmlu:anatomy", "num_few_shot": 0, "allow_truncation": 1}
+    assert LightevalRunner("google/gemma-2b").cache_params(task, "accelerate")["revision"] == "def456"
+
+
+def test_offline_cache_keys_use_the_cached_sha(workdir, cache_path, monkeypatch):
+    from src.utils.hf_utils import hub_client
+    HubClient(cache_path=cache_path, offline=False, api=FakeHfApi({"google/gemma-2b": _hub_model("abc123")})) \
+        .model_info("google/gemma-2b")
+    api = FakeHfApi({})
+    monkeypatch.setattr(hub_client, "_CLIENT", HubClient(cache_path=cache_path, offline=True, api=api, ttl_s=0))
+    assert get_model_revision("google/gemma-2b", refresh=True) == "abc123"
+    assert api.calls == []
@@ -0,0 +1,120 @@
+import json
+import os
+import sys
+import types
+
+import pytest
+
+from helpers import make_job
+from src.frameworks import LightevalRunner, LightevalPythonRunner
+from src.results import ResultCache
+from src.sweep.journal import SweepJournal
+from src.sweep.sweep_runner import _run_in_process
+from src.sweep.spec import job_task_details
+
+
+@pytest.fixture
+def cached_job(workdir, model_revision):
+    # A job whose results the CLI runner (here the stub lighteval) already cached
+    job = make_job(0)
+    runner = LightevalRunner(job["model_id"])
+    assert runner.run(job_task_details(job), job["backend"], **{"override-batch-size": job["batch_size"]})
+    return job, runner.last_output_dir
+
+
+def test_in_process_sweep_uses_cached_results(cached_job, workdir):
+    job, output_dir = cached_job
+    journal = SweepJournal(str(workdir / "journal.jsonl"))
+    records = _run_in_process([job], journal=journal)
+    assert records[0]["success"]
+    assert records[0]["output_dir"] == output_dir
+    assert journal.replay()[job["job_id"]]["state"] == "done"
+
+
+@pytest.fixture
+def fake_pipeline(monkeypatch):
+    # Stands in for lighteval's Python API: each Pipeline built without a model loads one,
+    # and saving writes a results file the way lighteval lays it out
+    loaded = []
+
+    class Model:
+        def __init__(self, config):
+            self.config = config
+            self.cleaned_up = False
+            loaded.append(self)
+
+        def cleanup(self):
+            self.cleaned_up = True
+
+    class Pipeline:
+        def __init__(self, tasks, pipeline_parameters, evaluation_tracker, model_config=None, model=None):
+            self.tasks = tasks
+            self.output_dir = evaluation_tracker.output_dir
+            self.model = model if model is not None else Model(model_config)
+
+        def evaluate(self):
+            pass
+
+        def save_and_push_results(self):
+            suite, name, num_few_shot = self.tasks.split("|")[:3]
+            results_dir = os.path.join(self.output_dir, "results", self.model.config["pretrained"])
+            os.makedirs(results_dir)
+            with open(os.path.join(results_dir, "results_2025-01-01T00-00-00.json"), 'w') as f:
+                json.dump({"results": {f"{suite}|{name}|{num_few_shot}": {"acc": 0.5}}}, f)
+
+        def show_results(self):
+            pass
+
+    modules = {
+        "lighteval": {},
+        "lighteval.pipeline": {"Pipeline": Pipeline, "PipelineParameters": dict,
+                               "ParallelismManager": types.SimpleNamespace(ACCELERATE="accelerate", VLLM="vllm")},
+        "lighteval.logging": {},
+        "lighteval.logging.evaluation_tracker": {
+            "EvaluationTracker": lambda output_dir, save_details: types.SimpleNamespace(output_dir=output_dir)},
+        "lighteval.models": {},
+        "lighteval.models.transformers": {},
+        "lighteval.models.transformers.transformers_model": {"TransformersModelConfig": dict},
+    }
+    for name, attributes in modules.items():
+        module = types.ModuleType(name)
+        module.__dict__.update(attributes)
+        monkeypatch.setitem(sys.modules, name, module)
+    return loaded
+
+
+def test_in_process_sweep_loads_the_model_once(fake_pipeline, cached_job, workdir):
+    job, output_dir = cached_job
+    jobs = [job] + [make_job(i) for i in (1, 2)]
+    journal = SweepJournal(str(workdir / "journal.jsonl"))
+    records = _run_in_process(jobs, journal=journal, force_rerun=True, telemetry_interval=0)
+    assert [record["success"] for record in records] == [True, True, True]
+    # force_rerun evaluated the cached task again, into a run of its own
+    assert records[0]["output_dir"] != output_dir
+    assert len({record["output_dir"] for record in records}) == 3
+    assert all(state["state"] == "done" for state in journal.replay().values())
+
+    # One model, pinned to the cached revision, served all three tasks and was released after them
+    assert len(fake_pipeline) == 1
+    assert fake_pipeline[0].config == {"pretrained": "stub/model", "trust_remote_code": True, "revision": "abc123"}
+    assert fake_pipeline[0].cleaned_up
+
+
+def test_in_process_runs_cache_under_the_resolved_quantization(fake_pipeline, workdir, model_revision, monkeypatch):
+    # A GPTQ checkpoint asked for with 'auto' is evaluated, and cached, as gptq
+    monkeypatch.setattr(LightevalRunner, "checkpoint_quantization", lambda self: "gptq")
+    task = job_task_details(make_job(0))
+    runner = LightevalPythonRunner("stub/model")
+    records = runner.run_tasks([task], "accelerate", quantization="auto", telemetry_interval=0)
+    assert records[0]["success"]
+    cached = LightevalRunner("stub/model").lookup_cached_run(task, "accelerate", quantization="gptq")
+    assert cached["run_output_dir"] == records[0]["output_dir"]
+    assert ResultCache().lookup(LightevalRunner("stub/model").cache_params(task, "accelerate")) is None
+
+
+def test_in_process_rejects_an_unusable_quantization(fake_pipeline, workdir, model_revision, monkeypatch):
+    monkeypatch.setattr(LightevalRunner, "checkpoint_quantization", lambda self: "awq")
+    records = LightevalPythonRunner("stub/model").run_tasks([job_task_details(make_job(0))], "accelerate",
+                                                            quantization="gptq", telemetry_interval=0)
+    assert not records[0]["success"]
+    assert fake_pipeline == []
@@ -0,0 +1,46 @@
+import json
+import os
+
+from src.frameworks import LightevalRunner
+from src.results import find_details_files
+
+TASK = {"task_identifier": "helm|mmlu:anatomy", "num_few_shot": 0, "allow_truncation": 1}
+
+
+def _perf(run_output_dir: str) -> dict:
+    with open(os.path.join(run_output_dir, "perf.json"), 'r') as f:
+        return json.load(f)
+
+
+def test_cli_run_reports_token_counts(workdir):
+    runner = LightevalRunner("stub/model")
+    assert runner.run(dict(TASK), "accelerate")
+    assert find_details_files(runner.last_output_dir)
+    perf = _perf(runner.last_output_dir)
+    assert perf["num_samples"] == 64
+    assert perf["prompt_tokens"] > 0
+
+
+def test_run_without_details_says_why_tokens_are_missing(workdir):
+    runner = LightevalRunner("stub/model")
+    command, _ = runner.build_command(dict(TASK), "accelerate", save_details=False)
+    assert "--save-details" not in command
+    assert runner.run(dict(TASK), "accelerate", save_details=False)
+    assert not find_details_files(runner.last_output_dir)
+    perf = _perf(runner.last_output_dir)
+    # The results file still counts the samples
+    assert perf["num_samples"] == 64
+    assert perf["prompt_tokens"] is None
+    assert any("details" in note for note in perf["notes"])
+
+
+def test_model_is_pinned_to_the_cached_revision(workdir, model_revision):
+    runner = LightevalRunner("stub/model")
+    command, _ = runner.build_command(dict(TASK), "accelerate")
+    assert f"pretrained=stub/model,trust_remote_code=True,revision={model_revision}" in command
+    assert runner.cache_params(dict(TASK), "accelerate")["revision"] == model_revision
+
+
+def test_model_without_a_known_revision_is_not_pinned(workdir):
+    command, _ = LightevalRunner("stub/model").build_command(dict(TASK), "vllm")
+    assert "pretrained=stub/model,trust_remote_code=True,dtype=auto" in command
@@ -0,0 +1,67 @@
+import json
+import os
+
+from src.frameworks.load_test_runner import LoadTestRunner, LOADTEST_FILENAME, PROMPTS_FILENAME
+from src.utils.endpoint_utils import LoadGenerator
+
+PROMPTS = [{"prompt": f"Question {i}: what is {i} + {i}?", "max_tokens": None} for i in range(4)]
+
+
+def test_closed_loop_times_streamed_tokens(openai_server):
+    # 20 ms to the first token, then 5 tokens 10 ms apart
+    base_url = openai_server("--latency-ms", "20", "--token-ms", "10", "--output-tokens", "6")
+    steps = LoadGenerator(base_url, "stub/model", PROMPTS, step_duration_s=0.5).run("concurrency", [1, 4])
+    assert [step["concurrency"] for step in steps] == [1, 4]
+    for step in steps:
+        assert step["succeeded"] > 0
+        assert (step["failed"], step["dropped"]) == (0, 0)
+        assert step["output_tokens"] == 6 * step["succeeded"]
+        assert 0.015 <= step["ttft_s"]["p50"] < 0.2
+        assert 0.005 <= step["itl_s"]["p50"] < 0.1
+        assert step["latency_s"]["p50"] >= step["ttft_s"]["p50"]
+    # Four clients against a server without a batch limit get through more requests
+    assert steps[1]["throughput_rps"] > steps[0]["throughput_rps"]
+
+
+def test_chat_api_and_server_queueing(openai_server):
+    # The server serves one request at a time, so concurrent clients queue behind each other
+    base_url = openai_server("--latency-ms", "20", "--max-batch", "1")
+    steps = LoadGenerator(base_url, "stub/model", PROMPTS, api="chat", step_duration_s=0.4).run("concurrency", [1, 4])
+    assert all(step["succeeded"] and not step["failed"] for step in steps)
+    assert steps[1]["latency_s"]["p50"] > 2 * steps[0]["latency_s"]["p50"]
+
+
+def test_open_loop_counts_failures(openai_server):
+    base_url = openai_server("--latency-ms", "5", "--fail-every", "2")
+    step = LoadGenerator(base_url, "stub/model", PROMPTS, step_duration_s=0.5).run("rate", [40])[0]
+    assert step["rate_rps"] == 40
+    assert step["requests"] == step["succeeded"] + step["failed"]
+    assert step["succeeded"] and step["failed"]
+    assert step["errors"] == {"503": step["failed"]}
+
+
+def test_load_test_run_reports_the_sustained_throughput(workdir, openai_server):
+    base_url = openai_server("--latency-ms", "10", "--token-ms", "2", "--output-tokens", "4")
+    prompts_file = workdir / "prompts.txt"
+    prompts_file.write_text("\n".join(prompt["prompt"] for prompt in PROMPTS) + "\n")
+    runner = LoadTestRunner("stub/model")
+    report = runner.run_load_test(base_url, "concurrency", [1, 2], prompts_file=str(prompts_file),
+                                  step_duration_s=0.3, p99_slo_ms=5000)
+    assert report is not None
+    assert (report["prompt_source"], report["num_prompts"]) == ("prompts.txt", 4)
+    assert report["slo"]["met"]
+    assert report["slo"]["sustained_throughput_rps"] == max(step["throughput_rps"] for step in report["steps"])
+
+    with open(os.path.join(report["run_output_dir"], LOADTEST_FILENAME), 'r') as f:
+        assert json.load(f)["steps"] == report["steps"]
+    with open(os.path.join(report["run_output_dir"], PROMPTS_FILENAME), 'r') as f:
+        assert len(f.readlines()) == 4
+
+
+def test_unreachable_slo_is_not_met(workdir, openai_server):
+    base_url = openai_server("--latency-ms", "30")
+    prompts_file = workdir / "prompts.txt"
+    prompts_file.write_text("hello\n")
+    report = LoadTestRunner("stub/model").run_load_test(base_url, "concurrency", [2], prompts_file=str(prompts_file),
+                                                        step_duration_s=0.2, p99_slo_ms=1)
+    assert report["slo"] == {"p99_latency_ms": 1, "met": False, "sustained_throughput_rps": None, "step": None}
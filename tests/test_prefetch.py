@@ -0,0 +1,101 @@
+import hashlib
+import os
+import threading
+
+import pytest
+
+from src.utils.hf_utils import WeightPrefetcher
+
+MIB = 1024**2
+
+
+@pytest.fixture
+def downloads(workdir, monkeypatch):
+    # Online, with snapshot_download replaced: records each download, which fails while the
+    # model is in `failing` and otherwise waits for `release` to be set
+    import huggingface_hub
+    monkeypatch.setenv("HF_HUB_OFFLINE", "0")
+    calls = []
+    failing = set()
+    release = threading.Event()
+    release.set()
+
+    def snapshot_download(model_id, **kwargs):
+        calls.append(model_id)
+        release.wait(10)
+        if model_id in failing:
+            raise OSError(f"connection reset while fetching {model_id}")
+        return f"/hf_cache/{model_id}"
+    monkeypatch.setattr(huggingface_hub, "snapshot_download", snapshot_download)
+    return calls, failing, release
+
+
+def test_prefetch_upcoming_fetches_the_lookahead_window_once(downloads):
+    calls, _, release = downloads
+    release.clear()
+    prefetcher = WeightPrefetcher(lookahead=2)
+    prefetcher.prefetch_upcoming(["a", "b", "a", "c", "d"], running=["r", "r"])
+    # The running model and the next two distinct queued models, still in flight, are protected
+    assert prefetcher._protected == {"r", "a", "b"}
+    release.set()
+    assert all(prefetcher.wait(model_id, timeout=10) for model_id in ("r", "a", "b"))
+
+    # The sweep moved on to a: the window moves to c, and nothing already fetched is fetched again
+    prefetcher.prefetch_upcoming(["a", "b", "c", "d"], running=["a"])
+    assert prefetcher.wait("c", timeout=10)
+    assert sorted(calls) == ["a", "b", "c", "r"]
+    assert prefetcher._protected == {"a", "b", "c"}
+    assert not prefetcher.wait("d")
+
+
+def test_failed_download_is_retried(downloads):
+    calls, failing, _ = downloads
+    failing.add("a")
+    prefetcher = WeightPrefetcher()
+    prefetcher.prefetch("a")
+    assert not prefetcher.wait("a", timeout=10)
+    failing.clear()
+    prefetcher.prefetch("a")
+    assert prefetcher.wait("a", timeout=10)
+    prefetcher.prefetch("a")
+    assert calls == ["a", "a"]
+
+
+def test_offline_and_local_models_are_not_fetched(workdir, downloads, monkeypatch):
+    calls, _, _ = downloads
+    prefetcher = WeightPrefetcher()
+    local_model = workdir / "my-model"
+    local_model.mkdir()
+    assert prefetcher.prefetch(str(local_model)) is None
+    monkeypatch.setenv("HF_HUB_OFFLINE", "1")
+    prefetcher.prefetch_upcoming(["org/a"], running=["org/b"])
+    assert not prefetcher.wait("org/a")
+    assert calls == []
+
+
+def _cached_repo(cache_dir, repo_id: str, size: int, accessed: float) -> None:
+    # A model in the Hugging Face cache layout: one blob, linked from a snapshot of main
+    repo_dir = cache_dir / f"models--{repo_id.replace('/', '--')}"
+    commit = hashlib.sha1(repo_id.encode()).hexdigest()
+    (repo_dir / "blobs").mkdir(parents=True)
+    (repo_dir / "refs").mkdir()
+    (repo_dir / "snapshots" / commit).mkdir(parents=True)
+    blob = repo_dir / "blobs" / hashlib.sha256(repo_id.encode()).hexdigest()
+    blob.write_bytes(b"\0" * size)
+    os.utime(blob, (accessed, accessed))
+    (repo_dir / "refs" / "main").write_text(commit)
+    os.symlink(blob, repo_dir / "snapshots" / commit / "model.safetensors")
+
+
+def test_eviction_drops_the_least_recently_used_unprotected_models(workdir):
+    cache_dir = workdir / "hf_cache"
+    for age, repo_id in enumerate(["org/oldest", "org/older", "org/old", "org/recent"]):
+        _cached_repo(cache_dir, repo_id, MIB, accessed=1_000_000 + 1000 * age)
+    # Room for two models; the oldest one is about to run, so it is kept
+    prefetcher = WeightPrefetcher(cache_budget_gb=2.5 * MIB / 1024**3, cache_dir=str(cache_dir))
+    prefetcher._protected = {"org/oldest"}
+    assert prefetcher.evict() == ["org/older", "org/old"]
+    assert sorted(os.listdir(cache_dir)) == ["models--org--oldest", "models--org--recent"]
+    # Over budget with every remaining model in use: nothing more is evicted
+    prefetcher._protected = {"org/oldest", "org/recent"}
+    assert prefetcher.evict(budget_gb=0) == []
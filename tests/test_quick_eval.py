@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from src.frameworks import LightevalRunner
+from src.frameworks.quick_eval import warehouse_baseline
+from src.results import load_results
+
+TASKS = [{"task_identifier": f"helm|mmlu:{name}", "num_few_shot": 0, "allow_truncation": 1}
+         for name in ("anatomy", "astronomy")]
+ACC = 0.7
+
+
+@pytest.fixture
+def stub_acc(workdir, monkeypatch):
+    monkeypatch.setenv("LIGHTEVAL_STUB_ACC", str(ACC))
+    return ACC
+
+
+def _quick(**kwargs) -> dict:
+    return LightevalRunner("stub/model").run_quick([dict(task) for task in TASKS], "accelerate",
+                                                   skip_memory_check=True, telemetry_interval=0, **kwargs)
+
+
+def test_every_round_interval_contains_the_accuracy(stub_acc):
+    # The stub has 64 samples per task: rounds of 8, 16, 32 and 64 samples, then a round
+    # that finds nothing left to sample
+    record = _quick(initial_samples=8, target_half_width=0.0)
+    assert [r["max_samples"] for r in record["rounds"]] == [8, 16, 32, 64, 128]
+    for r in record["rounds"]:
+        estimate = r["estimate"]
+        assert estimate["ci_low"] <= stub_acc <= estimate["ci_high"]
+        assert estimate["n"] == 2 * min(r["max_samples"], 64)
+    # Intervals narrow as samples are added
+    widths = [r["estimate"]["ci_high"] - r["estimate"]["ci_low"] for r in record["rounds"][:4]]
+    assert widths == sorted(widths, reverse=True)
+    assert (record["verdict"], record["stop_reason"]) == ("estimated", "every task was evaluated in full")
+    assert record["ci_low"] <= stub_acc <= record["ci_high"]
+    assert record["samples_evaluated"] == 2 * (8 + 16 + 32 + 64 + 64)
+
+    # The last round evaluated everything, so its estimate is the macro average lighteval reports
+    results = load_results(record["rounds"][-1]["run_output_dir"])
+    task_scores = [metrics["acc"] for key, metrics in results["results"].items() if key != "all"]
+    assert record["score"] == pytest.approx(sum(task_scores) / len(task_scores))
+    with open(record["record_path"], 'r') as f:
+        assert json.load(f)["score"] == record["score"]
+
+
+def test_quick_run_stops_once_the_interval_decides(stub_acc):
+    record = _quick(initial_samples=16, baseline={"score": 0.2}, tolerance=0.05)
+    assert record["verdict"] == "better"
+    assert len(record["rounds"]) == 1
+    assert record["ci_low"] > 0.25
+
+    record = _quick(initial_samples=16, baseline={"score": stub_acc}, tolerance=0.3)
+    assert record["verdict"] == "equivalent"
+    assert record["ci_low"] <= stub_acc <= record["ci_high"]
+
+
+def test_sampled_runs_are_not_baselines(stub_acc):
+    _quick(initial_samples=8, target_half_width=1.0)
+    assert warehouse_baseline("stub/model", [task["task_identifier"] for task in TASKS], 0, "acc") is None
+    for task in TASKS:
+        assert LightevalRunner("stub/model").run(dict(task), "accelerate", telemetry_interval=0)
+    baseline = warehouse_baseline("stub/model", [task["task_identifier"] for task in TASKS], 0, "acc")
+    assert baseline["num_tasks"] == 2
+    assert abs(baseline["score"] - stub_acc) < 0.15
@@ -0,0 +1,90 @@
+from src.utils.system_utils import recommend_run_config
+
+GEMMA_2B = 2_500_000_000
+GEMMA_9B = 9_000_000_000
+GEMMA_27B = 27_000_000_000
+
+
+def _system(*gpus_gb, name: str = "NVIDIA A10G") -> dict:
+    gpus = [{"index": i, "name": name, "memory_total_gb": gb, "memory_free_gb": gb}
+            for i, gb in enumerate(gpus_gb)]
+    return {"gpu_available": bool(gpus), "gpu_devices": gpus}
+
+
+def _past_run(backend: str, batch_size, samples_per_s=None, oom: bool = False, **fields) -> dict:
+    run = {"model_id": "google/gemma-2b", "num_params": GEMMA_2B, "backend": backend, "dtype": "bfloat16",
+           "batch_size": batch_size, "quantization": "none", "gpu_name": "NVIDIA A10G", "gpu_count": 1,
+           "success": not oom, "oom": oom, "samples_per_s": samples_per_s}
+    run.update(fields)
+    return run
+
+
+def test_model_that_fits_one_gpu_gets_vllm():
+    recommendation = recommend_run_config(_system(24.0), num_params=GEMMA_2B, dtype="bfloat16", history=[])
+    assert recommendation["source"] == "memory_estimate"
+    assert recommendation["backend"] == "vllm"
+    assert recommendation["dtype"] == "bfloat16"
+
+
+def test_model_sharded_across_gpus_gets_accelerate():
+    recommendation = recommend_run_config(_system(16.0, 16.0), num_params=GEMMA_9B, dtype="bfloat16", history=[])
+    assert recommendation["source"] == "memory_estimate"
+    assert recommendation["backend"] == "accelerate"
+    assert recommendation["batch_size"] == "auto"
+    assert "2 GPU(s)" in recommendation["reason"]
+
+
+def test_model_too_large_for_all_gpus_gets_batch_size_one():
+    recommendation = recommend_run_config(_system(16.0, 16.0), num_params=GEMMA_27B, dtype="bfloat16", history=[])
+    assert recommendation["backend"] == "accelerate"
+    assert recommendation["batch_size"] == 1
+
+
+def test_cpu_only():
+    recommendation = recommend_run_config({"gpu_available": False, "gpu_devices": []}, num_params=GEMMA_2B)
+    assert recommendation == {"backend": "accelerate", "source": "no_gpu", "dtype": None, "batch_size": None,
+                              "reason": recommendation["reason"]}
+
+
+def test_gpu_flag_without_devices_counts_as_cpu_only():
+    assert recommend_run_config({"gpu_available": True}, num_params=GEMMA_2B)["source"] == "no_gpu"
+
+
+def test_unknown_model_size_falls_back_to_memory_thresholds():
+    assert recommend_run_config(_system(24.0), history=[])["backend"] == "vllm"
+    recommendation = recommend_run_config(_system(12.0), history=[])
+    assert recommendation["source"] == "gpu_memory_threshold"
+    assert recommendation["backend"] == "accelerate"
+
+
+def test_gpu_without_memory_figures_falls_back_to_thresholds():
+    system_info = {"gpu_available": True, "gpu_devices": [{"index": 0, "name": "Unknown GPU"}]}
+    recommendation = recommend_run_config(system_info, num_params=GEMMA_2B, history=[])
+    assert recommendation["source"] == "gpu_memory_threshold"
+    assert recommendation["backend"] == "accelerate"
+    assert "Could not determine" in recommendation["reason"]
+
+
+def test_history_prefers_the_fastest_config_that_never_ran_out_of_memory():
+    history = [
+        _past_run("accelerate", 8, samples_per_s=10.0),
+        _past_run("accelerate", 8, samples_per_s=12.0),
+        _past_run("accelerate", 32, samples_per_s=40.0),
+        _past_run("accelerate", 32, oom=True),
+        _past_run("vllm", None, samples_per_s=30.0),
+        # Other hardware and quantized runs say nothing about this configuration
+        _past_run("accelerate", 64, samples_per_s=99.0, gpu_name="NVIDIA H100"),
+        _past_run("accelerate", 16, samples_per_s=99.0, quantization="bnb-4bit"),
+    ]
+    recommendation = recommend_run_config(_system(24.0), model_id="google/gemma-2b", num_params=GEMMA_2B,
+                                          history=history)
+    assert recommendation["source"] == "history"
+    assert (recommendation["backend"], recommendation["batch_size"]) == ("vllm", None)
+
+
+def test_history_of_similar_sized_models_applies():
+    history = [_past_run("accelerate", 16, samples_per_s=20.0, model_id="other/model", num_params=3_000_000_000)]
+    recommendation = recommend_run_config(_system(24.0), model_id="google/gemma-2b", num_params=GEMMA_2B,
+                                          history=history)
+    assert recommendation["source"] == "history"
+    assert recommendation["batch_size"] == 16
@@ -0,0 +1,95 @@
+import json
+import os
+import shutil
+
+from src.frameworks import LightevalRunner
+from src.results.run_layout import RunLayout, RunIndex, read_manifest, run_id_from_dir, RUN_INDEX_FILENAME
+
+CONFIG = {"model_id": "stub/model", "backend": "accelerate", "tasks": ["helm|mmlu:anatomy|0|1"]}
+NAME_PARTS = ["stub/model", "helm|mmlu:anatomy|0|1", "accelerate"]
+TASK = {"task_identifier": "helm|mmlu:anatomy", "num_few_shot": 0, "allow_truncation": 1}
+
+
+def _write_results(directory: str) -> None:
+    results_dir = os.path.join(directory, "results", "stub", "model")
+    os.makedirs(results_dir)
+    with open(os.path.join(results_dir, "results_2025-01-01T00-00-00.json"), 'w') as f:
+        json.dump({"results": {"all": {"acc": 0.5}}}, f)
+
+
+def test_run_is_staged_then_committed_into_place(tmp_path):
+    layout = RunLayout(str(tmp_path / "runs"))
+    run_dir = layout.allocate(CONFIG, NAME_PARTS)
+    staging = layout.staging_dir(run_dir)
+    assert os.path.basename(run_dir).startswith("stub_model_helm_mmlu_anatomy_0_1_accelerate_")
+    assert not os.path.exists(run_dir)
+    assert read_manifest(staging)["status"] == "running"
+
+    _write_results(staging)
+    assert layout.commit(run_dir)
+    assert not os.path.exists(staging)
+    manifest = read_manifest(run_dir)
+    assert (manifest["status"], manifest["run_id"]) == ("complete", run_id_from_dir(run_dir))
+    assert manifest["results_file"] == os.path.join("results", "stub", "model", "results_2025-01-01T00-00-00.json")
+    assert os.listdir(str(tmp_path / "runs" / ".staging")) == []
+
+
+def test_failed_run_leaves_no_run_directory(tmp_path):
+    layout = RunLayout(str(tmp_path / "runs"))
+    run_dir = layout.allocate(CONFIG, NAME_PARTS)
+    staging = layout.staging_dir(run_dir)
+    _write_results(staging)
+    with open(os.path.join(staging, "stderr.log"), 'w') as f:
+        f.write("CUDA out of memory\n")
+
+    layout.abandon(run_dir, "lighteval exited with return code 1")
+    assert not os.path.exists(run_dir)
+    # The logs and the manifest saying why are kept; the partial results are not
+    assert sorted(os.listdir(staging)) == ["manifest.json", "stderr.log"]
+    manifest = read_manifest(staging)
+    assert (manifest["status"], manifest["error"]) == ("failed", "lighteval exited with return code 1")
+    assert layout.index.entries() == []
+
+
+def test_failed_lighteval_run_is_not_listed(workdir, monkeypatch):
+    monkeypatch.setenv("LIGHTEVAL_STUB_OOM_BATCH_SIZE", "1")
+    runner = LightevalRunner("stub/model")
+    assert not runner.run(dict(TASK), "accelerate", telemetry_interval=0)
+    runs_root = workdir / "results" / "lighteval"
+    assert [name for name in os.listdir(runs_root) if not name.startswith(".")] == []
+    assert not os.path.exists(runner.last_output_dir)
+    assert read_manifest(runner.run_staging_dir(runner.last_output_dir))["status"] == "failed"
+
+
+def test_index_lists_committed_runs(tmp_path):
+    runs_root = str(tmp_path / "runs")
+    layout = RunLayout(runs_root)
+    run_dirs = []
+    for model_id in ("org/a", "org/b"):
+        run_dir = layout.allocate(dict(CONFIG, model_id=model_id), [model_id])
+        _write_results(layout.staging_dir(run_dir))
+        assert layout.commit(run_dir)
+        run_dirs.append(run_dir)
+
+    with open(os.path.join(runs_root, RUN_INDEX_FILENAME), 'r') as f:
+        lines = [json.loads(line) for line in f]
+    assert [entry["model_id"] for entry in lines] == ["org/a", "org/b"]
+    assert [entry["name"] for entry in lines] == [os.path.basename(run_dir) for run_dir in run_dirs]
+    assert all(entry["quantization"] == "none" and entry["tasks"] == CONFIG["tasks"] for entry in lines)
+
+    # Runs are looked up by run ID, ID prefix or directory name
+    index = RunIndex(runs_root)
+    run_id = lines[1]["run_id"]
+    assert index.lookup(run_id)["model_id"] == "org/b"
+    assert index.lookup(run_id[:8])["run_id"] == run_id
+    assert index.lookup(os.path.basename(run_dirs[0]))["run_id"] == lines[0]["run_id"]
+
+    # A line still being written is left for the next read
+    with open(index.path, 'a') as f:
+        f.write('{"run_id": "torn"')
+    assert len(index.entries()) == 2
+
+    # Runs deleted by hand drop out of the index once it is rebuilt
+    shutil.rmtree(run_dirs[0])
+    assert index.rebuild() == 1
+    assert [entry["model_id"] for entry in index.entries()] == ["org/b"]
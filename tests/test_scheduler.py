@@ -0,0 +1,61 @@
+from helpers import make_job
+from src.frameworks import LightevalRunner
+from src.sweep.scheduler import GpuScheduler
+
+
+def test_launch_burst_spreads_over_gpus(workdir, fake_nvidia_smi, monkeypatch):
+    # One GPU reports slightly more free memory; the jobs still each get their own GPU
+    fake_nvidia_smi([16000, 16000, 16000, 16100])
+    monkeypatch.setenv("LIGHTEVAL_STUB_SLEEP_S", "0.5")
+    jobs = [make_job(i) for i in range(4)]
+    records = GpuScheduler(max_parallel=4, poll_interval=0.05, telemetry_interval=0).run(jobs)
+    assert all(record["success"] for record in records)
+    assert sorted(record["device"] for record in records) == [0, 1, 2, 3]
+
+
+def test_jobs_share_a_gpu_once_every_gpu_is_busy(workdir, fake_nvidia_smi, monkeypatch):
+    fake_nvidia_smi([16000, 16000])
+    monkeypatch.setenv("LIGHTEVAL_STUB_SLEEP_S", "0.3")
+    jobs = [make_job(i) for i in range(4)]
+    records = GpuScheduler(max_parallel=4, poll_interval=0.05, telemetry_interval=0).run(jobs)
+    assert all(record["success"] for record in records)
+    assert sorted(record["device"] for record in records) == [0, 0, 1, 1]
+
+
+def test_oom_retries_with_smaller_batch(workdir, fake_nvidia_smi, monkeypatch):
+    fake_nvidia_smi([16000, 16000])
+    monkeypatch.setenv("LIGHTEVAL_STUB_OOM_BATCH_SIZE", "8")
+    job = make_job(0, batch_size=16)
+    records = GpuScheduler(max_parallel=1, max_oom_retries=2, poll_interval=0.05, telemetry_interval=0).run([job])
+    assert records[0]["success"]
+    assert records[0]["job"]["batch_size"] == 4
+    assert records[0]["attempts"] == 3
+
+
+def test_runs_unpinned_without_gpus(workdir):
+    records = GpuScheduler(max_parallel=2, poll_interval=0.05, telemetry_interval=0).run([make_job(0)])
+    assert records[0]["success"]
+    assert records[0]["device"] is None
+
+
+def test_quantization_is_resolved_before_launch(workdir, monkeypatch):
+    monkeypatch.setattr(LightevalRunner, "checkpoint_quantization",
+                        lambda self: "awq" if self.model_id.endswith("-awq") else None)
+    jobs = [make_job(0, model_id="stub/model-awq"), make_job(1, quantization="auto"),
+            make_job(2, quantization="awq")]
+    records = GpuScheduler(max_parallel=2, poll_interval=0.05, telemetry_interval=0).run(jobs)
+    # An AWQ checkpoint runs as one, and 'auto' becomes a concrete mode
+    assert [record["success"] for record in records] == [True, True, False]
+    assert records[0]["job"]["quantization"] == "awq"
+    assert records[1]["job"]["quantization"] == "none"
+    # A mode the model cannot use fails the job without launching it
+    assert (records[2]["attempts"], records[2]["output_dir"]) == (0, None)
+
+
+def test_quantized_job_that_does_not_fit_is_not_launched(workdir, fake_nvidia_smi, monkeypatch):
+    fake_nvidia_smi([4000])
+    monkeypatch.setattr(LightevalRunner, "model_parameter_count", lambda self: 27_000_000_000)
+    records = GpuScheduler(max_parallel=1, poll_interval=0.05, telemetry_interval=0).run(
+        [make_job(0, quantization="bnb-4bit")])
+    assert not records[0]["success"]
+    assert records[0]["attempts"] == 0
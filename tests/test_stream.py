@@ -0,0 +1,42 @@
+import os
+import sys
+import time
+
+import pytest
+
+from src.utils.process_utils import StreamingProcess
+
+# Starts a grandchild that would outlive its parent, then waits
+SPAWNING_PARENT = """
+import subprocess, sys, time
+child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+print(child.pid, flush=True)
+time.sleep(60)
+"""
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    # A killed child of the (also killed) parent may linger as a zombie until reaped
+    with open(f"/proc/{pid}/stat") as f:
+        return f.read().split(")")[-1].split()[0] != "Z"
+
+
+@pytest.mark.skipif(os.name != "posix" or not os.path.isdir("/proc"), reason="needs POSIX process groups")
+def test_terminate_stops_the_whole_process_group(tmp_path):
+    process = StreamingProcess([sys.executable, "-c", SPAWNING_PARENT], str(tmp_path), echo=False)
+    process.start()
+    deadline = time.monotonic() + 10
+    while not process.tail("stdout") and time.monotonic() < deadline:
+        time.sleep(0.05)
+    grandchild = int(process.tail("stdout")[0])
+    assert _alive(grandchild)
+
+    process.terminate(grace_period=5)
+    deadline = time.monotonic() + 5
+    while _alive(grandchild) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not _alive(grandchild)
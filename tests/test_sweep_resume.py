@@ -0,0 +1,132 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import psutil
+import pytest
+
+from helpers import REPO_ROOT, make_job
+from src.sweep import spec as sweep_spec
+from src.sweep.journal import SweepJournal
+from src.sweep.sweep_runner import _plan_resume, run_sweep
+
+TASKS = ["helm|mmlu:anatomy", "helm|mmlu:astronomy"]
+SPEC = {"name": "resume", "models": ["stub/model"], "tasks": TASKS, "num_few_shot": 0}
+JOURNAL = os.path.join("results", "lighteval", "sweeps", "resume.journal.jsonl")
+
+# Runs the sweep in a child process that can be sent SIGTERM; the task catalog lives in
+# the repo, so the child gets the spec's tasks the way the tests patch them in
+_SWEEP_SCRIPT = f"""
+import sys
+sys.path.insert(0, {REPO_ROOT!r})
+from src.sweep import spec
+spec.get_supported_tasks = lambda: {TASKS!r}
+from src.sweep import run_sweep
+run_sweep(sys.argv[1], check_models=False, max_parallel=1, prefetch_lookahead=0, telemetry_interval=0)
+"""
+
+
+@pytest.fixture
+def spec_path(workdir, monkeypatch):
+    monkeypatch.setattr(sweep_spec, "get_supported_tasks", lambda: TASKS)
+    path = workdir / "resume.json"
+    path.write_text(json.dumps(SPEC))
+    return str(path)
+
+
+def _finished_run(workdir, name: str) -> str:
+    run_dir = workdir / name
+    run_dir.mkdir()
+    (run_dir / "results.json").write_text(json.dumps({"results": {}}))
+    return str(run_dir)
+
+
+def test_resume_reruns_only_unfinished_jobs(workdir):
+    jobs = [make_job(i) for i in range(6)]
+    journal = SweepJournal(str(workdir / "journal.jsonl"))
+    journal.record(jobs[0]["job_id"], "done", output_dir=_finished_run(workdir, "done"))
+    journal.record(jobs[1]["job_id"], "failed", output_dir=str(workdir / "failed"))
+    # Killed after lighteval wrote its results, and before
+    journal.record(jobs[2]["job_id"], "running", output_dir=_finished_run(workdir, "finished"))
+    journal.record(jobs[3]["job_id"], "running", output_dir=str(workdir / "partial"))
+    journal.record(jobs[4]["job_id"], "interrupted")
+    # jobs[5] never started
+
+    completed, remaining = _plan_resume(jobs, journal)
+    assert [record["job"]["job_id"] for record in completed] == [jobs[0]["job_id"], jobs[2]["job_id"]]
+    assert [job["job_id"] for job in remaining] == [jobs[i]["job_id"] for i in (1, 3, 4, 5)]
+    # The partial run goes back into its own directory; a failed one starts over
+    assert remaining[1]["output_dir"] == str(workdir / "partial")
+    assert "output_dir" not in remaining[0]
+    assert journal.replay()[jobs[2]["job_id"]]["state"] == "done"
+
+
+def test_journal_tolerates_a_torn_last_line(workdir):
+    journal = SweepJournal(str(workdir / "journal.jsonl"))
+    journal.record("a", "done", output_dir="runs/a")
+    journal.record("b", "running")
+    with open(journal.path, 'a') as f:
+        f.write('{"job_id": "b", "state": "do')
+    with pytest.warns(UserWarning, match="malformed line 3"):
+        states = journal.replay()
+    assert {job_id: state["state"] for job_id, state in states.items()} == {"a": "done", "b": "running"}
+
+
+def test_journal_keeps_the_last_output_dir_and_honours_resets(workdir):
+    journal = SweepJournal(str(workdir / "journal.jsonl"))
+    journal.record("a", "running", output_dir="runs/a")
+    journal.record("a", "interrupted")
+    assert journal.replay()["a"]["output_dir"] == "runs/a"
+    journal.start_fresh()
+    assert journal.replay() == {}
+
+
+def _wait_for(condition, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        value = condition()
+        if value:
+            return value
+        time.sleep(0.05)
+    raise AssertionError("timed out")
+
+
+def _journal_states(workdir) -> dict:
+    path = workdir / JOURNAL
+    if not path.exists():
+        return {}
+    return {job_id: state["state"] for job_id, state in SweepJournal(str(path)).replay().items()}
+
+
+def test_sigterm_interrupts_the_sweep_and_resume_finishes_it(workdir, spec_path):
+    env = dict(os.environ, LIGHTEVAL_STUB_SLEEP_S="60")
+    sweep = subprocess.Popen([sys.executable, "-c", _SWEEP_SCRIPT, spec_path], env=env,
+                             stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    try:
+        _wait_for(lambda: "running" in _journal_states(workdir).values())
+        lighteval = _wait_for(lambda: [child for child in psutil.Process(sweep.pid).children(recursive=True)
+                                       if "lighteval" in " ".join(child.cmdline())])[0]
+        process_group = os.getpgid(lighteval.pid)
+        sweep.send_signal(signal.SIGTERM)
+        output, _ = sweep.communicate(timeout=60)
+    finally:
+        if sweep.poll() is None:
+            sweep.kill()
+    assert sweep.returncode != 0
+    assert "Sweep interrupted" in output
+    assert sorted(_journal_states(workdir).values()) == ["interrupted", "queued"]
+    # lighteval ran in its own process group, which was stopped with the sweep
+    with pytest.raises(ProcessLookupError):
+        os.killpg(process_group, 0)
+
+    interrupted = [state for state in SweepJournal(str(workdir / JOURNAL)).replay().values()
+                   if state["state"] == "interrupted"][0]
+    assert run_sweep(spec_path, check_models=False, resume=True, max_parallel=1, prefetch_lookahead=0,
+                     telemetry_interval=0)
+    states = SweepJournal(str(workdir / JOURNAL)).replay()
+    assert [state["state"] for state in states.values()] == ["done", "done"]
+    # The interrupted job was re-run into the directory of its first attempt
+    assert states[interrupted["job_id"]]["output_dir"] == interrupted["output_dir"]
@@ -0,0 +1,82 @@
+import os
+
+import pytest
+
+from helpers import REPO_ROOT
+from src.utils.task_utils import TaskCatalog, build_task_catalog, task_catalog
+
+TASKS_YAML = """tasks:
+  helm:
+    - helm|mmlu:anatomy
+    - helm|mmlu:astronomy
+    - helm|boolq
+  leaderboard:
+    - leaderboard|mmlu:anatomy
+    - leaderboard|gsm8k
+"""
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    # Counts how often the catalog parses its YAML
+    calls = []
+    load = task_catalog.load_tasks_from_yaml
+
+    def counting_load(filepath):
+        calls.append(filepath)
+        return load(filepath)
+    monkeypatch.setattr(task_catalog, "load_tasks_from_yaml", counting_load)
+    return calls
+
+
+def test_catalog_cache_is_rebuilt_when_the_yaml_changes(tmp_path, parses):
+    tasks_yaml = tmp_path / "tasks.yaml"
+    tasks_yaml.write_text(TASKS_YAML)
+    cache_path = str(tmp_path / "catalog" / "task_catalog.pickle")
+    assert len(build_task_catalog(str(tasks_yaml), cache_path)) == 5
+    assert os.path.exists(cache_path)
+    assert len(build_task_catalog(str(tasks_yaml), cache_path)) == 5
+    assert len(parses) == 1
+
+    # Touched but identical: recognised by its sha256, not parsed again
+    stat = os.stat(tasks_yaml)
+    os.utime(tasks_yaml, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+    build_task_catalog(str(tasks_yaml), cache_path)
+    assert len(parses) == 1
+
+    tasks_yaml.write_text(TASKS_YAML + "    - leaderboard|arc:challenge\n")
+    os.utime(tasks_yaml, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000_000))
+    catalog = build_task_catalog(str(tasks_yaml), cache_path)
+    assert "leaderboard|arc:challenge" in catalog
+    assert len(parses) == 2
+    # The rebuilt cache is the one read next
+    assert "leaderboard|arc:challenge" in build_task_catalog(str(tasks_yaml), cache_path)
+    assert len(parses) == 2
+
+
+def test_corrupt_cache_is_rebuilt(tmp_path, parses):
+    tasks_yaml = tmp_path / "tasks.yaml"
+    tasks_yaml.write_text(TASKS_YAML)
+    cache_path = tmp_path / "task_catalog.pickle"
+    cache_path.write_bytes(b"not a pickle")
+    assert len(build_task_catalog(str(tasks_yaml), str(cache_path))) == 5
+    assert len(parses) == 1
+
+
+def test_prefix_search():
+    catalog = TaskCatalog(["helm|mmlu:astronomy", "helm|boolq", "helm|mmlu:anatomy", "helmet|x", "leaderboard|gsm8k"])
+    assert catalog.search_prefix("helm|mmlu:") == ["helm|mmlu:anatomy", "helm|mmlu:astronomy"]
+    assert catalog.search_prefix("helm|") == ["helm|boolq", "helm|mmlu:anatomy", "helm|mmlu:astronomy"]
+    assert catalog.search_prefix("helm|", limit=1) == ["helm|boolq"]
+    assert catalog.search_prefix("zzz") == []
+    assert catalog.suite_tasks("helm") == ["helm|boolq", "helm|mmlu:anatomy", "helm|mmlu:astronomy"]
+
+
+def test_typos_get_suggestions(tmp_path):
+    catalog = build_task_catalog(os.path.join(REPO_ROOT, "src", "data", "lighteval_supported_tasks.yaml"),
+                                 str(tmp_path / "task_catalog.pickle"))
+    assert catalog.suggest("leaderboard|gsm8kk")[0] == "leaderboard|gsm8k"
+    # The name matches even when the suite is wrong
+    assert "helm|mmlu:anatomy" in catalog.suggest("hlem|mmlu:anatomy")
+    assert catalog.suggest_suite("leaderbord") == ["leaderboard"]
+    assert catalog.suggest("completely unrelated words") == []
@@ -0,0 +1,56 @@
+import json
+import os
+import sys
+
+from helpers import STUBS_DIR, write_executable
+from src.frameworks import LightevalRunner
+from src.utils.process_utils import TELEMETRY_FILENAME
+
+TASK = {"task_identifier": "helm|mmlu:anatomy", "num_few_shot": 0, "allow_truncation": 1}
+
+# `nvidia-smi -lms` prints one 4-field row per GPU per interval; GPU 1 cannot report its
+# utilization. Snapshot queries (the memory check) get the 7-column rows they ask for.
+_LOOPING_NVIDIA_SMI = """
+import sys
+if any(arg.startswith("-lms") for arg in sys.argv):
+    for utilization, used in ((10, 4096), (90, 8192), (50, 6144)):
+        print(f"0, {utilization}, {used}, 16384")
+        print("1, [Not Supported], 1024, 8192")
+else:
+    print("0, Fake GPU, GPU-0000, 550.00, 16384, 4096, 12288")
+    print("1, Fake GPU, GPU-0001, 550.00, 8192, 1024, 7168")
+"""
+
+
+def _telemetry(runner: LightevalRunner) -> dict:
+    with open(os.path.join(runner.last_output_dir, TELEMETRY_FILENAME), 'r') as f:
+        return json.load(f)
+
+
+def test_gpu_samples_from_a_looping_nvidia_smi(workdir):
+    write_executable(workdir / "bin" / "nvidia-smi", _LOOPING_NVIDIA_SMI)
+    runner = LightevalRunner("stub/model")
+    assert runner.run(dict(TASK), "accelerate", telemetry_interval=0.05)
+    telemetry = _telemetry(runner)
+    assert telemetry["notes"] == []
+    assert telemetry["summary"]["gpu"] == {
+        "0": {"utilization_pct": {"mean": 50.0, "peak": 90.0}, "memory_used_gb": {"mean": 6.0, "peak": 8.0},
+              "memory_total_gb": 16.0, "num_samples": 3},
+        "1": {"utilization_pct": {"mean": None, "peak": None}, "memory_used_gb": {"mean": 1.0, "peak": 1.0},
+              "memory_total_gb": 8.0, "num_samples": 3},
+    }
+    assert [sample[1:] for sample in telemetry["gpu_samples"][:2]] == [[0, 10.0, 4.0, 16.0], [1, None, 1.0, 8.0]]
+
+
+def test_runs_without_nvidia_smi_have_no_gpu_telemetry(workdir, monkeypatch):
+    # Only the stub lighteval and the Python running it are on PATH
+    monkeypatch.setenv("PATH", os.pathsep.join([str(workdir / "bin"), STUBS_DIR, os.path.dirname(sys.executable)]))
+    monkeypatch.setenv("LIGHTEVAL_STUB_SLEEP_S", "0.3")
+    runner = LightevalRunner("stub/model")
+    assert runner.run(dict(TASK), "accelerate", telemetry_interval=0.05)
+    telemetry = _telemetry(runner)
+    assert telemetry["summary"]["gpu"] == {}
+    assert telemetry["gpu_samples"] == []
+    assert telemetry["notes"][0].startswith("GPU sampling disabled: could not start nvidia-smi")
+    # The lighteval process is still sampled
+    assert telemetry["summary"]["process"]["num_samples"] >= 1
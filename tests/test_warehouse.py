@@ -0,0 +1,39 @@
+from src.frameworks import LightevalRunner
+from src.results import ResultsWarehouse, leaderboard, find_regressions
+
+TASK = {"task_identifier": "helm|mmlu:anatomy", "num_few_shot": 0, "allow_truncation": 1}
+
+
+def _run(monkeypatch, acc: float, quant_method=None) -> None:
+    # A stub run of stub/model scoring about acc; quant_method makes its checkpoint read as
+    # quantized ahead of time, so the run is recorded with that mode
+    monkeypatch.setenv("LIGHTEVAL_STUB_ACC", str(acc))
+    monkeypatch.setattr(LightevalRunner, "checkpoint_quantization", lambda self: quant_method)
+    assert LightevalRunner("stub/model").run(dict(TASK), "accelerate", skip_memory_check=True)
+
+
+def test_ingests_in_quick_succession_keep_every_run(workdir, monkeypatch):
+    warehouse = ResultsWarehouse()
+    for acc in (0.9, 0.5, 0.7):
+        _run(monkeypatch, acc)
+        warehouse.ingest()
+    assert warehouse.query(columns=["run_id"], metric="acc").num_rows == 3
+
+
+def test_quantized_runs_are_their_own_series(workdir, monkeypatch):
+    _run(monkeypatch, 0.9)
+    _run(monkeypatch, 0.4, quant_method="awq")
+    warehouse = ResultsWarehouse()
+    warehouse.ingest()
+    # The AWQ run scoring lower than the full-precision one is not a regression
+    assert find_regressions(warehouse, metric="acc") == []
+
+    rows = leaderboard(warehouse, metric="acc")
+    assert [row["quantization"] for row in rows] == ["none", "awq"]
+    assert all(row["model_id"] == "stub/model" and row["num_tasks"] == 1 for row in rows)
+
+    _run(monkeypatch, 0.4)
+    warehouse.ingest()
+    regressions = find_regressions(warehouse, metric="acc")
+    assert [(row["quantization"], row["backend"]) for row in regressions] == [("none", "accelerate")]
+    assert regressions[0]["previous"] > regressions[0]["latest"]